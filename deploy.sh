@@ -26,6 +26,9 @@ package_lambdas() {
         "lambdas/resume_upload"
         "lambdas/resume_management"
         "lambdas/resume_parser"
+        "lambdas/resume_matcher"
+        "lambdas/job_requirement"
+        "lambdas/table_backup"
     )
     
     for lambda_dir in "${LAMBDA_DIRS[@]}"; do
@@ -34,6 +37,15 @@ package_lambdas() {
             cd "$lambda_dir"
             zip_name=$(basename "$lambda_dir").zip
             zip -r "$zip_name" . -x "*.zip" "*.pyc" "__pycache__/*" "*.git*"
+            # 第三方套件（例如 numpy）安裝到暫存目錄後再加入 zip，不污染原始碼目錄
+            if [ -s requirements.txt ] && grep -qv '^boto3' requirements.txt; then
+                build_dir=$(mktemp -d)
+                grep -v '^boto3' requirements.txt > "$build_dir/requirements.txt"
+                python3 -m pip install -r "$build_dir/requirements.txt" -t "$build_dir/python" \
+                    --platform manylinux2014_x86_64 --only-binary=:all: --python-version 3.11 --quiet
+                (cd "$build_dir/python" && zip -qr "$OLDPWD/$zip_name" . -x "*.pyc" "__pycache__/*")
+                rm -rf "$build_dir"
+            fi
             cd "$SCRIPT_DIR"
             echo "✅ $lambda_dir 打包完成"
         else
@@ -0,0 +1,103 @@
+"""
+職缺批次 API 的 DynamoDB 交易寫入
+
+transact_writes 以 TransactWriteItems 每 100 筆一組寫入（Put / Update 皆可）：
+
+- 交易被取消時依 CancellationReasons 找出條件不成立的項目，標記為失敗後把其餘項目重送
+- 交易衝突或節流則整組以指數退避（含隨機抖動）重送
+- companion 可為每一組附加一個額外項目（例如職缺統計的 ADD），由該組最後實際寫入的項目決定內容，
+  與該組同時成功或同時失敗；此時每組最多 99 筆
+
+回傳 {項目索引: 錯誤代碼}，沒有出現在結果中的項目代表寫入成功。
+"""
+import random
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+import boto3
+from botocore.exceptions import ClientError
+
+dynamodb = boto3.resource('dynamodb')
+
+TRANSACT_MAX_ITEMS = 100
+MAX_WRITE_ATTEMPTS = 8
+
+
+def backoff(attempt: int) -> None:
+    time.sleep(min(0.05 * (2 ** attempt), 5) * (0.5 + random.random()))
+
+
+def put_operation(table_name: str, item: Dict[str, Any],
+                  condition_expression: Optional[str] = None) -> Dict[str, Any]:
+    """建立 TransactWriteItems 的 Put 項目"""
+    put = {'TableName': table_name, 'Item': item}
+    if condition_expression:
+        put['ConditionExpression'] = condition_expression
+    return {'Put': put}
+
+
+def update_operation(table_name: str, key: Dict[str, Any], update_expression: str,
+                     condition_expression: Optional[str] = None,
+                     names: Optional[Dict[str, str]] = None,
+                     values: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """建立 TransactWriteItems 的 Update 項目（dynamodb.meta.client 會自動序列化 Python 值）"""
+    update = {
+        'TableName': table_name,
+        'Key': key,
+        'UpdateExpression': update_expression
+    }
+    if condition_expression:
+        update['ConditionExpression'] = condition_expression
+    if names:
+        update['ExpressionAttributeNames'] = names
+    if values:
+        update['ExpressionAttributeValues'] = values
+    return {'Update': update}
+
+
+def _transact_chunk(indexed_operations: List[tuple],
+                    companion: Optional[Callable[[List[int]], Optional[Dict[str, Any]]]]) -> Dict[int, str]:
+    failures: Dict[int, str] = {}
+    pending = list(indexed_operations)
+    for attempt in range(MAX_WRITE_ATTEMPTS):
+        if not pending:
+            return failures
+        transact_items = [operation for _, operation in pending]
+        extra = companion([index for index, _ in pending]) if companion else None
+        if extra:
+            transact_items.append(extra)
+        try:
+            dynamodb.meta.client.transact_write_items(TransactItems=transact_items)
+            return failures
+        except ClientError as e:
+            if e.response['Error']['Code'] != 'TransactionCanceledException':
+                if e.response['Error']['Code'] not in ('ThrottlingException', 'ProvisionedThroughputExceededException'):
+                    raise
+                backoff(attempt)
+                continue
+            reasons = e.response.get('CancellationReasons') or []
+            rejected = {position for position, reason in enumerate(reasons[:len(pending)])
+                        if reason.get('Code') == 'ConditionalCheckFailed'}
+            if rejected:
+                # 條件不成立的項目直接失敗，其餘項目不必等待即可重送
+                failures.update({pending[position][0]: 'ConditionalCheckFailed' for position in rejected})
+                pending = [entry for position, entry in enumerate(pending) if position not in rejected]
+            else:
+                backoff(attempt)
+    failures.update({index: 'TransactionConflict' for index, _ in pending})
+    return failures
+
+
+def transact_writes(operations: List[Dict[str, Any]],
+                    companion: Optional[Callable[[List[int]], Optional[Dict[str, Any]]]] = None) -> Dict[int, str]:
+    """
+    以 TransactWriteItems 分組寫入，回傳 {索引: 錯誤代碼}
+
+    :param companion: 依該組實際寫入的項目索引產生額外項目（回傳 None 代表不需要）
+    """
+    chunk_size = TRANSACT_MAX_ITEMS - 1 if companion else TRANSACT_MAX_ITEMS
+    indexed = list(enumerate(operations))
+    failures: Dict[int, str] = {}
+    for start in range(0, len(indexed), chunk_size):
+        failures.update(_transact_chunk(indexed[start:start + chunk_size], companion))
+    return failures
@@ -0,0 +1,333 @@
+"""
+公開職缺看板（求職者首頁）的靜態快照
+
+職缺建立、更新或刪除時（影響到開放中的職缺），職缺管理 Lambda 以非同步呼叫自己執行 publish，
+把所有 active 職缺預先分頁成 JSON 寫到 static-site bucket，首頁直接經由 CloudFront 讀取，
+不再呼叫 API Gateway / Lambda：
+
+- 範圍：全部（all）、每個團隊（team）、每種僱用類型（employment_type）
+- 每次發布產生新的 generation，頁面寫在 job-board/{generation}/ 下，內容不會再變動，
+  以長時間快取（immutable）
+- job-board/manifest.json 指向目前的 generation 與各範圍的頁面（含篩選選單的顯示名稱），快取時間很短，
+  因此職缺異動最多 MANIFEST_MAX_AGE 秒後就會出現在首頁
+- 保留前一個 generation，讓正在翻頁的使用者不會讀到不存在的頁面；更舊的 generation
+  在建立超過 GENERATION_GRACE_SECONDS 後才刪除，避免刪掉另一個發布剛寫好、尚未切換的頁面
+
+職缺連續異動時會有多個 publish 同時被觸發，以 background-task 表中的租約（lease）序列化：
+取得租約的執行負責發布，其他執行只標記 pending 後結束；持有者發布完成後若發現 pending，
+會再發布一次，把期間的異動一併反映（合併多次觸發）。manifest 以 S3 條件寫入（If-Match / If-None-Match）
+更新，只有較新的 generation 能取代目前的 manifest。
+
+只輸出 PUBLIC_FIELDS 列出的欄位（不包含用人主管信箱等內部資料）。
+"""
+import hashlib
+import json
+import os
+import time
+import uuid
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import Any, Dict, List, Optional, Tuple
+
+import boto3
+from boto3.dynamodb.conditions import Key
+from botocore.exceptions import ClientError
+
+dynamodb = boto3.resource('dynamodb')
+s3 = boto3.client('s3')
+
+JOBS_TABLE_NAME = os.environ.get('JOBS_TABLE_NAME', 'benson-haire-job-posting')
+JOB_BOARD_BUCKET = os.environ.get('JOB_BOARD_BUCKET', '')
+JOB_BOARD_PREFIX = 'job-board'
+MANIFEST_KEY = f'{JOB_BOARD_PREFIX}/manifest.json'
+JOB_BOARD_PAGE_SIZE = int(os.environ.get('JOB_BOARD_PAGE_SIZE', '50'))
+TASK_TABLE_NAME = os.environ.get('TASK_TABLE_NAME', 'benson-haire-background-task')
+
+LEASE_TASK_ID = 'publish-job-board'
+# 租約長度等於 Lambda 逾時（900 秒）；持有者異常結束時，租約過期後下一次觸發即可接手
+LEASE_SECONDS = 900
+# 非目前 / 前一個 generation 的頁面至少保留這麼久才刪除
+GENERATION_GRACE_SECONDS = 3600
+GENERATION_FORMAT = '%Y%m%dT%H%M%S%f'
+
+MANIFEST_MAX_AGE = 60
+PAGE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+MANIFEST_CACHE_CONTROL = f'public, max-age={MANIFEST_MAX_AGE}, s-maxage={MANIFEST_MAX_AGE}'
+
+PUBLIC_FIELDS = [
+    'job_id', 'team_id', 'title', 'company', 'department', 'team_name', 'location',
+    'employment_type', 'experience_level', 'remote_option', 'salary_min', 'salary_max', 'salary_note',
+    'description', 'responsibilities', 'required_skills', 'nice_to_have_skills',
+    'min_experience_years', 'education_required', 'majors_required', 'language_required',
+    'created_at', 'updated_at'
+]
+
+jobs_table = dynamodb.Table(JOBS_TABLE_NAME)
+task_table = dynamodb.Table(TASK_TABLE_NAME)
+
+
+def _json_default(o):
+    if isinstance(o, Decimal):
+        return int(o) if o == int(o) else float(o)
+    raise TypeError(f"無法序列化 {type(o)}")
+
+
+def public_job(job: Dict[str, Any]) -> Dict[str, Any]:
+    job = {**job, 'title': job.get('title') or job.get('job_title', '')}
+    return {field: job[field] for field in PUBLIC_FIELDS if job.get(field) not in (None, '', [])}
+
+
+def load_active_jobs() -> List[Dict[str, Any]]:
+    """以 status-index 讀取所有開放中的職缺（新到舊）"""
+    jobs = []
+    query_kwargs = {
+        'IndexName': 'status-index',
+        'KeyConditionExpression': Key('status').eq('active'),
+        'ScanIndexForward': False
+    }
+    while True:
+        query_response = jobs_table.query(**query_kwargs)
+        jobs.extend(query_response.get('Items', []))
+        if 'LastEvaluatedKey' not in query_response:
+            return jobs
+        query_kwargs['ExclusiveStartKey'] = query_response['LastEvaluatedKey']
+
+
+def scope_path(scope_type: str, value: str = '') -> str:
+    """範圍的路徑；團隊代碼與僱用類型可能含中文，以雜湊避免 URL 編碼問題"""
+    if scope_type == 'all':
+        return 'all'
+    return f"{scope_type}-{hashlib.sha1(value.encode('utf-8')).hexdigest()[:12]}"
+
+
+def build_scopes(jobs: List[Dict[str, Any]]) -> Dict[str, List[Dict[str, Any]]]:
+    """{manifest 中的範圍名稱: 職缺}，名稱為 all、team:{team_id}、employment_type:{類型}"""
+    scopes: Dict[str, List[Dict[str, Any]]] = {'all': jobs}
+    for job in jobs:
+        if job.get('team_id'):
+            scopes.setdefault(f"team:{job['team_id']}", []).append(job)
+        if job.get('employment_type'):
+            scopes.setdefault(f"employment_type:{job['employment_type']}", []).append(job)
+    return scopes
+
+
+def scope_label(scope: str, scope_jobs: List[Dict[str, Any]]) -> str:
+    """首頁篩選選單顯示的名稱：團隊以公司與團隊名稱顯示，其餘直接使用值"""
+    scope_type, _, value = scope.partition(':')
+    if scope_type == 'all':
+        return '全部職缺'
+    if scope_type == 'team' and scope_jobs:
+        names = [scope_jobs[0].get(field) for field in ('company', 'team_name') if scope_jobs[0].get(field)]
+        return ' - '.join(names) or value
+    return value
+
+
+def put_json(key: str, body: Dict[str, Any], cache_control: str, **conditions) -> None:
+    s3.put_object(
+        Bucket=JOB_BOARD_BUCKET,
+        Key=key,
+        Body=json.dumps(body, default=_json_default, ensure_ascii=False, separators=(',', ':')).encode('utf-8'),
+        ContentType='application/json; charset=utf-8',
+        CacheControl=cache_control,
+        **conditions
+    )
+
+
+def load_manifest() -> Tuple[Dict[str, Any], Optional[str]]:
+    """目前的 manifest 與其 ETag（尚未發布過時為 ({}, None)）"""
+    try:
+        manifest_object = s3.get_object(Bucket=JOB_BOARD_BUCKET, Key=MANIFEST_KEY)
+        return json.loads(manifest_object['Body'].read()), manifest_object['ETag']
+    except s3.exceptions.NoSuchKey:
+        return {}, None
+
+
+def switch_manifest(manifest: Dict[str, Any]) -> Tuple[bool, Optional[str]]:
+    """
+    條件寫入 manifest：只在目前的 generation 比較舊時取代，並以 ETag 確認讀取後沒有被改寫
+
+    回傳 (是否已切換, 原本的 generation)
+    """
+    while True:
+        current, etag = load_manifest()
+        previous = current.get('generation')
+        if previous and previous >= manifest['generation']:
+            return False, previous
+        condition = {'IfMatch': etag} if etag else {'IfNoneMatch': '*'}
+        try:
+            put_json(MANIFEST_KEY, manifest, MANIFEST_CACHE_CONTROL, **condition)
+            return True, previous
+        except ClientError as e:
+            # 讀取後 manifest 被另一個發布改寫，重新讀取再比較
+            if e.response['Error']['Code'] not in ('PreconditionFailed', 'ConditionalRequestConflict'):
+                raise
+
+
+def generation_time(generation: str) -> Optional[datetime]:
+    try:
+        return datetime.strptime(generation[1:], GENERATION_FORMAT)
+    except ValueError:
+        return None
+
+
+def delete_generations(keep: List[str]) -> int:
+    """刪除 keep 以外、且建立超過 GENERATION_GRACE_SECONDS 的 generation 目錄"""
+    cutoff = datetime.utcnow() - timedelta(seconds=GENERATION_GRACE_SECONDS)
+    deleted = 0
+    paginator = s3.get_paginator('list_objects_v2')
+    for page in paginator.paginate(Bucket=JOB_BOARD_BUCKET, Prefix=f'{JOB_BOARD_PREFIX}/g'):
+        stale = []
+        for obj in page.get('Contents', []):
+            generation = obj['Key'].split('/')[1]
+            created = generation_time(generation)
+            if generation not in keep and created is not None and created < cutoff:
+                stale.append({'Key': obj['Key']})
+        if stale:
+            s3.delete_objects(Bucket=JOB_BOARD_BUCKET, Delete={'Objects': stale, 'Quiet': True})
+            deleted += len(stale)
+    return deleted
+
+
+def acquire_lease(token: str) -> bool:
+    """取得發布租約；已有其他執行持有時標記 pending，由持有者完成後再發布一次"""
+    now = int(time.time())
+    try:
+        task_table.update_item(
+            Key={'task_id': LEASE_TASK_ID},
+            UpdateExpression='SET lease_token = :token, lease_expires = :expires, pending = :false',
+            ConditionExpression='attribute_not_exists(lease_expires) OR lease_expires < :now',
+            ExpressionAttributeValues={':token': token, ':expires': now + LEASE_SECONDS, ':now': now, ':false': False}
+        )
+        return True
+    except ClientError as e:
+        if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+            raise
+    task_table.update_item(
+        Key={'task_id': LEASE_TASK_ID},
+        UpdateExpression='SET pending = :true, requested_at = :requested_at',
+        ExpressionAttributeValues={':true': True, ':requested_at': datetime.utcnow().isoformat()}
+    )
+    return False
+
+
+def finish_lease(token: str) -> bool:
+    """
+    發布完成後釋放租約；回傳 False 表示期間有新的觸發（pending），
+    此時清除 pending、延長租約，呼叫端需要再發布一次
+    """
+    try:
+        task_table.update_item(
+            Key={'task_id': LEASE_TASK_ID},
+            UpdateExpression='REMOVE lease_token, lease_expires',
+            ConditionExpression='lease_token = :token AND pending <> :true',
+            ExpressionAttributeValues={':token': token, ':true': True}
+        )
+        return True
+    except ClientError as e:
+        if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+            raise
+    try:
+        task_table.update_item(
+            Key={'task_id': LEASE_TASK_ID},
+            UpdateExpression='SET pending = :false, lease_expires = :expires',
+            ConditionExpression='lease_token = :token',
+            ExpressionAttributeValues={':token': token, ':false': False, ':expires': int(time.time()) + LEASE_SECONDS}
+        )
+        return False
+    except ClientError as e:
+        if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+            raise
+        # 租約已過期並由其他執行接手，由對方負責之後的發布
+        return True
+
+
+def release_lease(token: str) -> None:
+    """發布失敗時釋放租約（保留 pending，下一次觸發會重新發布）"""
+    try:
+        task_table.update_item(
+            Key={'task_id': LEASE_TASK_ID},
+            UpdateExpression='REMOVE lease_token, lease_expires',
+            ConditionExpression='lease_token = :token',
+            ExpressionAttributeValues={':token': token}
+        )
+    except ClientError as e:
+        if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+            raise
+
+
+def publish() -> Dict[str, Any]:
+    """取得租約後發布；已有發布進行中時只標記 pending，由持有者再發布一次"""
+    if not JOB_BOARD_BUCKET:
+        return {'published': False, 'reason': '未設定 JOB_BOARD_BUCKET'}
+
+    token = uuid.uuid4().hex
+    if not acquire_lease(token):
+        print("職缺看板發布進行中，已標記完成後重新發布")
+        return {'published': False, 'reason': '已有發布進行中，完成後會再發布一次', 'coalesced': True}
+    try:
+        publishes = 0
+        while True:
+            summary = publish_generation()
+            publishes += 1
+            if finish_lease(token):
+                return {**summary, 'publishes': publishes}
+            print("發布期間有新的職缺異動，重新發布")
+    except Exception:
+        release_lease(token)
+        raise
+
+
+def publish_generation() -> Dict[str, Any]:
+    """重新產生所有快照並切換 manifest"""
+    generated_at = datetime.utcnow().isoformat() + 'Z'
+    generation = f"g{datetime.utcnow().strftime(GENERATION_FORMAT)}"
+    jobs = [public_job(job) for job in load_active_jobs()]
+
+    scopes_manifest = {}
+    page_count = 0
+    for scope, scope_jobs in build_scopes(jobs).items():
+        scope_type, _, value = scope.partition(':')
+        base = f"{JOB_BOARD_PREFIX}/{generation}/{scope_path(scope_type, value)}"
+        total_pages = max(1, (len(scope_jobs) + JOB_BOARD_PAGE_SIZE - 1) // JOB_BOARD_PAGE_SIZE)
+        pages = [f"{base}/page-{page}.json" for page in range(1, total_pages + 1)]
+        for page, key in enumerate(pages, start=1):
+            start = (page - 1) * JOB_BOARD_PAGE_SIZE
+            put_json(key, {
+                'scope': scope,
+                'jobs': scope_jobs[start:start + JOB_BOARD_PAGE_SIZE],
+                'pagination': {
+                    'current_page': page,
+                    'total_pages': total_pages,
+                    'total_items': len(scope_jobs),
+                    'items_per_page': JOB_BOARD_PAGE_SIZE
+                },
+                'next_page': pages[page] if page < total_pages else None,
+                'generated_at': generated_at
+            }, PAGE_CACHE_CONTROL)
+        page_count += len(pages)
+        scopes_manifest[scope] = {
+            'label': scope_label(scope, scope_jobs),
+            'total_items': len(scope_jobs),
+            'total_pages': total_pages,
+            'pages': pages
+        }
+
+    switched, previous = switch_manifest({
+        'generation': generation,
+        'generated_at': generated_at,
+        'page_size': JOB_BOARD_PAGE_SIZE,
+        'scopes': scopes_manifest
+    })
+    current = generation if switched else previous
+    deleted = delete_generations([current] + ([previous] if switched and previous else []))
+
+    summary = {
+        'published': switched,
+        'generation': generation,
+        'active_jobs': len(jobs),
+        'scopes': len(scopes_manifest),
+        'pages': page_count,
+        'deleted_objects': deleted
+    }
+    print(f"職缺看板已發布: {summary}")
+    return summary
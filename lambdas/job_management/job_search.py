@@ -0,0 +1,278 @@
+"""
+職缺全文搜尋（BM25 倒排索引）
+
+- 斷詞：與履歷搜尋（resume_management/text_search.py）相同，中文取字元 bigram、英文依單字切分
+- 索引欄位：title、description、company、team_name、responsibilities、required_skills
+- 篩選欄位（team_id、status、employment_type、experience_level、remote_option）與詞頻一起存在索引中，
+  查詢時先篩選再計分，結果依相關度排序
+- 儲存：快照 + delta，與履歷搜尋共用 index_store 的存取方式。職缺數量不多，快照直接用壓縮 JSON
+  - create_job / update_job / delete_job 每次寫入一個 delta，同一容器立即套用，其他容器在下次刷新時載入
+  - 暖機容器只載入一次快照，之後每 REFRESH_INTERVAL_SECONDS 秒追加新的 delta
+  - 排程以 merge_job_search_index 合併 delta；rebuild_job_search_index 由職缺表重建
+
+S3 路徑（JOB_SEARCH_BUCKET，不可與觸發履歷解析的 raw_resume bucket 共用）：
+  search-index/jobs/manifest.json
+  search-index/jobs/snapshots/v{version}.json.gz
+  search-index/jobs/deltas/{timestamp}-{job_id}.json
+"""
+import heapq
+import json
+import math
+import os
+import re
+import time
+import unicodedata
+import zlib
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+
+import index_store
+import table_scan
+
+SEARCH_BUCKET = os.environ.get('JOB_SEARCH_BUCKET', '')
+SEARCH_INDEX_PREFIX = 'search-index/jobs'
+
+# 暖機容器多久檢查一次 manifest 與新的 delta
+REFRESH_INTERVAL_SECONDS = int(os.environ.get('SEARCH_INDEX_REFRESH_SECONDS', '30'))
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# 可搜尋的文字欄位（title 與舊欄位 job_title 擇一）
+TEXT_FIELDS = ['title', 'description', 'company', 'team_name', 'responsibilities', 'required_skills']
+# 存在索引中、查詢時可直接篩選的欄位
+FILTER_FIELDS = ['team_id', 'status', 'employment_type', 'experience_level', 'remote_option']
+
+_CJK_RANGES = '\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff'
+_TOKEN_RE = re.compile(f'[{_CJK_RANGES}]+|[a-z0-9][a-z0-9+#.]*')
+_CJK_RE = re.compile(f'[{_CJK_RANGES}]')
+
+
+def tokenize(text: str) -> List[str]:
+    """中英混合斷詞：中文取字元 bigram，英文取小寫單字（保留 c++、c#、node.js 等寫法）"""
+    tokens = []
+    for match in _TOKEN_RE.finditer(unicodedata.normalize('NFKC', text or '').lower()):
+        token = match.group()
+        if _CJK_RE.match(token):
+            if len(token) == 1:
+                tokens.append(token)
+            else:
+                tokens.extend(token[i:i + 2] for i in range(len(token) - 1))
+        else:
+            token = token.rstrip('.')
+            if token:
+                tokens.append(token)
+    return tokens
+
+
+def document_text(job: Dict[str, Any]) -> str:
+    parts = []
+    for field in TEXT_FIELDS:
+        value = (job.get('title') or job.get('job_title')) if field == 'title' else job.get(field)
+        if isinstance(value, (list, tuple, set)):
+            parts.extend(str(v) for v in value if v)
+        elif value:
+            parts.append(str(value))
+    return '\n'.join(parts)
+
+
+def document_meta(job: Dict[str, Any]) -> Dict[str, str]:
+    meta = {field: str(job.get(field) or '') for field in FILTER_FIELDS}
+    meta['created_at'] = str(job.get('created_at') or '')
+    return meta
+
+
+class JobSearchIndex:
+    """記憶體中的倒排索引：詞彙 -> {job_id: 詞頻}，可直接增刪文件"""
+
+    def __init__(self, version: int = 0, watermark: str = ''):
+        self.version = version
+        self.watermark = watermark
+        self.documents: Dict[str, Tuple[Dict[str, str], Counter]] = {}
+        self.postings: Dict[str, Dict[str, int]] = {}
+        self.lengths: Dict[str, int] = {}
+        self.total_length = 0
+        self.loaded_keys: set = set()
+
+    def remove(self, job_id: str) -> None:
+        document = self.documents.pop(job_id, None)
+        if not document:
+            return
+        for term in document[1]:
+            postings = self.postings.get(term)
+            if postings is not None:
+                postings.pop(job_id, None)
+                if not postings:
+                    del self.postings[term]
+        self.total_length -= self.lengths.pop(job_id, 0)
+
+    def upsert(self, job_id: str, meta: Dict[str, str], term_counts: Counter) -> None:
+        self.remove(job_id)
+        self.documents[job_id] = (meta, term_counts)
+        for term, tf in term_counts.items():
+            self.postings.setdefault(term, {})[job_id] = tf
+        self.lengths[job_id] = sum(term_counts.values())
+        self.total_length += self.lengths[job_id]
+
+    def apply(self, delta: Dict[str, Any]) -> None:
+        if delta.get('deleted'):
+            self.remove(delta['job_id'])
+        else:
+            document = delta.get('document') or {}
+            self.upsert(delta['job_id'], document_meta(document), Counter(tokenize(document_text(document))))
+
+    def search(self, query: str, filters: Optional[Dict[str, Any]] = None,
+               limit: int = 1000) -> List[Tuple[str, float]]:
+        """
+        回傳依 BM25 分數排序的 (job_id, score)；分數相同時較新的職缺在前
+
+        :param filters: 欄位 -> 值或值的集合（例如 {'status': {'active', 'paused'}}）
+        """
+        query_terms = list(dict.fromkeys(tokenize(query)))
+        doc_count = len(self.documents)
+        if not query_terms or not doc_count:
+            return []
+        allowed = {field: {value} if isinstance(value, str) else set(value)
+                   for field, value in (filters or {}).items() if value}
+        avg_length = self.total_length / doc_count or 1.0
+
+        scores: Dict[str, float] = {}
+        rejected: set = set()
+        for term in query_terms:
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (doc_count - len(postings) + 0.5) / (len(postings) + 0.5))
+            for job_id, tf in postings.items():
+                if job_id in rejected:
+                    continue
+                if job_id not in scores:
+                    meta = self.documents[job_id][0]
+                    if any(meta.get(field) not in values for field, values in allowed.items()):
+                        rejected.add(job_id)
+                        continue
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * self.lengths[job_id] / avg_length)
+                scores[job_id] = scores.get(job_id, 0.0) + idf * tf * (BM25_K1 + 1) / (tf + norm)
+
+        return [(job_id, round(score, 6)) for job_id, score in heapq.nlargest(
+            limit, scores.items(), key=lambda x: (round(x[1], 6), self.documents[x[0]][0]['created_at'])
+        )]
+
+    def to_bytes(self) -> bytes:
+        payload = {
+            'version': self.version,
+            'watermark': self.watermark,
+            'documents': {job_id: {'meta': meta, 'terms': dict(term_counts)}
+                          for job_id, (meta, term_counts) in self.documents.items()}
+        }
+        return zlib.compress(json.dumps(payload, ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> 'JobSearchIndex':
+        payload = json.loads(zlib.decompress(data).decode('utf-8'))
+        index = cls(version=payload['version'], watermark=payload['watermark'])
+        for job_id, document in payload['documents'].items():
+            index.upsert(job_id, document['meta'], Counter(document['terms']))
+        return index
+
+
+# ---------------------------------------------------------------------------
+# 查詢、寫入與合併（快照與 delta 的 S3 存取見 index_store）
+# ---------------------------------------------------------------------------
+
+store = index_store.IndexStore(SEARCH_BUCKET, SEARCH_INDEX_PREFIX, '.json.gz')
+
+_index: Optional[JobSearchIndex] = None
+_last_refresh = 0.0
+
+
+def load_snapshot(manifest: Optional[Dict[str, Any]]) -> JobSearchIndex:
+    data = store.load_snapshot(manifest)
+    return JobSearchIndex.from_bytes(data) if data else JobSearchIndex()
+
+
+def get_index(force_refresh: bool = False) -> JobSearchIndex:
+    """取得搜尋索引；快照在暖機容器中只載入一次，之後只追加新的 delta"""
+    global _index, _last_refresh
+
+    now = time.time()
+    if _index is not None and not force_refresh and now - _last_refresh < REFRESH_INTERVAL_SECONDS:
+        return _index
+
+    manifest = store.load_manifest()
+    version = manifest['version'] if manifest else 0
+    if _index is None or _index.version != version:
+        _index = load_snapshot(manifest)
+        print(f"載入職缺搜尋索引快照 v{_index.version}，共 {len(_index.documents)} 個職缺、{len(_index.postings)} 個詞彙")
+
+    store.apply_new_deltas(_index.watermark, _index.loaded_keys, _index.apply)
+    _last_refresh = now
+    return _index
+
+
+def search(query: str, filters: Optional[Dict[str, Any]] = None, limit: int = 1000) -> List[Tuple[str, float]]:
+    return get_index().search(query, filters=filters, limit=limit)
+
+
+def write_delta(delta: Dict[str, Any]) -> None:
+    """寫入一個 delta，並立即套用到這個容器已載入的索引"""
+    key = store.write_delta(delta['job_id'], delta, default=lambda o: int(o) if o == int(o) else float(o))
+    if _index is not None:
+        _index.apply(delta)
+        _index.loaded_keys.add(key)
+
+
+def index_job(job: Dict[str, Any]) -> bool:
+    """職缺建立或更新後呼叫；已軟刪除的職缺會從索引移除。失敗只記錄錯誤，不影響寫入"""
+    try:
+        if job.get('status') == 'deleted':
+            write_delta({'job_id': job['job_id'], 'deleted': True})
+        else:
+            document = {field: job.get(field) for field in set(TEXT_FIELDS + FILTER_FIELDS) | {'job_title', 'created_at'}}
+            write_delta({'job_id': job['job_id'], 'document': document})
+        return True
+    except Exception as e:
+        print(f"更新職缺搜尋索引失敗: job_id={job.get('job_id')}, {str(e)}")
+        return False
+
+
+def remove_job(job_id: str) -> bool:
+    return index_job({'job_id': job_id, 'status': 'deleted'})
+
+
+def publish(index: JobSearchIndex, merged_keys: List[str]) -> Dict[str, Any]:
+    return store.publish(index.to_bytes(), index.version, index.watermark, merged_keys,
+                         document_count=len(index.documents), term_count=len(index.postings))
+
+
+def merge_deltas() -> Dict[str, Any]:
+    """把累積的 delta 合併進新版本的快照"""
+    manifest = store.load_manifest()
+    index = load_snapshot(manifest)
+    keys = store.mergeable_delta_keys(manifest)
+    if not keys:
+        return {'merged_deltas': 0, 'version': index.version}
+
+    for key in keys:
+        index.apply(store.load_delta(key))
+    index.version += 1
+    index.watermark = keys[-1]
+    manifest = publish(index, keys)
+    return {'merged_deltas': len(keys), **manifest}
+
+
+def rebuild_from_table(jobs_table, segments: int = 1) -> Dict[str, Any]:
+    """掃描職缺表重建完整快照（已軟刪除的職缺不列入）"""
+    manifest = store.load_manifest()
+    # 先記下目前的 delta，這些變更在掃描時已經反映在表中
+    pending_keys = store.mergeable_delta_keys(manifest)
+
+    index = JobSearchIndex(version=(manifest['version'] if manifest else 0) + 1)
+    projection = sorted(set(TEXT_FIELDS + FILTER_FIELDS) | {'job_id', 'job_title', 'created_at'})
+    for job in table_scan.TableScan(jobs_table, segments=segments, projection=projection):
+        if job.get('status') != 'deleted':
+            index.upsert(job['job_id'], document_meta(job), Counter(tokenize(document_text(job))))
+
+    index.watermark = pending_keys[-1] if pending_keys else (manifest['watermark'] if manifest else '')
+    manifest = publish(index, pending_keys)
+    return {'merged_deltas': len(pending_keys), **manifest}
@@ -0,0 +1,152 @@
+"""
+職缺統計（物化的聚合項目）
+
+統計表只有一筆項目（stat_id = 'jobs'），保存：
+
+- total_jobs：未刪除的職缺數
+- status#{狀態}、team#{team_id}、employment_type#{聘用類型}：各分類的職缺數
+- total_applications：職缺 application_count 的總和（履歷解析 Lambda 寫入新履歷時與 application_count 一起累加）
+
+每次寫入職缺時，統計的更新與職缺本身放在同一筆 TransactWriteItems 中，以 ADD 累加差值
+（新內容的貢獻減去舊內容的貢獻），兩者同時成功或同時失敗。ADD 只能用在最上層屬性，
+因此分類計數以「前綴#值」的平面屬性保存，讀取時再整理成巢狀結構。
+差值是依寫入前讀到的職缺計算，交易中的職缺寫入以 unchanged_condition 確認計數欄位在這段期間沒有被其他請求改動。
+
+GET /jobs/stats 只需一次 GetItem，不必掃描職缺表。rebuild 以全表掃描重算並覆寫整筆項目，
+用於初次部署或修正偏差（重算期間的寫入可能沒有反映，必要時再執行一次）。
+"""
+import os
+from collections import Counter
+from datetime import datetime
+from typing import Any, Dict, Iterable, Optional
+
+import boto3
+
+dynamodb = boto3.resource('dynamodb')
+
+STATS_TABLE_NAME = os.environ.get('STATS_TABLE_NAME', 'benson-haire-job-stats')
+STATS_ID = 'jobs'
+
+# 分類計數：屬性前綴 -> 職缺欄位
+DIMENSIONS = {'status': 'status', 'team': 'team_id', 'employment_type': 'employment_type'}
+# 加總欄位：統計屬性 -> 職缺欄位
+TOTALS = {'total_applications': 'application_count'}
+# 會影響統計的職缺欄位
+COUNTED_FIELDS = list(DIMENSIONS.values()) + list(TOTALS.values())
+
+stats_table = dynamodb.Table(STATS_TABLE_NAME)
+
+
+def _number(value: Any) -> int:
+    try:
+        return int(value or 0)
+    except (ValueError, TypeError):
+        return 0
+
+
+def contribution(job: Optional[Dict[str, Any]]) -> Counter:
+    """一筆職缺對統計的貢獻；不存在或已刪除的職缺不計入"""
+    counts = Counter()
+    if not job or job.get('status') == 'deleted':
+        return counts
+    counts['total_jobs'] = 1
+    for attribute, field in TOTALS.items():
+        counts[attribute] = _number(job.get(field))
+    for prefix, field in DIMENSIONS.items():
+        if job.get(field):
+            counts[f"{prefix}#{job[field]}"] += 1
+    return counts
+
+
+def delta(old: Optional[Dict[str, Any]], new: Optional[Dict[str, Any]]) -> Dict[str, int]:
+    """職缺由 old 變成 new 時統計需要累加的差值（不含 0）"""
+    changes = contribution(new)
+    changes.subtract(contribution(old))
+    return {attribute: value for attribute, value in changes.items() if value}
+
+
+def merge(deltas: Iterable[Dict[str, int]]) -> Dict[str, int]:
+    total = Counter()
+    for changes in deltas:
+        total.update(changes)
+    return {attribute: value for attribute, value in total.items() if value}
+
+
+def stats_operation(changes: Dict[str, int]) -> Optional[Dict[str, Any]]:
+    """累加差值的 TransactWriteItems 項目；沒有差值時回傳 None"""
+    if not changes:
+        return None
+    names = {f"#s{i}": attribute for i, attribute in enumerate(changes)}
+    values = {f":s{i}": value for i, value in enumerate(changes.values())}
+    values[':updated_at'] = datetime.utcnow().isoformat()
+    return {'Update': {
+        'TableName': STATS_TABLE_NAME,
+        'Key': {'stat_id': STATS_ID},
+        'UpdateExpression': 'SET updated_at = :updated_at ADD ' + ', '.join(f"#s{i} :s{i}" for i in range(len(changes))),
+        'ExpressionAttributeNames': names,
+        'ExpressionAttributeValues': values
+    }}
+
+
+def unchanged_condition(operation: Dict[str, Any], job: Dict[str, Any]) -> Dict[str, Any]:
+    """在職缺寫入項目加上條件：計數欄位仍是寫入前讀到的值（差值才會正確）"""
+    body = next(iter(operation.values()))
+    names = body.setdefault('ExpressionAttributeNames', {})
+    values = body.setdefault('ExpressionAttributeValues', {})
+    conditions = [body['ConditionExpression']] if body.get('ConditionExpression') else []
+    for field in COUNTED_FIELDS:
+        names[f"#c_{field}"] = field
+        if field in job:
+            values[f":c_{field}"] = job[field]
+            conditions.append(f"#c_{field} = :c_{field}")
+        else:
+            conditions.append(f"attribute_not_exists(#c_{field})")
+    body['ConditionExpression'] = ' AND '.join(f"({condition})" for condition in conditions)
+    return operation
+
+
+def transact(operation: Dict[str, Any], changes: Dict[str, int]) -> None:
+    """以一筆交易寫入職缺並累加統計（條件不成立時拋出 TransactionCanceledException）"""
+    stats = stats_operation(changes)
+    dynamodb.meta.client.transact_write_items(TransactItems=[operation] + ([stats] if stats else []))
+
+
+def condition_failed(error) -> bool:
+    """transact 的第一個項目（職缺）是否因條件不成立而取消"""
+    reasons = error.response.get('CancellationReasons') or []
+    return (error.response['Error']['Code'] == 'TransactionCanceledException'
+            and bool(reasons) and reasons[0].get('Code') == 'ConditionalCheckFailed')
+
+
+def get_stats() -> Dict[str, Any]:
+    """讀取統計並整理成 {total_jobs, total_applications, by_status, by_team, by_employment_type}"""
+    item = stats_table.get_item(Key={'stat_id': STATS_ID}).get('Item') or {}
+    stats = {'total_jobs': _number(item.get('total_jobs'))}
+    stats.update({attribute: _number(item.get(attribute)) for attribute in TOTALS})
+    stats.update({f"by_{prefix}": {} for prefix in DIMENSIONS})
+    for attribute, value in item.items():
+        prefix, separator, key = attribute.partition('#')
+        if separator and prefix in DIMENSIONS and _number(value):
+            stats[f"by_{prefix}"][key] = _number(value)
+    stats['updated_at'] = item.get('updated_at')
+    stats['rebuilt_at'] = item.get('rebuilt_at')
+    return stats
+
+
+def rebuild(jobs: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    """由全部職缺重算統計並覆寫整筆項目"""
+    total = Counter()
+    scanned = 0
+    for job in jobs:
+        scanned += 1
+        total.update(contribution(job))
+    timestamp = datetime.utcnow().isoformat()
+    stats_table.put_item(Item={
+        'stat_id': STATS_ID,
+        **{attribute: value for attribute, value in total.items() if value},
+        'updated_at': timestamp,
+        'rebuilt_at': timestamp
+    })
+    summary = {'scanned': scanned, 'total_jobs': total['total_jobs']}
+    print(f"職缺統計已重算: {summary}")
+    return summary
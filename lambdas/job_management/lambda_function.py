@@ -1,22 +1,59 @@
+import base64
+import hashlib
 import json
 import boto3
 import uuid
 import re
 import os
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from decimal import Decimal
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Tuple
+
+from boto3.dynamodb.conditions import Attr, Key
+from botocore.exceptions import ClientError
+
+import batch_writes
+import http_cache
+import job_board
+import job_search
+import job_stats
+import table_scan
+import team_info_repair
+import team_sync
 
 # 初始化 AWS 服務
 dynamodb = boto3.resource('dynamodb')
-s3 = boto3.client('s3')
+lambda_client = boto3.client('lambda')
 
 # 環境變數
 JOBS_TABLE_NAME = os.environ.get('JOBS_TABLE_NAME', 'benson-haire-job-posting')
 TEAMS_TABLE_NAME = os.environ.get('TEAMS_TABLE_NAME', 'benson-haire-teams')
-S3_BUCKET = os.environ.get('BACKUP_S3_BUCKET', 'benson-haire-static-site-e36d5aee')
+MATCHER_FUNCTION_NAME = os.environ.get('MATCHER_FUNCTION_NAME', '')
+REQUIREMENT_FUNCTION_NAME = os.environ.get('REQUIREMENT_FUNCTION_NAME', '')
+# 全表讀取的平行分段數
+SCAN_SEGMENTS = int(os.environ.get('SCAN_SEGMENTS', '4'))
+
+# 配對評分會用到的職缺欄位；只有這些欄位變更才需要重新評分
+SCORING_FIELDS = [
+    'team_id', 'required_skills', 'nice_to_have_skills', 'min_experience_years',
+    'education_required', 'majors_required', 'language_required'
+]
+
+# status=all 時列出的狀態（不含已軟刪除的 deleted）
+LISTABLE_STATUSES = ['active', 'paused', 'closed']
+
+# 批次 API 每次最多處理的職缺數，以及寫入後觸發評分 / 索引等後續處理的並行數
+MAX_BATCH_ITEMS = 200
+BATCH_FOLLOW_UP_CONCURRENCY = 8
 
-# DynamoDB 表格
+# 各路由的 Cache-Control（GET 回應一律帶 ETag，未列出的路由使用 http_cache 的預設值）
+CACHE_CONTROL_RULES = [
+    (r'/jobs', 'private, no-cache'),
+    (r'/jobs/[^/]+', 'private, no-cache')
+]
+
+# DynamoDB 表格（備份由 Stream 觸發的 table_backup Lambda 處理，請求路徑上不寫 S3）
 jobs_table = dynamodb.Table(JOBS_TABLE_NAME)
 teams_table = dynamodb.Table(TEAMS_TABLE_NAME)
 
@@ -35,7 +72,7 @@ def response(status_code: int, body: Dict[str, Any]) -> Dict[str, Any]:
             'Content-Type': 'application/json',
             'Access-Control-Allow-Origin': '*',
             'Access-Control-Allow-Headers': 'Content-Type,X-Amz-Date,Authorization,X-Api-Key,X-Amz-Security-Token',
-            'Access-Control-Allow-Methods': 'GET,POST,PUT,DELETE,OPTIONS'
+            'Access-Control-Allow-Methods': 'GET,POST,PUT,PATCH,DELETE,OPTIONS'
         },
         'body': json.dumps(body, cls=DecimalEncoder, ensure_ascii=False)
     }
@@ -106,18 +143,20 @@ def check_team_exists(team_id: str) -> Optional[Dict[str, Any]]:
         print(f"檢查團隊失敗: {str(e)}")
         return None
 
-def create_job(data: Dict[str, Any]) -> Dict[str, Any]:
-    """建立新職缺"""
-    # 驗證資料
-    validation_error = validate_job_data(data)
-    if validation_error:
-        return response(400, {'error': validation_error})
-    
-    # 檢查團隊是否存在
-    team_data = check_team_exists(data['team_id'])
-    if not team_data:
-        return response(404, {'error': '指定的團隊不存在'})
-    
+def batch_get_teams(team_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+    """以 BatchGetItem 讀取多個團隊（每次最多 100 筆）"""
+    teams = {}
+    for start in range(0, len(team_ids), 100):
+        request_items = {TEAMS_TABLE_NAME: {'Keys': [{'team_id': team_id} for team_id in team_ids[start:start + 100]]}}
+        while request_items:
+            batch_response = dynamodb.batch_get_item(RequestItems=request_items)
+            for item in batch_response.get('Responses', {}).get(TEAMS_TABLE_NAME, []):
+                teams[item['team_id']] = item
+            request_items = batch_response.get('UnprocessedKeys') or {}
+    return teams
+
+def build_job_item(data: Dict[str, Any], team_data: Dict[str, Any]) -> Dict[str, Any]:
+    """由已驗證的請求資料與團隊資料組出新職缺項目"""
     # 生成職缺 ID: {team_id}-{uuid}
     uuid_part = str(uuid.uuid4())[:8]
     job_id = f"{data['team_id']}-{uuid_part}"
@@ -175,30 +214,54 @@ def create_job(data: Dict[str, Any]) -> Dict[str, Any]:
         'education_required': data.get('education_required', ''),
         'majors_required': majors_required,
         'language_required': language_required,
+        # 配對通知收件人（未設定時通知整個團隊）
+        'hiring_manager_email': data.get('hiring_manager_email', ''),
         # 狀態和時間戳
         'status': data.get('status', 'active'),
         'created_at': timestamp,
         'updated_at': timestamp
     }
+    return job_data
+
+def on_job_created(job_data: Dict[str, Any]) -> bool:
+    """新職缺寫入後的後續處理，回傳是否觸發評分"""
+    # 新職缺：讓團隊履歷池中的既有履歷都評分一次
+    rescore_triggered = job_data['status'] == 'active' and trigger_job_rescoring(job_data['job_id'], '新職缺')
+    trigger_requirement_extraction(job_data['job_id'])
+    job_search.index_job(job_data)
+    return rescore_triggered
+
+def create_job(data: Dict[str, Any]) -> Dict[str, Any]:
+    """建立新職缺"""
+    # 驗證資料
+    validation_error = validate_job_data(data)
+    if validation_error:
+        return response(400, {'error': validation_error})
+    
+    # 檢查團隊是否存在
+    team_data = check_team_exists(data['team_id'])
+    if not team_data:
+        return response(404, {'error': '指定的團隊不存在'})
+    
+    job_data = build_job_item(data, team_data)
+    job_id = job_data['job_id']
     
     try:
-        # 儲存到 DynamoDB
-        jobs_table.put_item(Item=job_data)
-        
-        # 備份到 S3 (可選)
-        if S3_BUCKET:
-            backup_key = f"backups/jobs/{job_id}.json"
-            s3.put_object(
-                Bucket=S3_BUCKET,
-                Key=backup_key,
-                Body=json.dumps(job_data, cls=DecimalEncoder, ensure_ascii=False, indent=2),
-                ContentType='application/json'
-            )
+        # 儲存到 DynamoDB（與職缺統計在同一筆交易）
+        job_stats.transact(
+            batch_writes.put_operation(JOBS_TABLE_NAME, job_data, 'attribute_not_exists(job_id)'),
+            job_stats.delta(None, job_data)
+        )
+        
+        rescore_triggered = on_job_created(job_data)
+        if job_data['status'] == 'active':
+            trigger_job_board_publish(f'新職缺 {job_id}')
         
         return response(201, {
             'message': '職缺建立成功',
             'job_id': job_id,
-            'data': job_data
+            'data': job_data,
+            'rescore_triggered': rescore_triggered
         })
         
     except Exception as e:
@@ -223,84 +286,194 @@ def get_job(job_id: str) -> Dict[str, Any]:
         print(f"取得職缺失敗: {str(e)}")
         return response(500, {'error': '取得職缺失敗'})
 
+def encode_cursor(payload: Optional[Dict[str, Any]]) -> Optional[str]:
+    """把分頁位置轉成不透明的 cursor 字串"""
+    if not payload:
+        return None
+    data = json.dumps(payload, cls=DecimalEncoder, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(data).decode('ascii')
+
+def decode_cursor(cursor: str, signature: str) -> Dict[str, Any]:
+    """還原 cursor；格式錯誤或與目前的篩選條件不符時拋出 ValueError"""
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+    except Exception:
+        raise ValueError('cursor 格式不正確')
+    if not isinstance(payload, dict) or payload.get('sig') != signature:
+        raise ValueError('cursor 與篩選條件不符')
+    return payload
+
+def list_signature(filters: Dict[str, Any]) -> str:
+    """篩選條件的摘要，避免 cursor 被用在不同的查詢上"""
+    return hashlib.sha256(json.dumps(filters, sort_keys=True).encode('utf-8')).hexdigest()[:12]
+
+def index_key(item: Dict[str, Any], index_name: str) -> Dict[str, Any]:
+    """由職缺項目組出索引的 ExclusiveStartKey（主鍵 + 索引鍵）"""
+    partition_key = 'team_id' if index_name == 'team-index' else 'status'
+    return {'job_id': item['job_id'], partition_key: item[partition_key], 'created_at': item['created_at']}
+
+def job_matches_search(item: Dict[str, Any], search: str) -> bool:
+    searchable_text = f"{item.get('job_title', '')} {item.get('title', '')} {item.get('description', '')} {item.get('company', '')} {item.get('team_name', '')} {' '.join(item.get('responsibilities', []))} {' '.join(item.get('required_skills', []))}".lower()
+    return search in searchable_text
+
+def job_matches_filters(item: Dict[str, Any], team_id: Optional[str], status: str,
+                        query_params: Dict[str, str]) -> bool:
+    if team_id and item.get('team_id') != team_id:
+        return False
+    if item.get('status') not in (LISTABLE_STATUSES if status == 'all' else [status]):
+        return False
+    return all(item.get(field) == query_params[field]
+               for field in ('employment_type', 'experience_level', 'remote_option') if query_params.get(field))
+
+def batch_get_jobs(job_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+    """以 BatchGetItem 讀取多個職缺（每次最多 100 筆）"""
+    jobs = {}
+    for start in range(0, len(job_ids), 100):
+        request_items = {JOBS_TABLE_NAME: {'Keys': [{'job_id': job_id} for job_id in job_ids[start:start + 100]]}}
+        while request_items:
+            batch_response = dynamodb.batch_get_item(RequestItems=request_items)
+            for item in batch_response.get('Responses', {}).get(JOBS_TABLE_NAME, []):
+                jobs[item['job_id']] = item
+            request_items = batch_response.get('UnprocessedKeys') or {}
+    return jobs
+
+def query_jobs_page(index_name: str, partition_value: str, limit: int,
+                    start_key: Optional[Dict[str, Any]] = None,
+                    filter_expression=None,
+                    search: str = '') -> Tuple[List[Dict[str, Any]], Optional[Dict[str, Any]]]:
+    """
+    依 created_at 倒序讀取索引，直到收集到 limit 筆符合條件的職缺
+
+    :return: (職缺, 下一頁的起點)；起點為最後一筆回傳職缺的索引鍵，沒有更多資料時為 None
+    """
+    partition_key = 'team_id' if index_name == 'team-index' else 'status'
+    query_kwargs = {
+        'IndexName': index_name,
+        'KeyConditionExpression': Key(partition_key).eq(partition_value),
+        'ScanIndexForward': False,
+        'Limit': limit
+    }
+    if filter_expression is not None:
+        query_kwargs['FilterExpression'] = filter_expression
+    if start_key:
+        query_kwargs['ExclusiveStartKey'] = start_key
+
+    items = []
+    while True:
+        query_response = jobs_table.query(**query_kwargs)
+        page_items = query_response.get('Items', [])
+        last_evaluated_key = query_response.get('LastEvaluatedKey')
+        for position, item in enumerate(page_items):
+            if search and not job_matches_search(item, search):
+                continue
+            items.append(item)
+            if len(items) == limit:
+                is_last = position == len(page_items) - 1 and not last_evaluated_key
+                return items, None if is_last else index_key(item, index_name)
+        if not last_evaluated_key:
+            return items, None
+        query_kwargs['ExclusiveStartKey'] = last_evaluated_key
+
 def list_jobs(query_params: Dict[str, str]) -> Dict[str, Any]:
-    """列出職缺（支援篩選和分頁）"""
+    """
+    列出職缺（支援篩選與 cursor 分頁）
+
+    依 created_at 倒序查詢索引，每次只讀取一頁：
+    - 指定 team_id：team-index（狀態以 FilterExpression 篩選）
+    - 只指定 status：status-index
+    - status=all：分別查詢各狀態的 status-index 後合併，cursor 記錄每個狀態的位置
+    - 有 search 關鍵字：由職缺搜尋索引（job_search）取得依相關度排序的結果，cursor 記錄位移
+    回傳的 pagination.next_cursor 帶入下一次請求的 cursor 參數即可取得下一頁。
+    """
     try:
         # 解析查詢參數
         team_id = query_params.get('team_id')
-        status = query_params.get('status', 'active')
-        employment_type = query_params.get('employment_type')
-        experience_level = query_params.get('experience_level')
-        remote_option = query_params.get('remote_option')
+        # 空字串（前端「全部」選項）視同 all
+        status = query_params.get('status', 'active') or 'all'
         search = query_params.get('search', '').lower()
-        
-        # 分頁參數
-        page = int(query_params.get('page', 1))
-        limit = min(int(query_params.get('limit', 50)), 100)  # 最大 100 筆
-        
-        # 基礎掃描
-        scan_kwargs = {}
-        filter_expressions = []
-        expression_values = {}
-        expression_names = {}
-        
-        # 狀態篩選 - 只顯示啟用的職缺給求職者
-        if status:
-            filter_expressions.append('#status = :status')
-            expression_values[':status'] = status
-            expression_names['#status'] = 'status'
-        
-        # 團隊篩選
-        if team_id:
-            filter_expressions.append('team_id = :team_id')
-            expression_values[':team_id'] = team_id
-        
-        # 就業類型篩選
-        if employment_type:
-            filter_expressions.append('employment_type = :employment_type')
-            expression_values[':employment_type'] = employment_type
-        
-        # 經驗等級篩選
-        if experience_level:
-            filter_expressions.append('experience_level = :experience_level')
-            expression_values[':experience_level'] = experience_level
-        
-        # 遠端選項篩選
-        if remote_option:
-            filter_expressions.append('remote_option = :remote_option')
-            expression_values[':remote_option'] = remote_option
-        
-        # 建構篩選表達式
-        if filter_expressions:
-            scan_kwargs['FilterExpression'] = ' AND '.join(filter_expressions)
-            scan_kwargs['ExpressionAttributeValues'] = expression_values
-            if expression_names:
-                scan_kwargs['ExpressionAttributeNames'] = expression_names
-        
-        # 執行掃描
-        response_data = jobs_table.scan(**scan_kwargs)
-        items = response_data['Items']
-        
-        # 文字搜尋（在記憶體中進行）
+        limit = min(max(int(query_params.get('limit', 50)), 1), 100)  # 最大 100 筆
+
+        # 其他欄位篩選在讀取時由 DynamoDB 過濾
+        filter_condition = None
+        for field in ('employment_type', 'experience_level', 'remote_option'):
+            if query_params.get(field):
+                condition = Attr(field).eq(query_params[field])
+                filter_condition = condition if filter_condition is None else filter_condition & condition
+
+        filters = {field: query_params.get(field) or '' for field in (
+            'team_id', 'employment_type', 'experience_level', 'remote_option')}
+        filters.update({'status': status, 'search': search})
+        signature = list_signature(filters)
+        try:
+            cursor = decode_cursor(query_params['cursor'], signature) if query_params.get('cursor') else {}
+        except ValueError as e:
+            return response(400, {'error': str(e)})
+
+        ranked = None
         if search:
-            filtered_items = []
-            for item in items:
-                searchable_text = f"{item.get('job_title', '')} {item.get('title', '')} {item.get('description', '')} {item.get('company', '')} {item.get('team_name', '')} {' '.join(item.get('responsibilities', []))} {' '.join(item.get('required_skills', []))}".lower()
-                if search in searchable_text:
-                    filtered_items.append(item)
-            items = filtered_items
-        
-        # 排序（按建立時間倒序）
-        items.sort(key=lambda x: x.get('created_at', ''), reverse=True)
-        
-        # 分頁
-        total = len(items)
-        start = (page - 1) * limit
-        end = start + limit
-        paginated_items = items[start:end]
-        
+            # 有關鍵字時改用搜尋索引，依相關度排序；索引無法使用時退回逐頁比對文字
+            try:
+                ranked = job_search.search(search, filters={
+                    'team_id': team_id,
+                    'status': LISTABLE_STATUSES if status == 'all' else status,
+                    **{field: query_params.get(field) for field in ('employment_type', 'experience_level', 'remote_option')}
+                })
+            except Exception as e:
+                print(f"職缺搜尋索引無法使用，改為逐頁比對: {str(e)}")
+
+        if ranked is not None:
+            offset = int(cursor.get('offset', 0))
+            page = ranked[offset:offset + limit]
+            jobs_by_id = batch_get_jobs([job_id for job_id, _ in page])
+            items = []
+            for job_id, score in page:
+                item = jobs_by_id.get(job_id)
+                # 索引可能稍微落後，以目前的資料再確認一次篩選條件
+                if not item or not job_matches_filters(item, team_id, status, query_params):
+                    continue
+                item['relevance_score'] = Decimal(str(score))
+                items.append(item)
+            next_position = {'sig': signature, 'offset': offset + limit} if offset + limit < len(ranked) else None
+
+        elif team_id:
+            condition = Attr('status').is_in(LISTABLE_STATUSES) if status == 'all' else Attr('status').eq(status)
+            filter_condition = condition if filter_condition is None else filter_condition & condition
+            items, next_key = query_jobs_page('team-index', team_id, limit, cursor.get('key'),
+                                              filter_condition, search)
+            next_position = {'sig': signature, 'key': next_key} if next_key else None
+
+        elif status != 'all':
+            items, next_key = query_jobs_page('status-index', status, limit, cursor.get('key'),
+                                              filter_condition, search)
+            next_position = {'sig': signature, 'key': next_key} if next_key else None
+
+        else:
+            # 各狀態各取一頁後依 created_at 合併；positions 中 None 代表該狀態已讀完
+            positions = cursor.get('positions', {})
+            candidates = {}
+            for job_status in LISTABLE_STATUSES:
+                if job_status in positions and positions[job_status] is None:
+                    continue
+                candidates[job_status] = query_jobs_page('status-index', job_status, limit, positions.get(job_status),
+                                                         filter_condition, search)
+            merged = sorted(
+                ((item, job_status) for job_status, (status_items, _) in candidates.items() for item in status_items),
+                key=lambda pair: pair[0].get('created_at', ''), reverse=True
+            )[:limit]
+            items = [item for item, _ in merged]
+
+            next_positions = dict(positions)
+            for job_status, (status_items, status_next_key) in candidates.items():
+                taken = sum(1 for _, item_status in merged if item_status == job_status)
+                if taken == len(status_items):
+                    next_positions[job_status] = status_next_key
+                elif taken > 0:
+                    next_positions[job_status] = index_key(status_items[taken - 1], 'status-index')
+            has_more = any(next_positions.get(job_status, True) is not None for job_status in LISTABLE_STATUSES)
+            next_position = {'sig': signature, 'positions': next_positions} if has_more else None
+
         # 確保每個職缺都有必要的欄位給前端顯示
-        for item in paginated_items:
+        for item in items:
             # 確保有 title 欄位
             if 'title' not in item and 'job_title' in item:
                 item['title'] = item['job_title']
@@ -311,16 +484,17 @@ def list_jobs(query_params: Dict[str, str]) -> Dict[str, Any]:
                 else:
                     item['description'] = '詳細職缺資訊請洽詢人資部門'
         
+        next_cursor = encode_cursor(next_position)
         return response(200, {
             'success': True,
             'message': '職缺列表取得成功',
-            'jobs': paginated_items,  # 前端期望的欄位名稱
-            'data': paginated_items,   # 保留相容性
+            'jobs': items,  # 前端期望的欄位名稱
+            'data': items,   # 保留相容性
             'pagination': {
-                'current_page': page,
-                'total_pages': (total + limit - 1) // limit if total > 0 else 1,
-                'total_items': total,
-                'items_per_page': limit
+                'items_per_page': limit,
+                'returned_items': len(items),
+                'next_cursor': next_cursor,
+                'has_more': next_cursor is not None
             }
         })
         
@@ -330,6 +504,75 @@ def list_jobs(query_params: Dict[str, str]) -> Dict[str, Any]:
         print(traceback.format_exc())
         return response(500, {'error': '列出職缺失敗', 'message': str(e)})
 
+def normalize_scoring_value(value: Any) -> Any:
+    """正規化評分欄位以便比較：字串與單元素陣列視為相同、忽略大小寫與前後空白"""
+    if value is None or value == '' or value == []:
+        return None
+    if isinstance(value, (int, float, Decimal)):
+        return str(int(value))
+    if isinstance(value, str):
+        value = value.strip()
+        if re.fullmatch(r'\d+(\.\d+)?', value):
+            return str(int(float(value)))
+        value = [value]
+    if isinstance(value, (list, tuple)):
+        return sorted(str(item).strip().lower() for item in value if str(item).strip())
+    return str(value).strip().lower()
+
+def changed_scoring_fields(existing_job: Dict[str, Any], data: Dict[str, Any]) -> List[str]:
+    """比對更新內容與既有職缺，回傳實際變更的評分欄位"""
+    return [
+        field for field in SCORING_FIELDS
+        if field in data and normalize_scoring_value(data[field]) != normalize_scoring_value(existing_job.get(field))
+    ]
+
+def trigger_job_rescoring(job_id: str, reason: str) -> bool:
+    """非同步呼叫配對 Lambda，只重新評分這個職缺的配對結果"""
+    if not MATCHER_FUNCTION_NAME:
+        return False
+    try:
+        lambda_client.invoke(
+            FunctionName=MATCHER_FUNCTION_NAME,
+            InvocationType='Event',
+            Payload=json.dumps({'job_id': job_id, 'reason': reason}).encode('utf-8')
+        )
+        print(f"已觸發職缺重新評分: job_id={job_id}, 原因: {reason}")
+        return True
+    except Exception as e:
+        print(f"觸發職缺重新評分失敗: job_id={job_id}, {str(e)}")
+        return False
+
+def trigger_requirement_extraction(job_id: str) -> bool:
+    """非同步呼叫需求萃取 Lambda；職缺內容未變更時由對方以內容雜湊略過，不會呼叫模型"""
+    if not REQUIREMENT_FUNCTION_NAME:
+        return False
+    try:
+        lambda_client.invoke(
+            FunctionName=REQUIREMENT_FUNCTION_NAME,
+            InvocationType='Event',
+            Payload=json.dumps({'job_id': job_id}).encode('utf-8')
+        )
+        return True
+    except Exception as e:
+        print(f"觸發需求萃取失敗: job_id={job_id}, {str(e)}")
+        return False
+
+def trigger_job_board_publish(reason: str) -> bool:
+    """非同步呼叫自己重新發布公開職缺看板；不在 Lambda 中執行（本機測試）時直接發布"""
+    try:
+        function_name = os.environ.get('AWS_LAMBDA_FUNCTION_NAME')
+        if not function_name:
+            return job_board.publish()['published']
+        lambda_client.invoke(
+            FunctionName=function_name,
+            InvocationType='Event',
+            Payload=json.dumps({'action': 'publish_job_board', 'reason': reason}, ensure_ascii=False).encode('utf-8')
+        )
+        return True
+    except Exception as e:
+        print(f"觸發職缺看板發布失敗: {reason}, {str(e)}")
+        return False
+
 def update_job(job_id: str, data: Dict[str, Any]) -> Dict[str, Any]:
     """更新職缺"""
     # 驗證資料
@@ -375,6 +618,7 @@ def update_job(job_id: str, data: Dict[str, Any]) -> Dict[str, Any]:
             'education_required': 'education_required',
             'majors_required': 'majors_required',
             'language_required': 'language_required',
+            'hiring_manager_email': 'hiring_manager_email',
             'status': 'status'  # 保留字
         }
         
@@ -408,13 +652,23 @@ def update_job(job_id: str, data: Dict[str, Any]) -> Dict[str, Any]:
         print(f"表達式名稱: {expression_names}")
         print(f"表達式值: {expression_values}")
         
-        # 執行更新
-        jobs_table.update_item(
-            Key={'job_id': job_id},
-            UpdateExpression=update_expression,
-            ExpressionAttributeNames=expression_names,
-            ExpressionAttributeValues=expression_values
+        # 執行更新；狀態、團隊等計數欄位變更時，職缺統計在同一筆交易中累加
+        operation = batch_writes.update_operation(
+            JOBS_TABLE_NAME, {'job_id': job_id}, update_expression,
+            names=expression_names, values=expression_values
         )
+        stats_changes = job_stats.delta(existing_job, {
+            **existing_job,
+            **{field: expression_values[f':{field}'] for field in updatable_fields if field in data}
+        })
+        if stats_changes:
+            job_stats.unchanged_condition(operation, existing_job)
+        try:
+            job_stats.transact(operation, stats_changes)
+        except ClientError as e:
+            if job_stats.condition_failed(e):
+                return response(409, {'error': '職缺已被其他請求更新，請重新讀取後再試'})
+            raise
         
         # 取得更新後的資料
         updated_response = jobs_table.get_item(Key={'job_id': job_id})
@@ -422,18 +676,22 @@ def update_job(job_id: str, data: Dict[str, Any]) -> Dict[str, Any]:
         
         print(f"更新後的職缺資料: {updated_job}")
         
-        # 備份到 S3
-        backup_key = f"backups/jobs/{job_id}.json"
-        s3.put_object(
-            Bucket=S3_BUCKET,
-            Key=backup_key,
-            Body=json.dumps(updated_job, cls=DecimalEncoder, ensure_ascii=False, indent=2),
-            ContentType='application/json'
-        )
+        # 只有評分欄位變更或職缺重新開放時才重算配對；薪資、說明等欄位不影響分數
+        scoring_changes = changed_scoring_fields(existing_job, data)
+        reactivated = updated_job.get('status') == 'active' and existing_job.get('status') != 'active'
+        rescore_triggered = False
+        if updated_job.get('status') == 'active' and (scoring_changes or reactivated):
+            reason = f"欄位變更: {', '.join(scoring_changes)}" if scoring_changes else '職缺重新開放'
+            rescore_triggered = trigger_job_rescoring(job_id, reason)
+        trigger_requirement_extraction(job_id)
+        job_search.index_job(updated_job)
+        if 'active' in (existing_job.get('status'), updated_job.get('status')):
+            trigger_job_board_publish(f'職缺更新 {job_id}')
         
         return response(200, {
             'message': '職缺更新成功',
-            'data': updated_job
+            'data': updated_job,
+            'rescore_triggered': rescore_triggered
         })
         
     except Exception as e:
@@ -450,28 +708,30 @@ def delete_job(job_id: str) -> Dict[str, Any]:
         if 'Item' not in existing_response:
             return response(404, {'error': '職缺不存在'})
         
-        # 軟刪除：更新狀態為 deleted
-        jobs_table.update_item(
-            Key={'job_id': job_id},
-            UpdateExpression='SET #status = :status, updated_at = :updated_at',
-            ExpressionAttributeNames={'#status': 'status'},
-            ExpressionAttributeValues={
+        # 軟刪除：更新狀態為 deleted，並從職缺統計扣除
+        existing_job = existing_response['Item']
+        operation = batch_writes.update_operation(
+            JOBS_TABLE_NAME, {'job_id': job_id},
+            'SET #status = :status, updated_at = :updated_at',
+            names={'#status': 'status'},
+            values={
                 ':status': 'deleted',
                 ':updated_at': datetime.utcnow().isoformat()
             }
         )
+        stats_changes = job_stats.delta(existing_job, {**existing_job, 'status': 'deleted'})
+        if stats_changes:
+            job_stats.unchanged_condition(operation, existing_job)
+        try:
+            job_stats.transact(operation, stats_changes)
+        except ClientError as e:
+            if job_stats.condition_failed(e):
+                return response(409, {'error': '職缺已被其他請求更新，請重新讀取後再試'})
+            raise
         
-        # 取得更新後的資料並備份
-        updated_response = jobs_table.get_item(Key={'job_id': job_id})
-        updated_job = updated_response['Item']
-        
-        backup_key = f"backups/jobs/{job_id}.json"
-        s3.put_object(
-            Bucket=S3_BUCKET,
-            Key=backup_key,
-            Body=json.dumps(updated_job, cls=DecimalEncoder, ensure_ascii=False, indent=2),
-            ContentType='application/json'
-        )
+        job_search.remove_job(job_id)
+        if existing_response['Item'].get('status') == 'active':
+            trigger_job_board_publish(f'職缺刪除 {job_id}')
         
         return response(200, {'message': '職缺刪除成功'})
         
@@ -479,86 +739,269 @@ def delete_job(job_id: str) -> Dict[str, Any]:
         print(f"刪除職缺失敗: {str(e)}")
         return response(500, {'error': '刪除職缺失敗'})
 
-def fix_existing_jobs_team_info() -> Dict[str, Any]:
-    """修正現有職缺的團隊資訊，補充缺失的中文名稱"""
+def get_job_stats() -> Dict[str, Any]:
+    """職缺統計（讀取物化的聚合項目，不掃描職缺表）"""
+    try:
+        return response(200, {'stats': job_stats.get_stats()})
+        
+    except Exception as e:
+        print(f"取得職缺統計失敗: {str(e)}")
+        return response(500, {'error': '取得職缺統計失敗'})
+
+def run_follow_ups(func, items: List[Any]) -> List[Any]:
+    """以固定大小的執行緒池執行批次寫入後的後續處理（評分、需求萃取、搜尋索引）"""
+    if not items:
+        return []
+    with ThreadPoolExecutor(max_workers=max(1, min(BATCH_FOLLOW_UP_CONCURRENCY, len(items)))) as executor:
+        return list(executor.map(func, items))
+
+def batch_create_jobs(data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    批次建立職缺
+    
+    一次驗證所有項目、每個 team_id 只查詢一次，通過的項目以 TransactWriteItems 分組寫入，
+    每組附帶該組職缺統計的 ADD；單筆失敗不影響其他項目，回應逐筆列出結果
+    """
+    jobs = data.get('jobs')
+    if not isinstance(jobs, list) or not jobs:
+        return response(400, {'error': '請提供 jobs 陣列'})
+    if len(jobs) > MAX_BATCH_ITEMS:
+        return response(400, {'error': f'每次最多建立 {MAX_BATCH_ITEMS} 個職缺'})
+    
+    try:
+        results: List[Optional[Dict[str, Any]]] = [None] * len(jobs)
+        
+        # 一次驗證所有項目
+        valid_indexes = []
+        for index, job in enumerate(jobs):
+            validation_error = validate_job_data(job) if isinstance(job, dict) else '職缺資料必須是物件'
+            if validation_error:
+                results[index] = {'index': index, 'success': False, 'error': validation_error}
+            else:
+                valid_indexes.append(index)
+        
+        # 每個不同的 team_id 只查詢一次
+        teams = batch_get_teams(sorted({jobs[index]['team_id'] for index in valid_indexes}))
+        items, item_indexes = [], []
+        for index in valid_indexes:
+            team_data = teams.get(jobs[index]['team_id'])
+            if not team_data:
+                results[index] = {'index': index, 'success': False, 'error': '指定的團隊不存在'}
+                continue
+            items.append(build_job_item(jobs[index], team_data))
+            item_indexes.append(index)
+        
+        deltas = [job_stats.delta(None, item) for item in items]
+        failures = batch_writes.transact_writes(
+            [batch_writes.put_operation(JOBS_TABLE_NAME, item, 'attribute_not_exists(job_id)') for item in items],
+            companion=lambda indexes: job_stats.stats_operation(job_stats.merge(deltas[i] for i in indexes))
+        )
+        created = []
+        for position, item in enumerate(items):
+            index = item_indexes[position]
+            if position in failures:
+                results[index] = {'index': index, 'success': False, 'error': f'寫入失敗: {failures[position]}'}
+            else:
+                results[index] = {'index': index, 'success': True, 'job_id': item['job_id']}
+                created.append(item)
+        
+        run_follow_ups(on_job_created, created)
+        if any(job['status'] == 'active' for job in created):
+            trigger_job_board_publish(f'批次建立 {len(created)} 個職缺')
+        
+        return response(200, {
+            'message': f'批次建立完成：成功 {len(created)} 筆，失敗 {len(jobs) - len(created)} 筆',
+            'total': len(jobs),
+            'succeeded': len(created),
+            'failed': len(jobs) - len(created),
+            'results': results
+        })
+        
+    except Exception as e:
+        print(f"批次建立職缺失敗: {str(e)}")
+        import traceback
+        print(traceback.format_exc())
+        return response(500, {'error': '批次建立職缺失敗'})
+
+def batch_update_job_status(data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    批次更新職缺狀態
+    
+    以 BatchGetItem 一次讀取所有職缺，狀態需要變更的項目以 TransactWriteItems 條件更新
+    （計數欄位必須仍是讀到的值），每組附帶職缺統計的 ADD；已是目標狀態的職缺不寫入，回應逐筆列出結果
+    """
+    job_ids = data.get('job_ids')
+    status = data.get('status')
+    if not isinstance(job_ids, list) or not job_ids:
+        return response(400, {'error': '請提供 job_ids 陣列'})
+    if not status:
+        return response(400, {'error': '缺少必填欄位: status'})
+    validation_error = validate_job_data({'status': status}, is_update=True)
+    if validation_error:
+        return response(400, {'error': validation_error})
+    
+    unique_ids = list(dict.fromkeys(str(job_id) for job_id in job_ids))
+    if len(unique_ids) > MAX_BATCH_ITEMS:
+        return response(400, {'error': f'每次最多更新 {MAX_BATCH_ITEMS} 個職缺'})
+    
     try:
-        # 取得所有職缺
-        jobs_response = jobs_table.scan()
-        jobs = jobs_response['Items']
-        
-        # 取得所有團隊資料
-        teams_response = teams_table.scan()
-        teams = {team['team_id']: team for team in teams_response['Items']}
-        
-        updated_count = 0
-        
-        for job in jobs:
-            job_id = job['job_id']
-            team_id = job['team_id']
-            
-            # 檢查是否需要更新團隊資訊
-            needs_update = False
-            update_data = {}
-            
-            if team_id in teams:
-                team_data = teams[team_id]
-                
-                # 檢查並更新缺失的欄位
-                if not job.get('company') and team_data.get('company'):
-                    update_data['company'] = team_data['company']
-                    needs_update = True
-                
-                if not job.get('department') and team_data.get('department'):
-                    update_data['department'] = team_data['department']
-                    needs_update = True
-                
-                if not job.get('team_name') and team_data.get('team_name'):
-                    update_data['team_name'] = team_data['team_name']
-                    needs_update = True
-                
-                # 補充代碼欄位
-                if not job.get('company_code') and team_data.get('company_code'):
-                    update_data['company_code'] = team_data['company_code']
-                    needs_update = True
-                
-                if not job.get('dept_code') and team_data.get('dept_code'):
-                    update_data['dept_code'] = team_data['dept_code']
-                    needs_update = True
-                
-                if not job.get('team_code') and team_data.get('team_code'):
-                    update_data['team_code'] = team_data['team_code']
-                    needs_update = True
-            
-            # 如果需要更新，執行更新
-            if needs_update:
-                update_expression = 'SET updated_at = :updated_at'
-                expression_values = {':updated_at': datetime.utcnow().isoformat()}
-                
-                for field, value in update_data.items():
-                    update_expression += f', {field} = :{field}'
-                    expression_values[f':{field}'] = value
-                
-                jobs_table.update_item(
-                    Key={'job_id': job_id},
-                    UpdateExpression=update_expression,
-                    ExpressionAttributeValues=expression_values
-                )
-                
-                updated_count += 1
-                print(f"已更新職缺 {job_id} 的團隊資訊")
+        existing = batch_get_jobs(unique_ids)
+        outcomes: Dict[str, Dict[str, Any]] = {}
+        targets = []
+        for job_id in unique_ids:
+            job = existing.get(job_id)
+            if not job or job.get('status') == 'deleted':
+                outcomes[job_id] = {'success': False, 'error': '職缺不存在'}
+            elif job.get('status') == status:
+                outcomes[job_id] = {'success': True, 'unchanged': True}
+            else:
+                targets.append(job_id)
         
+        timestamp = datetime.utcnow().isoformat()
+        operations = [
+            job_stats.unchanged_condition(batch_writes.update_operation(
+                JOBS_TABLE_NAME, {'job_id': job_id},
+                'SET #status = :status, updated_at = :updated_at',
+                names={'#status': 'status'},
+                values={':status': status, ':updated_at': timestamp}
+            ), existing[job_id])
+            for job_id in targets
+        ]
+        deltas = [job_stats.delta(existing[job_id], {**existing[job_id], 'status': status}) for job_id in targets]
+        failures = batch_writes.transact_writes(
+            operations,
+            companion=lambda indexes: job_stats.stats_operation(job_stats.merge(deltas[i] for i in indexes))
+        )
+        
+        updated = []
+        for position, job_id in enumerate(targets):
+            if position in failures:
+                error = ('職缺已被其他請求更新，請重新讀取後再試' if failures[position] == 'ConditionalCheckFailed'
+                         else f'寫入失敗: {failures[position]}')
+                outcomes[job_id] = {'success': False, 'error': error}
+            else:
+                outcomes[job_id] = {'success': True, 'previous_status': existing[job_id].get('status')}
+                updated.append({**existing[job_id], 'status': status, 'updated_at': timestamp})
+        
+        def follow_up(job: Dict[str, Any]) -> None:
+            if status == 'active':
+                trigger_job_rescoring(job['job_id'], '職缺重新開放')
+            job_search.index_job(job)
+        
+        run_follow_ups(follow_up, updated)
+        if updated and (status == 'active' or any(existing[job['job_id']].get('status') == 'active' for job in updated)):
+            trigger_job_board_publish(f'批次更新 {len(updated)} 個職缺狀態為 {status}')
+        
+        results = [{'job_id': job_id, **outcomes[job_id]} for job_id in unique_ids]
+        succeeded = sum(1 for result in results if result['success'])
         return response(200, {
-            'message': f'已修正 {updated_count} 個職缺的團隊資訊',
-            'updated_count': updated_count
+            'message': f'批次更新完成：成功 {succeeded} 筆，失敗 {len(results) - succeeded} 筆',
+            'status': status,
+            'total': len(results),
+            'succeeded': succeeded,
+            'failed': len(results) - succeeded,
+            'results': results
+        })
+        
+    except Exception as e:
+        print(f"批次更新職缺狀態失敗: {str(e)}")
+        import traceback
+        print(traceback.format_exc())
+        return response(500, {'error': '批次更新職缺狀態失敗'})
+
+def invoke_maintenance_action(action: str, **payload) -> bool:
+    """非同步呼叫自己執行維護工作；不在 Lambda 中執行（本機測試）時直接執行"""
+    try:
+        event = {'action': action, **payload}
+        function_name = os.environ.get('AWS_LAMBDA_FUNCTION_NAME')
+        if not function_name:
+            return handle_maintenance_action(event)['statusCode'] == 200
+        lambda_client.invoke(
+            FunctionName=function_name,
+            InvocationType='Event',
+            Payload=json.dumps(event, ensure_ascii=False).encode('utf-8')
+        )
+        return True
+    except Exception as e:
+        print(f"觸發維護工作失敗: {action}, {str(e)}")
+        return False
+
+def fix_existing_jobs_team_info(data: Dict[str, Any]) -> Dict[str, Any]:
+    """以背景工作修正現有職缺的團隊資訊（補充缺失的中文名稱與代碼），立即回傳工作進度"""
+    try:
+        if data.get('resume'):
+            # 從失敗的執行接續（只處理尚未完成的分段）
+            run_id = team_info_repair.reopen_failed_run()
+            if not run_id:
+                return response(409, {'error': '沒有可接續的失敗執行'})
+        else:
+            run_id = team_info_repair.start_run(dry_run=bool(data.get('dry_run', False)))['run_id']
+        
+        if not invoke_maintenance_action('fix_team_info', run_id=run_id):
+            return response(500, {'error': '啟動團隊資訊修復失敗'})
+        
+        return response(202, {
+            'message': '團隊資訊修復已開始，可由 GET /jobs/fix-team-info 查詢進度',
+            'progress': team_info_repair.progress_summary(team_info_repair.get_progress() or {})
         })
         
     except Exception as e:
         print(f"修正職缺團隊資訊失敗: {str(e)}")
         return response(500, {'error': '修正職缺團隊資訊失敗'})
 
-def lambda_handler(event, context):
-    """Lambda 主函數"""
+def get_team_info_repair_progress() -> Dict[str, Any]:
+    """查詢團隊資訊修復的進度（dry_run 時包含差異樣本）"""
+    try:
+        checkpoint = team_info_repair.get_progress()
+        if not checkpoint:
+            return response(404, {'error': '尚未執行過團隊資訊修復'})
+        return response(200, {'progress': team_info_repair.progress_summary(checkpoint)})
+        
+    except Exception as e:
+        print(f"查詢團隊資訊修復進度失敗: {str(e)}")
+        return response(500, {'error': '查詢團隊資訊修復進度失敗'})
+
+def handle_maintenance_action(event: Dict[str, Any], context=None) -> Dict[str, Any]:
+    """處理排程或手動觸發的維護工作（非 API Gateway 事件）"""
+    action = event.get('action')
+    print(f"執行維護工作: {action}")
+    
+    if action == 'merge_job_search_index':
+        result = job_search.merge_deltas()
+    elif action == 'publish_job_board':
+        result = job_board.publish()
+    elif action == 'rebuild_job_search_index':
+        result = job_search.rebuild_from_table(jobs_table, segments=SCAN_SEGMENTS)
+    elif action == 'rebuild_job_stats':
+        # 初次部署或統計出現偏差時，由全表重算
+        result = job_stats.rebuild(table_scan.TableScan(
+            jobs_table, segments=SCAN_SEGMENTS, projection=['job_id'] + job_stats.COUNTED_FIELDS
+        ))
+    elif action == 'sync_team_info':
+        # 團隊管理 Lambda 更新團隊欄位後送出的變更事件
+        result = team_sync.sync_team(event['team_id'])
+        if result.get('active_updated'):
+            trigger_job_board_publish(f"團隊資料變更 {event['team_id']}")
+    elif action == 'fix_team_info':
+        checkpoint = team_info_repair.run(event['run_id'], context)
+        result = team_info_repair.progress_summary(checkpoint)
+        if checkpoint.get('status') == 'completed' and not checkpoint.get('dry_run') and checkpoint.get('updated'):
+            # 團隊名稱與公司會出現在搜尋索引與公開看板
+            invoke_maintenance_action('rebuild_job_search_index')
+            trigger_job_board_publish('職缺團隊資訊修復')
+    else:
+        return {'statusCode': 400, 'body': json.dumps({'error': f'未知的維護工作: {action}'}, ensure_ascii=False)}
+    
+    print(f"維護工作完成: {result}")
+    return {'statusCode': 200, 'body': json.dumps(result, cls=DecimalEncoder, ensure_ascii=False)}
+
+def route_request(event, context):
+    """依方法與路徑分派請求"""
     try:
+        # 排程 / 手動觸發的維護工作
+        if 'action' in event and 'httpMethod' not in event:
+            return handle_maintenance_action(event, context)
+        
         # 處理 CORS preflight 請求
         if event['httpMethod'] == 'OPTIONS':
             return response(200, {'message': 'CORS preflight success'})
@@ -581,10 +1024,30 @@ def lambda_handler(event, context):
             # 建立職缺
             return create_job(body)
         
+        elif method == 'POST' and path == '/jobs:batch':
+            # 批次建立職缺
+            return batch_create_jobs(body)
+        
+        elif method == 'PATCH' and path == '/jobs:batchStatus':
+            # 批次更新職缺狀態
+            return batch_update_job_status(body)
+        
         elif method == 'GET' and path == '/jobs':
             # 列出職缺
             return list_jobs(query_params)
         
+        elif method == 'GET' and path == '/jobs/stats':
+            # 職缺統計
+            return get_job_stats()
+        
+        elif method == 'GET' and path == '/jobs/fix-team-info':
+            # 團隊資訊修復的進度
+            return get_team_info_repair_progress()
+        
+        elif method == 'POST' and path == '/jobs/fix-team-info':
+            # 修正現有職缺的團隊資訊（背景執行）
+            return fix_existing_jobs_team_info(body)
+        
         elif method == 'GET' and path.startswith('/jobs/'):
             # 取得單一職缺
             job_id = path.split('/')[-1]
@@ -600,13 +1063,13 @@ def lambda_handler(event, context):
             job_id = path.split('/')[-1]
             return delete_job(job_id)
         
-        elif method == 'POST' and path == '/jobs/fix-team-info':
-            # 修正現有職缺的團隊資訊
-            return fix_existing_jobs_team_info()
-        
         else:
             return response(404, {'error': '找不到指定的路由'})
     
     except Exception as e:
         print(f"Lambda 執行錯誤: {str(e)}")
         return response(500, {'error': '伺服器內部錯誤'})
+
+def lambda_handler(event, context):
+    """Lambda 主函數：處理請求後為 GET 回應加上 ETag / Cache-Control（If-None-Match 符合時回傳 304）"""
+    return http_cache.conditional(event, route_request(event, context), CACHE_CONTROL_RULES)
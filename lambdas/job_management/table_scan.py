@@ -0,0 +1,221 @@
+"""
+DynamoDB 全表讀取（Scan）的共用迭代器
+
+單次 scan 最多只回傳 1 MB，必須跟著 LastEvaluatedKey 繼續讀取才會完整。TableScan 負責：
+
+- 分頁：持續讀取直到沒有 LastEvaluatedKey（或達到 limit）
+- 平行分段：segments > 1 時以 Segment / TotalSegments 分段，每段一個執行緒同時讀取
+- 投影：projection 只讀取需要的欄位（自動以 ExpressionAttributeNames 處理保留字，例如 status）
+- 容量預算：capacity_budget 設定 RCU 上限，用完後不再發出新的請求，budget_exhausted 標記結果不完整
+- 串流：以 generator 逐頁回傳，讀到一頁就能處理一頁，不需把整張表放進記憶體
+
+平行分段時各段的頁面交錯回傳，不保證順序。
+
+job_management、team_management、resume_management、table_backup 各有一份相同的模組，修改時請同步。
+"""
+import base64
+import json
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+# 平行分段時每段最多預先讀取的頁數，避免讀取速度遠快於處理速度時佔用過多記憶體
+PREFETCH_PAGES_PER_SEGMENT = 2
+_DONE = object()
+
+
+class TableScan:
+    """
+    可重複迭代的全表讀取
+
+    for item in TableScan(jobs_table, segments=4, projection=['job_id', 'team_id']):
+        ...
+
+    讀取完成後可由 pages_read、scanned_count、consumed_capacity、budget_exhausted 查看統計；
+    單段讀取時 next_start_key 為下一次接續的位置（None 代表已讀完）。
+    """
+
+    def __init__(self, table, segments: int = 1, projection: Optional[Sequence[str]] = None,
+                 filter_expression=None, page_size: Optional[int] = None, limit: Optional[int] = None,
+                 capacity_budget: Optional[float] = None, start_key: Optional[Dict[str, Any]] = None,
+                 key_fields: Sequence[str] = ()):
+        """
+        :param segments: 平行分段數（1 代表循序讀取）
+        :param projection: 只讀取的欄位名稱
+        :param filter_expression: boto3 的 Attr 條件
+        :param page_size: 每次 scan 的 Limit
+        :param limit: 最多回傳的項目數（只支援單段讀取）
+        :param capacity_budget: 消耗的讀取容量（RCU）上限
+        :param start_key: 由 next_start_key 接續讀取（只支援單段讀取）
+        :param key_fields: 資料表的主鍵欄位；limit 在頁面中間停止時用來組出 next_start_key
+        """
+        if segments < 1:
+            raise ValueError('segments 必須大於 0')
+        if limit is not None and limit < 1:
+            raise ValueError('limit 必須大於 0')
+        if segments > 1 and (limit or start_key):
+            raise ValueError('limit 與 start_key 只支援單段讀取')
+        self.table = table
+        self.segments = segments
+        self.projection = list(projection or [])
+        self.filter_expression = filter_expression
+        self.page_size = page_size
+        self.limit = limit
+        self.capacity_budget = capacity_budget
+        self.start_key = start_key
+        self.key_fields = list(key_fields)
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self) -> None:
+        self.pages_read = 0
+        self.scanned_count = 0
+        self.item_count = 0
+        self.consumed_capacity = 0.0
+        self.budget_exhausted = False
+        self.next_start_key = None
+
+    def _scan_kwargs(self) -> Dict[str, Any]:
+        scan_kwargs: Dict[str, Any] = {'ReturnConsumedCapacity': 'TOTAL'}
+        if self.projection:
+            names = {f"#p{i}": field for i, field in enumerate(self.projection)}
+            scan_kwargs['ProjectionExpression'] = ', '.join(names)
+            scan_kwargs['ExpressionAttributeNames'] = names
+        if self.filter_expression is not None:
+            scan_kwargs['FilterExpression'] = self.filter_expression
+        if self.page_size:
+            scan_kwargs['Limit'] = self.page_size
+        return scan_kwargs
+
+    def _over_budget(self) -> bool:
+        with self._lock:
+            if self.capacity_budget is not None and self.consumed_capacity >= self.capacity_budget:
+                self.budget_exhausted = True
+            return self.budget_exhausted
+
+    def _segment_pages(self, segment: Optional[int], stop: Optional[threading.Event] = None) -> Iterator[Dict[str, Any]]:
+        """讀取一個分段（segment 為 None 代表不分段），逐頁回傳 scan 回應"""
+        scan_kwargs = self._scan_kwargs()
+        if segment is not None:
+            scan_kwargs.update({'Segment': segment, 'TotalSegments': self.segments})
+        if self.start_key:
+            scan_kwargs['ExclusiveStartKey'] = self.start_key
+        while True:
+            if (stop is not None and stop.is_set()) or self._over_budget():
+                return
+            scan_response = self.table.scan(**scan_kwargs)
+            with self._lock:
+                self.pages_read += 1
+                self.scanned_count += scan_response.get('ScannedCount', 0)
+                self.consumed_capacity += float((scan_response.get('ConsumedCapacity') or {}).get('CapacityUnits', 0))
+            yield scan_response
+            if 'LastEvaluatedKey' not in scan_response:
+                return
+            scan_kwargs['ExclusiveStartKey'] = scan_response['LastEvaluatedKey']
+
+    def _sequential_pages(self) -> Iterator[List[Dict[str, Any]]]:
+        self.next_start_key = self.start_key
+        for scan_response in self._segment_pages(None):
+            items = scan_response.get('Items', [])
+            self.next_start_key = scan_response.get('LastEvaluatedKey')
+            if self.limit is not None and self.item_count + len(items) > self.limit:
+                # 在頁面中間停止：下一次從最後回傳的項目之後接續
+                if not self.key_fields:
+                    raise ValueError('limit 在頁面中間停止時需要 key_fields 才能接續')
+                items = items[:self.limit - self.item_count]
+                self.next_start_key = {field: items[-1][field] for field in self.key_fields}
+            self.item_count += len(items)
+            if items:
+                yield items
+            if self.limit is not None and self.item_count >= self.limit:
+                return
+
+    def _parallel_pages(self) -> Iterator[List[Dict[str, Any]]]:
+        pages: queue.Queue = queue.Queue(maxsize=self.segments * PREFETCH_PAGES_PER_SEGMENT)
+        stop = threading.Event()
+
+        def offer(value) -> bool:
+            """放入佇列；呼叫端已停止讀取時放棄"""
+            while True:
+                try:
+                    pages.put(value, timeout=0.5)
+                    return True
+                except queue.Full:
+                    if stop.is_set():
+                        return False
+
+        def read_segment(segment: int) -> None:
+            try:
+                for scan_response in self._segment_pages(segment, stop):
+                    items = scan_response.get('Items', [])
+                    if items and not offer(items):
+                        return
+            except Exception as e:
+                offer(e)
+            finally:
+                offer(_DONE)
+
+        executor = ThreadPoolExecutor(max_workers=self.segments)
+        try:
+            for segment in range(self.segments):
+                executor.submit(read_segment, segment)
+            finished = 0
+            while finished < self.segments:
+                page = pages.get()
+                if page is _DONE:
+                    finished += 1
+                elif isinstance(page, Exception):
+                    raise page
+                else:
+                    self.item_count += len(page)
+                    yield page
+        finally:
+            # 呼叫端提前結束或發生錯誤時通知其他分段停止
+            stop.set()
+            executor.shutdown(wait=False)
+
+    def pages(self) -> Iterator[List[Dict[str, Any]]]:
+        """逐頁回傳項目（空頁面會略過）"""
+        self._reset()
+        if self.segments == 1:
+            return self._sequential_pages()
+        return self._parallel_pages()
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for page in self.pages():
+            yield from page
+
+    def all(self) -> List[Dict[str, Any]]:
+        return list(self)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'segments': self.segments,
+            'pages_read': self.pages_read,
+            'scanned_count': self.scanned_count,
+            'item_count': self.item_count,
+            'consumed_capacity': round(self.consumed_capacity, 2),
+            'budget_exhausted': self.budget_exhausted
+        }
+
+
+def encode_start_key(start_key: Optional[Dict[str, Any]]) -> Optional[str]:
+    """把 next_start_key 轉成不透明的 cursor 字串"""
+    if not start_key:
+        return None
+    payload = json.dumps(start_key, default=lambda o: int(o) if o == int(o) else float(o),
+                         separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(payload).decode('ascii')
+
+
+def decode_start_key(cursor: str, key_fields: Sequence[str]) -> Dict[str, Any]:
+    """還原 cursor；格式錯誤或主鍵欄位不符時拋出 ValueError"""
+    try:
+        start_key = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')), parse_float=Decimal)
+    except Exception:
+        raise ValueError('cursor 格式不正確')
+    if not isinstance(start_key, dict) or set(start_key) != set(key_fields):
+        raise ValueError('cursor 與資料表不符')
+    return start_key
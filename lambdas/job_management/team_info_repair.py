@@ -0,0 +1,234 @@
+"""
+職缺團隊資訊的背景修復（fix-team-info）
+
+依團隊表補齊職缺缺少的公司、部門、團隊名稱與代碼。職缺數量多時無法在 API Gateway 的 29 秒內完成，
+因此 API 只建立工作並非同步呼叫自己執行：
+
+- 全表切成 REPAIR_SEGMENTS 個分段（Segment / TotalSegments），以 REPAIR_SCAN_CONCURRENCY 個執行緒同時讀取
+- 需要修正的職缺交給共用、大小固定的執行緒池（REPAIR_UPDATE_CONCURRENCY）做條件更新：
+  只在欄位仍為空、且 team_id 未變更時寫入，與使用者同時編輯不會互相覆蓋
+- 每個分段完成後把結果寫入 background-task 表作為 checkpoint（background_task）；
+  Lambda 剩餘時間不足時不再開始新的分段，以相同 run_id 非同步呼叫自己，只處理尚未完成的分段
+- dry_run 只比對不寫入，checkpoint 中保留每個分段的差異樣本，供進度 API 檢視
+
+同時只會有一個 run_id 有效：checkpoint 以 run_id 作為條件更新，被新一輪取代的舊執行會在下一個分段停止。
+"""
+import os
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, Dict, List, Optional
+
+import boto3
+from botocore.exceptions import ClientError
+
+import background_task
+import table_scan
+from background_task import RunSuperseded, save_checkpoint
+
+dynamodb = boto3.resource('dynamodb')
+
+JOBS_TABLE_NAME = os.environ.get('JOBS_TABLE_NAME', 'benson-haire-job-posting')
+TEAMS_TABLE_NAME = os.environ.get('TEAMS_TABLE_NAME', 'benson-haire-teams')
+
+REPAIR_SEGMENTS = int(os.environ.get('TEAM_INFO_REPAIR_SEGMENTS', '16'))
+REPAIR_SCAN_CONCURRENCY = int(os.environ.get('TEAM_INFO_SCAN_CONCURRENCY', '4'))
+REPAIR_UPDATE_CONCURRENCY = int(os.environ.get('TEAM_INFO_UPDATE_CONCURRENCY', '8'))
+# 剩餘時間低於此值時不再開始新的分段
+CONTINUE_BELOW_MS = 2 * 60 * 1000
+# dry_run 時每個分段保留的差異筆數（checkpoint 項目上限 400 KB）
+DIFF_SAMPLE_PER_SEGMENT = 20
+
+TASK_ID = 'fix-team-info#jobs'
+TEAM_INFO_FIELDS = ['company', 'department', 'team_name', 'company_code', 'dept_code', 'team_code']
+
+jobs_table = dynamodb.Table(JOBS_TABLE_NAME)
+teams_table = dynamodb.Table(TEAMS_TABLE_NAME)
+
+
+def get_progress() -> Optional[Dict[str, Any]]:
+    return background_task.get_checkpoint(TASK_ID)
+
+
+def start_run(dry_run: bool, segments: int = REPAIR_SEGMENTS) -> Dict[str, Any]:
+    """建立新一輪的 checkpoint（取代先前的執行）"""
+    return background_task.start_run(
+        TASK_ID, 'fix_team_info',
+        dry_run=dry_run,
+        total_segments=segments,
+        segments={str(segment): {'status': 'pending'} for segment in range(segments)},
+        scanned=0, needs_update=0, updated=0, skipped=0
+    )
+
+
+def save_segment(checkpoint: Dict[str, Any], segment: int, state: Dict[str, Any]) -> None:
+    """記錄完成的分段並累加計數（以 ADD 原子累加，可由多個執行緒同時呼叫）"""
+    counters = {field: state[field] for field in ('scanned', 'needs_update', 'updated', 'skipped')}
+    background_task.conditional_update(
+        checkpoint,
+        'SET #segments.#segment = :state, updated_at = :updated_at ADD '
+        + ', '.join(f"#{field} :{field}" for field in counters),
+        {'#segments': 'segments', '#segment': str(segment), **{f"#{field}": field for field in counters}},
+        {':state': state, ':updated_at': datetime.utcnow().isoformat(),
+         **{f":{field}": value for field, value in counters.items()}}
+    )
+
+
+def missing_team_info(job: Dict[str, Any], team: Dict[str, Any]) -> Dict[str, Any]:
+    """職缺缺少、團隊有值的欄位"""
+    return {field: team[field] for field in TEAM_INFO_FIELDS if not job.get(field) and team.get(field)}
+
+
+def apply_fix(job: Dict[str, Any], changes: Dict[str, Any]) -> bool:
+    """
+    條件更新一筆職缺
+
+    :return: False 代表讀取後職缺已被修改（欄位已有值、換了團隊或已刪除），略過
+    """
+    names = {f"#{field}": field for field in changes}
+    values = {f":{field}": value for field, value in changes.items()}
+    values.update({':updated_at': datetime.utcnow().isoformat(), ':team_id': job.get('team_id', ''), ':empty': ''})
+    try:
+        jobs_table.update_item(
+            Key={'job_id': job['job_id']},
+            UpdateExpression='SET updated_at = :updated_at, ' + ', '.join(f"#{field} = :{field}" for field in changes),
+            ConditionExpression='team_id = :team_id AND ' + ' AND '.join(
+                f"(attribute_not_exists(#{field}) OR #{field} = :empty)" for field in changes),
+            ExpressionAttributeNames=names,
+            ExpressionAttributeValues=values
+        )
+        return True
+    except ClientError as e:
+        if e.response['Error']['Code'] == 'ConditionalCheckFailedException':
+            return False
+        raise
+
+
+def repair_segment(segment: int, total_segments: int, teams: Dict[str, Dict[str, Any]],
+                   dry_run: bool, update_pool: ThreadPoolExecutor) -> Dict[str, Any]:
+    """讀取一個分段並修正（或比對）其中的職缺，回傳分段結果"""
+    projection = ['job_id', 'team_id'] + TEAM_INFO_FIELDS
+    names = {f"#p{i}": field for i, field in enumerate(projection)}
+    scan_kwargs = {
+        'Segment': segment,
+        'TotalSegments': total_segments,
+        'ProjectionExpression': ', '.join(names),
+        'ExpressionAttributeNames': names
+    }
+    state = {'status': 'completed', 'scanned': 0, 'needs_update': 0, 'updated': 0, 'skipped': 0, 'diff': []}
+    while True:
+        scan_response = jobs_table.scan(**scan_kwargs)
+        pending = []
+        for job in scan_response.get('Items', []):
+            state['scanned'] += 1
+            team = teams.get(job.get('team_id', ''))
+            changes = missing_team_info(job, team) if team else {}
+            if not changes:
+                continue
+            state['needs_update'] += 1
+            if dry_run:
+                if len(state['diff']) < DIFF_SAMPLE_PER_SEGMENT:
+                    state['diff'].append({'job_id': job['job_id'], 'team_id': job.get('team_id', ''), 'changes': changes})
+            else:
+                pending.append(update_pool.submit(apply_fix, job, changes))
+        for future in pending:
+            if future.result():
+                state['updated'] += 1
+            else:
+                state['skipped'] += 1
+        if 'LastEvaluatedKey' not in scan_response:
+            break
+        scan_kwargs['ExclusiveStartKey'] = scan_response['LastEvaluatedKey']
+    if not dry_run:
+        del state['diff']
+    return state
+
+
+def run(run_id: str, context=None) -> Dict[str, Any]:
+    """
+    執行（或接續）修復，處理所有尚未完成的分段
+
+    :return: 目前的 checkpoint；這次呼叫沒有實際執行（已被取代或已結束）時帶有 superseded
+    """
+    checkpoint = background_task.resume_run(TASK_ID, run_id)
+    if checkpoint is None:
+        print(f"團隊資訊修復已被取代或已結束，停止接續: run_id={run_id}")
+        return {**(get_progress() or {}), 'superseded': True}
+
+    total_segments = int(checkpoint['total_segments'])
+    remaining = sorted(int(segment) for segment, state in checkpoint['segments'].items()
+                       if state.get('status') != 'completed')
+    dry_run = bool(checkpoint.get('dry_run'))
+    lock = threading.Lock()
+
+    def time_left() -> bool:
+        return context is None or context.get_remaining_time_in_millis() >= CONTINUE_BELOW_MS
+
+    try:
+        teams = {team['team_id']: team for team in table_scan.TableScan(teams_table)}
+        with ThreadPoolExecutor(max_workers=max(1, REPAIR_UPDATE_CONCURRENCY)) as update_pool, \
+                ThreadPoolExecutor(max_workers=max(1, REPAIR_SCAN_CONCURRENCY)) as scan_pool:
+            running = {}
+            while remaining or running:
+                while remaining and len(running) < REPAIR_SCAN_CONCURRENCY and time_left():
+                    segment = remaining.pop(0)
+                    running[scan_pool.submit(repair_segment, segment, total_segments, teams, dry_run, update_pool)] = segment
+                if not running:
+                    break
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    segment = running.pop(future)
+                    state = future.result()
+                    with lock:
+                        save_segment(checkpoint, segment, state)
+                        checkpoint['segments'][str(segment)] = state
+                    print(f"團隊資訊修復進度: 分段 {segment + 1}/{total_segments}, "
+                          f"讀取 {state['scanned']} 筆, 需修正 {state['needs_update']} 筆")
+
+        if remaining:
+            background_task.continue_later(context, {'action': 'fix_team_info', 'run_id': run_id})
+            print(f"剩餘時間不足，交由下一次呼叫接續: 尚有 {len(remaining)} 個分段")
+            return get_progress() or checkpoint
+
+        checkpoint = get_progress() or checkpoint
+        save_checkpoint(checkpoint, status='completed', finished_at=datetime.utcnow().isoformat())
+        return checkpoint
+
+    except RunSuperseded:
+        print(f"團隊資訊修復已被新一輪取代: run_id={run_id}")
+        return {**checkpoint, 'superseded': True}
+    except Exception as e:
+        # 已完成的分段保留在 checkpoint，重新以同一 run_id 呼叫即可接續
+        background_task.fail_run(checkpoint, e)
+        raise
+
+
+def reopen_failed_run() -> Optional[str]:
+    """失敗的執行改回 running，回傳可接續的 run_id"""
+    return background_task.reopen_failed_run(TASK_ID)
+
+
+def _plain(value: Any) -> Any:
+    if isinstance(value, Decimal):
+        return int(value) if value == int(value) else float(value)
+    if isinstance(value, dict):
+        return {key: _plain(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_plain(item) for item in value]
+    return value
+
+
+def progress_summary(checkpoint: Dict[str, Any]) -> Dict[str, Any]:
+    """對外回報用的進度：分段狀態彙總為完成數，dry_run 時合併各分段的差異樣本"""
+    segments = checkpoint.get('segments') or {}
+    summary = {key: value for key, value in checkpoint.items() if key not in ('segments', 'task_id')}
+    summary['completed_segments'] = sum(1 for state in segments.values() if state.get('status') == 'completed')
+    if checkpoint.get('dry_run'):
+        diff: List[Dict[str, Any]] = []
+        for segment in sorted(segments, key=int):
+            diff.extend(segments[segment].get('diff', []))
+        summary['diff'] = diff
+        summary['diff_truncated'] = int(checkpoint.get('needs_update', 0)) > len(diff)
+    summary['has_more'] = checkpoint.get('status') == 'running'
+    return _plain(summary)
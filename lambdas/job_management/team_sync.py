@@ -0,0 +1,113 @@
+"""
+團隊資料變更同步到職缺
+
+create_job 會把團隊的公司、部門、團隊名稱與代碼複製到職缺。團隊管理 Lambda 更新這些欄位後，
+以非同步呼叫送出 sync_team_info 事件（只帶 team_id），由這裡把變更套用到該團隊的所有職缺：
+
+- 重新讀取團隊表的最新資料（事件不帶欄位值，重複或亂序送達都只會套用最新狀態）
+- 以 team-index 分頁查詢該團隊的職缺，不需掃描整張表；欄位已一致的職缺不寫入
+- 每頁需要更新的職缺一起交給大小固定的執行緒池做條件更新
+  （BatchWriteItem 不支援條件，因此以並行的 UpdateItem 代替）：
+  只在 team_id 未變更、且職缺上的 team_info_version 不比這次新時寫入，
+  較晚執行的舊事件不會覆蓋較新的團隊資料
+- 更新後的職缺同步寫入搜尋索引（團隊名稱與公司是搜尋欄位）
+"""
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+import boto3
+from boto3.dynamodb.conditions import Key
+from botocore.exceptions import ClientError
+
+import job_search
+from team_info_repair import TEAM_INFO_FIELDS
+
+dynamodb = boto3.resource('dynamodb')
+
+JOBS_TABLE_NAME = os.environ.get('JOBS_TABLE_NAME', 'benson-haire-job-posting')
+TEAMS_TABLE_NAME = os.environ.get('TEAMS_TABLE_NAME', 'benson-haire-teams')
+
+SYNC_PAGE_SIZE = int(os.environ.get('TEAM_SYNC_PAGE_SIZE', '100'))
+SYNC_UPDATE_CONCURRENCY = int(os.environ.get('TEAM_SYNC_UPDATE_CONCURRENCY', '8'))
+
+jobs_table = dynamodb.Table(JOBS_TABLE_NAME)
+teams_table = dynamodb.Table(TEAMS_TABLE_NAME)
+
+
+def team_info(team: Dict[str, Any]) -> Dict[str, Any]:
+    """職缺上應有的團隊欄位（與 create_job 的複製規則相同）"""
+    return {field: team.get(field, '') for field in TEAM_INFO_FIELDS}
+
+
+def apply_team_info(job_id: str, team_id: str, info: Dict[str, Any], version: str) -> Optional[Dict[str, Any]]:
+    """
+    條件更新一筆職缺的團隊欄位
+
+    :return: 更新後的職缺；職缺已換團隊、已刪除或已套用較新的版本時回傳 None
+    """
+    names = {f"#{field}": field for field in info}
+    names['#team_info_version'] = 'team_info_version'
+    values = {f":{field}": value for field, value in info.items()}
+    values.update({':team_id': team_id, ':version': version, ':updated_at': datetime.utcnow().isoformat()})
+    try:
+        update_response = jobs_table.update_item(
+            Key={'job_id': job_id},
+            UpdateExpression='SET updated_at = :updated_at, #team_info_version = :version, '
+                             + ', '.join(f"#{field} = :{field}" for field in info),
+            ConditionExpression='team_id = :team_id AND '
+                                '(attribute_not_exists(#team_info_version) OR #team_info_version <= :version)',
+            ExpressionAttributeNames=names,
+            ExpressionAttributeValues=values,
+            ReturnValues='ALL_NEW'
+        )
+        return update_response['Attributes']
+    except ClientError as e:
+        if e.response['Error']['Code'] == 'ConditionalCheckFailedException':
+            return None
+        raise
+
+
+def sync_team(team_id: str) -> Dict[str, Any]:
+    """把團隊目前的資料套用到該團隊的所有職缺，回傳統計"""
+    team = teams_table.get_item(Key={'team_id': team_id}).get('Item')
+    if not team:
+        return {'team_id': team_id, 'synced': False, 'reason': '找不到團隊'}
+
+    info = team_info(team)
+    version = str(team.get('updated_at') or datetime.utcnow().isoformat())
+    projection = ['job_id', 'status'] + TEAM_INFO_FIELDS
+    names = {f"#p{i}": field for i, field in enumerate(projection)}
+    query_kwargs = {
+        'IndexName': 'team-index',
+        'KeyConditionExpression': Key('team_id').eq(team_id),
+        'ProjectionExpression': ', '.join(names),
+        'ExpressionAttributeNames': names,
+        'Limit': SYNC_PAGE_SIZE
+    }
+    summary = {'team_id': team_id, 'synced': True, 'version': version,
+               'checked': 0, 'updated': 0, 'skipped': 0, 'active_updated': 0}
+
+    with ThreadPoolExecutor(max_workers=max(1, SYNC_UPDATE_CONCURRENCY)) as update_pool:
+        while True:
+            query_response = jobs_table.query(**query_kwargs)
+            jobs = query_response.get('Items', [])
+            summary['checked'] += len(jobs)
+            stale = [job for job in jobs if any(job.get(field, '') != value for field, value in info.items())]
+            futures = [update_pool.submit(apply_team_info, job['job_id'], team_id, info, version) for job in stale]
+            for future in futures:
+                updated_job = future.result()
+                if updated_job is None:
+                    summary['skipped'] += 1
+                    continue
+                summary['updated'] += 1
+                if updated_job.get('status') == 'active':
+                    summary['active_updated'] += 1
+                job_search.index_job(updated_job)
+            if 'LastEvaluatedKey' not in query_response:
+                break
+            query_kwargs['ExclusiveStartKey'] = query_response['LastEvaluatedKey']
+
+    print(f"團隊資料已同步到職缺: {summary}")
+    return summary
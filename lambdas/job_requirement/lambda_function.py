@@ -0,0 +1,287 @@
+import json
+import os
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, Dict
+
+import boto3
+from botocore.exceptions import ClientError
+
+import requirement_extractor
+
+# 初始化 AWS 服務
+dynamodb = boto3.resource('dynamodb')
+s3 = boto3.client('s3')
+lambda_client = boto3.client('lambda')
+
+# 環境變數
+JOBS_TABLE_NAME = os.environ.get('JOBS_TABLE_NAME', 'benson-haire-job-posting')
+JOB_REQUIREMENT_TABLE_NAME = os.environ.get('JOB_REQUIREMENT_TABLE_NAME', 'benson-haire-job-requirement')
+REQUIREMENT_BUCKET = requirement_extractor.REQUIREMENT_BUCKET
+MATCHER_FUNCTION_NAME = os.environ.get('MATCHER_FUNCTION_NAME', '')
+
+# DynamoDB 表格
+jobs_table = dynamodb.Table(JOBS_TABLE_NAME)
+job_requirement_table = dynamodb.Table(JOB_REQUIREMENT_TABLE_NAME)
+
+class DecimalEncoder(json.JSONEncoder):
+    """處理 DynamoDB Decimal 類型的 JSON 編碼器"""
+    def default(self, o):
+        if isinstance(o, Decimal):
+            return float(o)
+        return super(DecimalEncoder, self).default(o)
+
+def response(status_code: int, body: Dict[str, Any]) -> Dict[str, Any]:
+    """統一的回應格式"""
+    return {
+        'statusCode': status_code,
+        'headers': {
+            'Content-Type': 'application/json',
+            'Access-Control-Allow-Origin': '*',
+            'Access-Control-Allow-Headers': 'Content-Type,X-Amz-Date,Authorization,X-Api-Key,X-Amz-Security-Token',
+            'Access-Control-Allow-Methods': 'GET,POST,PUT,OPTIONS'
+        },
+        'body': json.dumps(body, cls=DecimalEncoder, ensure_ascii=False)
+    }
+
+def save_version_snapshot(job_id: str, version: int, snapshot: Dict[str, Any]) -> None:
+    """每個版本保存一份到 S3（job-requirements/{job_id}/v{version}.json），表格只保留最新與已確認的版本"""
+    if not REQUIREMENT_BUCKET:
+        return
+    try:
+        s3.put_object(
+            Bucket=REQUIREMENT_BUCKET,
+            Key=f"job-requirements/{job_id}/v{version}.json",
+            Body=json.dumps(snapshot, cls=DecimalEncoder, ensure_ascii=False, indent=2).encode('utf-8'),
+            ContentType='application/json; charset=utf-8'
+        )
+    except Exception as e:
+        print(f"保存需求版本失敗: job_id={job_id}, version={version}, {str(e)}")
+
+def trigger_job_rescoring(job_id: str, reason: str) -> bool:
+    """需求確認後非同步呼叫配對 Lambda 重新評分"""
+    if not MATCHER_FUNCTION_NAME:
+        return False
+    try:
+        lambda_client.invoke(
+            FunctionName=MATCHER_FUNCTION_NAME,
+            InvocationType='Event',
+            Payload=json.dumps({'job_id': job_id, 'reason': reason}).encode('utf-8')
+        )
+        return True
+    except Exception as e:
+        print(f"觸發職缺重新評分失敗: job_id={job_id}, {str(e)}")
+        return False
+
+def extract_requirements(job_id: str, force: bool = False) -> Dict[str, Any]:
+    """
+    萃取職缺需求並存成新的草稿版本
+
+    職缺內容雜湊與目前版本相同時直接略過（不呼叫模型、不產生新版本）；
+    force 為 True 時仍會建立新草稿，但相同內容會由 S3 快取取得結果。
+
+    :return: {'job_id', 'status': 'unchanged' | 'drafted', 'version', 'cached'}
+    """
+    job_response = jobs_table.get_item(Key={'job_id': job_id})
+    if 'Item' not in job_response:
+        return {'job_id': job_id, 'status': 'not_found'}
+    job = job_response['Item']
+
+    content_hash = requirement_extractor.posting_hash(job)
+    current = job_requirement_table.get_item(Key={'job_id': job_id}).get('Item') or {}
+    if current.get('content_hash') == content_hash and not force:
+        print(f"職缺內容未變更，略過需求萃取: job_id={job_id}")
+        return {'job_id': job_id, 'status': 'unchanged', 'version': int(current.get('version', 0)), 'cached': True}
+
+    extraction = requirement_extractor.extract(job, content_hash)
+    version = int(current.get('version', 0)) + 1
+    draft = {
+        'requirement_text': extraction['requirement_text'],
+        'requirements': extraction['requirements'],
+        'content_hash': content_hash,
+        'model_id': extraction.get('model_id', ''),
+        'generated_at': datetime.utcnow().isoformat()
+    }
+
+    # 以版本號為條件寫入，避免並行萃取互相覆蓋；已確認的版本欄位保持不變
+    try:
+        job_requirement_table.update_item(
+            Key={'job_id': job_id},
+            UpdateExpression=(
+                'SET version = :version, is_confirmed = :false, requirement_text = :text, '
+                'requirements = :requirements, content_hash = :hash, model_id = :model_id, '
+                'generated_at = :generated_at, team_id = :team_id'
+            ),
+            ConditionExpression='attribute_not_exists(version) OR version = :current',
+            ExpressionAttributeValues={
+                ':version': version,
+                ':current': version - 1,
+                ':false': False,
+                ':text': draft['requirement_text'],
+                ':requirements': draft['requirements'],
+                ':hash': content_hash,
+                ':model_id': draft['model_id'],
+                ':generated_at': draft['generated_at'],
+                ':team_id': job.get('team_id', '')
+            }
+        )
+    except ClientError as e:
+        if e.response['Error']['Code'] == 'ConditionalCheckFailedException':
+            print(f"需求已被其他請求更新，放棄這次草稿: job_id={job_id}")
+            return {'job_id': job_id, 'status': 'conflict'}
+        raise
+
+    save_version_snapshot(job_id, version, {'job_id': job_id, 'version': version, 'is_confirmed': False, **draft})
+    print(f"需求草稿已建立: job_id={job_id}, version={version}, 快取命中={extraction['cached']}")
+    return {'job_id': job_id, 'status': 'drafted', 'version': version, 'cached': extraction['cached']}
+
+def get_requirements(job_id: str) -> Dict[str, Any]:
+    """取得職缺目前的需求（最新草稿與已確認版本）"""
+    try:
+        item = job_requirement_table.get_item(Key={'job_id': job_id}).get('Item')
+        if not item:
+            return response(404, {'error': '此職缺尚未產生需求'})
+        return response(200, {
+            'message': '成功獲取職缺需求',
+            'data': item
+        })
+    except Exception as e:
+        print(f"獲取職缺需求失敗: {str(e)}")
+        return response(500, {'error': '獲取職缺需求失敗'})
+
+def confirm_requirements(job_id: str, data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    確認目前的草稿（可同時修改內容）
+
+    body: {"version": <要確認的版本>, "requirement_text": [...], "requirements": {...}}
+    version 必須是目前的最新版本，避免確認到已被新草稿取代的內容。
+    """
+    try:
+        current = job_requirement_table.get_item(Key={'job_id': job_id}).get('Item')
+        if not current:
+            return response(404, {'error': '此職缺尚未產生需求'})
+
+        version = data.get('version', current.get('version'))
+        try:
+            version = int(version)
+        except (TypeError, ValueError):
+            return response(400, {'error': 'version 格式不正確'})
+
+        requirement_text = data.get('requirement_text', current.get('requirement_text'))
+        if isinstance(requirement_text, str):
+            requirement_text = [requirement_text]
+        if not requirement_text:
+            return response(400, {'error': 'requirement_text 不可為空'})
+
+        updates = data.get('requirements') or {}
+        if not isinstance(updates, dict):
+            return response(400, {'error': 'requirements 必須是物件'})
+        try:
+            requirements = {**(current.get('requirements') or {}), **requirement_extractor.coerce_requirements(updates)}
+        except ValueError as e:
+            return response(400, {'error': str(e)})
+
+        confirmed_at = datetime.utcnow().isoformat()
+        try:
+            job_requirement_table.update_item(
+                Key={'job_id': job_id},
+                UpdateExpression=(
+                    'SET is_confirmed = :true, requirement_text = :text, requirements = :requirements, '
+                    'confirmed_version = :version, confirmed_requirement_text = :text, '
+                    'confirmed_requirements = :requirements, confirmed_at = :confirmed_at'
+                ),
+                ConditionExpression='version = :version',
+                ExpressionAttributeValues={
+                    ':true': True,
+                    ':text': requirement_text,
+                    ':requirements': requirements,
+                    ':version': version,
+                    ':confirmed_at': confirmed_at
+                }
+            )
+        except ClientError as e:
+            if e.response['Error']['Code'] == 'ConditionalCheckFailedException':
+                return response(409, {
+                    'error': '需求已有較新的版本，請重新載入後再確認',
+                    'latest_version': int(current.get('version', 0))
+                })
+            raise
+
+        save_version_snapshot(job_id, version, {
+            'job_id': job_id,
+            'version': version,
+            'is_confirmed': True,
+            'requirement_text': requirement_text,
+            'requirements': requirements,
+            'content_hash': current.get('content_hash', ''),
+            'generated_at': current.get('generated_at', ''),
+            'confirmed_at': confirmed_at
+        })
+        rescore_triggered = trigger_job_rescoring(job_id, f'需求確認 v{version}')
+
+        return response(200, {
+            'message': '職缺需求已確認',
+            'job_id': job_id,
+            'confirmed_version': version,
+            'rescore_triggered': rescore_triggered
+        })
+
+    except Exception as e:
+        print(f"確認職缺需求失敗: {str(e)}")
+        return response(500, {'error': '確認職缺需求失敗'})
+
+def lambda_handler(event, context):
+    """
+    Lambda 主函數
+
+    - {"job_id": "...", "force": false}：由職缺管理 Lambda 非同步呼叫，萃取需求草稿
+    - GET  /jobs/{job_id}/requirements：取得最新草稿與已確認版本
+    - POST /jobs/{job_id}/requirements：重新萃取草稿
+    - PUT  /jobs/{job_id}/requirements：確認草稿（可同時修改）
+    """
+    try:
+        if 'httpMethod' not in event:
+            result = extract_requirements(event.get('job_id', ''), force=bool(event.get('force')))
+            return {'statusCode': 200, 'body': json.dumps(result, cls=DecimalEncoder, ensure_ascii=False)}
+
+        # 處理 CORS preflight 請求
+        if event['httpMethod'] == 'OPTIONS':
+            return response(200, {'message': 'CORS preflight success'})
+
+        method = event['httpMethod']
+        path = event.get('path', '')
+        path_parameters = event.get('pathParameters') or {}
+        job_id = path_parameters.get('job_id') or path.rstrip('/').split('/')[-2]
+
+        body = {}
+        if event.get('body'):
+            try:
+                body = json.loads(event['body'])
+            except json.JSONDecodeError:
+                return response(400, {'error': '無效的 JSON 格式'})
+
+        if not path.rstrip('/').endswith('/requirements'):
+            return response(404, {'error': '找不到指定的路由'})
+
+        if method == 'GET':
+            return get_requirements(job_id)
+
+        elif method == 'POST':
+            result = extract_requirements(job_id, force=True)
+            if result['status'] == 'not_found':
+                return response(404, {'error': '職缺不存在'})
+            if result['status'] == 'conflict':
+                return response(409, {'error': '需求正在被其他請求更新，請稍後再試'})
+            return response(200, {'message': '需求草稿已產生', **result})
+
+        elif method == 'PUT':
+            return confirm_requirements(job_id, body)
+
+        else:
+            return response(404, {'error': '找不到指定的路由'})
+
+    except Exception as e:
+        print(f"Job requirement Lambda 執行錯誤: {str(e)}")
+        import traceback
+        print(traceback.format_exc())
+        return response(500, {'error': '伺服器內部錯誤'})
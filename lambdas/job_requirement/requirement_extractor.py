@@ -0,0 +1,197 @@
+"""
+以 Bedrock 從職缺內容萃取人才需求（requirement_text 與結構化條件）
+
+- posting_hash：只由影響需求的職缺內容欄位與 PROMPT_VERSION 計算，
+  薪資、狀態等欄位變更或重新儲存不會改變雜湊
+- 萃取結果以雜湊快取在 S3（job-requirements/cache/{hash}.json），
+  內容相同的職缺（包含複製出來的職缺）都不會再次呼叫模型
+- 團隊超過當日 Bedrock 預算時改用較便宜的模型，這類結果不寫入快取，之後重新萃取仍會使用原模型
+"""
+import hashlib
+import json
+import os
+import re
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, Dict, Optional
+
+import boto3
+from botocore.exceptions import ClientError
+
+import usage_meter
+
+bedrock_client = boto3.client('bedrock-runtime', region_name='ap-southeast-1')
+s3 = boto3.client('s3')
+
+REQUIREMENT_BUCKET = os.environ.get('REQUIREMENT_BUCKET', '')
+REQUIREMENT_MODEL_ID = os.environ.get('REQUIREMENT_MODEL_ID', 'anthropic.claude-3-5-sonnet-20240620-v1:0')
+CACHE_PREFIX = 'job-requirements/cache/'
+# 修改 prompt 或輸出格式時遞增，讓舊的快取失效
+PROMPT_VERSION = 'req-prompt-v1'
+
+# 影響需求萃取的職缺內容欄位
+CONTENT_FIELDS = [
+    'title', 'description', 'responsibilities', 'required_skills', 'nice_to_have_skills',
+    'min_experience_years', 'education_required', 'majors_required', 'language_required',
+    'employment_type', 'location'
+]
+
+# 萃取結果中可直接給配對 Lambda 使用的結構化欄位
+STRUCTURED_FIELDS = [
+    'required_skills', 'nice_to_have_skills', 'min_experience_years',
+    'education_required', 'majors_required', 'language_required'
+]
+
+EXTRACTION_SYSTEM_PROMPT = [{"text": """你是資深招募顧問。請閱讀職缺內容，整理出用人主管真正需要的人才條件。
+只輸出以下 JSON，不得包含其他文字：
+{
+  "requirement_text": [<string，每項一句完整的人才需求敘述，3-8 項>],
+  "required_skills": [<string，必備技能>],
+  "nice_to_have_skills": [<string，加分技能>],
+  "min_experience_years": <integer 或 null>,
+  "education_required": <string，例如 "學士"、"碩士"，無要求填 "">,
+  "majors_required": [<string>],
+  "language_required": [<string>]
+}"""}]
+
+
+def normalize_content_value(value: Any) -> Any:
+    """與職缺管理的比較方式一致：字串去空白轉小寫、清單排序，數字字串視為數字"""
+    if isinstance(value, (list, tuple, set)):
+        return sorted(normalize_content_value(v) for v in value if v not in (None, ''))
+    if isinstance(value, str):
+        value = ' '.join(value.split()).lower()
+        return int(value) if value.isdigit() else value
+    if isinstance(value, (int, float, Decimal)) and not isinstance(value, bool):
+        return int(value) if value == int(value) else float(value)
+    return value
+
+
+def content_fields(job: Dict[str, Any]) -> Dict[str, Any]:
+    # 舊職缺只有 job_title 欄位
+    return {field: (job.get('title') or job.get('job_title')) if field == 'title' else job.get(field)
+            for field in CONTENT_FIELDS}
+
+
+def posting_hash(job: Dict[str, Any]) -> str:
+    content = {field: normalize_content_value(value) for field, value in content_fields(job).items()}
+    payload = json.dumps({'prompt': PROMPT_VERSION, 'content': content}, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:32]
+
+
+def job_prompt(job: Dict[str, Any]) -> str:
+    content = {field: value for field, value in content_fields(job).items() if value not in (None, '', [])}
+    return f"職缺內容:\n{json.dumps(content, ensure_ascii=False, default=str)}"
+
+
+def as_string_list(value: Any) -> list:
+    if isinstance(value, str):
+        value = [value]
+    return [str(v).strip() for v in (value or []) if str(v).strip()]
+
+
+def coerce_requirements(updates: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    人工修改的結構化欄位轉成與 parse_extraction 相同的格式（配對 Lambda 直接使用這些欄位）
+
+    只保留 STRUCTURED_FIELDS；格式錯誤時拋出 ValueError（訊息可直接回傳給前端）
+    """
+    requirements = {}
+    for field, value in updates.items():
+        if field not in STRUCTURED_FIELDS:
+            continue
+        if field == 'min_experience_years':
+            if value in (None, ''):
+                requirements[field] = None
+                continue
+            try:
+                years = Decimal(str(value).strip())
+            except ArithmeticError:
+                raise ValueError('min_experience_years 必須是整數')
+            if isinstance(value, bool) or years != years.to_integral_value():
+                raise ValueError('min_experience_years 必須是整數')
+            if years < 0 or years > 50:
+                raise ValueError('min_experience_years 必須在 0-50 年之間')
+            requirements[field] = int(years)
+        elif field == 'education_required':
+            if not isinstance(value, (str, type(None))):
+                raise ValueError('education_required 必須是字串')
+            requirements[field] = (value or '').strip()
+        else:
+            if not isinstance(value, (str, list, type(None))):
+                raise ValueError(f'{field} 必須是字串陣列')
+            requirements[field] = as_string_list(value)
+    return requirements
+
+
+def parse_extraction(text: str) -> Dict[str, Any]:
+    """取出模型回覆中的 JSON 並整理成固定格式"""
+    match = re.search(r'\{.*\}', text, re.S)
+    if not match:
+        raise ValueError('模型回覆中找不到 JSON')
+    raw = json.loads(match.group(0))
+    requirements = {
+        'required_skills': as_string_list(raw.get('required_skills')),
+        'nice_to_have_skills': as_string_list(raw.get('nice_to_have_skills')),
+        'min_experience_years': int(raw['min_experience_years']) if str(raw.get('min_experience_years') or '').isdigit() else None,
+        'education_required': str(raw.get('education_required') or '').strip(),
+        'majors_required': as_string_list(raw.get('majors_required')),
+        'language_required': as_string_list(raw.get('language_required'))
+    }
+    requirement_text = as_string_list(raw.get('requirement_text'))
+    if not requirement_text:
+        raise ValueError('模型未產生 requirement_text')
+    return {'requirement_text': requirement_text, 'requirements': requirements}
+
+
+def load_cached(content_hash: str) -> Optional[Dict[str, Any]]:
+    if not REQUIREMENT_BUCKET:
+        return None
+    try:
+        obj = s3.get_object(Bucket=REQUIREMENT_BUCKET, Key=f"{CACHE_PREFIX}{content_hash}.json")
+        return json.loads(obj['Body'].read())
+    except ClientError as e:
+        if e.response['Error']['Code'] in ('NoSuchKey', '404'):
+            return None
+        raise
+
+
+def save_cached(content_hash: str, extraction: Dict[str, Any]) -> None:
+    if not REQUIREMENT_BUCKET:
+        return
+    s3.put_object(
+        Bucket=REQUIREMENT_BUCKET,
+        Key=f"{CACHE_PREFIX}{content_hash}.json",
+        Body=json.dumps(extraction, ensure_ascii=False).encode('utf-8'),
+        ContentType='application/json; charset=utf-8'
+    )
+
+
+def extract(job: Dict[str, Any], content_hash: Optional[str] = None) -> Dict[str, Any]:
+    """
+    萃取職缺需求；同樣內容的結果直接由快取回傳
+
+    :return: {'requirement_text', 'requirements', 'model_id', 'generated_at', 'cached'}
+    """
+    content_hash = content_hash or posting_hash(job)
+    cached = load_cached(content_hash)
+    if cached:
+        return {**cached, 'cached': True}
+
+    team_id = job.get('team_id', '')
+    model_id, over_budget = usage_meter.route_model(team_id, REQUIREMENT_MODEL_ID)
+    response = bedrock_client.converse(
+        modelId=model_id,
+        messages=[{"role": "user", "content": [{"text": job_prompt(job)}]}],
+        system=EXTRACTION_SYSTEM_PROMPT,
+        inferenceConfig={"temperature": 0.0, "maxTokens": 2048}
+    )
+    usage_meter.record_converse(response, model_id, 'requirement', team_id=team_id, job_id=job.get('job_id', ''))
+    extraction = {
+        **parse_extraction(response['output']['message']['content'][0]['text']),
+        'model_id': model_id,
+        'generated_at': datetime.utcnow().isoformat()
+    }
+    if model_id == REQUIREMENT_MODEL_ID:
+        save_cached(content_hash, extraction)
+    return {**extraction, 'cached': False}
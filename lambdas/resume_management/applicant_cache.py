@@ -0,0 +1,127 @@
+"""
+應徵者列表快取
+
+以 job_id + 版本號為鍵，快取 get_job_applicants 格式化後的應徵者列表：
+- 第一層：暖機 Lambda 容器內的記憶體（LRU）
+- 第二層：DynamoDB 共用快取表，所有容器共享
+
+履歷解析 Lambda 每寫入一份新履歷就會對該職缺的 version 做原子遞增，
+因此只要版本號沒有變，讀取就不需要再查詢履歷表。
+"""
+import json
+import os
+import zlib
+from collections import OrderedDict
+from decimal import Decimal
+from typing import Any, Dict, List, Optional, Tuple
+
+import boto3
+
+dynamodb = boto3.resource('dynamodb')
+
+APPLICANT_CACHE_TABLE_NAME = os.environ.get('APPLICANT_CACHE_TABLE_NAME', 'benson-haire-applicant-cache')
+# 記憶體中最多保留幾個職缺的列表
+MAX_LOCAL_ENTRIES = int(os.environ.get('APPLICANT_CACHE_MAX_ENTRIES', '200'))
+# DynamoDB 單筆上限 400KB，保留空間給其他屬性
+MAX_SHARED_PAYLOAD_BYTES = 350 * 1024
+
+applicant_cache_table = dynamodb.Table(APPLICANT_CACHE_TABLE_NAME)
+
+# job_id -> (version, applicants)
+_local_cache: 'OrderedDict[str, Tuple[int, List[Dict[str, Any]]]]' = OrderedDict()
+
+
+class _DecimalEncoder(json.JSONEncoder):
+    """處理 DynamoDB Decimal 類型的 JSON 編碼器"""
+    def default(self, o):
+        if isinstance(o, Decimal):
+            return int(o) if o % 1 == 0 else float(o)
+        return super(_DecimalEncoder, self).default(o)
+
+
+def _remember(job_id: str, version: int, applicants: List[Dict[str, Any]]) -> None:
+    """寫入記憶體快取並淘汰最久未使用的項目"""
+    _local_cache[job_id] = (version, applicants)
+    _local_cache.move_to_end(job_id)
+    while len(_local_cache) > MAX_LOCAL_ENTRIES:
+        _local_cache.popitem(last=False)
+
+
+def lookup(job_id: str) -> Tuple[int, Optional[List[Dict[str, Any]]]]:
+    """
+    查詢快取
+
+    :return: (目前版本號, 快取的應徵者列表)，未命中時列表為 None
+    """
+    try:
+        # 先只讀版本號，記憶體命中時不必取回整包 payload
+        head = applicant_cache_table.get_item(
+            Key={'job_id': job_id},
+            ProjectionExpression='#version, cached_version',
+            ExpressionAttributeNames={'#version': 'version'}
+        ).get('Item', {})
+    except Exception as e:
+        print(f"讀取應徵者快取版本失敗: {str(e)}")
+        return -1, None
+
+    version = int(head.get('version', 0))
+
+    local = _local_cache.get(job_id)
+    if local and local[0] == version:
+        _local_cache.move_to_end(job_id)
+        return version, local[1]
+
+    if int(head.get('cached_version', -1)) != version:
+        return version, None
+
+    try:
+        item = applicant_cache_table.get_item(Key={'job_id': job_id}).get('Item', {})
+        payload = item.get('payload')
+        # 讀取期間可能有新履歷寫入，版本不一致就視為未命中
+        if payload is None or int(item.get('cached_version', -1)) != int(item.get('version', 0)):
+            return int(item.get('version', 0)), None
+        applicants = json.loads(zlib.decompress(bytes(payload)).decode('utf-8'))
+    except Exception as e:
+        print(f"讀取應徵者共用快取失敗: {str(e)}")
+        return version, None
+
+    _remember(job_id, version, applicants)
+    return version, applicants
+
+
+def store(job_id: str, version: int, applicants: List[Dict[str, Any]]) -> None:
+    """
+    將格式化後的應徵者列表寫入快取
+
+    只有在共用表中的 version 仍等於查詢前讀到的版本時才會寫入，
+    避免把舊資料蓋在較新的版本上。
+    """
+    if version < 0:
+        return
+
+    _remember(job_id, version, applicants)
+
+    try:
+        payload = zlib.compress(
+            json.dumps(applicants, cls=_DecimalEncoder, ensure_ascii=False).encode('utf-8')
+        )
+        if len(payload) > MAX_SHARED_PAYLOAD_BYTES:
+            print(f"應徵者列表過大 ({len(payload)} bytes)，只保留於記憶體快取: {job_id}")
+            return
+
+        condition = 'attribute_not_exists(#version)' if version == 0 else '#version = :version'
+        expression_values: Dict[str, Any] = {':payload': payload, ':cached_version': version}
+        if version != 0:
+            expression_values[':version'] = version
+
+        applicant_cache_table.update_item(
+            Key={'job_id': job_id},
+            UpdateExpression='SET payload = :payload, cached_version = :cached_version',
+            ConditionExpression=condition,
+            ExpressionAttributeNames={'#version': 'version'},
+            ExpressionAttributeValues=expression_values
+        )
+    except dynamodb.meta.client.exceptions.ConditionalCheckFailedException:
+        print(f"應徵者快取版本已更新，略過寫入: {job_id}")
+    except Exception as e:
+        print(f"寫入應徵者共用快取失敗: {str(e)}")
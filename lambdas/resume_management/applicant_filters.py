@@ -0,0 +1,241 @@
+"""
+應徵者伺服器端篩選與排序
+
+每份履歷先轉成精簡屬性（技能集合、年資、學歷關鍵字、投遞時間），
+篩選與排序只在這些屬性上進行：
+- 依投遞時間排序時資料本身已是時間倒序，湊滿所需頁面即停止
+- 依年資或配對分數排序時以大小為 page * limit 的 heap 取前幾名
+"""
+import heapq
+import os
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import boto3
+
+from skill_normalizer import normalize_skill
+
+dynamodb = boto3.resource('dynamodb')
+
+MATCH_RESULT_TABLE_NAME = os.environ.get('MATCH_RESULT_TABLE_NAME', 'benson-haire-match-result')
+
+# 篩選與排序的查詢參數（page / limit 單獨出現時維持原本的列表行為）
+FILTER_PARAMS = ('skills', 'skills_mode', 'min_experience', 'education', 'sort_by', 'order')
+VALID_SORT_FIELDS = ('applied_at', 'experience', 'match_score')
+VALID_SKILL_MODES = ('any', 'all')
+
+# 精簡屬性的欄位位置
+SKILLS, EXPERIENCE, EDUCATION, APPLIED_AT = range(4)
+
+# (job_id, version) -> 精簡屬性列表，與應徵者快取同步失效
+_MAX_ATTRIBUTE_ENTRIES = 200
+_attribute_cache: 'OrderedDict[Tuple[str, int], List[Tuple]]' = OrderedDict()
+
+
+def normalize_term(term: str) -> str:
+    """正規化技能 / 關鍵字：全半形統一、轉小寫、合併空白"""
+    return ' '.join(unicodedata.normalize('NFKC', str(term)).lower().split())
+
+
+def has_filter_params(query_params: Dict[str, str]) -> bool:
+    """判斷請求是否帶有篩選或排序參數"""
+    return any(query_params.get(name) for name in FILTER_PARAMS)
+
+
+def parse_filter_params(query_params: Dict[str, str]) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+    """
+    解析篩選參數
+
+    :return: (criteria, error)，參數不合法時 criteria 為 None
+    """
+    skills = [normalize_skill(s) for s in (query_params.get('skills') or '').split(',') if s.strip()]
+
+    skills_mode = (query_params.get('skills_mode') or 'all').lower()
+    if skills_mode not in VALID_SKILL_MODES:
+        return None, f"skills_mode 無效，可選值: {', '.join(VALID_SKILL_MODES)}"
+
+    min_experience = None
+    if query_params.get('min_experience'):
+        try:
+            min_experience = int(query_params['min_experience'])
+        except (ValueError, TypeError):
+            return None, "min_experience 格式不正確"
+
+    sort_by = query_params.get('sort_by') or 'applied_at'
+    if sort_by not in VALID_SORT_FIELDS:
+        return None, f"sort_by 無效，可選值: {', '.join(VALID_SORT_FIELDS)}"
+
+    order = (query_params.get('order') or 'desc').lower()
+    if order not in ('asc', 'desc'):
+        return None, "order 無效，可選值: asc, desc"
+
+    try:
+        page = max(int(query_params.get('page', 1)), 1)
+        limit = min(max(int(query_params.get('limit', 50)), 1), 100)
+    except (ValueError, TypeError):
+        return None, "分頁參數格式不正確"
+
+    return {
+        'skills': frozenset(skills),
+        'skills_mode': skills_mode,
+        'min_experience': min_experience,
+        'education': normalize_term(query_params.get('education') or ''),
+        'sort_by': sort_by,
+        'order': order,
+        'page': page,
+        'limit': limit
+    }, None
+
+
+def compact_attributes(resume: Dict[str, Any]) -> Tuple[frozenset, int, str, str]:
+    """
+    從 parsed_resume 項目取出篩選用的精簡屬性
+
+    優先使用解析 Lambda 寫入時預先計算的欄位，舊資料才從 profile 推算。
+    """
+    profile = resume.get('profile') or {}
+    basics = profile.get('basics') or {}
+
+    skills = resume.get('skills_normalized')
+    if skills is None:
+        skills = basics.get('skills') or []
+    skills = [normalize_skill(s) for s in skills if s]
+
+    experience = resume.get('experience_years')
+    if experience is None:
+        experience = basics.get('total_experience_in_years')
+    if experience is None:
+        months = sum(int(exp.get('duration_in_months') or 0) for exp in profile.get('professional_experiences') or [])
+        experience = round(months / 12) if months > 0 else -1
+
+    education = resume.get('education_keywords')
+    if education is None:
+        education = normalize_term(' '.join(
+            str(edu.get(field) or '')
+            for edu in profile.get('educations') or []
+            for field in ('issuing_organization', 'study_type', 'department')
+        ))
+
+    return frozenset(skills), int(experience), education, resume.get('processed_at', '')
+
+
+def cached_attributes(job_id: str, version: int, resumes: List[Dict[str, Any]]) -> List[Tuple]:
+    """取得某職缺某版本應徵者的精簡屬性，同版本只計算一次"""
+    key = (job_id, version)
+    attributes = _attribute_cache.get(key)
+    if attributes is None or len(attributes) != len(resumes):
+        attributes = [compact_attributes(resume) for resume in resumes]
+        if version >= 0:
+            _attribute_cache[key] = attributes
+            while len(_attribute_cache) > _MAX_ATTRIBUTE_ENTRIES:
+                _attribute_cache.popitem(last=False)
+    else:
+        _attribute_cache.move_to_end(key)
+    return attributes
+
+
+def build_predicate(criteria: Dict[str, Any]) -> Callable[[Tuple], bool]:
+    """依條件建立精簡屬性的判斷函式"""
+    skills = criteria['skills']
+    match_all = criteria['skills_mode'] == 'all'
+    min_experience = criteria['min_experience']
+    education = criteria['education']
+
+    def predicate(attrs: Tuple) -> bool:
+        if skills:
+            if match_all and not skills <= attrs[SKILLS]:
+                return False
+            if not match_all and skills.isdisjoint(attrs[SKILLS]):
+                return False
+        if min_experience is not None and attrs[EXPERIENCE] < min_experience:
+            return False
+        if education and education not in attrs[EDUCATION]:
+            return False
+        return True
+
+    return predicate
+
+
+def load_match_scores(keys: Iterable[Tuple[str, str]]) -> Dict[Tuple[str, str], float]:
+    """以 BatchGetItem 讀取 (job_id, resume_id) 的配對分數"""
+    keys = list(dict.fromkeys(keys))
+    scores: Dict[Tuple[str, str], float] = {}
+    for start in range(0, len(keys), 100):
+        request_items = {
+            MATCH_RESULT_TABLE_NAME: {
+                'Keys': [{'job_id': job_id, 'resume_id': resume_id} for job_id, resume_id in keys[start:start + 100]],
+                'ProjectionExpression': 'job_id, resume_id, match_score'
+            }
+        }
+        try:
+            while request_items:
+                batch_response = dynamodb.batch_get_item(RequestItems=request_items)
+                for item in batch_response.get('Responses', {}).get(MATCH_RESULT_TABLE_NAME, []):
+                    scores[(item['job_id'], item['resume_id'])] = float(item.get('match_score', 0))
+                request_items = batch_response.get('UnprocessedKeys') or {}
+        except Exception as e:
+            print(f"讀取配對分數失敗: {str(e)}")
+    return scores
+
+
+def select_page(entries: Iterator[Tuple[Tuple, Any]],
+                criteria: Dict[str, Any],
+                score_key: Optional[Callable[[Any], Tuple[str, str]]] = None) -> Dict[str, Any]:
+    """
+    從 (精簡屬性, 原始項目) 序列中篩選並取出指定頁
+
+    entries 必須依投遞時間倒序產生；依投遞時間倒序排序時，
+    找到 page * limit + 1 筆符合的項目就停止讀取後續資料。
+
+    :return: {'items', 'total', 'has_more'}，提早停止時 total 為 None
+    """
+    predicate = build_predicate(criteria)
+    page, limit = criteria['page'], criteria['limit']
+    needed = page * limit
+    sort_by, descending = criteria['sort_by'], criteria['order'] == 'desc'
+    matched = ((attrs, item) for attrs, item in entries if predicate(attrs))
+
+    if sort_by == 'applied_at' and descending:
+        window = []
+        for entry in matched:
+            window.append(entry)
+            if len(window) > needed:
+                break
+        has_more = len(window) > needed
+        return {
+            'items': [item for _, item in window[needed - limit:needed]],
+            'total': None if has_more else len(window),
+            'has_more': has_more
+        }
+
+    matched = list(matched)
+    if sort_by == 'applied_at':
+        sort_value = lambda entry: entry[0][APPLIED_AT]
+    elif sort_by == 'experience':
+        sort_value = lambda entry: entry[0][EXPERIENCE]
+    else:
+        scores = load_match_scores(score_key(item) for _, item in matched)
+        sort_value = lambda entry: scores.get(score_key(entry[1]), -1.0)
+
+    # heap 只保留前 page * limit 名，穩定排序以保留原本的時間順序
+    ranked = (heapq.nlargest if descending else heapq.nsmallest)(needed, matched, key=sort_value)
+    return {
+        'items': [item for _, item in ranked[needed - limit:needed]],
+        'total': len(matched),
+        'has_more': len(matched) > needed
+    }
+
+
+def pagination_info(result: Dict[str, Any], criteria: Dict[str, Any]) -> Dict[str, Any]:
+    """組成與其他列表 API 相同格式的分頁資訊"""
+    page, limit, total = criteria['page'], criteria['limit'], result['total']
+    info = {
+        'current_page': page,
+        'items_per_page': limit,
+        'has_more': result['has_more']
+    }
+    if total is not None:
+        info['total_items'] = total
+        info['total_pages'] = (total + limit - 1) // limit if total > 0 else 1
+    return info
@@ -0,0 +1,117 @@
+"""
+文字向量（embedding）提供者
+
+透過環境變數 EMBEDDING_PROVIDER 切換：
+- bedrock（預設）：Amazon Titan Text Embeddings V2
+- hashing：以特徵雜湊產生的確定性向量，不需呼叫外部服務，供本機與測試使用
+
+resume_parser 與 resume_management 各有一份相同的模組，修改時請同步兩邊，
+否則寫入與查詢的向量空間會不一致。
+"""
+import hashlib
+import json
+import math
+import os
+import re
+import struct
+import unicodedata
+from typing import List
+
+EMBEDDING_PROVIDER = os.environ.get('EMBEDDING_PROVIDER', 'bedrock')
+EMBEDDING_MODEL_ID = os.environ.get('EMBEDDING_MODEL_ID', 'amazon.titan-embed-text-v2:0')
+EMBEDDING_DIMENSION = int(os.environ.get('EMBEDDING_DIMENSION', '512'))
+# Titan V2 單次輸入上限約 8k tokens，先以字元數粗略截斷
+MAX_EMBEDDING_CHARS = 8000
+
+_TOKEN_RE = re.compile('[\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff]|[a-z0-9][a-z0-9+#.]*')
+
+
+class BedrockEmbeddingProvider:
+    """呼叫 Bedrock Titan Embeddings 產生已正規化的向量"""
+
+    def __init__(self, bedrock_client=None, model_id: str = EMBEDDING_MODEL_ID, dimension: int = EMBEDDING_DIMENSION):
+        if bedrock_client is None:
+            import boto3
+            bedrock_client = boto3.client('bedrock-runtime', region_name='ap-southeast-1')
+        self.client = bedrock_client
+        self.model_id = model_id
+        self.dimension = dimension
+        # 最近一次呼叫的輸入 tokens，供用量計量
+        self.last_input_tokens = 0
+
+    def embed(self, text: str) -> List[float]:
+        response = self.client.invoke_model(
+            modelId=self.model_id,
+            body=json.dumps({
+                'inputText': text[:MAX_EMBEDDING_CHARS],
+                'dimensions': self.dimension,
+                'normalize': True
+            }),
+            contentType='application/json',
+            accept='application/json'
+        )
+        payload = json.loads(response['body'].read())
+        self.last_input_tokens = int(payload.get('inputTextTokenCount', 0))
+        return payload['embedding']
+
+
+class HashingEmbeddingProvider:
+    """
+    確定性的本機替代方案：中文取字元 bigram、英文取單字，
+    以 SHA-1 雜湊決定維度與正負號後做 L2 正規化。
+    """
+
+    # 記錄在向量索引的 manifest，用來判斷既有向量能否沿用
+    model_id = 'hashing'
+
+    def __init__(self, dimension: int = EMBEDDING_DIMENSION):
+        self.dimension = dimension
+
+    def features(self, text: str) -> List[str]:
+        tokens = [t.rstrip('.') for t in _TOKEN_RE.findall(unicodedata.normalize('NFKC', text or '').lower())]
+        tokens = [t for t in tokens if t]
+        bigrams = [a + b for a, b in zip(tokens, tokens[1:]) if len(a) == 1 and len(b) == 1]
+        return tokens + bigrams
+
+    def embed(self, text: str) -> List[float]:
+        vector = [0.0] * self.dimension
+        for feature in self.features(text[:MAX_EMBEDDING_CHARS]):
+            digest = hashlib.sha1(feature.encode('utf-8')).digest()
+            slot = int.from_bytes(digest[:4], 'little') % self.dimension
+            vector[slot] += 1.0 if digest[4] & 1 else -1.0
+        norm = math.sqrt(sum(v * v for v in vector))
+        return [v / norm for v in vector] if norm else vector
+
+
+def get_embedding_provider(bedrock_client=None):
+    """依環境變數取得 embedding 提供者"""
+    if EMBEDDING_PROVIDER == 'hashing':
+        return HashingEmbeddingProvider()
+    return BedrockEmbeddingProvider(bedrock_client)
+
+
+def pack_float16(vector: List[float]) -> bytes:
+    """將向量壓成 little-endian float16 位元組（不需 NumPy）"""
+    return struct.pack(f'<{len(vector)}e', *vector)
+
+
+def profile_embedding_text(resume: dict) -> str:
+    """組出履歷用於語意比對的文字"""
+    profile = resume.get('profile') or {}
+    basics = profile.get('basics') or {}
+    parts = [resume.get('current_title') or basics.get('current_title') or '']
+    parts.append(', '.join(str(skill) for skill in basics.get('skills') or []))
+    for exp in profile.get('professional_experiences') or []:
+        parts.append(' '.join(str(exp.get(field) or '') for field in ('title', 'company', 'description')))
+    for edu in profile.get('educations') or []:
+        parts.append(' '.join(str(edu.get(field) or '') for field in ('study_type', 'department')))
+    return '\n'.join(part for part in parts if part.strip())
+
+
+def job_embedding_text(job: dict) -> str:
+    """組出職缺用於語意比對的文字：職稱、工作內容與必備 / 加分技能"""
+    parts = [job.get('title') or job.get('job_title') or '']
+    parts.extend(str(item) for item in job.get('responsibilities') or [])
+    parts.append(', '.join(str(skill) for skill in job.get('required_skills') or []))
+    parts.append(', '.join(str(skill) for skill in job.get('nice_to_have_skills') or []))
+    return '\n'.join(part for part in parts if part.strip())
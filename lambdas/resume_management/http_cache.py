@@ -0,0 +1,95 @@
+"""
+API 回應的條件式快取（ETag / If-None-Match）
+
+lambda_handler 產生回應後交給 conditional：
+
+- 只處理 GET 且 statusCode 為 200 的 JSON 回應；其他回應加上 Cache-Control: no-store
+- ETag 為強驗證器："{內容中最新的 updated_at}-{內容雜湊}"；計算雜湊時忽略每次都會變動的欄位（例如 timestamp）
+- 請求的 If-None-Match 符合時回傳 304（沒有 body），管理頁面輪詢時資料未變更就幾乎不需傳輸
+- Cache-Control 依路由設定（rules 為 (路徑正規式, Cache-Control) 清單，第一個符合的生效）
+
+job_management、team_management、resume_management 各有一份相同的模組，修改時請同步。
+"""
+import hashlib
+import json
+import re
+from typing import Any, Dict, Iterable, Optional, Sequence, Tuple
+
+DEFAULT_CACHE_CONTROL = 'private, no-cache'
+# 不列入 ETag 計算的欄位（每次回應都不同，但不代表資料變更）
+VOLATILE_FIELDS = {'timestamp'}
+
+
+def header_value(event: Dict[str, Any], name: str) -> Optional[str]:
+    """不分大小寫取得請求標頭"""
+    for key, value in (event.get('headers') or {}).items():
+        if key.lower() == name.lower():
+            return value
+    return None
+
+
+def latest_updated_at(value: Any, depth: int = 0) -> str:
+    """回應內容中最新的 updated_at（只看前兩層，例如 data、jobs、teams 中的項目）"""
+    latest = ''
+    if isinstance(value, dict):
+        latest = str(value.get('updated_at') or '')
+        children: Iterable[Any] = value.values()
+    elif isinstance(value, list):
+        children = value
+    else:
+        return ''
+    if depth < 2:
+        for child in children:
+            latest = max(latest, latest_updated_at(child, depth + 1))
+    return latest
+
+
+def compute_etag(body: str) -> str:
+    try:
+        payload = json.loads(body)
+    except (TypeError, ValueError):
+        payload = body
+    if isinstance(payload, dict):
+        payload = {key: value for key, value in payload.items() if key not in VOLATILE_FIELDS}
+    canonical = json.dumps(payload, sort_keys=True, ensure_ascii=False, separators=(',', ':'), default=str)
+    digest = hashlib.sha256(canonical.encode('utf-8')).hexdigest()[:32]
+    updated_at = re.sub(r'[^0-9A-Za-z]', '', latest_updated_at(payload))
+    return f'"{updated_at}-{digest}"' if updated_at else f'"{digest}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match 使用弱比較：忽略 W/ 前綴，* 符合任何版本"""
+    if not if_none_match:
+        return False
+    candidates = [candidate.strip() for candidate in if_none_match.split(',')]
+    return any(candidate == '*' or candidate.replace('W/', '', 1) == etag for candidate in candidates)
+
+
+def cache_control_for(path: str, rules: Sequence[Tuple[str, str]], default: str = DEFAULT_CACHE_CONTROL) -> str:
+    for pattern, cache_control in rules:
+        if re.fullmatch(pattern, path or ''):
+            return cache_control
+    return default
+
+
+def conditional(event: Dict[str, Any], result: Dict[str, Any],
+                rules: Sequence[Tuple[str, str]] = ()) -> Dict[str, Any]:
+    """為 GET 回應加上 ETag 與 Cache-Control，If-None-Match 符合時改為 304"""
+    if not isinstance(result, dict) or 'httpMethod' not in event:
+        return result
+    headers = dict(result.get('headers') or {})
+    if event['httpMethod'] != 'GET' or result.get('statusCode') != 200 or result.get('isBase64Encoded'):
+        headers.setdefault('Cache-Control', 'no-store')
+        return {**result, 'headers': headers}
+
+    etag = compute_etag(result.get('body') or '')
+    expose = headers.get('Access-Control-Expose-Headers')
+    headers.update({
+        'ETag': etag,
+        'Cache-Control': cache_control_for(event.get('path', ''), rules),
+        'Access-Control-Expose-Headers': f'{expose}, ETag' if expose else 'ETag'
+    })
+    if etag_matches(header_value(event, 'If-None-Match'), etag):
+        headers.pop('Content-Type', None)
+        return {'statusCode': 304, 'headers': headers, 'body': ''}
+    return {**result, 'headers': headers}
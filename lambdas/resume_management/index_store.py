@@ -0,0 +1,119 @@
+"""
+搜尋索引的 S3 快照與 delta 存取
+
+履歷全文搜尋（text_search）、履歷語意搜尋（vector_search）與職缺搜尋（job_search）都以相同的方式保存索引：
+
+  {prefix}/manifest.json                 目前的快照版本與 watermark（已合併的最後一個 delta）
+  {prefix}/snapshots/v{version}{副檔名}  不可變的快照
+  {prefix}/deltas/{timestamp}-{id}.json  尚未合併的增量，key 以 UTC 時間戳開頭，字典序即寫入順序
+
+IndexStore 負責讀取 manifest / 快照、列出與載入 delta、發布新快照並刪除已合併的 delta；
+斷詞、計分與快照的序列化格式留在各索引模組。
+
+resume_management、job_management 各有一份相同的模組，修改時請同步。
+"""
+import json
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional
+
+import boto3
+
+s3 = boto3.client('s3')
+
+# 太新的 delta 先不合併，避免與正在寫入的請求競爭
+MERGE_GRACE_SECONDS = 60
+DELTA_TIMESTAMP_FORMAT = '%Y%m%dT%H%M%S%f'
+
+
+class IndexStore:
+    """一個索引在 S3 上的 manifest、快照與 delta"""
+
+    def __init__(self, bucket: str, prefix: str, snapshot_extension: str):
+        self.bucket = bucket
+        self.prefix = prefix
+        self.manifest_key = f'{prefix}/manifest.json'
+        self.snapshot_prefix = f'{prefix}/snapshots/'
+        self.delta_prefix = f'{prefix}/deltas/'
+        self.snapshot_extension = snapshot_extension
+
+    def load_manifest(self) -> Optional[Dict[str, Any]]:
+        try:
+            return json.loads(s3.get_object(Bucket=self.bucket, Key=self.manifest_key)['Body'].read())
+        except s3.exceptions.NoSuchKey:
+            return None
+
+    def load_snapshot(self, manifest: Optional[Dict[str, Any]]) -> Optional[bytes]:
+        """manifest 指向的快照內容；尚未發布過時回傳 None"""
+        if not manifest:
+            return None
+        return s3.get_object(Bucket=self.bucket, Key=manifest['snapshot_key'])['Body'].read()
+
+    def list_delta_keys(self, after: str = '', older_than: Optional[str] = None) -> List[str]:
+        """列出 watermark 之後的 delta 檔（key 以時間戳開頭，字典序即時間序）"""
+        keys = []
+        paginator = s3.get_paginator('list_objects_v2')
+        list_kwargs = {'Bucket': self.bucket, 'Prefix': self.delta_prefix}
+        if after:
+            list_kwargs['StartAfter'] = after
+        for page in paginator.paginate(**list_kwargs):
+            for obj in page.get('Contents', []):
+                if older_than and obj['Key'] >= older_than:
+                    return keys
+                keys.append(obj['Key'])
+        return keys
+
+    def load_delta(self, key: str) -> Dict[str, Any]:
+        return json.loads(s3.get_object(Bucket=self.bucket, Key=key)['Body'].read())
+
+    def apply_new_deltas(self, after: str, loaded_keys: set, apply: Callable[[Dict[str, Any]], None]) -> None:
+        """把 watermark 之後、這個容器還沒套用過的 delta 依序交給 apply"""
+        for key in self.list_delta_keys(after=after):
+            if key not in loaded_keys:
+                apply(self.load_delta(key))
+                loaded_keys.add(key)
+
+    def delta_key(self, document_id: str) -> str:
+        return f"{self.delta_prefix}{datetime.utcnow().strftime(DELTA_TIMESTAMP_FORMAT)}-{document_id}.json"
+
+    def write_delta(self, document_id: str, delta: Dict[str, Any], default: Optional[Callable] = None) -> str:
+        key = self.delta_key(document_id)
+        s3.put_object(
+            Bucket=self.bucket,
+            Key=key,
+            Body=json.dumps(delta, ensure_ascii=False, default=default).encode('utf-8'),
+            ContentType='application/json'
+        )
+        return key
+
+    def grace_cutoff_key(self) -> str:
+        cutoff = datetime.utcnow() - timedelta(seconds=MERGE_GRACE_SECONDS)
+        return f"{self.delta_prefix}{cutoff.strftime(DELTA_TIMESTAMP_FORMAT)}"
+
+    def mergeable_delta_keys(self, manifest: Optional[Dict[str, Any]]) -> List[str]:
+        """manifest 之後、已超過 MERGE_GRACE_SECONDS 可以合併的 delta"""
+        return self.list_delta_keys(after=manifest['watermark'] if manifest else '',
+                                    older_than=self.grace_cutoff_key())
+
+    def publish(self, snapshot: bytes, version: int, watermark: str, merged_keys: List[str],
+                **details) -> Dict[str, Any]:
+        """上傳新快照並切換 manifest，再刪除已合併的 delta；details 是寫進 manifest 的統計"""
+        snapshot_key = f'{self.snapshot_prefix}v{version}{self.snapshot_extension}'
+        s3.put_object(Bucket=self.bucket, Key=snapshot_key, Body=snapshot,
+                      ContentType='application/octet-stream')
+
+        manifest = {
+            'version': version,
+            'snapshot_key': snapshot_key,
+            'watermark': watermark,
+            **details,
+            'built_at': datetime.utcnow().isoformat()
+        }
+        s3.put_object(Bucket=self.bucket, Key=self.manifest_key,
+                      Body=json.dumps(manifest).encode('utf-8'), ContentType='application/json')
+
+        for start in range(0, len(merged_keys), 1000):
+            s3.delete_objects(Bucket=self.bucket, Delete={
+                'Objects': [{'Key': key} for key in merged_keys[start:start + 1000]],
+                'Quiet': True
+            })
+        return manifest
@@ -5,6 +5,15 @@ from datetime import datetime
 from decimal import Decimal
 from typing import Dict, List, Optional, Any
 
+import applicant_cache
+import applicant_filters
+import http_cache
+import match_ranking
+import skill_search
+import table_scan
+import text_search
+import vector_search
+
 # 初始化 AWS 服務
 dynamodb = boto3.resource('dynamodb')
 
@@ -12,6 +21,13 @@ dynamodb = boto3.resource('dynamodb')
 RESUME_TABLE_NAME = os.environ.get('RESUME_TABLE_NAME', 'benson-haire-parsed_resume')
 JOBS_TABLE_NAME = os.environ.get('JOBS_TABLE_NAME', 'benson-haire-job-posting')
 
+# 各路由的 Cache-Control（GET 回應一律帶 ETag，未列出的路由使用 http_cache 的預設值）
+# 搜尋結果依賴的索引每 30 秒才刷新一次，可以短暫快取
+CACHE_CONTROL_RULES = [
+    (r'/resumes/(search|semantic-search|skill-search)', 'private, max-age=30'),
+    (r'/resumes(/.*)?', 'private, no-cache')
+]
+
 # DynamoDB 表格
 resume_table = dynamodb.Table(RESUME_TABLE_NAME)
 jobs_table = dynamodb.Table(JOBS_TABLE_NAME)
@@ -36,8 +52,94 @@ def response(status_code: int, body: Dict[str, Any]) -> Dict[str, Any]:
         'body': json.dumps(body, cls=DecimalEncoder, ensure_ascii=False)
     }
 
-def get_job_applicants(job_id: str) -> Dict[str, Any]:
-    """獲取特定職缺的應徵者履歷資料"""
+def format_applicant(resume: Dict[str, Any]) -> Dict[str, Any]:
+    """將 parsed_resume 項目格式化為前端需要的應徵者資料"""
+    # 提取履歷基本資訊 - 使用新的 profile 結構
+    profile = resume.get('profile', {})  # 新的 profile 結構
+    basics = profile.get('basics', {})
+    experiences = profile.get('professional_experiences', [])
+    educations = profile.get('educations', [])
+    
+    # 計算總工作經驗
+    total_experience = basics.get('total_experience_in_years')
+    if total_experience is None and experiences:
+        # 如果沒有總經驗，從工作經歷計算
+        total_months = 0
+        for exp in experiences:
+            if exp.get('duration_in_months'):
+                total_months += exp['duration_in_months']
+        total_experience = round(total_months / 12) if total_months > 0 else 0
+    
+    # 取得最新的教育背景
+    latest_education = ''
+    if educations:
+        # 按年份排序，取最新的
+        sorted_educations = sorted(educations, key=lambda x: x.get('start_year', 0), reverse=True)
+        latest_edu = sorted_educations[0]
+        org = latest_edu.get('issuing_organization', '')
+        dept = latest_edu.get('department', '')
+        if org and dept:
+            latest_education = f"{org} {dept}"
+        elif org:
+            latest_education = org
+    
+    # 取得技能列表
+    skills = basics.get('skills', [])
+    
+    # 從候選人名稱中提取，兼容新舊格式
+    candidate_name = resume.get('candidate_name', 'Unknown')
+    if candidate_name == 'None None' or not candidate_name:
+        # 如果候選人名稱無效，嘗試從 basics 中提取
+        first_name = basics.get('first_name', '')
+        last_name = basics.get('last_name', '')
+        candidate_name = f"{first_name} {last_name}".strip() or 'Unknown'
+    
+    # 組織應徵者資料
+    return {
+        'id': resume['resume_id'],
+        'name': candidate_name,
+        'email': resume.get('candidate_email') or (basics.get('emails', [None])[0] if basics.get('emails') else None) or '未提供',
+        'phone': '未提供',  # 履歷解析中沒有電話號碼
+        'experience': f"{total_experience}年" if total_experience is not None else '未知',
+        'education': latest_education or '未提供',
+        'skills': skills,
+        'current_title': resume.get('current_title') or basics.get('current_title', '') or '未提供',
+        'status': 'applied',  # 預設狀態
+        'applied_at': resume.get('processed_at', ''),
+        'resume_id': resume['resume_id'],
+        'team_id': resume.get('team_id', ''),
+        'job_id': resume.get('job_id', ''),
+        's3_key': resume.get('s3_key', ''),
+        'parsed_data': resume  # 完整的解析資料，供詳細檢視使用
+    }
+
+def filtered_applicants_response(job_id: str, version: int, applicants: List[Dict[str, Any]],
+                                 criteria: Dict[str, Any]) -> Dict[str, Any]:
+    """依篩選條件回傳單頁應徵者資料"""
+    attributes = applicant_filters.cached_attributes(
+        job_id, version, [applicant['parsed_data'] for applicant in applicants]
+    )
+    result = applicant_filters.select_page(
+        zip(attributes, applicants),
+        criteria,
+        score_key=lambda applicant: (applicant.get('job_id') or job_id, applicant['resume_id'])
+    )
+    return response(200, {
+        'message': '成功獲取應徵者資料' if result['items'] else '沒有符合條件的應徵者',
+        'job_id': job_id,
+        'total_count': result['total'],
+        'data': result['items'],
+        'pagination': applicant_filters.pagination_info(result, criteria)
+    })
+
+def get_job_applicants(job_id: str, query_params: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+    """獲取特定職缺的應徵者履歷資料（可選擇篩選、排序與分頁）"""
+    criteria = None
+    if query_params and applicant_filters.has_filter_params(query_params):
+        criteria, filter_error = applicant_filters.parse_filter_params(query_params)
+        if filter_error:
+            return response(400, {'error': filter_error})
+    
     try:
         print(f"查詢職缺應徵者 - job_id: {job_id}")
         
@@ -49,94 +151,50 @@ def get_job_applicants(job_id: str) -> Dict[str, Any]:
         
         print(f"職缺存在，開始查詢履歷資料...")
         
+        # 先查詢快取，版本號未變時不必查詢履歷表
+        cache_version, cached_applicants = applicant_cache.lookup(job_id)
+        if cached_applicants is not None:
+            print(f"應徵者快取命中 - job_id: {job_id}, version: {cache_version}")
+            if criteria:
+                return filtered_applicants_response(job_id, cache_version, cached_applicants, criteria)
+            return response(200, {
+                'message': '成功獲取應徵者資料' if cached_applicants else '目前尚無應徵者',
+                'job_id': job_id,
+                'total_count': len(cached_applicants),
+                'data': cached_applicants
+            })
+        
         # 使用 GSI 查詢該職缺的所有履歷
         try:
             print(f"執行 GSI 查詢: IndexName=job-index, job_id={job_id}")
-            resume_response = resume_table.query(
-                IndexName='job-index',
-                KeyConditionExpression='job_id = :job_id',
-                ExpressionAttributeValues={
+            resumes = []
+            query_kwargs = {
+                'IndexName': 'job-index',
+                'KeyConditionExpression': 'job_id = :job_id',
+                'ExpressionAttributeValues': {
                     ':job_id': job_id
                 },
-                ScanIndexForward=False  # 按時間倒序排列
-            )
+                'ScanIndexForward': False  # 按時間倒序排列
+            }
+            while True:
+                resume_response = resume_table.query(**query_kwargs)
+                resumes.extend(resume_response.get('Items', []))
+                if 'LastEvaluatedKey' not in resume_response:
+                    break
+                query_kwargs['ExclusiveStartKey'] = resume_response['LastEvaluatedKey']
             
-            resumes = resume_response.get('Items', [])
             print(f"查詢到 {len(resumes)} 筆履歷資料")
             
-            if resumes:
-                print(f"第一筆履歷資料: {resumes[0].get('resume_id', 'UNKNOWN')}")
-            
             # 格式化履歷資料為前端需要的格式
-            applicants = []
-            for resume in resumes:
-                print(f"處理履歷: {resume.get('resume_id', 'UNKNOWN')}")
-                
-                # 提取履歷基本資訊 - 使用新的 profile 結構
-                profile = resume.get('profile', {})  # 新的 profile 結構
-                basics = profile.get('basics', {})
-                experiences = profile.get('professional_experiences', [])
-                educations = profile.get('educations', [])
-                
-                # 計算總工作經驗
-                total_experience = basics.get('total_experience_in_years')
-                if total_experience is None and experiences:
-                    # 如果沒有總經驗，從工作經歷計算
-                    current_year = datetime.now().year
-                    total_months = 0
-                    for exp in experiences:
-                        if exp.get('duration_in_months'):
-                            total_months += exp['duration_in_months']
-                    total_experience = round(total_months / 12) if total_months > 0 else 0
-                
-                # 取得最新的教育背景
-                latest_education = ''
-                if educations:
-                    # 按年份排序，取最新的
-                    sorted_educations = sorted(educations, key=lambda x: x.get('start_year', 0), reverse=True)
-                    latest_edu = sorted_educations[0]
-                    org = latest_edu.get('issuing_organization', '')
-                    dept = latest_edu.get('department', '')
-                    if org and dept:
-                        latest_education = f"{org} {dept}"
-                    elif org:
-                        latest_education = org
-                
-                # 取得技能列表
-                skills = basics.get('skills', [])
-                
-                # 從候選人名稱中提取，兼容新舊格式
-                candidate_name = resume.get('candidate_name', 'Unknown')
-                if candidate_name == 'None None' or not candidate_name:
-                    # 如果候選人名稱無效，嘗試從 basics 中提取
-                    first_name = basics.get('first_name', '')
-                    last_name = basics.get('last_name', '')
-                    candidate_name = f"{first_name} {last_name}".strip() or 'Unknown'
-                
-                # 組織應徵者資料
-                applicant = {
-                    'id': resume['resume_id'],
-                    'name': candidate_name,
-                    'email': resume.get('candidate_email') or (basics.get('emails', [None])[0] if basics.get('emails') else None) or '未提供',
-                    'phone': '未提供',  # 履歷解析中沒有電話號碼
-                    'experience': f"{total_experience}年" if total_experience is not None else '未知',
-                    'education': latest_education or '未提供',
-                    'skills': skills,
-                    'current_title': resume.get('current_title') or basics.get('current_title', '') or '未提供',
-                    'status': 'applied',  # 預設狀態
-                    'applied_at': resume.get('processed_at', ''),
-                    'resume_id': resume['resume_id'],
-                    'team_id': resume.get('team_id', ''),
-                    'job_id': resume.get('job_id', ''),
-                    's3_key': resume.get('s3_key', ''),
-                    'parsed_data': resume  # 完整的解析資料，供詳細檢視使用
-                }
-                
-                applicants.append(applicant)
-                print(f"添加應徵者: {applicant['name']}")
+            applicants = [format_applicant(resume) for resume in resumes]
+            
+            applicant_cache.store(job_id, cache_version, applicants)
             
             print(f"總共處理了 {len(applicants)} 個應徵者")
             
+            if criteria:
+                return filtered_applicants_response(job_id, cache_version, applicants, criteria)
+            
             return response(200, {
                 'message': '成功獲取應徵者資料' if applicants else '目前尚無應徵者',
                 'job_id': job_id,
@@ -181,6 +239,92 @@ def get_resume_detail(resume_id: str) -> Dict[str, Any]:
         print(f"獲取履歷詳情失敗: {str(e)}")
         return response(500, {'error': '獲取履歷詳情失敗'})
 
+def get_candidate_applications(query_params: Dict[str, str]) -> Dict[str, Any]:
+    """
+    列出同一位候選人的所有投遞
+
+    查詢參數 candidate_id，或以 resume_id 找出其所屬候選人；
+    由 candidate-index（candidate_id + processed_at）倒序查詢，並附上各職缺的配對分數
+    """
+    try:
+        candidate_id = query_params.get('candidate_id')
+        resume_id = query_params.get('resume_id')
+        if not candidate_id and not resume_id:
+            return response(400, {'error': '缺少 candidate_id 或 resume_id 參數'})
+        
+        if not candidate_id:
+            resume = resume_table.get_item(
+                Key={'resume_id': resume_id},
+                ProjectionExpression='resume_id, candidate_id'
+            ).get('Item')
+            if not resume:
+                return response(404, {'error': '履歷不存在'})
+            if not resume.get('candidate_id'):
+                return response(404, {'error': '此履歷尚未建立候選人身分'})
+            candidate_id = resume['candidate_id']
+        
+        query_kwargs = {
+            'IndexName': 'candidate-index',
+            'KeyConditionExpression': 'candidate_id = :candidate_id',
+            'ExpressionAttributeValues': {':candidate_id': candidate_id},
+            'ScanIndexForward': False
+        }
+        applications = []
+        while True:
+            query_response = resume_table.query(**query_kwargs)
+            applications.extend(query_response.get('Items', []))
+            if 'LastEvaluatedKey' not in query_response:
+                break
+            query_kwargs['ExclusiveStartKey'] = query_response['LastEvaluatedKey']
+        
+        if not applications:
+            return response(404, {'error': '找不到此候選人的投遞紀錄'})
+        
+        scores = applicant_filters.load_match_scores(
+            (item.get('job_id', ''), item['resume_id']) for item in applications if item.get('job_id')
+        )
+        latest = applications[0]
+        return response(200, {
+            'message': '成功獲取候選人投遞紀錄',
+            'candidate_id': candidate_id,
+            'candidate_name': latest.get('candidate_name', ''),
+            'current_title': latest.get('current_title', ''),
+            'total_count': len(applications),
+            'data': [
+                {
+                    'resume_id': item['resume_id'],
+                    'team_id': item.get('team_id', ''),
+                    'job_id': item.get('job_id', ''),
+                    'processed_at': item.get('processed_at', ''),
+                    'match_score': scores.get((item.get('job_id', ''), item['resume_id'])),
+                    'reused_parse': item.get('identity_matched_by') == 'content'
+                }
+                for item in applications
+            ]
+        })
+        
+    except Exception as e:
+        print(f"獲取候選人投遞紀錄失敗: {str(e)}")
+        return response(500, {'error': '獲取候選人投遞紀錄失敗'})
+
+def iter_team_resumes(team_id: str):
+    """逐頁讀取 team-index（時間倒序），呼叫端停止迭代就不會再查詢下一頁"""
+    query_kwargs = {
+        'IndexName': 'team-index',
+        'KeyConditionExpression': 'team_id = :team_id',
+        'ExpressionAttributeValues': {
+            ':team_id': team_id
+        },
+        'ScanIndexForward': False
+    }
+    while True:
+        resume_response = resume_table.query(**query_kwargs)
+        for resume in resume_response.get('Items', []):
+            yield resume
+        if 'LastEvaluatedKey' not in resume_response:
+            return
+        query_kwargs['ExclusiveStartKey'] = resume_response['LastEvaluatedKey']
+
 def list_resumes(query_params: Dict[str, str]) -> Dict[str, Any]:
     """列出履歷（支援按團隊、職缺篩選）"""
     try:
@@ -191,7 +335,29 @@ def list_resumes(query_params: Dict[str, str]) -> Dict[str, Any]:
         
         if job_id:
             # 使用 job-index GSI 查詢特定職缺的履歷
-            return get_job_applicants(job_id)
+            return get_job_applicants(job_id, query_params)
+        elif team_id and applicant_filters.has_filter_params(query_params):
+            # 篩選 / 排序：逐頁讀取 team-index，依時間排序時湊滿頁面即停止
+            criteria, filter_error = applicant_filters.parse_filter_params(query_params)
+            if filter_error:
+                return response(400, {'error': filter_error})
+            
+            entries = (
+                (applicant_filters.compact_attributes(resume), resume)
+                for resume in iter_team_resumes(team_id)
+            )
+            result = applicant_filters.select_page(
+                entries,
+                criteria,
+                score_key=lambda resume: (resume.get('job_id', ''), resume['resume_id'])
+            )
+            return response(200, {
+                'message': '成功獲取團隊履歷資料' if result['items'] else '沒有符合條件的履歷',
+                'team_id': team_id,
+                'total_count': result['total'],
+                'data': result['items'],
+                'pagination': applicant_filters.pagination_info(result, criteria)
+            })
         elif team_id:
             # 使用 team-index GSI 查詢特定團隊的履歷
             try:
@@ -234,26 +400,211 @@ def list_resumes(query_params: Dict[str, str]) -> Dict[str, Any]:
                     'data': []
                 })
         else:
-            # 掃描所有履歷（限制使用）
-            scan_response = resume_table.scan(
-                Limit=limit
-            )
+            # 掃描所有履歷（限制使用）：每次最多 limit 筆，以 cursor 接續下一批
+            try:
+                start_key = table_scan.decode_start_key(query_params['cursor'], ['resume_id']) if query_params.get('cursor') else None
+            except ValueError as e:
+                return response(400, {'error': str(e)})
             
-            resumes = scan_response.get('Items', [])
+            scan = table_scan.TableScan(resume_table, page_size=limit, limit=limit,
+                                        start_key=start_key, key_fields=['resume_id'])
+            resumes = scan.all()
+            next_cursor = table_scan.encode_start_key(scan.next_start_key)
             
             return response(200, {
                 'message': '成功獲取履歷列表',
                 'total_count': len(resumes),
-                'data': resumes
+                'data': resumes,
+                'next_cursor': next_cursor,
+                'has_more': next_cursor is not None
             })
             
     except Exception as e:
         print(f"列出履歷失敗: {str(e)}")
         return response(500, {'error': '列出履歷失敗'})
 
-def lambda_handler(event, context):
-    """Lambda 主函數"""
+def search_by_skills(query_params: Dict[str, str]) -> Dict[str, Any]:
+    """依技能查詢候選人（多個技能取交集或聯集）"""
+    try:
+        result = skill_search.search(query_params)
+        if 'error' in result:
+            return response(400, {'error': result['error']})
+        
+        return response(200, {
+            'message': '成功查詢技能候選人' if result['data'] else '沒有符合技能的候選人',
+            **result
+        })
+        
+    except Exception as e:
+        print(f"技能查詢失敗: {str(e)}")
+        import traceback
+        print(traceback.format_exc())
+        return response(500, {'error': '技能查詢失敗'})
+
+def search_resumes(query_params: Dict[str, str]) -> Dict[str, Any]:
+    """全文搜尋候選人（BM25，支援中英混合關鍵字）"""
+    query = (query_params.get('q') or '').strip()
+    if not query:
+        return response(400, {'error': '缺少 q 參數'})
+    
     try:
+        limit = min(max(int(query_params.get('limit', 20)), 1), 100)
+    except (ValueError, TypeError):
+        return response(400, {'error': 'limit 格式不正確'})
+    
+    try:
+        hits = text_search.search(query, team_id=query_params.get('team_id'), limit=limit)
+        summaries = {
+            item['resume_id']: item
+            for item in skill_search.load_resume_summaries([resume_id for resume_id, _ in hits])
+        }
+        results = [
+            {**summaries[resume_id], 'score': round(score, 4)}
+            for resume_id, score in hits if resume_id in summaries
+        ]
+        
+        return response(200, {
+            'message': '搜尋完成' if results else '沒有符合的候選人',
+            'query': query,
+            'total_count': len(results),
+            'data': results
+        })
+        
+    except Exception as e:
+        print(f"全文搜尋失敗: {str(e)}")
+        import traceback
+        print(traceback.format_exc())
+        return response(500, {'error': '全文搜尋失敗'})
+
+def semantic_search(query_params: Dict[str, str]) -> Dict[str, Any]:
+    """語意搜尋候選人：以職缺（job_id）或自由文字（q）的向量找最相近的履歷"""
+    job_id = query_params.get('job_id')
+    query = (query_params.get('q') or '').strip()
+    if not job_id and not query:
+        return response(400, {'error': '缺少 job_id 或 q 參數'})
+    
+    try:
+        limit = min(max(int(query_params.get('k', 20)), 1), 100)
+    except (ValueError, TypeError):
+        return response(400, {'error': 'k 格式不正確'})
+    
+    try:
+        team_id = query_params.get('team_id')
+        if job_id:
+            job_response = jobs_table.get_item(Key={'job_id': job_id})
+            if 'Item' not in job_response:
+                return response(404, {'error': '職缺不存在'})
+            job = job_response['Item']
+            hits = vector_search.search_job(job, team_id=team_id or job.get('team_id'), limit=limit)
+        else:
+            hits = vector_search.search_text(query, team_id=team_id, limit=limit)
+        
+        summaries = {
+            item['resume_id']: item
+            for item in skill_search.load_resume_summaries([resume_id for resume_id, _ in hits])
+        }
+        results = [
+            {**summaries[resume_id], 'similarity': round(score, 4)}
+            for resume_id, score in hits if resume_id in summaries
+        ]
+        
+        return response(200, {
+            'message': '搜尋完成' if results else '沒有符合的候選人',
+            'job_id': job_id,
+            'query': query or None,
+            'total_count': len(results),
+            'data': results
+        })
+        
+    except Exception as e:
+        print(f"語意搜尋失敗: {str(e)}")
+        import traceback
+        print(traceback.format_exc())
+        return response(500, {'error': '語意搜尋失敗'})
+
+def get_ranked_applicants(query_params: Dict[str, str]) -> Dict[str, Any]:
+    """依配對分數取得職缺的前 K 名候選人（cursor 分頁）"""
+    job_id = query_params.get('job_id')
+    if not job_id:
+        return response(400, {'error': '缺少 job_id 參數'})
+    
+    try:
+        limit = min(max(int(query_params.get('k', 20)), 1), match_ranking.MAX_RANKED_LIMIT)
+    except (ValueError, TypeError):
+        return response(400, {'error': 'k 格式不正確'})
+    
+    try:
+        is_matched = match_ranking.parse_is_matched(query_params.get('is_matched'))
+        page = match_ranking.query_ranked(job_id, limit=limit, cursor=query_params.get('cursor'), is_matched=is_matched)
+    except ValueError as e:
+        return response(400, {'error': str(e)})
+    
+    try:
+        summaries = {
+            item['resume_id']: item
+            for item in skill_search.load_resume_summaries([item['resume_id'] for item in page['items']])
+        }
+        results = []
+        for rank_item in page['items']:
+            summary = summaries.get(rank_item['resume_id'], {'resume_id': rank_item['resume_id']})
+            results.append({
+                **summary,
+                'match_score': rank_item.get('match_score'),
+                'is_matched': rank_item.get('is_matched'),
+                'matched_requirements': rank_item.get('matched_requirements', []),
+                'unmatched_requirements': rank_item.get('unmatched_requirements', []),
+                'llm_score': rank_item.get('llm_score'),
+                'cot_reason': rank_item.get('cot_reason'),
+                'matched_at': rank_item.get('matched_at')
+            })
+        
+        return response(200, {
+            'message': '查詢完成' if results else '沒有配對結果',
+            'job_id': job_id,
+            'is_matched': is_matched,
+            'count': len(results),
+            'data': results,
+            'next_cursor': page['next_cursor']
+        })
+        
+    except Exception as e:
+        print(f"排名查詢失敗: {str(e)}")
+        import traceback
+        print(traceback.format_exc())
+        return response(500, {'error': '排名查詢失敗'})
+
+def handle_maintenance_action(event: Dict[str, Any], context=None) -> Dict[str, Any]:
+    """處理排程或手動觸發的維護工作（非 API Gateway 事件）"""
+    action = event.get('action')
+    print(f"執行維護工作: {action}")
+    
+    if action == 'merge_search_index':
+        result = {
+            'bm25': text_search.merge_deltas(),
+            'vectors': vector_search.merge_deltas()
+        }
+    elif action == 'rebuild_search_index':
+        result = text_search.rebuild_from_table(resume_table)
+    elif action == 'rebuild_vector_index':
+        # 帶 run_id 時接續既有的重建；沒有時先接續失敗的執行，否則開始新的一輪
+        # （reembed 為 true 時不沿用既有向量）
+        run_id = event.get('run_id') or vector_search.reopen_failed_rebuild()
+        result = vector_search.rebuild_summary(vector_search.rebuild_from_table(
+            resume_table, context, run_id=run_id, reembed=bool(event.get('reembed'))
+        ))
+    else:
+        return {'statusCode': 400, 'body': json.dumps({'error': f'未知的維護工作: {action}'}, ensure_ascii=False)}
+    
+    print(f"維護工作完成: {result}")
+    return {'statusCode': 200, 'body': json.dumps(result, cls=DecimalEncoder, ensure_ascii=False)}
+
+def route_request(event, context):
+    """依方法與路徑分派請求"""
+    try:
+        # 排程 / 手動觸發的維護工作
+        if 'action' in event and 'httpMethod' not in event:
+            return handle_maintenance_action(event, context)
+        
         # 處理 CORS preflight 請求
         if event['httpMethod'] == 'OPTIONS':
             return response(200, {'message': 'CORS preflight success'})
@@ -275,7 +626,27 @@ def lambda_handler(event, context):
             job_id = query_params.get('job_id')
             if not job_id:
                 return response(400, {'error': '缺少 job_id 參數'})
-            return get_job_applicants(job_id)
+            return get_job_applicants(job_id, query_params)
+        
+        elif method == 'GET' and path == '/resumes/ranked':
+            # 依配對分數排名的前 K 名候選人
+            return get_ranked_applicants(query_params)
+        
+        elif method == 'GET' and path == '/resumes/candidate-applications':
+            # 同一位候選人跨職缺的所有投遞
+            return get_candidate_applications(query_params)
+        
+        elif method == 'GET' and path == '/resumes/search':
+            # 全文搜尋候選人
+            return search_resumes(query_params)
+        
+        elif method == 'GET' and path == '/resumes/semantic-search':
+            # 語意搜尋候選人（職缺向量或自由文字）
+            return semantic_search(query_params)
+        
+        elif method == 'GET' and path == '/resumes/skill-search':
+            # 以技能反向索引查詢候選人（可跨團隊）
+            return search_by_skills(query_params)
         
         elif method == 'GET' and path.startswith('/resumes/'):
             # 獲取特定履歷詳情
@@ -289,4 +660,8 @@ def lambda_handler(event, context):
         print(f"Resume management Lambda 執行錯誤: {str(e)}")
         import traceback
         print(traceback.format_exc())
-        return response(500, {'error': '伺服器內部錯誤'}) 
\ No newline at end of file
+        return response(500, {'error': '伺服器內部錯誤'}) 
+
+def lambda_handler(event, context):
+    """Lambda 主函數：處理請求後為 GET 回應加上 ETag / Cache-Control（If-None-Match 符合時回傳 304）"""
+    return http_cache.conditional(event, route_request(event, context), CACHE_CONTROL_RULES)
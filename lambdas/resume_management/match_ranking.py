@@ -0,0 +1,82 @@
+"""
+職缺配對結果的排名查詢
+
+match_result 表的 score-index（job_id + score_sort）依分數排序，
+score_sort = "{is_matched}#{分數 x 10000 補零}"，由配對 Lambda 寫入。
+前 K 名直接倒序查詢索引取得，不需讀取整個職缺分區；
+is_matched 篩選以 begins_with 作為 key condition，不使用 FilterExpression。
+"""
+import base64
+import json
+import os
+from typing import Any, Dict, Optional
+
+import boto3
+from boto3.dynamodb.conditions import Key
+
+dynamodb = boto3.resource('dynamodb')
+
+MATCH_RESULT_TABLE_NAME = os.environ.get('MATCH_RESULT_TABLE_NAME', 'benson-haire-match-result')
+SCORE_INDEX_NAME = 'score-index'
+MAX_RANKED_LIMIT = 100
+
+match_result_table = dynamodb.Table(MATCH_RESULT_TABLE_NAME)
+
+
+def encode_cursor(last_evaluated_key: Optional[Dict[str, Any]]) -> Optional[str]:
+    """把 LastEvaluatedKey 轉成不透明的 cursor 字串"""
+    if not last_evaluated_key:
+        return None
+    payload = json.dumps(last_evaluated_key, default=str, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(payload).decode('ascii')
+
+
+def decode_cursor(cursor: str, job_id: str) -> Dict[str, Any]:
+    """還原 cursor；格式錯誤或不屬於這個職缺時拋出 ValueError"""
+    try:
+        key = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+    except Exception:
+        raise ValueError('cursor 格式不正確')
+    if not isinstance(key, dict) or key.get('job_id') != job_id or not {'resume_id', 'score_sort'} <= set(key):
+        raise ValueError('cursor 與職缺不符')
+    return key
+
+
+def query_ranked(job_id: str, limit: int = 20, cursor: Optional[str] = None,
+                 is_matched: Optional[bool] = None) -> Dict[str, Any]:
+    """
+    依分數由高到低取得一頁配對結果
+
+    :return: {'items', 'next_cursor'}
+    """
+    key_condition = Key('job_id').eq(job_id)
+    if is_matched is not None:
+        key_condition = key_condition & Key('score_sort').begins_with(f"{int(is_matched)}#")
+
+    query_kwargs = {
+        'IndexName': SCORE_INDEX_NAME,
+        'KeyConditionExpression': key_condition,
+        'ScanIndexForward': False,
+        'Limit': limit
+    }
+    if cursor:
+        query_kwargs['ExclusiveStartKey'] = decode_cursor(cursor, job_id)
+
+    query_response = match_result_table.query(**query_kwargs)
+    items = query_response.get('Items', [])
+    return {
+        'items': items,
+        'next_cursor': encode_cursor(query_response.get('LastEvaluatedKey'))
+    }
+
+
+def parse_is_matched(value: Optional[str]) -> Optional[bool]:
+    if value is None or value == '':
+        return None
+    value = value.lower()
+    if value in ('true', '1'):
+        return True
+    if value in ('false', '0'):
+        return False
+    raise ValueError('is_matched 無效，可選值: true, false')
+
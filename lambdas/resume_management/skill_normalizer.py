@@ -0,0 +1,229 @@
+"""
+技能正規化字典與多模式比對（Aho–Corasick）
+
+- normalize_skill：把單一技能字串（"python3"、"PY"、"機器學習"、"ML"）轉成標準名稱
+- extract_skills：在工作經歷描述中一次線性掃描找出所有提到的技能（只比對不易誤判的寫法）
+- 自動機在第一次使用時建立，暖機容器中重複使用
+
+resume_parser、resume_matcher 與 resume_management 各有一份相同的模組，
+修改字典時請同步三邊，否則寫入與查詢的技能名稱會不一致。
+"""
+import unicodedata
+from collections import deque
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# 標準名稱 -> 別名（標準名稱本身也會被比對）；這些寫法也會從自由文字中擷取
+SKILL_ALIASES: Dict[str, List[str]] = {
+    'python': ['python3', 'python 3', 'py', 'python2'],
+    'java': ['java8', 'java 8', 'java11', 'java 11', 'java17'],
+    'javascript': ['js', 'java script', 'ecmascript', 'es6'],
+    'typescript': ['ts'],
+    'c++': ['cpp', 'c plus plus'],
+    'c#': ['csharp', 'c sharp'],
+    'go': ['golang'],
+    'r': ['r語言', 'r language'],
+    'sql': ['structured query language'],
+    'mysql': [],
+    'postgresql': ['postgres', 'psql'],
+    'mongodb': ['mongo'],
+    'redis': [],
+    'nosql': [],
+    'react': ['react.js', 'reactjs'],
+    'vue': ['vue.js', 'vuejs'],
+    'angular': ['angularjs', 'angular.js'],
+    'node.js': ['nodejs'],
+    'django': [],
+    'flask': [],
+    'fastapi': [],
+    'spring boot': ['springboot'],
+    'aws': ['amazon web services'],
+    'gcp': ['google cloud', 'google cloud platform'],
+    'azure': ['microsoft azure'],
+    'docker': [],
+    'kubernetes': ['k8s'],
+    'terraform': [],
+    'ci/cd': ['cicd', 'ci cd', '持續整合'],
+    'git': [],
+    'linux': [],
+    'machine learning': ['ml', '機器學習'],
+    'deep learning': ['dl', '深度學習'],
+    'natural language processing': ['nlp', '自然語言處理'],
+    'computer vision': ['cv', '電腦視覺', '影像辨識'],
+    'large language model': ['llm', 'llms', '大型語言模型'],
+    'data analysis': ['資料分析', '數據分析', 'data analytics'],
+    'data engineering': ['資料工程', '數據工程'],
+    'data visualization': ['資料視覺化', '數據視覺化'],
+    'statistics': ['統計分析'],
+    'tensorflow': ['tf'],
+    'pytorch': [],
+    'scikit-learn': ['sklearn', 'scikit learn'],
+    'pandas': [],
+    'numpy': [],
+    'spark': ['pyspark', 'apache spark'],
+    'hadoop': [],
+    'airflow': ['apache airflow'],
+    'kafka': ['apache kafka'],
+    'tableau': [],
+    'power bi': ['powerbi'],
+    'excel': ['microsoft excel', 'ms excel'],
+    'project management': ['專案管理', 'pm'],
+    'agile': ['scrum', '敏捷開發'],
+    'english': ['英文', '英語'],
+    'japanese': ['日文', '日語'],
+    'chinese': ['中文', '華語'],
+}
+
+# 一般用語或泛稱的別名（"node"、"spring"、"github"、「容器化」）：只在整個技能欄位等於該寫法時轉換，
+# 不從自由文字擷取，避免「每個 node」、"Spring 2020"、"excel at" 之類的誤判
+LIST_ONLY_ALIASES: Dict[str, List[str]] = {
+    'node.js': ['node'],
+    'spring boot': ['spring'],
+    'docker': ['容器化'],
+    'git': ['github', 'gitlab'],
+    'statistics': ['統計'],
+    'pytorch': ['torch'],
+}
+
+# 標準名稱本身是常見英文單字的技能，自由文字中只比對 SKILL_ALIASES 的別名（例如 "ms excel"、"reactjs"）
+LIST_ONLY_SKILLS = {'excel', 'react', 'spark', 'angular', 'statistics'}
+
+# 太短或太常見的別名只用於整個技能欄位的比對，不從自由文字中擷取
+MIN_EXTRACT_LENGTH = 3
+_CJK_RANGES = (('\u3400', '\u9fff'), ('\uf900', '\ufaff'))
+
+
+def normalize_term(term: str) -> str:
+    """正規化技能 / 關鍵字：全半形統一、轉小寫、合併空白"""
+    return ' '.join(unicodedata.normalize('NFKC', str(term)).lower().split())
+
+
+def _is_cjk(char: str) -> bool:
+    return any(low <= char <= high for low, high in _CJK_RANGES)
+
+
+def _is_word_char(char: str) -> bool:
+    return char.isalnum() and not _is_cjk(char)
+
+
+class SkillAutomaton:
+    """Aho–Corasick 自動機：goto 表、fail 連結與每個狀態的輸出 (長度, 標準名稱)"""
+
+    def __init__(self, patterns: Iterable[Tuple[str, str]]):
+        self.goto: List[Dict[str, int]] = [{}]
+        self.fail: List[int] = [0]
+        self.output: List[List[Tuple[int, str]]] = [[]]
+
+        for pattern, canonical in patterns:
+            state = 0
+            for char in pattern:
+                next_state = self.goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self.goto)
+                    self.goto[state][char] = next_state
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.output.append([])
+                state = next_state
+            self.output[state].append((len(pattern), canonical))
+
+        # 廣度優先建立 fail 連結，並合併後綴狀態的輸出
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self.goto[state].items():
+                queue.append(next_state)
+                if state:
+                    fallback = self.fail[state]
+                    while fallback and char not in self.goto[fallback]:
+                        fallback = self.fail[fallback]
+                    self.fail[next_state] = self.goto[fallback].get(char, 0)
+                self.output[next_state] = self.output[next_state] + self.output[self.fail[next_state]]
+
+    def find(self, text: str) -> List[Tuple[int, int, str]]:
+        """回傳所有符合詞界的命中 (start, end, canonical)，只掃描一次文字"""
+        matches = []
+        state = 0
+        for index, char in enumerate(text):
+            while state and char not in self.goto[state]:
+                state = self.fail[state]
+            state = self.goto[state].get(char, 0)
+            for length, canonical in self.output[state]:
+                start = index - length + 1
+                end = index + 1
+                # 英數字樣式需要完整詞界，避免 "go" 命中 "google"
+                if _is_word_char(text[start]) and start > 0 and _is_word_char(text[start - 1]):
+                    continue
+                if _is_word_char(text[index]) and end < len(text) and _is_word_char(text[end]):
+                    continue
+                matches.append((start, end, canonical))
+        return matches
+
+
+_alias_lookup: Optional[Dict[str, str]] = None
+_automaton: Optional[SkillAutomaton] = None
+
+
+def alias_lookup() -> Dict[str, str]:
+    global _alias_lookup
+    if _alias_lookup is None:
+        lookup = {}
+        for canonical, aliases in SKILL_ALIASES.items():
+            for alias in [canonical] + aliases + LIST_ONLY_ALIASES.get(canonical, []):
+                lookup[normalize_term(alias)] = canonical
+        _alias_lookup = lookup
+    return _alias_lookup
+
+
+def _extract_patterns() -> Iterable[Tuple[str, str]]:
+    """可從自由文字擷取的寫法：SKILL_ALIASES 的別名，以及不在 LIST_ONLY_SKILLS 的標準名稱"""
+    for canonical, aliases in SKILL_ALIASES.items():
+        spellings = aliases if canonical in LIST_ONLY_SKILLS else [canonical] + aliases
+        for spelling in spellings:
+            alias = normalize_term(spelling)
+            if len(alias) >= MIN_EXTRACT_LENGTH or any(_is_cjk(char) for char in alias):
+                yield alias, canonical
+
+
+def get_automaton() -> SkillAutomaton:
+    """取得已編譯的自動機（每個暖機容器只建立一次）"""
+    global _automaton
+    if _automaton is None:
+        _automaton = SkillAutomaton(_extract_patterns())
+    return _automaton
+
+
+def normalize_skill(skill: str) -> str:
+    """單一技能轉標準名稱；字典中沒有的技能只做字串正規化"""
+    term = normalize_term(skill)
+    return alias_lookup().get(term, term)
+
+
+def skill_spellings(skill: str) -> List[str]:
+    """技能的所有寫法（標準名稱與別名，皆已正規化），供以文字比對的條件使用（例如「英文」與 "english"）"""
+    term = normalize_term(skill)
+    canonical = alias_lookup().get(term, term)
+    spellings = [term, canonical] + [alias for alias, name in alias_lookup().items() if name == canonical]
+    return list(dict.fromkeys(spellings))
+
+
+def normalize_skills(skills: Iterable[str]) -> List[str]:
+    """批次正規化並去除重複，保留原始順序"""
+    return list(dict.fromkeys(normalize_skill(skill) for skill in skills if skill and str(skill).strip()))
+
+
+def extract_skills(text: str) -> List[str]:
+    """
+    從自由文字擷取技能（最左最長、不重疊），依首次出現順序回傳標準名稱
+    """
+    text = normalize_term(text or '')
+    if not text:
+        return []
+    matches = sorted(get_automaton().find(text), key=lambda m: (m[0], -(m[1] - m[0])))
+    found = []
+    covered_until = 0
+    for start, end, canonical in matches:
+        if start < covered_until:
+            continue
+        found.append(canonical)
+        covered_until = end
+    return list(dict.fromkeys(found))
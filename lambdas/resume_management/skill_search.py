@@ -0,0 +1,154 @@
+"""
+技能反向索引查詢
+
+索引由履歷解析 Lambda 增量維護（skill_key = "{team_id}#{skill}" / "*#{skill}"）。
+查詢多個技能時並行讀取各 posting list，再由最短的清單開始取交集，
+不需要掃描 parsed_resume 表。
+查詢技能先轉成標準名稱；正規化字典上線前寫入的 posting 可能仍是原始寫法，
+因此同一技能的標準名稱與原始寫法兩個 posting list 會先取聯集。
+"""
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+import boto3
+
+from applicant_filters import normalize_term
+from skill_normalizer import normalize_skill
+
+dynamodb = boto3.resource('dynamodb')
+
+SKILL_INDEX_TABLE_NAME = os.environ.get('SKILL_INDEX_TABLE_NAME', 'benson-haire-skill-index')
+RESUME_TABLE_NAME = os.environ.get('RESUME_TABLE_NAME', 'benson-haire-parsed_resume')
+
+# 一次查詢最多幾個技能
+MAX_QUERY_SKILLS = 10
+# 跨團隊查詢使用的 partition 前綴
+ALL_TEAMS = '*'
+
+skill_index_table = dynamodb.Table(SKILL_INDEX_TABLE_NAME)
+
+
+def load_postings(skill_key: str) -> Dict[str, str]:
+    """讀取單一技能的完整 posting list：resume_id -> job_id"""
+    postings: Dict[str, str] = {}
+    query_kwargs = {
+        'KeyConditionExpression': 'skill_key = :skill_key',
+        'ExpressionAttributeValues': {':skill_key': skill_key},
+        'ProjectionExpression': 'resume_id, job_id'
+    }
+    while True:
+        query_response = skill_index_table.query(**query_kwargs)
+        for item in query_response.get('Items', []):
+            postings[item['resume_id']] = item.get('job_id', '')
+        if 'LastEvaluatedKey' not in query_response:
+            return postings
+        query_kwargs['ExclusiveStartKey'] = query_response['LastEvaluatedKey']
+
+
+def find_resumes_by_skills(skills: List[str], team_id: Optional[str] = None, match: str = 'all') -> Dict[str, str]:
+    """
+    查詢具備指定技能的履歷
+
+    :param match: 'all' 取交集、'any' 取聯集
+    :return: resume_id -> job_id
+    """
+    partition = team_id or ALL_TEAMS
+    variants: Dict[str, List[str]] = {}
+    for skill in skills:
+        if skill and skill.strip():
+            raw = normalize_term(skill)
+            variants.setdefault(normalize_skill(raw), []).append(raw)
+    if not variants:
+        return {}
+
+    keys = list(dict.fromkeys(
+        f"{partition}#{term}" for canonical, raws in variants.items() for term in [canonical] + raws
+    ))
+    with ThreadPoolExecutor(max_workers=min(len(keys), 10)) as executor:
+        loaded = dict(zip(keys, executor.map(load_postings, keys)))
+
+    posting_lists = []
+    for canonical, raws in variants.items():
+        postings: Dict[str, str] = {}
+        for term in dict.fromkeys([canonical] + raws):
+            postings.update(loaded[f"{partition}#{term}"])
+        posting_lists.append(postings)
+
+    if match == 'any':
+        merged: Dict[str, str] = {}
+        for postings in posting_lists:
+            merged.update(postings)
+        return merged
+
+    # 從最短的 posting list 開始取交集，候選集合只會越來越小
+    posting_lists.sort(key=len)
+    result = dict(posting_lists[0])
+    for postings in posting_lists[1:]:
+        if not result:
+            break
+        result = {resume_id: job_id for resume_id, job_id in result.items() if resume_id in postings}
+    return result
+
+
+def load_resume_summaries(resume_ids: List[str]) -> List[Dict[str, Any]]:
+    """以 BatchGetItem 取回履歷摘要欄位，維持傳入的順序"""
+    summaries: Dict[str, Dict[str, Any]] = {}
+    for start in range(0, len(resume_ids), 100):
+        request_items = {
+            RESUME_TABLE_NAME: {
+                'Keys': [{'resume_id': resume_id} for resume_id in resume_ids[start:start + 100]],
+                'ProjectionExpression': 'resume_id, team_id, job_id, candidate_name, current_title, processed_at, skills_normalized'
+            }
+        }
+        while request_items:
+            batch_response = dynamodb.batch_get_item(RequestItems=request_items)
+            for item in batch_response.get('Responses', {}).get(RESUME_TABLE_NAME, []):
+                summaries[item['resume_id']] = item
+            request_items = batch_response.get('UnprocessedKeys') or {}
+    return [summaries[resume_id] for resume_id in resume_ids if resume_id in summaries]
+
+
+def search(query_params: Dict[str, str]) -> Dict[str, Any]:
+    """
+    技能搜尋 API 的主要邏輯
+
+    :return: {'error'} 或 {'skills', 'team_id', 'match', 'total_count', 'data', 'pagination'}
+    """
+    skills = [skill for skill in (query_params.get('skills') or '').split(',') if skill.strip()]
+    if not skills:
+        return {'error': '缺少 skills 參數'}
+    if len(skills) > MAX_QUERY_SKILLS:
+        return {'error': f'一次最多查詢 {MAX_QUERY_SKILLS} 個技能'}
+
+    match = (query_params.get('match') or 'all').lower()
+    if match not in ('all', 'any'):
+        return {'error': 'match 無效，可選值: all, any'}
+
+    try:
+        page = max(int(query_params.get('page', 1)), 1)
+        limit = min(max(int(query_params.get('limit', 50)), 1), 100)
+    except (ValueError, TypeError):
+        return {'error': '分頁參數格式不正確'}
+
+    team_id = query_params.get('team_id')
+    matches = find_resumes_by_skills(skills, team_id=team_id, match=match)
+
+    # resume_id 排序讓分頁結果穩定
+    resume_ids = sorted(matches)
+    total = len(resume_ids)
+    page_ids = resume_ids[(page - 1) * limit:page * limit]
+
+    return {
+        'skills': list(dict.fromkeys(normalize_skill(skill) for skill in skills)),
+        'team_id': team_id,
+        'match': match,
+        'total_count': total,
+        'data': load_resume_summaries(page_ids),
+        'pagination': {
+            'current_page': page,
+            'total_pages': (total + limit - 1) // limit if total > 0 else 1,
+            'total_items': total,
+            'items_per_page': limit
+        }
+    }
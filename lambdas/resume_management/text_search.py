@@ -0,0 +1,384 @@
+"""
+候選人全文搜尋（BM25）
+
+- 斷詞：中文字串切成字元 bigram（單字則保留 unigram），英文與數字依單字切分
+- 索引：詞彙表 + 串接的 posting 陣列（array 模組，無額外相依套件）
+- 儲存：以版本號命名的壓縮快照放在 parsed resume bucket，manifest 指向目前版本（index_store）
+- 增量：履歷解析 Lambda 每寫入 / 刪除一份履歷就追加一個 delta 檔，
+  查詢時在記憶體中疊加到快照上，並定期合併成新的快照
+
+S3 路徑：
+  search-index/bm25/manifest.json
+  search-index/bm25/snapshots/v{version}.bin
+  search-index/bm25/deltas/{timestamp}-{resume_id}.json
+"""
+import array
+import heapq
+import json
+import math
+import os
+import re
+import struct
+import sys
+import time
+import unicodedata
+import zlib
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import index_store
+import table_scan
+
+PARSED_BUCKET = os.environ.get('PARSED_BUCKET', 'benson-haire-parsed-resume')
+SEARCH_INDEX_PREFIX = 'search-index/bm25'
+
+# 暖機容器多久檢查一次 manifest 與新的 delta
+REFRESH_INTERVAL_SECONDS = int(os.environ.get('SEARCH_INDEX_REFRESH_SECONDS', '30'))
+# 重建快照時掃描 parsed_resume 表的平行分段數
+REBUILD_SCAN_SEGMENTS = int(os.environ.get('REBUILD_SCAN_SEGMENTS', '4'))
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+SNAPSHOT_MAGIC = b'HBM25'
+SNAPSHOT_FORMAT = 1
+
+_CJK_RANGES = '\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff'
+_TOKEN_RE = re.compile(f'[{_CJK_RANGES}]+|[a-z0-9][a-z0-9+#.]*')
+_CJK_RE = re.compile(f'[{_CJK_RANGES}]')
+
+
+def tokenize(text: str) -> List[str]:
+    """中英混合斷詞：中文取字元 bigram，英文取小寫單字（保留 c++、c#、node.js 等寫法）"""
+    tokens = []
+    for match in _TOKEN_RE.finditer(unicodedata.normalize('NFKC', text or '').lower()):
+        token = match.group()
+        if _CJK_RE.match(token):
+            if len(token) == 1:
+                tokens.append(token)
+            else:
+                tokens.extend(token[i:i + 2] for i in range(len(token) - 1))
+        else:
+            token = token.rstrip('.')
+            if token:
+                tokens.append(token)
+    return tokens
+
+
+def document_text(resume: Dict[str, Any]) -> str:
+    """組出履歷的可搜尋文字：職稱、技能、工作經歷、學歷與證照"""
+    profile = resume.get('profile') or {}
+    basics = profile.get('basics') or {}
+    parts = [resume.get('current_title') or '', basics.get('current_title') or '']
+    parts.extend(str(skill) for skill in basics.get('skills') or [])
+    for exp in profile.get('professional_experiences') or []:
+        parts.extend(str(exp.get(field) or '') for field in ('title', 'company', 'description'))
+    for edu in profile.get('educations') or []:
+        parts.extend(str(edu.get(field) or '') for field in ('issuing_organization', 'study_type', 'department', 'description'))
+    for cert in profile.get('trainings_and_certifications') or []:
+        parts.extend(str(cert.get(field) or '') for field in ('issuing_organization', 'description'))
+    return '\n'.join(part for part in parts if part)
+
+
+def _to_little_endian(values: array.array) -> bytes:
+    if sys.byteorder != 'little':
+        values = array.array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def _from_little_endian(typecode: str, data: bytes) -> array.array:
+    values = array.array(typecode)
+    values.frombytes(data)
+    if sys.byteorder != 'little':
+        values.byteswap()
+    return values
+
+
+class SearchIndex:
+    """
+    不可變的 BM25 索引
+
+    每個詞彙對應 postings 陣列中的一段連續區間 [start, start + df)，
+    postings_docs 存文件序號、postings_tf 存詞頻。
+    """
+
+    def __init__(self, doc_ids: List[str], doc_teams: array.array, team_names: List[str],
+                 doc_lengths: array.array, terms: Dict[str, Tuple[int, int]],
+                 postings_docs: array.array, postings_tf: array.array,
+                 version: int = 0, watermark: str = ''):
+        self.doc_ids = doc_ids
+        self.doc_teams = doc_teams
+        self.team_names = team_names
+        self.doc_lengths = doc_lengths
+        self.terms = terms
+        self.postings_docs = postings_docs
+        self.postings_tf = postings_tf
+        self.version = version
+        self.watermark = watermark
+        self.id_to_doc = {doc_id: i for i, doc_id in enumerate(doc_ids)}
+        self.team_to_index = {team: i for i, team in enumerate(team_names)}
+        self.avg_length = (sum(doc_lengths) / len(doc_lengths)) if doc_lengths else 0.0
+        # BM25 的文件長度正規化項只與文件有關，載入時先算好
+        self.norms = array.array('d', (
+            BM25_K1 * (1 - BM25_B + BM25_B * length / (self.avg_length or 1.0)) for length in doc_lengths
+        ))
+
+    @classmethod
+    def build(cls, documents: Iterable[Tuple[str, str, Counter]], version: int = 0, watermark: str = '') -> 'SearchIndex':
+        """由 (resume_id, team_id, 詞頻) 建立索引"""
+        doc_ids: List[str] = []
+        doc_teams = array.array('H')
+        team_names: List[str] = []
+        team_to_index: Dict[str, int] = {}
+        doc_lengths = array.array('I')
+        term_postings: Dict[str, List[Tuple[int, int]]] = {}
+
+        for resume_id, team_id, term_counts in documents:
+            doc = len(doc_ids)
+            doc_ids.append(resume_id)
+            if team_id not in team_to_index:
+                team_to_index[team_id] = len(team_names)
+                team_names.append(team_id)
+            doc_teams.append(team_to_index[team_id])
+            doc_lengths.append(sum(term_counts.values()))
+            for term, tf in term_counts.items():
+                term_postings.setdefault(term, []).append((doc, min(tf, 0xFFFF)))
+
+        terms: Dict[str, Tuple[int, int]] = {}
+        postings_docs = array.array('I')
+        postings_tf = array.array('H')
+        for term in sorted(term_postings):
+            postings = term_postings[term]
+            terms[term] = (len(postings_docs), len(postings))
+            postings_docs.extend(doc for doc, _ in postings)
+            postings_tf.extend(tf for _, tf in postings)
+
+        return cls(doc_ids, doc_teams, team_names, doc_lengths, terms,
+                   postings_docs, postings_tf, version=version, watermark=watermark)
+
+    def iter_documents(self, skip: Optional[set] = None) -> Iterable[Tuple[str, str, Counter]]:
+        """還原每份文件的詞頻，供合併 delta 時重建索引"""
+        doc_terms: List[Counter] = [Counter() for _ in self.doc_ids]
+        for term, (start, df) in self.terms.items():
+            for i in range(start, start + df):
+                doc_terms[self.postings_docs[i]][term] = self.postings_tf[i]
+        for doc, resume_id in enumerate(self.doc_ids):
+            if skip and resume_id in skip:
+                continue
+            yield resume_id, self.team_names[self.doc_teams[doc]], doc_terms[doc]
+
+    def to_bytes(self) -> bytes:
+        """序列化為壓縮快照：MAGIC + zlib(header 長度 + JSON header + 二進位陣列)"""
+        term_list = list(self.terms)
+        header = json.dumps({
+            'format': SNAPSHOT_FORMAT,
+            'version': self.version,
+            'watermark': self.watermark,
+            'doc_ids': self.doc_ids,
+            'team_names': self.team_names,
+            'terms': term_list,
+            'document_frequencies': [self.terms[term][1] for term in term_list]
+        }, ensure_ascii=False).encode('utf-8')
+        body = b''.join([
+            struct.pack('<I', len(header)),
+            header,
+            _to_little_endian(self.doc_teams),
+            _to_little_endian(self.doc_lengths),
+            _to_little_endian(self.postings_docs),
+            _to_little_endian(self.postings_tf)
+        ])
+        return SNAPSHOT_MAGIC + zlib.compress(body)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> 'SearchIndex':
+        if not data.startswith(SNAPSHOT_MAGIC):
+            raise ValueError('不是有效的搜尋索引快照')
+        body = zlib.decompress(data[len(SNAPSHOT_MAGIC):])
+        (header_length,) = struct.unpack_from('<I', body)
+        header = json.loads(body[4:4 + header_length].decode('utf-8'))
+        if header.get('format') != SNAPSHOT_FORMAT:
+            raise ValueError(f"不支援的快照格式: {header.get('format')}")
+
+        doc_count = len(header['doc_ids'])
+        posting_count = sum(header['document_frequencies'])
+        offset = 4 + header_length
+        sections = []
+        for typecode, count in (('H', doc_count), ('I', doc_count), ('I', posting_count), ('H', posting_count)):
+            size = array.array(typecode).itemsize * count
+            sections.append(_from_little_endian(typecode, body[offset:offset + size]))
+            offset += size
+
+        terms: Dict[str, Tuple[int, int]] = {}
+        start = 0
+        for term, df in zip(header['terms'], header['document_frequencies']):
+            terms[term] = (start, df)
+            start += df
+
+        return cls(header['doc_ids'], sections[0], header['team_names'], sections[1], terms,
+                   sections[2], sections[3], version=header['version'], watermark=header['watermark'])
+
+
+class DeltaSegment:
+    """尚未合併進快照的增量文件（記憶體中的小型索引）"""
+
+    def __init__(self):
+        self.loaded_keys: set = set()
+        self.documents: Dict[str, Tuple[str, Counter, int]] = {}
+        self.deleted: set = set()
+
+    @property
+    def touched(self) -> set:
+        return self.deleted | set(self.documents)
+
+    def apply(self, delta: Dict[str, Any]) -> None:
+        resume_id = delta['resume_id']
+        if delta.get('deleted'):
+            self.documents.pop(resume_id, None)
+            self.deleted.add(resume_id)
+            return
+        self.deleted.discard(resume_id)
+        term_counts = Counter(tokenize(document_text(delta.get('document') or {})))
+        self.documents[resume_id] = (delta.get('team_id', ''), term_counts, sum(term_counts.values()))
+
+    def document_frequency(self, term: str) -> int:
+        return sum(1 for _, term_counts, _ in self.documents.values() if term in term_counts)
+
+
+class SearchEngine:
+    """快照 + delta 的查詢介面"""
+
+    def __init__(self, index: SearchIndex, delta: Optional[DeltaSegment] = None):
+        self.index = index
+        self.delta = delta or DeltaSegment()
+
+    def search(self, query: str, team_id: Optional[str] = None, limit: int = 20) -> List[Tuple[str, float]]:
+        """回傳依 BM25 分數排序的 (resume_id, score)"""
+        query_terms = list(dict.fromkeys(tokenize(query)))
+        if not query_terms:
+            return []
+
+        index, delta = self.index, self.delta
+        masked = {index.id_to_doc[resume_id] for resume_id in delta.touched if resume_id in index.id_to_doc}
+        doc_count = len(index.doc_ids) - len(masked) + len(delta.documents)
+        if doc_count <= 0:
+            return []
+        avg_length = index.avg_length or (
+            sum(length for _, _, length in delta.documents.values()) / max(len(delta.documents), 1)
+        ) or 1.0
+
+        team_filter = None
+        if team_id is not None:
+            team_filter = index.team_to_index.get(team_id, -1)
+
+        scores: Dict[int, float] = {}
+        delta_scores: Dict[str, float] = {}
+        norms, postings_docs, postings_tf, doc_teams = (
+            index.norms, index.postings_docs, index.postings_tf, index.doc_teams
+        )
+        for term in query_terms:
+            start, df = index.terms.get(term, (0, 0))
+            delta_df = delta.document_frequency(term) if delta.documents else 0
+            total_df = df + delta_df
+            if total_df == 0:
+                continue
+            idf = math.log(1 + (doc_count - total_df + 0.5) / (total_df + 0.5))
+
+            for i in range(start, start + df):
+                doc = postings_docs[i]
+                if doc in masked or (team_filter is not None and doc_teams[doc] != team_filter):
+                    continue
+                tf = postings_tf[i]
+                scores[doc] = scores.get(doc, 0.0) + idf * tf * (BM25_K1 + 1) / (tf + norms[doc])
+
+            if delta_df:
+                for resume_id, (doc_team, term_counts, length) in delta.documents.items():
+                    tf = term_counts.get(term)
+                    if not tf or (team_id is not None and doc_team != team_id):
+                        continue
+                    norm = BM25_K1 * (1 - BM25_B + BM25_B * length / avg_length)
+                    delta_scores[resume_id] = delta_scores.get(resume_id, 0.0) + idf * tf * (BM25_K1 + 1) / (tf + norm)
+
+        candidates = [(index.doc_ids[doc], score) for doc, score in heapq.nlargest(limit, scores.items(), key=lambda x: x[1])]
+        candidates.extend(delta_scores.items())
+        return heapq.nlargest(limit, candidates, key=lambda x: x[1])
+
+
+# ---------------------------------------------------------------------------
+# 查詢與合併（S3 存取見 index_store）
+# ---------------------------------------------------------------------------
+
+store = index_store.IndexStore(PARSED_BUCKET, SEARCH_INDEX_PREFIX, '.bin')
+
+_engine: Optional[SearchEngine] = None
+_last_refresh = 0.0
+
+
+def load_snapshot(manifest: Optional[Dict[str, Any]]) -> SearchIndex:
+    data = store.load_snapshot(manifest)
+    return SearchIndex.from_bytes(data) if data else SearchIndex.build([])
+
+
+def get_engine(force_refresh: bool = False) -> SearchEngine:
+    """取得搜尋引擎；快照在暖機容器中只載入一次，之後只追加新的 delta"""
+    global _engine, _last_refresh
+
+    now = time.time()
+    if _engine is not None and not force_refresh and now - _last_refresh < REFRESH_INTERVAL_SECONDS:
+        return _engine
+
+    manifest = store.load_manifest()
+    version = manifest['version'] if manifest else 0
+    if _engine is None or _engine.index.version != version:
+        index = load_snapshot(manifest)
+        print(f"載入搜尋索引快照 v{index.version}，共 {len(index.doc_ids)} 份履歷、{len(index.terms)} 個詞彙")
+        _engine = SearchEngine(index)
+
+    store.apply_new_deltas(_engine.index.watermark, _engine.delta.loaded_keys, _engine.delta.apply)
+    _last_refresh = now
+    return _engine
+
+
+def search(query: str, team_id: Optional[str] = None, limit: int = 20) -> List[Tuple[str, float]]:
+    return get_engine().search(query, team_id=team_id, limit=limit)
+
+
+def publish(index: SearchIndex, merged_keys: List[str]) -> Dict[str, Any]:
+    return store.publish(index.to_bytes(), index.version, index.watermark, merged_keys,
+                         document_count=len(index.doc_ids), term_count=len(index.terms))
+
+
+def merge_deltas() -> Dict[str, Any]:
+    """把累積的 delta 合併進新版本的快照"""
+    manifest = store.load_manifest()
+    index = load_snapshot(manifest)
+    keys = store.mergeable_delta_keys(manifest)
+    if not keys:
+        return {'merged_deltas': 0, 'version': index.version}
+
+    delta = DeltaSegment()
+    for key in keys:
+        delta.apply(store.load_delta(key))
+
+    documents = list(index.iter_documents(skip=delta.touched))
+    documents.extend((resume_id, team_id, term_counts) for resume_id, (team_id, term_counts, _) in delta.documents.items())
+    merged = SearchIndex.build(documents, version=index.version + 1, watermark=keys[-1])
+    manifest = publish(merged, keys)
+    return {'merged_deltas': len(keys), **manifest}
+
+
+def rebuild_from_table(resume_table) -> Dict[str, Any]:
+    """掃描 parsed_resume 表重建完整快照"""
+    manifest = store.load_manifest()
+    # 先記下目前的 delta，這些變更在掃描時已經反映在表中
+    pending_keys = store.mergeable_delta_keys(manifest)
+
+    documents = []
+    for item in table_scan.TableScan(resume_table, segments=REBUILD_SCAN_SEGMENTS,
+                                     projection=['resume_id', 'team_id', 'current_title', 'profile']):
+        documents.append((item['resume_id'], item.get('team_id', ''), Counter(tokenize(document_text(item)))))
+
+    watermark = pending_keys[-1] if pending_keys else (manifest['watermark'] if manifest else '')
+    index = SearchIndex.build(documents, version=(manifest['version'] if manifest else 0) + 1, watermark=watermark)
+    manifest = publish(index, pending_keys)
+    return {'merged_deltas': len(pending_keys), **manifest}
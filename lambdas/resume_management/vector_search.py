@@ -0,0 +1,573 @@
+"""
+候選人語意搜尋（履歷向量）
+
+- 向量：履歷解析 Lambda 以 embeddings 模組產生已正規化的向量，內積即 cosine 相似度
+- 快照：float16 矩陣 + resume_id / team 對照表，以版本號命名存放在 parsed resume bucket
+- 查詢：語料或團隊規模小時直接以 NumPy 內積暴力搜尋；超過 IVF_MIN_DOCUMENTS
+  時快照會附帶 k-means 分群（IVF），查詢只掃描最接近的 nprobe 個群
+- 增量：與全文搜尋相同，delta 檔在查詢時疊加，定期合併成新快照
+- 職缺向量：依職缺內容雜湊快取在 S3 與暖機容器記憶體中，內容沒變就不重算
+- 重建：分頁掃描 parsed_resume 表，每頁的向量暫存到 S3 並寫入 background-task checkpoint（background_task），
+  Lambda 剩餘時間不足時以相同 run_id 接續；embedding 模型與維度沒變時沿用快照與 delta 中的向量，
+  只為沒有向量的履歷呼叫 Bedrock。重建期間不合併 delta，完成後一次發布新快照
+
+S3 路徑：
+  search-index/vectors/manifest.json
+  search-index/vectors/snapshots/v{version}.bin
+  search-index/vectors/deltas/{timestamp}-{resume_id}.json
+  search-index/vectors/jobs/{job_id}.json
+  search-index/vectors/rebuild/{run_id}/{chunk}.bin
+"""
+import base64
+import hashlib
+import json
+import os
+import struct
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+import boto3
+import numpy as np
+
+import background_task
+import embeddings
+import index_store
+import table_scan
+import usage_meter
+from background_task import RunSuperseded, save_checkpoint
+
+s3 = boto3.client('s3')
+
+PARSED_BUCKET = os.environ.get('PARSED_BUCKET', 'benson-haire-parsed-resume')
+VECTOR_INDEX_PREFIX = 'search-index/vectors'
+JOB_VECTOR_PREFIX = f'{VECTOR_INDEX_PREFIX}/jobs/'
+REBUILD_PREFIX = f'{VECTOR_INDEX_PREFIX}/rebuild/'
+REBUILD_TASK_ID = 'rebuild-vector-index'
+
+# 暖機容器多久檢查一次 manifest 與新的 delta
+REFRESH_INTERVAL_SECONDS = int(os.environ.get('SEARCH_INDEX_REFRESH_SECONDS', '30'))
+# 重建快照時每頁讀取的履歷數（每頁完成後寫入 checkpoint）
+REBUILD_CHUNK_SIZE = int(os.environ.get('VECTOR_REBUILD_CHUNK_SIZE', '500'))
+# 重建時剩餘時間低於此值就交給下一次呼叫接續（需足夠完成一頁的 embedding）
+CONTINUE_BELOW_MS = 120 * 1000
+# 重建的 checkpoint 超過此時間沒有進度，視為已中斷（不再阻擋 delta 合併）
+REBUILD_STALE_SECONDS = 1800
+
+# 語料超過此數量才建立 IVF 分群
+IVF_MIN_DOCUMENTS = int(os.environ.get('VECTOR_IVF_MIN_DOCUMENTS', '20000'))
+# 候選數不超過此數量時直接暴力搜尋（例如單一團隊）
+BRUTE_FORCE_MAX_ROWS = 20000
+IVF_NPROBE = int(os.environ.get('VECTOR_IVF_NPROBE', '8'))
+KMEANS_ITERATIONS = 10
+KMEANS_SAMPLE_SIZE = 50000
+
+SNAPSHOT_MAGIC = b'HVEC1'
+
+
+class VectorIndex:
+    """
+    唯讀的向量快照
+
+    matrix 以 float16 儲存，載入時轉成 float32 供內積運算；
+    IVF 以 list_rows（依群排序的列號）與 list_offsets 表示各群的成員。
+    """
+
+    def __init__(self, doc_ids: List[str], doc_teams: np.ndarray, team_names: List[str],
+                 matrix: np.ndarray, centroids: Optional[np.ndarray] = None,
+                 list_rows: Optional[np.ndarray] = None, list_offsets: Optional[np.ndarray] = None,
+                 version: int = 0, watermark: str = ''):
+        self.doc_ids = doc_ids
+        self.doc_teams = doc_teams
+        self.team_names = team_names
+        self.matrix = matrix.astype(np.float32, copy=False)
+        self.centroids = centroids
+        self.list_rows = list_rows
+        self.list_offsets = list_offsets
+        self.version = version
+        self.watermark = watermark
+
+        self.id_to_row = {resume_id: row for row, resume_id in enumerate(doc_ids)}
+        self.team_to_index = {team: i for i, team in enumerate(team_names)}
+        self._team_rows: Dict[int, np.ndarray] = {}
+
+    @property
+    def dimension(self) -> int:
+        return self.matrix.shape[1]
+
+    @property
+    def has_ivf(self) -> bool:
+        return self.centroids is not None and len(self.centroids) > 0
+
+    @classmethod
+    def build(cls, documents: List[Tuple[str, str, np.ndarray]], dimension: int,
+              version: int = 0, watermark: str = '') -> 'VectorIndex':
+        """由 (resume_id, team_id, vector) 建立快照，依語料大小決定是否建立 IVF"""
+        documents = sorted(documents, key=lambda doc: doc[0])
+        doc_ids = [resume_id for resume_id, _, _ in documents]
+        team_names = sorted({team_id for _, team_id, _ in documents})
+        team_to_index = {team: i for i, team in enumerate(team_names)}
+        doc_teams = np.array([team_to_index[team_id] for _, team_id, _ in documents], dtype=np.int32)
+        matrix = (np.vstack([vector for _, _, vector in documents]).astype(np.float16)
+                  if documents else np.zeros((0, dimension), dtype=np.float16))
+
+        centroids = list_rows = list_offsets = None
+        if len(documents) >= IVF_MIN_DOCUMENTS:
+            centroids, list_rows, list_offsets = train_ivf(matrix.astype(np.float32))
+        return cls(doc_ids, doc_teams, team_names, matrix, centroids, list_rows, list_offsets,
+                   version=version, watermark=watermark)
+
+    def iter_documents(self, skip: set):
+        """逐一列出快照中的文件（合併 delta 時使用）"""
+        for row, resume_id in enumerate(self.doc_ids):
+            if resume_id not in skip:
+                yield resume_id, self.team_names[self.doc_teams[row]], self.matrix[row]
+
+    def team_rows(self, team_id: str) -> np.ndarray:
+        team = self.team_to_index.get(team_id)
+        if team is None:
+            return np.zeros(0, dtype=np.int64)
+        if team not in self._team_rows:
+            self._team_rows[team] = np.flatnonzero(self.doc_teams == team)
+        return self._team_rows[team]
+
+    def candidate_rows(self, query: np.ndarray, team_id: Optional[str], nprobe: int) -> Optional[np.ndarray]:
+        """決定要計算內積的列；None 代表整個矩陣"""
+        rows = self.team_rows(team_id) if team_id is not None else None
+        row_count = len(self.doc_ids) if rows is None else len(rows)
+        if not self.has_ivf or row_count <= BRUTE_FORCE_MAX_ROWS:
+            return rows
+
+        probes = np.argsort(self.centroids @ query)[::-1][:nprobe]
+        probed = np.concatenate([
+            self.list_rows[self.list_offsets[probe]:self.list_offsets[probe + 1]] for probe in probes
+        ])
+        if team_id is not None:
+            probed = probed[self.doc_teams[probed] == self.team_to_index[team_id]]
+        return probed
+
+    def to_bytes(self) -> bytes:
+        header = {
+            'version': self.version,
+            'watermark': self.watermark,
+            'doc_ids': self.doc_ids,
+            'team_names': self.team_names,
+            'dimension': self.dimension,
+            'nlist': len(self.centroids) if self.has_ivf else 0
+        }
+        header_bytes = json.dumps(header, ensure_ascii=False).encode('utf-8')
+        parts = [
+            SNAPSHOT_MAGIC,
+            struct.pack('<I', len(header_bytes)),
+            header_bytes,
+            self.doc_teams.astype('<i4').tobytes(),
+            self.matrix.astype('<f2').tobytes()
+        ]
+        if self.has_ivf:
+            parts.extend([
+                self.centroids.astype('<f4').tobytes(),
+                self.list_rows.astype('<i4').tobytes(),
+                self.list_offsets.astype('<i4').tobytes()
+            ])
+        return b''.join(parts)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> 'VectorIndex':
+        if data[:len(SNAPSHOT_MAGIC)] != SNAPSHOT_MAGIC:
+            raise ValueError('向量索引快照格式不正確')
+        offset = len(SNAPSHOT_MAGIC)
+        (header_length,) = struct.unpack_from('<I', data, offset)
+        offset += 4
+        header = json.loads(data[offset:offset + header_length])
+        offset += header_length
+
+        count, dimension, nlist = len(header['doc_ids']), header['dimension'], header['nlist']
+
+        def take(dtype: str, length: int) -> np.ndarray:
+            nonlocal offset
+            values = np.frombuffer(data, dtype=dtype, count=length, offset=offset)
+            offset += values.nbytes
+            return values
+
+        doc_teams = take('<i4', count)
+        matrix = take('<f2', count * dimension).reshape(count, dimension)
+        centroids = list_rows = list_offsets = None
+        if nlist:
+            centroids = take('<f4', nlist * dimension).reshape(nlist, dimension)
+            list_rows = take('<i4', count)
+            list_offsets = take('<i4', nlist + 1)
+        return cls(header['doc_ids'], doc_teams, header['team_names'], matrix,
+                   centroids, list_rows, list_offsets,
+                   version=header['version'], watermark=header['watermark'])
+
+
+def train_ivf(matrix: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """以 spherical k-means 分群，回傳 (centroids, list_rows, list_offsets)"""
+    count = len(matrix)
+    nlist = max(int(np.sqrt(count)), 1)
+    rng = np.random.default_rng(0)
+    sample = matrix[rng.choice(count, size=min(count, KMEANS_SAMPLE_SIZE), replace=False)]
+    centroids = sample[rng.choice(len(sample), size=nlist, replace=False)].copy()
+
+    for _ in range(KMEANS_ITERATIONS):
+        assignments = np.argmax(sample @ centroids.T, axis=1)
+        for cluster in range(nlist):
+            members = sample[assignments == cluster]
+            if len(members):
+                centroid = members.sum(axis=0)
+                centroids[cluster] = centroid / (np.linalg.norm(centroid) or 1.0)
+
+    # 分批指派全部文件，避免一次配置 count x nlist 的矩陣
+    assignments = np.concatenate([
+        np.argmax(matrix[start:start + 10000] @ centroids.T, axis=1)
+        for start in range(0, count, 10000)
+    ])
+    list_rows = np.argsort(assignments, kind='stable').astype(np.int32)
+    list_offsets = np.searchsorted(assignments[list_rows], np.arange(nlist + 1)).astype(np.int32)
+    return centroids.astype(np.float32), list_rows, list_offsets
+
+
+def decode_vector(delta: Dict[str, Any]) -> np.ndarray:
+    return np.frombuffer(base64.b64decode(delta['vector_f16']), dtype='<f2').astype(np.float32)
+
+
+class DeltaSegment:
+    """尚未合併進快照的增量向量"""
+
+    def __init__(self):
+        self.loaded_keys: set = set()
+        self.documents: Dict[str, Tuple[str, np.ndarray]] = {}
+        self.deleted: set = set()
+
+    @property
+    def touched(self) -> set:
+        return self.deleted | set(self.documents)
+
+    def apply(self, delta: Dict[str, Any]) -> None:
+        resume_id = delta['resume_id']
+        if delta.get('deleted'):
+            self.documents.pop(resume_id, None)
+            self.deleted.add(resume_id)
+            return
+        self.deleted.discard(resume_id)
+        self.documents[resume_id] = (delta.get('team_id', ''), decode_vector(delta))
+
+
+class VectorEngine:
+    """快照 + delta 的查詢介面"""
+
+    def __init__(self, index: VectorIndex, delta: Optional[DeltaSegment] = None):
+        self.index = index
+        self.delta = delta or DeltaSegment()
+
+    def search(self, query: List[float], team_id: Optional[str] = None, limit: int = 20,
+               nprobe: int = IVF_NPROBE) -> List[Tuple[str, float]]:
+        """回傳依 cosine 相似度排序的 (resume_id, score)"""
+        index, delta = self.index, self.delta
+        query_vector = np.asarray(query, dtype=np.float32)
+        if query_vector.shape[0] != index.dimension and index.doc_ids:
+            raise ValueError(f'查詢向量維度 {query_vector.shape[0]} 與索引維度 {index.dimension} 不一致')
+
+        candidates: List[Tuple[str, float]] = []
+        if index.doc_ids:
+            rows = index.candidate_rows(query_vector, team_id, nprobe)
+            scores = index.matrix @ query_vector if rows is None else index.matrix[rows] @ query_vector
+            if rows is None:
+                rows = np.arange(len(index.doc_ids))
+
+            masked = [index.id_to_row[resume_id] for resume_id in delta.touched if resume_id in index.id_to_row]
+            if masked:
+                keep = ~np.isin(rows, masked)
+                rows, scores = rows[keep], scores[keep]
+
+            if len(scores) > limit:
+                top = np.argpartition(-scores, limit - 1)[:limit]
+                rows, scores = rows[top], scores[top]
+            candidates = [(index.doc_ids[row], float(score)) for row, score in zip(rows, scores)]
+
+        for resume_id, (doc_team, vector) in delta.documents.items():
+            if team_id is None or doc_team == team_id:
+                candidates.append((resume_id, float(vector @ query_vector)))
+
+        candidates.sort(key=lambda x: x[1], reverse=True)
+        return candidates[:limit]
+
+
+# ---------------------------------------------------------------------------
+# 查詢與合併（快照與 delta 的 S3 存取見 index_store）
+# ---------------------------------------------------------------------------
+
+store = index_store.IndexStore(PARSED_BUCKET, VECTOR_INDEX_PREFIX, '.bin')
+
+_engine: Optional[VectorEngine] = None
+_last_refresh = 0.0
+_provider = None
+# job_id -> (content_hash, vector)
+_job_vectors: Dict[str, Tuple[str, List[float]]] = {}
+
+
+def get_provider():
+    global _provider
+    if _provider is None:
+        _provider = embeddings.get_embedding_provider()
+    return _provider
+
+
+def embed(text: str, operation: str, team_id: str = '', job_id: str = '', resume_id: str = '') -> List[float]:
+    """產生向量並計入 Bedrock 用量（本機 hashing 提供者沒有用量）"""
+    provider = get_provider()
+    vector = provider.embed(text)
+    if getattr(provider, 'last_input_tokens', 0):
+        usage_meter.record_usage(provider.model_id, provider.last_input_tokens, 0, operation,
+                                 team_id=team_id, job_id=job_id, resume_ids=[resume_id])
+    return vector
+
+
+def load_snapshot(manifest: Optional[Dict[str, Any]]) -> VectorIndex:
+    data = store.load_snapshot(manifest)
+    return VectorIndex.from_bytes(data) if data else VectorIndex.build([], dimension=get_provider().dimension)
+
+
+def get_engine(force_refresh: bool = False) -> VectorEngine:
+    """取得查詢引擎；快照在暖機容器中只載入一次，之後只追加新的 delta"""
+    global _engine, _last_refresh
+
+    now = time.time()
+    if _engine is not None and not force_refresh and now - _last_refresh < REFRESH_INTERVAL_SECONDS:
+        return _engine
+
+    manifest = store.load_manifest()
+    version = manifest['version'] if manifest else 0
+    if _engine is None or _engine.index.version != version:
+        index = load_snapshot(manifest)
+        print(f"載入向量索引快照 v{index.version}，共 {len(index.doc_ids)} 份履歷，IVF: {index.has_ivf}")
+        _engine = VectorEngine(index)
+
+    store.apply_new_deltas(_engine.index.watermark, _engine.delta.loaded_keys, _engine.delta.apply)
+    _last_refresh = now
+    return _engine
+
+
+def job_vector(job: Dict[str, Any]) -> List[float]:
+    """取得職缺向量；以職缺內容雜湊判斷是否需要重新產生"""
+    job_id = job['job_id']
+    text = embeddings.job_embedding_text(job)
+    content_hash = hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+    cached = _job_vectors.get(job_id)
+    if cached and cached[0] == content_hash:
+        return cached[1]
+
+    key = f'{JOB_VECTOR_PREFIX}{job_id}.json'
+    try:
+        stored = json.loads(s3.get_object(Bucket=PARSED_BUCKET, Key=key)['Body'].read())
+        if stored.get('content_hash') == content_hash:
+            vector = decode_vector(stored).tolist()
+            _job_vectors[job_id] = (content_hash, vector)
+            return vector
+    except s3.exceptions.NoSuchKey:
+        pass
+
+    vector = embed(text, 'embed_job', team_id=job.get('team_id', ''), job_id=job_id)
+    s3.put_object(Bucket=PARSED_BUCKET, Key=key, ContentType='application/json', Body=json.dumps({
+        'job_id': job_id,
+        'content_hash': content_hash,
+        'dimension': len(vector),
+        'vector_f16': base64.b64encode(embeddings.pack_float16(vector)).decode('ascii'),
+        'embedded_at': datetime.utcnow().isoformat()
+    }).encode('utf-8'))
+    _job_vectors[job_id] = (content_hash, vector)
+    return vector
+
+
+def search_text(query: str, team_id: Optional[str] = None, limit: int = 20) -> List[Tuple[str, float]]:
+    return get_engine().search(embed(query, 'embed_query', team_id=team_id or ''), team_id=team_id, limit=limit)
+
+
+def search_job(job: Dict[str, Any], team_id: Optional[str] = None, limit: int = 20) -> List[Tuple[str, float]]:
+    return get_engine().search(job_vector(job), team_id=team_id, limit=limit)
+
+
+def publish(index: VectorIndex, merged_keys: List[str]) -> Dict[str, Any]:
+    return store.publish(index.to_bytes(), index.version, index.watermark, merged_keys,
+                         document_count=len(index.doc_ids), dimension=index.dimension,
+                         nlist=len(index.centroids) if index.has_ivf else 0,
+                         embedding_model=get_provider().model_id)
+
+
+def rebuild_running() -> bool:
+    checkpoint = background_task.get_checkpoint(REBUILD_TASK_ID)
+    if not checkpoint or checkpoint.get('status') != 'running':
+        return False
+    idle = datetime.utcnow() - datetime.fromisoformat(checkpoint['updated_at'])
+    return idle.total_seconds() < REBUILD_STALE_SECONDS
+
+
+def merge_deltas() -> Dict[str, Any]:
+    """把累積的 delta 合併進新版本的快照（語料跨過門檻時一併建立 IVF）"""
+    if rebuild_running():
+        # 重建完成時會一併處理這些 delta；先合併的話，重建發布的快照會蓋掉合併的結果
+        return {'merged_deltas': 0, 'rebuild_running': True}
+    manifest = store.load_manifest()
+    index = load_snapshot(manifest)
+    keys = store.mergeable_delta_keys(manifest)
+    if not keys:
+        return {'merged_deltas': 0, 'version': index.version}
+
+    delta = DeltaSegment()
+    for key in keys:
+        delta.apply(store.load_delta(key))
+
+    documents = list(index.iter_documents(skip=delta.touched))
+    documents.extend((resume_id, team_id, vector) for resume_id, (team_id, vector) in delta.documents.items())
+    merged = VectorIndex.build(documents, dimension=index.dimension, version=index.version + 1, watermark=keys[-1])
+    manifest = publish(merged, keys)
+    return {'merged_deltas': len(keys), **manifest}
+
+
+def stored_vector(engine: VectorEngine, resume_id: str) -> Optional[np.ndarray]:
+    """快照與 delta 中目前的履歷向量；沒有時回傳 None"""
+    if resume_id in engine.delta.documents:
+        return engine.delta.documents[resume_id][1]
+    row = engine.index.id_to_row.get(resume_id)
+    if row is None or resume_id in engine.delta.deleted:
+        return None
+    return engine.index.matrix[row]
+
+
+def chunk_key(run_id: str, chunk: int) -> str:
+    return f'{REBUILD_PREFIX}{run_id}/{chunk:06d}.bin'
+
+
+def delete_prefix(prefix: str) -> None:
+    paginator = s3.get_paginator('list_objects_v2')
+    for page in paginator.paginate(Bucket=PARSED_BUCKET, Prefix=prefix):
+        objects = [{'Key': obj['Key']} for obj in page.get('Contents', [])]
+        if objects:
+            s3.delete_objects(Bucket=PARSED_BUCKET, Delete={'Objects': objects, 'Quiet': True})
+
+
+def start_rebuild(reembed: bool) -> Dict[str, Any]:
+    """
+    建立新一輪的重建 checkpoint（取代先前的執行）
+
+    開始時已可合併的 delta 由重建涵蓋，記錄其範圍（base_watermark, watermark]，發布時刪除；
+    之後寫入的 delta 留給查詢時疊加。reuse 表示 manifest 的 embedding 模型與維度和目前相同，既有向量可以沿用。
+    """
+    manifest = store.load_manifest()
+    pending_keys = store.mergeable_delta_keys(manifest)
+    provider = get_provider()
+    base_watermark = manifest['watermark'] if manifest else ''
+    # 清掉先前被取代或失敗的執行留下的暫存檔
+    delete_prefix(REBUILD_PREFIX)
+    return background_task.start_run(
+        REBUILD_TASK_ID, 'rebuild_vector_index',
+        base_watermark=base_watermark,
+        watermark=pending_keys[-1] if pending_keys else base_watermark,
+        reuse=bool(not reembed and manifest and manifest.get('embedding_model') == provider.model_id
+                   and manifest.get('dimension') == provider.dimension),
+        chunks=0, embedded=0, reused=0
+    )
+
+
+def publish_rebuild(checkpoint: Dict[str, Any], dimension: int) -> Dict[str, Any]:
+    """合併各頁暫存的向量並發布新快照，再刪除這一輪的暫存檔"""
+    documents = []
+    for chunk in range(int(checkpoint['chunks'])):
+        data = s3.get_object(Bucket=PARSED_BUCKET, Key=chunk_key(checkpoint['run_id'], chunk))['Body'].read()
+        documents.extend(VectorIndex.from_bytes(data).iter_documents(skip=set()))
+
+    manifest = store.load_manifest()
+    merged_keys = [key for key in store.list_delta_keys(after=checkpoint['base_watermark'])
+                   if key <= checkpoint['watermark']]
+    index = VectorIndex.build(documents, dimension=dimension,
+                              version=(manifest['version'] if manifest else 0) + 1,
+                              watermark=checkpoint['watermark'])
+    manifest = publish(index, merged_keys)
+    delete_prefix(f"{REBUILD_PREFIX}{checkpoint['run_id']}/")
+    return {'merged_deltas': len(merged_keys), **manifest}
+
+
+def rebuild_from_table(resume_table, context=None, run_id: Optional[str] = None,
+                       reembed: bool = False) -> Dict[str, Any]:
+    """
+    掃描 parsed_resume 表重建向量快照（可跨多次呼叫接續）
+
+    :param run_id: 接續既有執行時帶入；None 代表開始新的一輪
+    :param reembed: 新的一輪是否不沿用既有向量、全部重新產生
+    :return: 目前的 checkpoint；這次呼叫沒有實際執行（已被取代或已結束）時帶有 superseded
+    """
+    if run_id:
+        checkpoint = background_task.resume_run(REBUILD_TASK_ID, run_id)
+        if checkpoint is None:
+            print(f"向量索引重建已被取代或已結束，停止接續: run_id={run_id}")
+            return {**(background_task.get_checkpoint(REBUILD_TASK_ID) or {}), 'superseded': True}
+    else:
+        checkpoint = start_rebuild(reembed)
+
+    provider = get_provider()
+    engine = get_engine(force_refresh=True) if checkpoint.get('reuse') else None
+    try:
+        while True:
+            scan = table_scan.TableScan(resume_table, projection=['resume_id', 'team_id', 'current_title', 'profile'],
+                                        limit=REBUILD_CHUNK_SIZE, start_key=checkpoint.get('cursor'),
+                                        key_fields=['resume_id'])
+            documents = []
+            reused = 0
+            for item in scan:
+                vector = stored_vector(engine, item['resume_id']) if engine else None
+                if vector is not None and len(vector) == provider.dimension:
+                    reused += 1
+                else:
+                    vector = np.asarray(embed(embeddings.profile_embedding_text(item), 'embed',
+                                              team_id=item.get('team_id', ''), resume_id=item['resume_id']),
+                                        dtype=np.float32)
+                documents.append((item['resume_id'], item.get('team_id', ''), vector))
+
+            if documents:
+                chunk = VectorIndex.build(documents, dimension=provider.dimension)
+                s3.put_object(Bucket=PARSED_BUCKET, Key=chunk_key(checkpoint['run_id'], int(checkpoint['chunks'])),
+                              Body=chunk.to_bytes(), ContentType='application/octet-stream')
+            save_checkpoint(
+                checkpoint,
+                cursor=scan.next_start_key,
+                chunks=checkpoint['chunks'] + (1 if documents else 0),
+                embedded=checkpoint['embedded'] + len(documents) - reused,
+                reused=checkpoint['reused'] + reused
+            )
+            print(f"向量索引重建進度: 第 {checkpoint['chunks']} 頁, 重新產生 {checkpoint['embedded']} 份, "
+                  f"沿用 {checkpoint['reused']} 份")
+
+            if not checkpoint['cursor']:
+                break
+            if context is not None and context.get_remaining_time_in_millis() < CONTINUE_BELOW_MS:
+                background_task.continue_later(context, {'action': 'rebuild_vector_index',
+                                                         'run_id': checkpoint['run_id']})
+                print("剩餘時間不足，向量索引重建交由下一次呼叫接續")
+                return checkpoint
+
+        manifest = publish_rebuild(checkpoint, provider.dimension)
+        save_checkpoint(checkpoint, status='completed', version=manifest['version'],
+                        merged_deltas=manifest['merged_deltas'], document_count=manifest['document_count'],
+                        finished_at=datetime.utcnow().isoformat())
+        return checkpoint
+
+    except RunSuperseded:
+        print(f"向量索引重建已被新一輪取代: run_id={checkpoint['run_id']}")
+        return {**checkpoint, 'superseded': True}
+    except Exception as e:
+        # 已完成的頁面保留在 checkpoint 與暫存檔，重新以同一 run_id 呼叫即可接續
+        background_task.fail_run(checkpoint, e)
+        raise
+
+
+def reopen_failed_rebuild() -> Optional[str]:
+    """失敗的重建改回 running，回傳可接續的 run_id"""
+    return background_task.reopen_failed_run(REBUILD_TASK_ID)
+
+
+def rebuild_summary(checkpoint: Dict[str, Any]) -> Dict[str, Any]:
+    """對外回報用的進度（不含內部 cursor）"""
+    summary = {key: value for key, value in checkpoint.items() if key not in ('cursor', 'task_id')}
+    summary['has_more'] = bool(checkpoint.get('cursor')) and checkpoint.get('status') != 'completed'
+    return summary
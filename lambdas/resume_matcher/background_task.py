@@ -0,0 +1,117 @@
+"""
+可接續的背景工作（background-task 表的 checkpoint）
+
+超過單次 Lambda 執行時間的工作（批次評分、團隊資訊修復、索引重建）都以相同方式執行：
+
+- start_run 建立新一輪的 checkpoint（新的 run_id、status = running），取代同一個 task_id 先前的執行
+- 每完成一段工作就以 save_checkpoint / conditional_update 寫入進度，條件為 run_id 未變；
+  被新一輪取代時拋出 RunSuperseded，舊執行在下一次寫入時停止
+- Lambda 剩餘時間不足時以 continue_later 用相同 run_id 非同步呼叫自己，resume_run 確認仍是有效的執行後接續
+- 失敗時 fail_run 把 status 設為 failed，reopen_failed_run 改回 running 後即可以同一 run_id 接續
+
+工作本身（讀取範圍、cursor 或分段狀態、計數欄位）由各模組放在 checkpoint 中。
+
+resume_matcher、job_management、resume_management 各有一份相同的模組，修改時請同步。
+"""
+import json
+import os
+import uuid
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+import boto3
+from botocore.exceptions import ClientError
+
+dynamodb = boto3.resource('dynamodb')
+lambda_client = boto3.client('lambda')
+
+TASK_TABLE_NAME = os.environ.get('TASK_TABLE_NAME', 'benson-haire-background-task')
+
+task_table = dynamodb.Table(TASK_TABLE_NAME)
+
+
+class RunSuperseded(Exception):
+    """checkpoint 已屬於較新的 run_id"""
+
+
+def get_checkpoint(task_id: str) -> Optional[Dict[str, Any]]:
+    return task_table.get_item(Key={'task_id': task_id}).get('Item')
+
+
+def start_run(task_id: str, task_type: str, **fields) -> Dict[str, Any]:
+    """建立新一輪的 checkpoint（取代同一個 task_id 先前的執行）；fields 為工作自己的初始狀態"""
+    now = datetime.utcnow().isoformat()
+    checkpoint = {
+        'task_id': task_id,
+        'task_type': task_type,
+        **fields,
+        'run_id': uuid.uuid4().hex[:12],
+        'status': 'running',
+        'started_at': now,
+        'updated_at': now
+    }
+    task_table.put_item(Item=checkpoint)
+    return checkpoint
+
+
+def resume_run(task_id: str, run_id: str) -> Optional[Dict[str, Any]]:
+    """接續執行前讀取 checkpoint；已被取代或已結束時回傳 None"""
+    checkpoint = get_checkpoint(task_id)
+    if not checkpoint or checkpoint.get('run_id') != run_id or checkpoint.get('status') != 'running':
+        return None
+    return checkpoint
+
+
+def conditional_update(checkpoint: Dict[str, Any], update_expression: str,
+                       names: Dict[str, str], values: Dict[str, Any]) -> None:
+    """以 run_id 為條件更新 checkpoint；已被新一輪取代時拋出 RunSuperseded"""
+    try:
+        task_table.update_item(
+            Key={'task_id': checkpoint['task_id']},
+            UpdateExpression=update_expression,
+            ConditionExpression='run_id = :run_id',
+            ExpressionAttributeNames=names,
+            ExpressionAttributeValues={**values, ':run_id': checkpoint['run_id']}
+        )
+    except ClientError as e:
+        if e.response['Error']['Code'] == 'ConditionalCheckFailedException':
+            raise RunSuperseded(checkpoint['run_id'])
+        raise
+
+
+def save_checkpoint(checkpoint: Dict[str, Any], **changes) -> None:
+    """SET 指定的欄位（同時更新 updated_at），成功後同步到記憶體中的 checkpoint"""
+    changes['updated_at'] = datetime.utcnow().isoformat()
+    conditional_update(
+        checkpoint,
+        'SET ' + ', '.join(f"#{field} = :{field}" for field in changes),
+        {f"#{field}": field for field in changes},
+        {f":{field}": value for field, value in changes.items()}
+    )
+    checkpoint.update(changes)
+
+
+def fail_run(checkpoint: Dict[str, Any], error: Exception) -> None:
+    """記錄失敗（盡力而為，不覆蓋原本的例外）；已完成的進度保留在 checkpoint"""
+    try:
+        save_checkpoint(checkpoint, status='failed', error=str(error)[:500])
+    except Exception:
+        pass
+
+
+def reopen_failed_run(task_id: str) -> Optional[str]:
+    """失敗的執行改回 running，回傳可接續的 run_id"""
+    checkpoint = get_checkpoint(task_id)
+    if not checkpoint or checkpoint.get('status') != 'failed':
+        return None
+    save_checkpoint(checkpoint, status='running')
+    return checkpoint['run_id']
+
+
+def continue_later(context, payload: Dict[str, Any]) -> None:
+    """以相同的維護事件（含 run_id）非同步呼叫自己"""
+    lambda_client.invoke(
+        FunctionName=context.function_name,
+        InvocationType='Event',
+        Payload=json.dumps(payload, ensure_ascii=False).encode('utf-8')
+    )
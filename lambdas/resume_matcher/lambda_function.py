@@ -0,0 +1,454 @@
+import json
+import os
+import time
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import boto3
+from boto3.dynamodb.conditions import Key
+
+import matcher
+import notifications
+import reranker
+import score_backlog
+import usage_meter
+
+dynamodb = boto3.resource('dynamodb')
+
+# 環境變數
+RESUME_TABLE_NAME = os.environ.get('RESUME_TABLE_NAME', 'benson-haire-parsed_resume')
+JOBS_TABLE_NAME = os.environ.get('JOBS_TABLE_NAME', 'benson-haire-job-posting')
+MATCH_RESULT_TABLE_NAME = os.environ.get('MATCH_RESULT_TABLE_NAME', 'benson-haire-match-result')
+JOB_REQUIREMENT_TABLE_NAME = os.environ.get('JOB_REQUIREMENT_TABLE_NAME', 'benson-haire-job-requirement')
+# 職缺評分後送交 LLM 重新排序的前幾名（0 代表停用）
+RERANK_SHORTLIST_SIZE = int(os.environ.get('RERANK_SHORTLIST_SIZE', '20'))
+
+# DynamoDB 表格
+resume_table = dynamodb.Table(RESUME_TABLE_NAME)
+jobs_table = dynamodb.Table(JOBS_TABLE_NAME)
+match_result_table = dynamodb.Table(MATCH_RESULT_TABLE_NAME)
+
+# 評分只需要的履歷欄位，避免讀取整份 profile
+RESUME_PROJECTION = (
+    'resume_id, team_id, job_id, skills_normalized, experience_years, education_keywords, '
+    'profile.basics.skills, profile.basics.total_experience_in_years, '
+    'profile.educations, profile.trainings_and_certifications'
+)
+
+# 已確認的職缺需求會覆寫職缺上的這些評分欄位
+REQUIREMENT_FIELDS = [
+    'required_skills', 'nice_to_have_skills', 'min_experience_years',
+    'education_required', 'majors_required', 'language_required'
+]
+
+# 重新排序需要的履歷摘要欄位
+RERANK_PROJECTION = (
+    'resume_id, current_title, skills_normalized, experience_years, education_keywords, '
+    'profile.basics, profile.professional_experiences'
+)
+
+class DecimalEncoder(json.JSONEncoder):
+    """處理 DynamoDB Decimal 類型的 JSON 編碼器"""
+    def default(self, o):
+        if isinstance(o, Decimal):
+            return float(o)
+        return super(DecimalEncoder, self).default(o)
+
+def load_team_resumes(team_id: str) -> List[Dict[str, Any]]:
+    """以 team-index 讀取團隊所有履歷的評分欄位"""
+    resumes = []
+    query_kwargs = {
+        'IndexName': 'team-index',
+        'KeyConditionExpression': 'team_id = :team_id',
+        'ExpressionAttributeValues': {':team_id': team_id},
+        'ProjectionExpression': RESUME_PROJECTION
+    }
+    while True:
+        resume_response = resume_table.query(**query_kwargs)
+        resumes.extend(resume_response.get('Items', []))
+        if 'LastEvaluatedKey' not in resume_response:
+            return resumes
+        query_kwargs['ExclusiveStartKey'] = resume_response['LastEvaluatedKey']
+
+def apply_confirmed_requirements(jobs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    以 BatchGetItem 讀取職缺已確認的需求，覆寫職缺上的評分欄位
+
+    只採用 confirmed_* 欄位，尚未確認的草稿不影響評分；沒有確認版本的職缺維持原本的欄位。
+    """
+    job_ids = list({job['job_id'] for job in jobs})
+    confirmed = {}
+    for start in range(0, len(job_ids), 100):
+        request_items = {
+            JOB_REQUIREMENT_TABLE_NAME: {
+                'Keys': [{'job_id': job_id} for job_id in job_ids[start:start + 100]],
+                'ProjectionExpression': 'job_id, confirmed_version, confirmed_requirement_text, confirmed_requirements'
+            }
+        }
+        while request_items:
+            batch_response = dynamodb.batch_get_item(RequestItems=request_items)
+            for item in batch_response.get('Responses', {}).get(JOB_REQUIREMENT_TABLE_NAME, []):
+                if item.get('confirmed_version') is not None:
+                    confirmed[item['job_id']] = item
+            request_items = batch_response.get('UnprocessedKeys') or {}
+
+    for job in jobs:
+        requirement = confirmed.get(job['job_id'])
+        if not requirement:
+            continue
+        requirements = requirement.get('confirmed_requirements') or {}
+        job.update({field: requirements[field] for field in REQUIREMENT_FIELDS if requirements.get(field) is not None})
+        job['requirement_text'] = list(requirement.get('confirmed_requirement_text') or [])
+        job['requirement_version'] = f"req-v{int(requirement['confirmed_version'])}"
+    return jobs
+
+def load_job(job_id: str) -> Optional[Dict[str, Any]]:
+    """讀取職缺並套用已確認的需求；職缺不存在時回傳 None"""
+    job_response = jobs_table.get_item(Key={'job_id': job_id})
+    if 'Item' not in job_response:
+        return None
+    return apply_confirmed_requirements([job_response['Item']])[0]
+
+def load_active_team_jobs(team_id: str) -> List[Dict[str, Any]]:
+    """以 team-index 讀取團隊中狀態為 active 的職缺"""
+    jobs = []
+    query_kwargs = {
+        'IndexName': 'team-index',
+        'KeyConditionExpression': 'team_id = :team_id',
+        'FilterExpression': '#status = :active',
+        'ExpressionAttributeNames': {'#status': 'status'},
+        'ExpressionAttributeValues': {':team_id': team_id, ':active': 'active'}
+    }
+    while True:
+        job_response = jobs_table.query(**query_kwargs)
+        jobs.extend(job_response.get('Items', []))
+        if 'LastEvaluatedKey' not in job_response:
+            return apply_confirmed_requirements(jobs)
+        query_kwargs['ExclusiveStartKey'] = job_response['LastEvaluatedKey']
+
+def match_result_item(job: Dict[str, Any], result: Dict[str, Any], matched_at: str) -> Dict[str, Any]:
+    return {
+        'job_id': job['job_id'],
+        'resume_id': result['resume_id'],
+        'team_id': job.get('team_id', ''),
+        'match_score': Decimal(str(result['match_score'])),
+        'is_matched': result['is_matched'],
+        'score_sort': matcher.score_sort_key(result['match_score'], result['is_matched']),
+        'matched_requirements': result['matched_requirements'],
+        'unmatched_requirements': result['unmatched_requirements'],
+        'scorer_version': matcher.SCORER_VERSION,
+        'matched_at': matched_at
+    }
+
+def write_match_results(job: Dict[str, Any], results: List[Dict[str, Any]]) -> None:
+    """以 BatchWriteItem 寫入配對結果（batch_writer 會自動重送未處理的項目）"""
+    matched_at = datetime.utcnow().isoformat()
+    with match_result_table.batch_writer(overwrite_by_pkeys=['job_id', 'resume_id']) as batch:
+        for result in results:
+            batch.put_item(Item=match_result_item(job, result, matched_at))
+
+def load_matched_pairs(keys: List[Tuple[str, str]]) -> Set[Tuple[str, str]]:
+    """以 BatchGetItem 讀取 (job_id, resume_id) 目前的配對結果，回傳已配對（is_matched）的組合"""
+    matched = set()
+    keys = list(dict.fromkeys(keys))
+    for start in range(0, len(keys), 100):
+        request_items = {MATCH_RESULT_TABLE_NAME: {
+            'Keys': [{'job_id': job_id, 'resume_id': resume_id} for job_id, resume_id in keys[start:start + 100]],
+            'ProjectionExpression': 'job_id, resume_id, is_matched'
+        }}
+        while request_items:
+            batch_response = dynamodb.batch_get_item(RequestItems=request_items)
+            for item in batch_response.get('Responses', {}).get(MATCH_RESULT_TABLE_NAME, []):
+                if item.get('is_matched'):
+                    matched.add((item['job_id'], item['resume_id']))
+            request_items = batch_response.get('UnprocessedKeys') or {}
+    return matched
+
+def previously_matched(job: Dict[str, Any], results: List[Dict[str, Any]]) -> Set[str]:
+    """寫入前讀取這次配對成功的履歷中，原本就已配對的部分（重新評分時不重複通知）"""
+    keys = [(job['job_id'], result['resume_id']) for result in results if result['is_matched']]
+    return {resume_id for _, resume_id in load_matched_pairs(keys)} if keys else set()
+
+def notify_matches(job: Dict[str, Any], results: List[Dict[str, Any]], already_matched: Set[str]) -> None:
+    """把新配對成功（原本未配對或沒有結果）的履歷加入通知彙整（失敗不影響評分）"""
+    try:
+        notifications.enqueue_matches(job, [
+            result['resume_id'] for result in results
+            if result['is_matched'] and result['resume_id'] not in already_matched
+        ])
+    except Exception as e:
+        print(f"加入配對通知失敗: job_id={job['job_id']}, {str(e)}")
+
+def score_job(job: Dict[str, Any], resumes: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """替單一職缺評分並寫入結果（履歷已由呼叫端讀取，供團隊多個職缺共用）"""
+    started = time.perf_counter()
+    results = matcher.score_resumes(job, resumes)
+    scored = time.perf_counter()
+    already_matched = previously_matched(job, results)
+    write_match_results(job, results)
+    notify_matches(job, results, already_matched)
+
+    summary = {
+        'job_id': job['job_id'],
+        'scored': len(results),
+        'matched': sum(1 for result in results if result['is_matched']),
+        'score_ms': round((scored - started) * 1000, 1),
+        'write_ms': round((time.perf_counter() - scored) * 1000, 1)
+    }
+    print(f"職缺配對完成: {summary}")
+    return summary
+
+def score_resume(resume_id: str) -> Dict[str, Any]:
+    """新履歷只與所屬團隊的 active 職缺評分，不重算其他履歷"""
+    resume_response = resume_table.get_item(Key={'resume_id': resume_id}, ProjectionExpression=RESUME_PROJECTION)
+    if 'Item' not in resume_response:
+        return {'resume_id': resume_id, 'scored_jobs': 0}
+    resume = resume_response['Item']
+    jobs = load_active_team_jobs(resume.get('team_id', ''))
+
+    matched_at = datetime.utcnow().isoformat()
+    scored_jobs = [(job, matcher.score_resumes(job, [resume])[0]) for job in jobs]
+    matched_jobs = [(job, result) for job, result in scored_jobs if result['is_matched']]
+    # 寫入前讀取原本的配對狀態，只通知新配對
+    already_matched = load_matched_pairs([(job['job_id'], resume_id) for job, _ in matched_jobs]) if matched_jobs else set()
+    with match_result_table.batch_writer(overwrite_by_pkeys=['job_id', 'resume_id']) as batch:
+        for job, result in scored_jobs:
+            batch.put_item(Item=match_result_item(job, result, matched_at))
+    for job, result in matched_jobs:
+        if (job['job_id'], resume_id) not in already_matched:
+            notify_matches(job, [result], set())
+    matched = len(matched_jobs)
+
+    summary = {'resume_id': resume_id, 'scored_jobs': len(jobs), 'matched_jobs': matched}
+    print(f"履歷配對完成: {summary}")
+    return summary
+
+def load_team_job_ids(team_id: str) -> List[Dict[str, Any]]:
+    """讀取團隊所有職缺（不限狀態）的 job_id"""
+    jobs = []
+    query_kwargs = {
+        'IndexName': 'team-index',
+        'KeyConditionExpression': 'team_id = :team_id',
+        'ExpressionAttributeValues': {':team_id': team_id},
+        'ProjectionExpression': 'job_id'
+    }
+    while True:
+        job_response = jobs_table.query(**query_kwargs)
+        jobs.extend(job_response.get('Items', []))
+        if 'LastEvaluatedKey' not in job_response:
+            return jobs
+        query_kwargs['ExclusiveStartKey'] = job_response['LastEvaluatedKey']
+
+def delete_resume_results(resume_id: str, team_id: str) -> Dict[str, Any]:
+    """履歷刪除或轉移團隊時，移除它在該團隊職缺下的配對結果"""
+    if not team_id:
+        # 沒有團隊的履歷不會有配對結果（team-index 也不接受空字串的鍵值）
+        return {'resume_id': resume_id, 'deleted_from_jobs': 0}
+    job_ids = [job['job_id'] for job in load_team_job_ids(team_id)]
+    with match_result_table.batch_writer() as batch:
+        for job_id in job_ids:
+            batch.delete_item(Key={'job_id': job_id, 'resume_id': resume_id})
+    print(f"已移除履歷配對結果: resume_id={resume_id}, 職缺數={len(job_ids)}")
+    return {'resume_id': resume_id, 'deleted_from_jobs': len(job_ids)}
+
+def load_resumes_by_ids(resume_ids: List[str]) -> List[Dict[str, Any]]:
+    """以 BatchGetItem 讀取重新排序需要的履歷欄位"""
+    resumes = []
+    for start in range(0, len(resume_ids), 100):
+        request_items = {
+            RESUME_TABLE_NAME: {
+                'Keys': [{'resume_id': resume_id} for resume_id in resume_ids[start:start + 100]],
+                'ProjectionExpression': RERANK_PROJECTION
+            }
+        }
+        while request_items:
+            batch_response = dynamodb.batch_get_item(RequestItems=request_items)
+            resumes.extend(batch_response.get('Responses', {}).get(RESUME_TABLE_NAME, []))
+            request_items = batch_response.get('UnprocessedKeys') or {}
+    return resumes
+
+def over_daily_budget(team_id: str, use_cache: bool = True) -> bool:
+    if not team_id:
+        return False
+    try:
+        return usage_meter.budget_status(team_id, use_cache=use_cache)['over_budget']
+    except Exception as e:
+        print(f"讀取團隊預算失敗: team_id={team_id}, {str(e)}")
+        return False
+
+def rerank_shortlist(job: Dict[str, Any], top_k: int = RERANK_SHORTLIST_SIZE) -> Dict[str, Any]:
+    """
+    取出分數最高的已配對候選人交給 LLM 批次評估，並把 cot_reason 寫回 match_result
+
+    團隊超過當日 Bedrock 預算時不呼叫模型，改排入佇列，由 drain_deferred 在預算重置後執行。
+    """
+    if over_daily_budget(job.get('team_id', '')):
+        usage_meter.enqueue_deferred('rerank', job.get('team_id', ''), job['job_id'], {'top_k': top_k})
+        print(f"團隊已超過每日預算，重新排序延後: job_id={job['job_id']}")
+        return {'job_id': job['job_id'], 'reranked': 0, 'deferred': True}
+
+    shortlist = match_result_table.query(
+        IndexName='score-index',
+        KeyConditionExpression=Key('job_id').eq(job['job_id']) & Key('score_sort').begins_with('1#'),
+        ScanIndexForward=False,
+        Limit=top_k
+    ).get('Items', [])
+    if not shortlist:
+        return {'job_id': job['job_id'], 'reranked': 0}
+
+    results = reranker.rerank(job, load_resumes_by_ids([item['resume_id'] for item in shortlist]))
+    reranked_at = datetime.utcnow().isoformat()
+    for resume_id, result in results.items():
+        try:
+            match_result_table.update_item(
+                Key={'job_id': job['job_id'], 'resume_id': resume_id},
+                UpdateExpression='SET cot_reason = :reason, llm_score = :score, reranked_at = :reranked_at',
+                ConditionExpression='attribute_exists(resume_id)',
+                ExpressionAttributeValues={
+                    ':reason': result['cot_reason'],
+                    ':score': Decimal(result['llm_score']),
+                    ':reranked_at': reranked_at
+                }
+            )
+        except match_result_table.meta.client.exceptions.ConditionalCheckFailedException:
+            # 重新排序期間配對結果已被刪除
+            pass
+
+    summary = {
+        'job_id': job['job_id'],
+        'reranked': len(results),
+        'model_calls_skipped': sum(1 for result in results.values() if result['cached'])
+    }
+    print(f"重新排序完成: {summary}")
+    return summary
+
+def drain_deferred() -> Dict[str, Any]:
+    """執行預算重置後的延後工作（目前只有重新排序）"""
+    drained, waiting = 0, 0
+    for item in usage_meter.load_deferred('rerank'):
+        if over_daily_budget(item.get('team_id', ''), use_cache=False):
+            waiting += 1
+            continue
+        # 先移除再執行，執行時若又超過預算會重新排入
+        usage_meter.remove_deferred(item)
+        job = load_job(item['job_id'])
+        if not job:
+            continue
+        try:
+            rerank_shortlist(job, int((item.get('payload') or {}).get('top_k') or RERANK_SHORTLIST_SIZE))
+            drained += 1
+        except Exception as e:
+            print(f"延後的重新排序失敗: job_id={item['job_id']}, {str(e)}")
+    summary = {'drained': drained, 'waiting': waiting}
+    print(f"延後工作處理完成: {summary}")
+    return summary
+
+def run_score_backlog(job: Dict[str, Any], context, run_id: str = None, prune: bool = True) -> Dict[str, Any]:
+    """以分頁串流的方式替職缺評分團隊所有履歷，完成後對前幾名重新排序"""
+    checkpoint = score_backlog.run(
+        job, match_result_item, RESUME_PROJECTION,
+        before_write=previously_matched, on_results=notify_matches,
+        context=context, run_id=run_id, prune=prune
+    )
+    summary = score_backlog.progress_summary(checkpoint)
+    if checkpoint.get('status') == 'completed' and not checkpoint.get('superseded') and RERANK_SHORTLIST_SIZE > 0:
+        try:
+            summary['rerank'] = rerank_shortlist(job)
+        except Exception as e:
+            # LLM 重新排序失敗不影響規則評分結果
+            print(f"重新排序失敗: job_id={job['job_id']}, {str(e)}")
+    print(f"職缺批次評分: {summary}")
+    return summary
+
+def lambda_handler(event, context):
+    """
+    配對 Lambda 主函數
+
+    事件格式：
+    - {"resume_id": "...", "team_id": "...", "deleted": false}：單一履歷對團隊 active 職缺評分；
+      deleted 為 true 時移除該履歷在團隊職缺下的配對結果（由履歷解析 Lambda 觸發）
+    - {"job_id": "..."}：以團隊所有履歷替單一職缺評分（新職缺或條件變更時由職缺管理 Lambda 觸發），
+      履歷分頁串流評分並寫入 checkpoint，逾時前自動接續
+    - {"action": "score_backlog", "job_id": "...", "run_id": "..."}：接續指定的批次評分；
+      不帶 run_id 時若上一輪失敗則從 checkpoint 接續，否則開始新的一輪
+    - {"action": "backlog_status", "job_id": "..."}：查詢批次評分進度
+    - {"team_id": "..."}：替團隊所有 active 職缺評分（履歷只讀取一次）
+    - {"action": "rerank", "job_id": "...", "top_k": 20}：只對前 K 名已配對者做 LLM 重新排序
+    - {"action": "flush_notifications"}：送出到期的配對通知摘要（EventBridge 排程）
+    - {"action": "drain_deferred"}：執行因超過團隊每日預算而延後的重新排序（EventBridge 排程）
+
+    職缺評分一律使用已確認的職缺需求（job_requirement 的 confirmed_* 欄位），需求確認時由需求 Lambda 觸發 {"job_id": "..."}。
+    職缺層級評分完成後，會自動對前 RERANK_SHORTLIST_SIZE 名重新排序（結果有快取）。
+    """
+    try:
+        print(f"Resume matcher - Event: {json.dumps(event, ensure_ascii=False)}")
+
+        if event.get('action') == 'rerank':
+            job = load_job(event.get('job_id', ''))
+            if not job:
+                return {'statusCode': 404, 'body': json.dumps({'error': '職缺不存在'}, ensure_ascii=False)}
+            result = rerank_shortlist(job, int(event.get('top_k') or RERANK_SHORTLIST_SIZE))
+            return {'statusCode': 200, 'body': json.dumps(result, cls=DecimalEncoder, ensure_ascii=False)}
+
+        if event.get('action') == 'flush_notifications':
+            result = notifications.flush_due()
+            return {'statusCode': 200, 'body': json.dumps(result, cls=DecimalEncoder, ensure_ascii=False)}
+
+        if event.get('action') == 'drain_deferred':
+            result = drain_deferred()
+            return {'statusCode': 200, 'body': json.dumps(result, cls=DecimalEncoder, ensure_ascii=False)}
+
+        if event.get('action') == 'backlog_status':
+            checkpoint = score_backlog.get_progress(event.get('job_id', ''))
+            if not checkpoint:
+                return {'statusCode': 404, 'body': json.dumps({'error': '沒有批次評分紀錄'}, ensure_ascii=False)}
+            return {'statusCode': 200, 'body': json.dumps(score_backlog.progress_summary(checkpoint), cls=DecimalEncoder, ensure_ascii=False)}
+
+        if event.get('action') == 'score_backlog' or (event.get('job_id') and not event.get('resume_id')):
+            job = load_job(event.get('job_id', ''))
+            if not job:
+                return {'statusCode': 404, 'body': json.dumps({'error': '職缺不存在'}, ensure_ascii=False)}
+            run_id = event.get('run_id')
+            if event.get('action') == 'score_backlog' and not run_id:
+                run_id = score_backlog.reopen_failed_run(event['job_id'])
+            result = run_score_backlog(job, context, run_id=run_id)
+            return {'statusCode': 200, 'body': json.dumps(result, cls=DecimalEncoder, ensure_ascii=False)}
+
+        if event.get('resume_id'):
+            if event.get('deleted'):
+                result = delete_resume_results(event['resume_id'], event.get('team_id', ''))
+            else:
+                result = score_resume(event['resume_id'])
+            return {'statusCode': 200, 'body': json.dumps(result, cls=DecimalEncoder, ensure_ascii=False)}
+
+        if not event.get('team_id'):
+            return {'statusCode': 400, 'body': json.dumps({'error': '缺少 job_id 或 team_id'}, ensure_ascii=False)}
+        team_id = event['team_id']
+        jobs = load_active_team_jobs(team_id)
+
+        resumes = load_team_resumes(team_id) if jobs else []
+        summaries = [score_job(job, resumes) for job in jobs]
+        if RERANK_SHORTLIST_SIZE > 0:
+            for job, summary in zip(jobs, summaries):
+                try:
+                    summary['rerank'] = rerank_shortlist(job)
+                except Exception as e:
+                    # LLM 重新排序失敗不影響規則評分結果
+                    print(f"重新排序失敗: job_id={job['job_id']}, {str(e)}")
+
+        return {
+            'statusCode': 200,
+            'body': json.dumps({
+                'message': '配對完成',
+                'team_id': team_id,
+                'resume_count': len(resumes),
+                'jobs': summaries
+            }, cls=DecimalEncoder, ensure_ascii=False)
+        }
+
+    except Exception as e:
+        print(f"Resume matcher Lambda 執行錯誤: {str(e)}")
+        import traceback
+        print(traceback.format_exc())
+        return {'statusCode': 500, 'body': json.dumps({'error': '配對失敗'}, ensure_ascii=False)}
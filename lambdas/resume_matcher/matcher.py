@@ -0,0 +1,216 @@
+"""
+規則式履歷配對評分
+
+把職缺條件（必備 / 加分技能、年資、學歷、主修、語言）與一批履歷轉成特徵矩陣，
+以 NumPy 一次計算整批分數：
+
+- 技能：詞彙表為職缺技能，履歷技能轉成 (履歷數 x 詞彙數) 的布林矩陣，覆蓋率以列加總計算
+- 年資：experience_years / min_experience_years，上限 1
+- 學歷：學歷等級達到要求得 1，低一級得 0.5
+- 主修 / 語言：任一主修命中得 1；語言以命中比例計分
+
+只有職缺實際設定的條件會參與加權，分數範圍 0-1。
+"""
+import re
+import unicodedata
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+
+from skill_normalizer import normalize_skill, normalize_skills, skill_spellings
+
+SCORER_VERSION = 'rules-v2'
+
+WEIGHTS = {
+    'required_skills': 0.40,
+    'nice_to_have_skills': 0.10,
+    'experience': 0.20,
+    'education': 0.15,
+    'majors': 0.10,
+    'languages': 0.05
+}
+# 分數達到門檻視為配對成功
+MATCH_THRESHOLD = 0.6
+
+# 學歷等級：由高到低比對，取第一個命中的等級
+EDUCATION_LEVELS = [
+    (5, ('博士', 'phd', 'ph.d', 'doctor')),
+    (4, ('碩士', '研究所', 'master', 'mba')),
+    (3, ('學士', '大學', 'bachelor', 'university')),
+    (2, ('專科', '二專', '五專', 'associate')),
+    (1, ('高中', '高職', 'high school'))
+]
+
+
+def score_sort_key(score: float, is_matched: bool) -> str:
+    """
+    match_result 的 score-index 排序鍵："{is_matched}#{分數 x 10000 補零}"
+
+    is_matched 由分數門檻決定，因此前綴排序與分數排序一致；
+    查詢已配對者時以 begins_with('1#') 取得，不需 FilterExpression。
+    """
+    return f"{int(bool(is_matched))}#{int(round(score * 10000)):05d}"
+
+
+def normalize_term(term: str) -> str:
+    """正規化技能 / 關鍵字：全半形統一、轉小寫、合併空白"""
+    return ' '.join(unicodedata.normalize('NFKC', str(term)).lower().split())
+
+
+def as_list(value) -> List[str]:
+    if not value:
+        return []
+    if isinstance(value, str):
+        return [item for item in re.split(r'[,，、/]', value) if item.strip()]
+    return [str(item) for item in value if item]
+
+
+def education_level(text: str) -> int:
+    text = normalize_term(text or '')
+    for level, keywords in EDUCATION_LEVELS:
+        if any(keyword in text for keyword in keywords):
+            return level
+    return 0
+
+
+def resume_features(resume: Dict[str, Any]) -> Tuple[set, int, str, str]:
+    """
+    取出評分需要的履歷特徵：(技能集合, 年資, 學歷文字, 語言比對文字)
+
+    優先使用解析 Lambda 預先計算的 skills_normalized / experience_years / education_keywords。
+    """
+    profile = resume.get('profile') or {}
+    basics = profile.get('basics') or {}
+
+    skills = resume.get('skills_normalized')
+    if skills is None:
+        skills = basics.get('skills') or []
+    # 舊資料的 skills_normalized 可能還不是標準名稱，normalize_skill 對標準名稱不會改變結果
+    skills = {normalize_skill(skill) for skill in skills if skill}
+
+    experience = resume.get('experience_years')
+    if experience is None:
+        experience = basics.get('total_experience_in_years')
+    experience = int(experience) if experience is not None else -1
+
+    education = resume.get('education_keywords')
+    if education is None:
+        education = normalize_term(' '.join(
+            str(edu.get(field) or '')
+            for edu in profile.get('educations') or []
+            for field in ('issuing_organization', 'study_type', 'department')
+        ))
+
+    language_text = normalize_term(' '.join(
+        [' '.join(skills)] +
+        [str(cert.get('description') or '') for cert in profile.get('trainings_and_certifications') or []]
+    ))
+    return skills, experience, education, language_text
+
+
+class JobRequirements:
+    """職缺條件的正規化表示"""
+
+    def __init__(self, job: Dict[str, Any]):
+        self.job_id = job.get('job_id')
+        self.required_skills = normalize_skills(as_list(job.get('required_skills')))
+        nice = normalize_skills(as_list(job.get('nice_to_have_skills')))
+        self.nice_to_have_skills = [s for s in nice if s not in self.required_skills]
+        self.min_experience_years = int(job.get('min_experience_years') or 0)
+        self.education_required = job.get('education_required') or ''
+        self.education_level = education_level(self.education_required)
+        self.majors = list(dict.fromkeys(normalize_term(m) for m in as_list(job.get('majors_required'))))
+        self.languages = list(dict.fromkeys(normalize_term(l) for l in as_list(job.get('language_required'))))
+        # 履歷技能已轉成標準名稱（「英文」-> english），語言以任一寫法比對
+        self.language_spellings = [skill_spellings(language) for language in self.languages]
+
+        self.vocabulary = {skill: i for i, skill in enumerate(self.required_skills + self.nice_to_have_skills)}
+
+
+def score_resumes(job: Dict[str, Any], resumes: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    以向量運算替整批履歷評分
+
+    :return: 與 resumes 順序相同的 [{'resume_id', 'match_score', 'is_matched',
+             'matched_requirements', 'unmatched_requirements'}]
+    """
+    requirements = JobRequirements(job)
+    count = len(resumes)
+    if count == 0:
+        return []
+
+    features = [resume_features(resume) for resume in resumes]
+    n_required = len(requirements.required_skills)
+    vocabulary = requirements.vocabulary
+
+    # 履歷技能 -> 布林矩陣（只記錄出現在職缺詞彙表中的技能）
+    skill_matrix = np.zeros((count, len(vocabulary)), dtype=bool)
+    rows, cols = [], []
+    for row, (skills, _, _, _) in enumerate(features):
+        for skill in skills:
+            col = vocabulary.get(skill)
+            if col is not None:
+                rows.append(row)
+                cols.append(col)
+    skill_matrix[rows, cols] = True
+
+    experience = np.fromiter((f[1] for f in features), dtype=np.float32, count=count)
+    education = np.fromiter((education_level(f[2]) for f in features), dtype=np.int8, count=count)
+    major_matrix = np.array(
+        [[major in f[2] for major in requirements.majors] for f in features], dtype=bool
+    ).reshape(count, len(requirements.majors))
+    language_matrix = np.array(
+        [[any(spelling in f[3] for spelling in spellings) for spellings in requirements.language_spellings]
+         for f in features], dtype=bool
+    ).reshape(count, len(requirements.languages))
+
+    components = {
+        'required_skills': skill_matrix[:, :n_required].mean(axis=1) if n_required else None,
+        'nice_to_have_skills': skill_matrix[:, n_required:].mean(axis=1) if requirements.nice_to_have_skills else None,
+        'experience': (np.clip(experience / requirements.min_experience_years, 0.0, 1.0)
+                       if requirements.min_experience_years > 0 else None),
+        'education': (np.where(education >= requirements.education_level, 1.0,
+                               np.where(education == requirements.education_level - 1, 0.5, 0.0))
+                      if requirements.education_level > 0 else None),
+        'majors': major_matrix.any(axis=1).astype(np.float32) if requirements.majors else None,
+        'languages': language_matrix.mean(axis=1) if requirements.languages else None
+    }
+
+    scores = np.zeros(count, dtype=np.float32)
+    total_weight = 0.0
+    for name, component in components.items():
+        if component is not None:
+            scores += WEIGHTS[name] * component
+            total_weight += WEIGHTS[name]
+    if total_weight:
+        scores /= total_weight
+    is_matched = scores >= MATCH_THRESHOLD if total_weight else np.zeros(count, dtype=bool)
+
+    # 列出符合 / 不符合的條件，供前端與人工審核參考
+    labels = [f'必備技能: {skill}' for skill in requirements.required_skills]
+    labels += [f'加分技能: {skill}' for skill in requirements.nice_to_have_skills]
+    checks = [skill_matrix]
+    if requirements.min_experience_years > 0:
+        labels.append(f'年資 {requirements.min_experience_years} 年以上')
+        checks.append((experience >= requirements.min_experience_years)[:, None])
+    if requirements.education_level > 0:
+        labels.append(f'學歷: {requirements.education_required}')
+        checks.append((education >= requirements.education_level)[:, None])
+    if requirements.majors:
+        labels.append(f"主修: {'、'.join(requirements.majors)}")
+        checks.append(major_matrix.any(axis=1)[:, None])
+    labels += [f'語言: {language}' for language in requirements.languages]
+    checks.append(language_matrix)
+    check_matrix = np.hstack(checks)
+
+    results = []
+    for row, resume in enumerate(resumes):
+        hits = check_matrix[row]
+        results.append({
+            'resume_id': resume['resume_id'],
+            'match_score': round(float(scores[row]), 4),
+            'is_matched': bool(is_matched[row]),
+            'matched_requirements': [label for label, hit in zip(labels, hits) if hit],
+            'unmatched_requirements': [label for label, hit in zip(labels, hits) if not hit]
+        })
+    return results
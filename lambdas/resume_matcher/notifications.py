@@ -0,0 +1,242 @@
+"""
+配對成功通知的彙整（debounce）
+
+新配對不會立即通知，而是依 (收件人, 職缺, 時間窗) 累積在 match-notification 表：
+
+- window_key = "{recipient}#{job_id}#{時間窗起點}"，每次配對寫入只做一次 ADD（resume_ids 為字串集合）
+- 時間窗結束後由排程呼叫 flush_due，同一收件人所有到期的時間窗合併成一封摘要
+- 每位收件人每小時最多 NOTIFY_MAX_PER_HOUR 封，超過時順延到下一個時間窗並繼續累積
+
+因此 publish 次數只與時間窗數量有關，與配對數量無關。
+待發送的項目帶有 pending 屬性，由稀疏索引 pending-index 查詢；送出後移除 pending。
+
+NOTIFICATION_PUBLISHER=local 時改用 LocalPublisher，只記錄訊息（本機測試用，不需要 SNS）。
+"""
+import json
+import os
+import time
+from collections import defaultdict
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional
+
+import boto3
+from boto3.dynamodb.conditions import Key
+from botocore.exceptions import ClientError
+
+dynamodb = boto3.resource('dynamodb')
+
+NOTIFICATION_TABLE_NAME = os.environ.get('NOTIFICATION_TABLE_NAME', 'benson-haire-match-notification')
+MATCH_TOPIC_ARN = os.environ.get('MATCH_TOPIC_ARN', '')
+NOTIFICATION_PUBLISHER = os.environ.get('NOTIFICATION_PUBLISHER', 'sns')
+NOTIFICATION_LOCAL_PATH = os.environ.get('NOTIFICATION_LOCAL_PATH', '')
+NOTIFICATION_WINDOW_SECONDS = int(os.environ.get('NOTIFICATION_WINDOW_SECONDS', '900'))
+NOTIFY_MAX_PER_HOUR = int(os.environ.get('NOTIFY_MAX_PER_HOUR', '4'))
+# 摘要中每個職缺列出的候選人上限，其餘只顯示數量
+DIGEST_MAX_CANDIDATES = 20
+# 已送出的時間窗與速率計數保留天數（TTL）
+RETENTION_DAYS = 7
+
+notification_table = dynamodb.Table(NOTIFICATION_TABLE_NAME)
+
+
+class SnsPublisher:
+    """發送到 SNS 主題，收件人放在 message attribute，由訂閱的 filter policy 分流"""
+
+    def __init__(self, topic_arn: str):
+        self.topic_arn = topic_arn
+        self.client = boto3.client('sns')
+
+    def publish(self, recipient: str, subject: str, message: str) -> None:
+        self.client.publish(
+            TopicArn=self.topic_arn,
+            Subject=subject[:100],
+            Message=message,
+            MessageAttributes={'recipient': {'DataType': 'String', 'StringValue': recipient}}
+        )
+
+
+class LocalPublisher:
+    """SNS 的本機替身：訊息保留在 sent，並可附加寫入 JSON Lines 檔"""
+
+    def __init__(self, path: str = ''):
+        self.path = path
+        self.sent: List[Dict[str, str]] = []
+
+    def publish(self, recipient: str, subject: str, message: str) -> None:
+        record = {'recipient': recipient, 'subject': subject, 'message': message}
+        self.sent.append(record)
+        print(f"[本機通知] {json.dumps(record, ensure_ascii=False)}")
+        if self.path:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(record, ensure_ascii=False) + '\n')
+
+
+_publisher = None
+
+
+def get_publisher():
+    global _publisher
+    if _publisher is None:
+        if NOTIFICATION_PUBLISHER == 'local' or not MATCH_TOPIC_ARN:
+            _publisher = LocalPublisher(NOTIFICATION_LOCAL_PATH)
+        else:
+            _publisher = SnsPublisher(MATCH_TOPIC_ARN)
+    return _publisher
+
+
+def recipient_for(job: Dict[str, Any]) -> str:
+    """職缺設定的用人主管信箱優先，否則通知整個團隊"""
+    return job.get('hiring_manager_email') or f"team:{job.get('team_id', '')}"
+
+
+def window_start(epoch: float) -> int:
+    return int(epoch // NOTIFICATION_WINDOW_SECONDS * NOTIFICATION_WINDOW_SECONDS)
+
+
+def expires_at(epoch: float) -> int:
+    return int(epoch) + RETENTION_DAYS * 86400
+
+
+def enqueue_matches(job: Dict[str, Any], resume_ids: Iterable[str], now: Optional[float] = None) -> int:
+    """
+    把新配對加入目前的時間窗（每次呼叫只寫入一次）
+
+    :return: 加入的配對數
+    """
+    resume_ids = set(resume_ids)
+    if not resume_ids:
+        return 0
+    now = now or time.time()
+    recipient = recipient_for(job)
+    start = window_start(now)
+
+    # 時間窗已送出時（排程剛好在這之前執行）改加入下一個時間窗
+    for _ in range(2):
+        try:
+            notification_table.update_item(
+                Key={'window_key': f"{recipient}#{job['job_id']}#{start}"},
+                UpdateExpression=(
+                    'ADD resume_ids :ids, match_count :count '
+                    'SET recipient = :recipient, job_id = :job_id, job_title = :title, '
+                    'pending = :pending, window_end = if_not_exists(window_end, :window_end), '
+                    'expires_at = :expires_at'
+                ),
+                ConditionExpression='attribute_not_exists(sent_at)',
+                ExpressionAttributeValues={
+                    ':ids': resume_ids,
+                    ':count': len(resume_ids),
+                    ':recipient': recipient,
+                    ':job_id': job['job_id'],
+                    ':title': job.get('title') or job.get('job_title', ''),
+                    ':pending': '1',
+                    ':window_end': start + NOTIFICATION_WINDOW_SECONDS,
+                    ':expires_at': expires_at(now)
+                }
+            )
+            return len(resume_ids)
+        except ClientError as e:
+            if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+                raise
+            start += NOTIFICATION_WINDOW_SECONDS
+    return 0
+
+
+def acquire_send_slot(recipient: str, now: float) -> bool:
+    """每位收件人每小時的發送上限（以小時為單位的計數器）"""
+    hour = int(now // 3600)
+    try:
+        notification_table.update_item(
+            Key={'window_key': f"rate#{recipient}#{hour}"},
+            UpdateExpression='ADD sent_count :one SET expires_at = :expires_at',
+            ConditionExpression='attribute_not_exists(sent_count) OR sent_count < :limit',
+            ExpressionAttributeValues={':one': 1, ':limit': NOTIFY_MAX_PER_HOUR, ':expires_at': expires_at(now)}
+        )
+        return True
+    except ClientError as e:
+        if e.response['Error']['Code'] == 'ConditionalCheckFailedException':
+            return False
+        raise
+
+
+def load_due_windows(now: float) -> List[Dict[str, Any]]:
+    windows = []
+    query_kwargs = {
+        'IndexName': 'pending-index',
+        'KeyConditionExpression': Key('pending').eq('1') & Key('window_end').lte(int(now))
+    }
+    while True:
+        query_response = notification_table.query(**query_kwargs)
+        windows.extend(query_response.get('Items', []))
+        if 'LastEvaluatedKey' not in query_response:
+            return windows
+        query_kwargs['ExclusiveStartKey'] = query_response['LastEvaluatedKey']
+
+
+def build_digest(recipient: str, windows: List[Dict[str, Any]]) -> Dict[str, str]:
+    total = sum(int(window.get('match_count', 0)) for window in windows)
+    lines = [f"您有 {total} 位新配對成功的候選人：", '']
+    by_job: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+    for window in windows:
+        by_job[window['job_id']].append(window)
+    for job_id, job_windows in by_job.items():
+        resume_ids = sorted({resume_id for window in job_windows for resume_id in window.get('resume_ids', set())})
+        title = job_windows[0].get('job_title') or job_id
+        lines.append(f"■ {title}（{job_id}）：{len(resume_ids)} 位")
+        lines.extend(f"  - {resume_id}" for resume_id in resume_ids[:DIGEST_MAX_CANDIDATES])
+        if len(resume_ids) > DIGEST_MAX_CANDIDATES:
+            lines.append(f"  …另有 {len(resume_ids) - DIGEST_MAX_CANDIDATES} 位")
+    subject = f"hAIre 配對通知：{len(by_job)} 個職缺、{total} 位新候選人"
+    return {'subject': subject, 'message': '\n'.join(lines)}
+
+
+def mark_sent(windows: List[Dict[str, Any]], sent_at: str) -> None:
+    for window in windows:
+        notification_table.update_item(
+            Key={'window_key': window['window_key']},
+            UpdateExpression='SET sent_at = :sent_at REMOVE pending',
+            ExpressionAttributeValues={':sent_at': sent_at}
+        )
+
+
+def defer(windows: List[Dict[str, Any]], now: float) -> None:
+    """超過速率上限的時間窗順延一個時間窗，期間新配對仍會加入下一個時間窗"""
+    for window in windows:
+        notification_table.update_item(
+            Key={'window_key': window['window_key']},
+            UpdateExpression='SET window_end = :window_end',
+            ExpressionAttributeValues={':window_end': window_start(now) + NOTIFICATION_WINDOW_SECONDS}
+        )
+
+
+def flush_due(now: Optional[float] = None) -> Dict[str, Any]:
+    """送出所有到期的時間窗：每位收件人一封摘要"""
+    now = now or time.time()
+    by_recipient: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+    for window in load_due_windows(now):
+        by_recipient[window['recipient']].append(window)
+
+    publisher = get_publisher()
+    sent, deferred = 0, 0
+    sent_at = datetime.utcnow().isoformat()
+    for recipient, windows in by_recipient.items():
+        if not acquire_send_slot(recipient, now):
+            defer(windows, now)
+            deferred += len(windows)
+            continue
+        try:
+            digest = build_digest(recipient, windows)
+            publisher.publish(recipient, digest['subject'], digest['message'])
+        except Exception as e:
+            # 發送失敗保留 pending，下次排程重試
+            print(f"發送配對通知失敗: recipient={recipient}, {str(e)}")
+            continue
+        mark_sent(windows, sent_at)
+        sent += 1
+
+    summary = {
+        'recipients': len(by_recipient),
+        'digests_sent': sent,
+        'windows_deferred': deferred
+    }
+    print(f"配對通知發送完成: {summary}")
+    return summary
@@ -0,0 +1,283 @@
+"""
+LLM 批次重新排序（cot_reason）
+
+- 一個 prompt 放入同一職缺的多位候選人精簡摘要（RERANK_BATCH_SIZE），減少 Bedrock 呼叫次數
+- 多個 prompt 以有限的執行緒並行，並以共用的速率限制器控制呼叫間隔（與解析 Lambda 相同的 1 秒間隔）
+- 結果以 (職缺需求版本, 履歷內容雜湊) 快取在 DynamoDB 與暖機容器記憶體中，
+  需求與履歷都沒變時不會再次呼叫模型
+"""
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, Dict, List, Tuple
+
+import boto3
+from botocore.exceptions import ClientError
+
+import usage_meter
+
+dynamodb = boto3.resource('dynamodb')
+bedrock_client = boto3.client('bedrock-runtime', region_name='ap-southeast-1')
+
+RERANK_CACHE_TABLE_NAME = os.environ.get('RERANK_CACHE_TABLE_NAME', 'benson-haire-rerank-cache')
+JOB_REQUIREMENT_TABLE_NAME = os.environ.get('JOB_REQUIREMENT_TABLE_NAME', 'benson-haire-job-requirement')
+RERANK_MODEL_ID = os.environ.get('RERANK_MODEL_ID', 'anthropic.claude-3-5-sonnet-20240620-v1:0')
+
+# 每個 prompt 的候選人數、同時進行的 prompt 數與呼叫間隔
+RERANK_BATCH_SIZE = int(os.environ.get('RERANK_BATCH_SIZE', '5'))
+RERANK_CONCURRENCY = int(os.environ.get('RERANK_CONCURRENCY', '2'))
+RERANK_MIN_INTERVAL_SECONDS = float(os.environ.get('RERANK_MIN_INTERVAL_SECONDS', '1'))
+MAX_RETRIES = 4
+
+rerank_cache_table = dynamodb.Table(RERANK_CACHE_TABLE_NAME)
+job_requirement_table = dynamodb.Table(JOB_REQUIREMENT_TABLE_NAME)
+
+_MAX_LOCAL_ENTRIES = 2000
+_local_cache: 'OrderedDict[str, Dict[str, Any]]' = OrderedDict()
+
+RERANK_SYSTEM_PROMPT = [{"text": """你是資深招募顧問。請依照職缺需求評估每位候選人的適配程度。
+只輸出 JSON 陣列，每位候選人一個物件，格式為：
+[{"candidate_id": <string>, "score": <0-100 的整數>, "reason": <string，100 字以內的中文評分理由>}]
+必須涵蓋所有候選人，不得輸出其他文字。"""}]
+
+
+class RateLimiter:
+    """執行緒共用的最小呼叫間隔限制"""
+
+    def __init__(self, min_interval: float):
+        self.min_interval = min_interval
+        self._lock = threading.Lock()
+        self._next_time = 0.0
+
+    def wait(self) -> None:
+        with self._lock:
+            now = time.monotonic()
+            delay = self._next_time - now
+            self._next_time = max(now, self._next_time) + self.min_interval
+        if delay > 0:
+            time.sleep(delay)
+
+
+rate_limiter = RateLimiter(RERANK_MIN_INTERVAL_SECONDS)
+
+
+def requirement_version(job: Dict[str, Any]) -> str:
+    """職缺需求版本：已確認的 job_requirement 版本優先，否則使用職缺條件欄位的雜湊"""
+    if job.get('requirement_version'):
+        return job['requirement_version']
+    try:
+        requirement = job_requirement_table.get_item(
+            Key={'job_id': job['job_id']},
+            ProjectionExpression='confirmed_version'
+        ).get('Item')
+        if requirement and requirement.get('confirmed_version') is not None:
+            return f"req-v{int(requirement['confirmed_version'])}"
+    except Exception as e:
+        print(f"讀取職缺需求版本失敗: job_id={job['job_id']}, {str(e)}")
+
+    fields = {field: job.get(field) for field in (
+        'title', 'responsibilities', 'required_skills', 'nice_to_have_skills',
+        'min_experience_years', 'education_required', 'majors_required', 'language_required'
+    )}
+    digest = hashlib.sha256(json.dumps(fields, sort_keys=True, default=str, ensure_ascii=False).encode('utf-8'))
+    return f"job-{digest.hexdigest()[:16]}"
+
+
+def job_summary(job: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        'title': job.get('title') or job.get('job_title', ''),
+        'requirement_text': list(job.get('requirement_text') or []),
+        'responsibilities': list(job.get('responsibilities') or [])[:8],
+        'required_skills': list(job.get('required_skills') or []),
+        'nice_to_have_skills': list(job.get('nice_to_have_skills') or []),
+        'min_experience_years': job.get('min_experience_years'),
+        'education_required': job.get('education_required', ''),
+        'majors_required': list(job.get('majors_required') or []),
+        'language_required': list(job.get('language_required') or [])
+    }
+
+
+def candidate_summary(resume: Dict[str, Any]) -> Dict[str, Any]:
+    """候選人的精簡摘要（不含姓名與聯絡方式），同時作為內容雜湊的來源"""
+    profile = resume.get('profile') or {}
+    basics = profile.get('basics') or {}
+    experiences = [
+        {
+            'title': exp.get('title', ''),
+            'company': exp.get('company', ''),
+            'months': exp.get('duration_in_months'),
+            'description': str(exp.get('description') or '')[:200]
+        }
+        for exp in (profile.get('professional_experiences') or [])[:3]
+    ]
+    return {
+        'current_title': resume.get('current_title') or basics.get('current_title', ''),
+        'experience_years': resume.get('experience_years', basics.get('total_experience_in_years')),
+        'skills': list(resume.get('skills_normalized') or basics.get('skills') or [])[:20],
+        'education': resume.get('education_keywords', ''),
+        'experiences': experiences
+    }
+
+
+def content_hash(summary: Dict[str, Any]) -> str:
+    payload = json.dumps(summary, sort_keys=True, default=str, ensure_ascii=False).encode('utf-8')
+    return hashlib.sha256(payload).hexdigest()[:32]
+
+
+def cache_key(job_id: str, version: str, resume_hash: str) -> str:
+    return f"{job_id}#{version}#{resume_hash}"
+
+
+def load_cached(keys: List[str]) -> Dict[str, Dict[str, Any]]:
+    """先查記憶體，再以 BatchGetItem 查 DynamoDB"""
+    keys = list(dict.fromkeys(keys))
+    found = {key: _local_cache[key] for key in keys if key in _local_cache}
+    missing = [key for key in keys if key not in found]
+    for start in range(0, len(missing), 100):
+        request_items = {
+            RERANK_CACHE_TABLE_NAME: {'Keys': [{'cache_key': key} for key in missing[start:start + 100]]}
+        }
+        try:
+            while request_items:
+                batch_response = dynamodb.batch_get_item(RequestItems=request_items)
+                for item in batch_response.get('Responses', {}).get(RERANK_CACHE_TABLE_NAME, []):
+                    found[item['cache_key']] = item
+                    remember(item['cache_key'], item)
+                request_items = batch_response.get('UnprocessedKeys') or {}
+        except Exception as e:
+            print(f"讀取重新排序快取失敗: {str(e)}")
+    return found
+
+
+def remember(key: str, value: Dict[str, Any]) -> None:
+    _local_cache[key] = value
+    _local_cache.move_to_end(key)
+    while len(_local_cache) > _MAX_LOCAL_ENTRIES:
+        _local_cache.popitem(last=False)
+
+
+def parse_model_output(text: str) -> List[Dict[str, Any]]:
+    """取出模型回覆中的 JSON 陣列（容忍前後多餘文字或 code fence）"""
+    match = re.search(r'\[.*\]', text, re.S)
+    if not match:
+        raise ValueError('模型回覆中找不到 JSON 陣列')
+    return json.loads(match.group(0))
+
+
+def rank_batch(job: Dict[str, Any], batch: List[Tuple[str, Dict[str, Any]]]) -> Dict[str, Dict[str, Any]]:
+    """
+    一次呼叫模型評估一批候選人
+
+    :param batch: [(resume_id, candidate_summary)]
+    :return: resume_id -> {'llm_score', 'cot_reason'}
+    """
+    # 以序號代替 resume_id，避免模型抄錯長字串
+    aliases = {f"C{i + 1}": resume_id for i, (resume_id, _) in enumerate(batch)}
+    candidates = [{'candidate_id': alias, **summary} for alias, (_, summary) in zip(aliases, batch)]
+    user_message = {
+        "role": "user",
+        "content": [{"text": (
+            f"職缺需求:\n{json.dumps(job_summary(job), ensure_ascii=False, default=str)}\n\n"
+            f"候選人:\n{json.dumps(candidates, ensure_ascii=False, default=str)}"
+        )}]
+    }
+
+    for attempt in range(MAX_RETRIES):
+        rate_limiter.wait()
+        try:
+            response = bedrock_client.converse(
+                modelId=RERANK_MODEL_ID,
+                messages=[user_message],
+                system=RERANK_SYSTEM_PROMPT,
+                inferenceConfig={"temperature": 0.0, "maxTokens": 300 * len(batch)}
+            )
+            usage_meter.record_converse(response, RERANK_MODEL_ID, 'rerank', team_id=job.get('team_id', ''),
+                                        job_id=job['job_id'], resume_ids=[resume_id for resume_id, _ in batch])
+            break
+        except ClientError as e:
+            if e.response['Error']['Code'] not in ('ThrottlingException', 'ServiceUnavailableException') \
+                    or attempt == MAX_RETRIES - 1:
+                raise
+            time.sleep(2 ** attempt)
+
+    results = {}
+    for entry in parse_model_output(response['output']['message']['content'][0]['text']):
+        resume_id = aliases.get(str(entry.get('candidate_id')))
+        if resume_id:
+            results[resume_id] = {
+                'llm_score': max(0, min(100, int(entry.get('score', 0)))),
+                'cot_reason': str(entry.get('reason', ''))
+            }
+    return results
+
+
+def rerank(job: Dict[str, Any], resumes: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """
+    重新排序一個職缺的候選人
+
+    :return: resume_id -> {'llm_score', 'cot_reason', 'cached'}
+    """
+    version = requirement_version(job)
+    summaries = {resume['resume_id']: candidate_summary(resume) for resume in resumes}
+    keys = {
+        resume_id: cache_key(job['job_id'], version, content_hash(summary))
+        for resume_id, summary in summaries.items()
+    }
+
+    cached = load_cached(list(keys.values()))
+    results = {
+        resume_id: {'llm_score': int(cached[key]['llm_score']), 'cot_reason': cached[key]['cot_reason'], 'cached': True}
+        for resume_id, key in keys.items() if key in cached
+    }
+
+    # 內容完全相同的履歷只送一次
+    pending_by_key: Dict[str, str] = {}
+    for resume_id, key in keys.items():
+        if resume_id not in results:
+            pending_by_key.setdefault(key, resume_id)
+    pending = [(resume_id, summaries[resume_id]) for resume_id in pending_by_key.values()]
+    batches = [pending[i:i + RERANK_BATCH_SIZE] for i in range(0, len(pending), RERANK_BATCH_SIZE)]
+    if not batches:
+        return results
+
+    print(f"重新排序: job_id={job['job_id']}, 快取命中 {len(results)} 位, 需呼叫模型 {len(pending)} 位 ({len(batches)} 批)")
+    with ThreadPoolExecutor(max_workers=max(1, min(RERANK_CONCURRENCY, len(batches)))) as executor:
+        futures = [executor.submit(rank_batch, job, batch) for batch in batches]
+        batch_results = []
+        for future in futures:
+            try:
+                batch_results.append(future.result())
+            except Exception as e:
+                # 單批失敗不影響其他批次，下次呼叫時會再重試
+                print(f"重新排序批次失敗: job_id={job['job_id']}, {str(e)}")
+
+    created_at = datetime.utcnow().isoformat()
+    ranked_by_key: Dict[str, Dict[str, Any]] = {}
+    with rerank_cache_table.batch_writer(overwrite_by_pkeys=['cache_key']) as batch:
+        for batch_result in batch_results:
+            for resume_id, result in batch_result.items():
+                item = {
+                    'cache_key': keys[resume_id],
+                    'job_id': job['job_id'],
+                    'resume_id': resume_id,
+                    'requirement_version': version,
+                    'llm_score': Decimal(result['llm_score']),
+                    'cot_reason': result['cot_reason'],
+                    'model_id': RERANK_MODEL_ID,
+                    'created_at': created_at
+                }
+                batch.put_item(Item=item)
+                remember(keys[resume_id], item)
+                ranked_by_key[keys[resume_id]] = result
+
+    for resume_id, key in keys.items():
+        if resume_id not in results and key in ranked_by_key:
+            results[resume_id] = {**ranked_by_key[key], 'cached': False}
+    return results
@@ -0,0 +1,206 @@
+"""
+職缺的批次評分（score backlog）
+
+新職缺開立或條件變更時，團隊履歷池中的既有履歷都要評分一次。為了讓記憶體用量固定：
+
+- 以 team-index 分頁讀取履歷，每頁 BACKLOG_CHUNK_SIZE 筆，評分完即寫出並丟棄
+- 每頁結果切成 25 筆一組，以有限的執行緒並行呼叫 BatchWriteItem，
+  未處理的項目以指數退避（含隨機抖動）重送
+- 每頁完成後把 LastEvaluatedKey 與累計數字寫入 background-task 表作為 checkpoint（background_task）；
+  Lambda 剩餘時間不足時以相同 run_id 非同步呼叫自己，從 checkpoint 接續
+
+同一職缺同時只會有一個 run_id 有效：checkpoint 以 run_id 作為條件更新，
+被新一輪取代的舊執行會在下一頁停止。
+"""
+import os
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, Callable, Dict, List, Optional
+
+import boto3
+
+import background_task
+import matcher
+from background_task import RunSuperseded, save_checkpoint
+
+dynamodb = boto3.resource('dynamodb')
+
+RESUME_TABLE_NAME = os.environ.get('RESUME_TABLE_NAME', 'benson-haire-parsed_resume')
+MATCH_RESULT_TABLE_NAME = os.environ.get('MATCH_RESULT_TABLE_NAME', 'benson-haire-match-result')
+
+BACKLOG_CHUNK_SIZE = int(os.environ.get('BACKLOG_CHUNK_SIZE', '500'))
+BACKLOG_WRITE_CONCURRENCY = int(os.environ.get('BACKLOG_WRITE_CONCURRENCY', '4'))
+# 剩餘時間低於此值時交給下一次呼叫接續
+CONTINUE_BELOW_MS = 60 * 1000
+BATCH_WRITE_SIZE = 25
+MAX_WRITE_ATTEMPTS = 8
+
+resume_table = dynamodb.Table(RESUME_TABLE_NAME)
+match_result_table = dynamodb.Table(MATCH_RESULT_TABLE_NAME)
+
+
+def task_id(job_id: str) -> str:
+    return f"score-backlog#{job_id}"
+
+
+def get_progress(job_id: str) -> Optional[Dict[str, Any]]:
+    return background_task.get_checkpoint(task_id(job_id))
+
+
+def start_run(job: Dict[str, Any], prune: bool) -> Dict[str, Any]:
+    """建立新一輪的 checkpoint（取代同職缺先前的執行）"""
+    return background_task.start_run(
+        task_id(job['job_id']), 'score_backlog',
+        job_id=job['job_id'], team_id=job.get('team_id', ''), prune=prune,
+        pages=0, scored=0, matched=0, write_retries=0
+    )
+
+
+def write_batch(requests: List[Dict[str, Any]]) -> int:
+    """
+    寫入一組（最多 25 筆）請求，未處理的項目以指數退避重送
+
+    :return: 重送次數
+    """
+    retries = 0
+    request_items = {MATCH_RESULT_TABLE_NAME: requests}
+    for attempt in range(MAX_WRITE_ATTEMPTS):
+        unprocessed = dynamodb.batch_write_item(RequestItems=request_items).get('UnprocessedItems') or {}
+        if not unprocessed.get(MATCH_RESULT_TABLE_NAME):
+            return retries
+        request_items = unprocessed
+        retries += 1
+        time.sleep(min(0.05 * (2 ** attempt), 5) * (0.5 + random.random()))
+    raise RuntimeError(f"BatchWriteItem 重試 {MAX_WRITE_ATTEMPTS} 次後仍有未處理項目")
+
+
+def parallel_batch_write(items: List[Dict[str, Any]]) -> int:
+    """把一頁結果切成多組 BatchWriteItem 並行寫入，回傳總重送次數"""
+    groups = [
+        [{'PutRequest': {'Item': item}} for item in items[start:start + BATCH_WRITE_SIZE]]
+        for start in range(0, len(items), BATCH_WRITE_SIZE)
+    ]
+    if not groups:
+        return 0
+    with ThreadPoolExecutor(max_workers=max(1, min(BACKLOG_WRITE_CONCURRENCY, len(groups)))) as executor:
+        return sum(executor.map(write_batch, groups))
+
+
+def prune_before(job_id: str, started_at: str) -> int:
+    """刪除這一輪開始前寫入、本輪未再評分到的配對結果（履歷已刪除或轉移團隊）"""
+    stale = []
+    query_kwargs = {
+        'KeyConditionExpression': 'job_id = :job_id',
+        'ExpressionAttributeValues': {':job_id': job_id},
+        'ProjectionExpression': 'resume_id, matched_at'
+    }
+    while True:
+        result_response = match_result_table.query(**query_kwargs)
+        stale.extend(item['resume_id'] for item in result_response.get('Items', [])
+                     if item.get('matched_at', '') < started_at)
+        if 'LastEvaluatedKey' not in result_response:
+            break
+        query_kwargs['ExclusiveStartKey'] = result_response['LastEvaluatedKey']
+
+    with match_result_table.batch_writer() as batch:
+        for resume_id in stale:
+            batch.delete_item(Key={'job_id': job_id, 'resume_id': resume_id})
+    return len(stale)
+
+
+def run(job: Dict[str, Any],
+        build_item: Callable[[Dict[str, Any], Dict[str, Any], str], Dict[str, Any]],
+        projection: str,
+        before_write: Optional[Callable[[Dict[str, Any], List[Dict[str, Any]]], Any]] = None,
+        on_results: Optional[Callable[[Dict[str, Any], List[Dict[str, Any]], Any], None]] = None,
+        context=None,
+        run_id: Optional[str] = None,
+        prune: bool = False) -> Dict[str, Any]:
+    """
+    執行（或接續）職缺的批次評分
+
+    :param build_item: (job, result, matched_at) -> match_result 項目
+    :param projection: 評分需要的履歷欄位
+    :param before_write: 每頁寫入前以 (job, results) 呼叫，例如讀取原本已配對的履歷
+    :param on_results: 每頁寫入後以 (job, results, before_write 的回傳值) 呼叫，例如只通知新配對
+    :param run_id: 接續既有執行時帶入；None 代表開始新的一輪
+    :return: 目前的 checkpoint；這次呼叫沒有實際執行（已被取代或已結束）時帶有 superseded
+    """
+    if run_id:
+        checkpoint = background_task.resume_run(task_id(job['job_id']), run_id)
+        if checkpoint is None:
+            print(f"批次評分已被取代或已結束，停止接續: job_id={job['job_id']}, run_id={run_id}")
+            return {**(get_progress(job['job_id']) or {}), 'superseded': True}
+    else:
+        checkpoint = start_run(job, prune)
+
+    query_kwargs = {
+        'IndexName': 'team-index',
+        'KeyConditionExpression': 'team_id = :team_id',
+        'ExpressionAttributeValues': {':team_id': job.get('team_id', '')},
+        'ProjectionExpression': projection,
+        'Limit': BACKLOG_CHUNK_SIZE
+    }
+    if checkpoint.get('cursor'):
+        query_kwargs['ExclusiveStartKey'] = checkpoint['cursor']
+
+    try:
+        while True:
+            page_started = time.perf_counter()
+            resume_response = resume_table.query(**query_kwargs)
+            resumes = resume_response.get('Items', [])
+            results = matcher.score_resumes(job, resumes) if resumes else []
+            matched_at = datetime.utcnow().isoformat()
+            before = before_write(job, results) if before_write and results else None
+            retries = parallel_batch_write([build_item(job, result, matched_at) for result in results])
+            if on_results and results:
+                on_results(job, results, before)
+
+            cursor = resume_response.get('LastEvaluatedKey')
+            save_checkpoint(
+                checkpoint,
+                cursor=cursor,
+                pages=checkpoint['pages'] + 1,
+                scored=checkpoint['scored'] + len(results),
+                matched=checkpoint['matched'] + sum(1 for result in results if result['is_matched']),
+                write_retries=checkpoint['write_retries'] + retries
+            )
+            print(f"批次評分進度: job_id={job['job_id']}, 第 {checkpoint['pages']} 頁, "
+                  f"累計 {checkpoint['scored']} 份, 本頁 {round((time.perf_counter() - page_started) * 1000)} ms")
+
+            if not cursor:
+                break
+            query_kwargs['ExclusiveStartKey'] = cursor
+            if context is not None and context.get_remaining_time_in_millis() < CONTINUE_BELOW_MS:
+                background_task.continue_later(context, {
+                    'action': 'score_backlog', 'job_id': job['job_id'], 'run_id': checkpoint['run_id']
+                })
+                print(f"剩餘時間不足，交由下一次呼叫接續: job_id={job['job_id']}")
+                return checkpoint
+
+        pruned = prune_before(job['job_id'], checkpoint['started_at']) if checkpoint.get('prune') else 0
+        save_checkpoint(checkpoint, status='completed', pruned=pruned, finished_at=datetime.utcnow().isoformat())
+        return checkpoint
+
+    except RunSuperseded:
+        print(f"批次評分已被新一輪取代: job_id={job['job_id']}, run_id={checkpoint['run_id']}")
+        return {**checkpoint, 'superseded': True}
+    except Exception as e:
+        # checkpoint 保留最後完成的頁面，重新以同一 run_id 呼叫即可接續
+        background_task.fail_run(checkpoint, e)
+        raise
+
+
+def reopen_failed_run(job_id: str) -> Optional[str]:
+    """失敗的執行改回 running，回傳可接續的 run_id"""
+    return background_task.reopen_failed_run(task_id(job_id))
+
+
+def progress_summary(checkpoint: Dict[str, Any]) -> Dict[str, Any]:
+    """對外回報用的進度（不含內部 cursor）"""
+    summary = {key: value for key, value in checkpoint.items() if key not in ('cursor', 'task_id')}
+    summary['has_more'] = bool(checkpoint.get('cursor')) and checkpoint.get('status') != 'completed'
+    return {key: int(value) if isinstance(value, Decimal) else value for key, value in summary.items()}
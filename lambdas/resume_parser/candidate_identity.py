@@ -0,0 +1,155 @@
+"""
+候選人身分辨識
+
+同一位候選人投遞多個職缺時，每次上傳都有新的 resume_id，這裡把它們歸到同一個 candidate_id：
+
+- content#{檔案雜湊}：完全相同的檔案，直接沿用已解析的 profile，不再呼叫 Bedrock
+- email#{email 雜湊}：主要訊號，email 正規化後比對
+- phone#{電話雜湊}：次要訊號，電話相同且姓名相似度達門檻才視為同一人
+
+身分索引只保存雜湊值，不保存 email 或電話原文。
+"""
+import difflib
+import hashlib
+import re
+import unicodedata
+import uuid
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from botocore.exceptions import ClientError
+
+NAME_SIMILARITY_THRESHOLD = 0.85
+_PHONE_PATTERN = re.compile(r'(?:\+?\d[\d\s\-()]{7,}\d)')
+
+
+def sha256_hex(value: str) -> str:
+    return hashlib.sha256(value.encode('utf-8')).hexdigest()
+
+
+def file_content_hash(file_bytes: bytes) -> str:
+    return hashlib.sha256(file_bytes).hexdigest()
+
+
+def normalize_email(email: Optional[str]) -> str:
+    """email 轉小寫並移除 "+tag"（user+jobs@example.com 與 user@example.com 視為相同）"""
+    email = unicodedata.normalize('NFKC', str(email or '')).strip().lower()
+    if '@' not in email:
+        return ''
+    local, _, domain = email.rpartition('@')
+    local = local.split('+', 1)[0]
+    return f"{local}@{domain}" if local and domain else ''
+
+
+def normalize_phone(phone: Optional[str]) -> str:
+    """只保留數字並統一台灣國碼（+886 912... 與 0912... 視為相同）"""
+    digits = re.sub(r'\D', '', unicodedata.normalize('NFKC', str(phone or '')))
+    if digits.startswith('886'):
+        digits = '0' + digits[3:]
+    return digits if len(digits) >= 8 else ''
+
+
+def normalize_name(name: Optional[str]) -> str:
+    """姓名去除空白與標點後轉小寫，中英文姓名順序不同時仍可比對"""
+    name = unicodedata.normalize('NFKC', str(name or '')).lower()
+    return ''.join(char for char in name if char.isalnum())
+
+
+def name_similarity(left: str, right: str) -> float:
+    if not left or not right:
+        return 0.0
+    if sorted(left) == sorted(right):
+        # "xiaoming zhang" 與 "zhang xiaoming" 去掉空白後字元相同
+        return 1.0
+    return difflib.SequenceMatcher(None, left, right).ratio()
+
+
+def extract_phone(profile: Dict[str, Any], raw_text: str = '') -> str:
+    """profile 沒有電話欄位，從 basics 或原始文字中找第一個像電話的字串"""
+    basics = profile.get('basics') or {}
+    candidates = list(basics.get('phones') or [])
+    if basics.get('phone'):
+        candidates.insert(0, basics['phone'])
+    candidates.extend(_PHONE_PATTERN.findall(raw_text or ''))
+    for candidate in candidates:
+        phone = normalize_phone(candidate)
+        if phone:
+            return phone
+    return ''
+
+
+def identity_keys(profile: Dict[str, Any], raw_text: str = '') -> Dict[str, str]:
+    """由解析後的 profile 產生身分索引鍵：{'email': ..., 'phone': ..., 'name': ...}"""
+    basics = profile.get('basics') or {}
+    emails = [normalize_email(email) for email in basics.get('emails') or []]
+    emails = [email for email in emails if email]
+    phone = extract_phone(profile, raw_text)
+    name = normalize_name(f"{basics.get('first_name') or ''}{basics.get('last_name') or ''}")
+    return {
+        'email': f"email#{sha256_hex(emails[0])}" if emails else '',
+        'phone': f"phone#{sha256_hex(phone)}" if phone else '',
+        'name': name
+    }
+
+
+def content_key(content_hash: str) -> str:
+    return f"content#{content_hash}"
+
+
+def lookup_content(table, content_hash: str) -> Optional[Dict[str, Any]]:
+    """查詢相同檔案先前的解析結果：{'candidate_id', 'resume_id', ...}"""
+    return table.get_item(Key={'identity_key': content_key(content_hash)}).get('Item')
+
+
+def resolve_candidate(table, keys: Dict[str, str]) -> Dict[str, Any]:
+    """
+    依 email → 電話 + 姓名的順序找出既有候選人，找不到時產生新的 candidate_id
+
+    :return: {'candidate_id', 'matched_by'}
+    """
+    if keys.get('email'):
+        item = table.get_item(Key={'identity_key': keys['email']}).get('Item')
+        if item:
+            return {'candidate_id': item['candidate_id'], 'matched_by': 'email'}
+
+    if keys.get('phone'):
+        item = table.get_item(Key={'identity_key': keys['phone']}).get('Item')
+        if item and name_similarity(keys.get('name', ''), item.get('name_key', '')) >= NAME_SIMILARITY_THRESHOLD:
+            return {'candidate_id': item['candidate_id'], 'matched_by': 'phone'}
+
+    return {'candidate_id': f"cand-{uuid.uuid4().hex[:12]}", 'matched_by': 'new'}
+
+
+def register_identity(table, candidate_id: str, keys: Dict[str, str], content_hash: str,
+                      resume_id: str, parsed_s3_key: str) -> None:
+    """
+    寫入身分索引
+
+    email / 電話鍵只在不存在時寫入，第一次建立的對應關係不會被覆寫；
+    檔案雜湊鍵則指向最新一次解析的履歷，供下次上傳相同檔案時沿用。
+    """
+    now = datetime.utcnow().isoformat()
+    for signal in ('email', 'phone'):
+        if not keys.get(signal):
+            continue
+        try:
+            table.put_item(
+                Item={
+                    'identity_key': keys[signal],
+                    'candidate_id': candidate_id,
+                    'name_key': keys.get('name', ''),
+                    'created_at': now
+                },
+                ConditionExpression='attribute_not_exists(identity_key)'
+            )
+        except ClientError as e:
+            if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+                raise
+
+    table.put_item(Item={
+        'identity_key': content_key(content_hash),
+        'candidate_id': candidate_id,
+        'resume_id': resume_id,
+        'parsed_s3_key': parsed_s3_key,
+        'updated_at': now
+    })
@@ -5,10 +5,18 @@ import logging
 from datetime import datetime
 import io
 import time
+import unicodedata
 
 import boto3
 from pdf2image import convert_from_bytes
 
+import candidate_identity
+import embeddings
+import search_delta
+import skill_index
+import usage_meter
+from skill_normalizer import extract_skills, normalize_skills
+
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)  # 或 DEBUG, WARNING, ERROR
 
@@ -21,8 +29,16 @@ inference_config = {"temperature": temperature, "maxTokens": maxTokens}
 system_prompt = [{"text": """請依照下列步驟處理： 1. 讀取變數 Resume Raw Json Data 中的履歷原始資料。 2. 解析並重組成以下 **完整且相同欄位結構** 的 JSON。 3. **僅**輸出 JSON，本身不得夾帶任何說明、換行之外的文字，或多餘欄位。 ## 輸出格式範例 預期輸出格式如以下（鍵名與巢狀結構不得變動，只需依照實際資料填入對應值）： "profile": { "basics": { "first_name": <string>, "last_name": <string>, "gender": <"male" | "female" | "other" | "unknown">, "emails": [<string>, ...], "urls": [<string>, ...], "date_of_birth": { "year": <integer>, "month": <integer>, "day": <integer> }, "age": <integer>, // 若生日資訊不足以計算，填 null "total_experience_in_years": <integer>, // 四捨五入到整數；無法判斷填 null "current_title": <string>, "skills": [<string>, ...] }, "educations": [{ "start_year": <integer>, "is_current": <boolean>, "end_year": <integer>, // 若 is_current 為 true 可填 null "issuing_organization":<string>, "study_type": <string>, "department": <string>, "description": <string> }], "trainings_and_certifications": [{ "year": <integer>, "issuing_organization":<string>, "description": <string> }], "professional_experiences": [{ "start_year": <integer>, "start_month": <integer>, "is_current": <boolean>, "end_year": <integer>, "end_month": <integer>, "duration_in_months": <integer>, // 若未提供可自行計算；無法判斷填 null "company": <string>, "location": <string>, "title": <string>, "description": <string> }], "awards": [{ "year": <integer>, "title": <string>, "description": <string> }] } **切記：最終輸出僅能是以上 JSON，本行與其他說明文字皆不得包含。"""}]
 
 s3 = boto3.client("s3")
+lambda_client = boto3.client("lambda")
+embedding_provider = embeddings.get_embedding_provider(bedrock_client)
 parsed_output_s3_bucket = os.environ["PARSED_BUCKET"]
 dynamodb_table_name = os.environ.get("DYNAMODB_TABLE", "benson-haire-parsed_resume")
+applicant_cache_table_name = os.environ.get("APPLICANT_CACHE_TABLE", "benson-haire-applicant-cache")
+skill_index_table_name = os.environ.get("SKILL_INDEX_TABLE", "benson-haire-skill-index")
+matcher_function_name = os.environ.get("MATCHER_FUNCTION_NAME", "")
+candidate_identity_table_name = os.environ.get("CANDIDATE_IDENTITY_TABLE", "benson-haire-candidate-identity")
+jobs_table_name = os.environ.get("JOBS_TABLE_NAME", "benson-haire-job-posting")
+stats_table_name = os.environ.get("STATS_TABLE_NAME", "benson-haire-job-stats")
 
 def clean_for_dynamodb(data):
     """清理資料以符合 DynamoDB 要求"""
@@ -156,6 +172,179 @@ def validate_and_fix_profile(profile):
         logger.error(f"清理 profile 資料失敗: {str(e)}")
         return profile  # 返回原始資料
 
+def bump_applicant_list_version(job_id: str) -> None:
+    """遞增職缺的應徵者列表版本號，讓履歷管理 API 的快取失效"""
+    try:
+        dynamodb.Table(applicant_cache_table_name).update_item(
+            Key={"job_id": job_id},
+            UpdateExpression="ADD #version :one",
+            ExpressionAttributeNames={"#version": "version"},
+            ExpressionAttributeValues={":one": 1}
+        )
+    except Exception as e:
+        # 快取失效失敗不影響履歷寫入，最差情況是列表延遲更新
+        logger.warning(f"遞增應徵者列表版本失敗: job_id={job_id}, {str(e)}")
+
+def count_application(job_id: str, change: int) -> None:
+    """
+    累加職缺的 application_count，並在同一筆交易中累加職缺統計的 total_applications
+
+    與職缺管理的 job_stats 一致：已刪除或不存在的職缺不計入統計，條件不成立時整筆略過
+    """
+    if not job_id or not change:
+        return
+    try:
+        dynamodb.meta.client.transact_write_items(TransactItems=[
+            {'Update': {
+                'TableName': jobs_table_name,
+                'Key': {'job_id': job_id},
+                'UpdateExpression': 'ADD application_count :change',
+                'ConditionExpression': 'attribute_exists(job_id) AND #status <> :deleted',
+                'ExpressionAttributeNames': {'#status': 'status'},
+                'ExpressionAttributeValues': {':change': change, ':deleted': 'deleted'}
+            }},
+            {'Update': {
+                'TableName': stats_table_name,
+                'Key': {'stat_id': 'jobs'},
+                'UpdateExpression': 'ADD total_applications :change',
+                'ExpressionAttributeValues': {':change': change}
+            }}
+        ])
+    except dynamodb.meta.client.exceptions.TransactionCanceledException as e:
+        if (e.response.get('CancellationReasons') or [{}])[0].get('Code') == 'ConditionalCheckFailed':
+            logger.info(f"職缺不存在或已刪除，不計入應徵人數: job_id={job_id}")
+        else:
+            logger.warning(f"更新應徵人數失敗: job_id={job_id}, change={change}, {str(e)}")
+    except Exception as e:
+        # 計數失敗不影響履歷寫入，可由職缺管理的 rebuild_job_stats 重算統計
+        logger.warning(f"更新應徵人數失敗: job_id={job_id}, change={change}, {str(e)}")
+
+def get_existing_resume(table, resume_id: str) -> dict:
+    """讀取覆寫前的履歷索引欄位，首次寫入時回傳空 dict"""
+    try:
+        return table.get_item(
+            Key={"resume_id": resume_id},
+            ProjectionExpression="team_id, job_id, skills_normalized"
+        ).get("Item", {})
+    except Exception as e:
+        logger.warning(f"讀取既有履歷失敗: resume_id={resume_id}, {str(e)}")
+        return {}
+
+def index_resume_skills(resume_id: str, team_id: str, job_id: str, skills: list, previous: dict) -> None:
+    """依覆寫前後的技能差異增量更新技能反向索引"""
+    try:
+        skill_index.update_postings(
+            dynamodb.Table(skill_index_table_name),
+            resume_id=resume_id,
+            team_id=team_id,
+            job_id=job_id,
+            new_skills=skills,
+            old_skills=previous.get("skills_normalized"),
+            old_team_id=previous.get("team_id"),
+            old_job_id=previous.get("job_id")
+        )
+    except Exception as e:
+        logger.error(f"更新技能索引失敗: resume_id={resume_id}, {str(e)}")
+
+def append_search_delta(resume_item: dict, deleted: bool = False) -> None:
+    """追加全文搜尋索引的 delta 檔"""
+    try:
+        search_delta.write_search_delta(s3, parsed_output_s3_bucket, resume_item, deleted=deleted)
+    except Exception as e:
+        logger.error(f"寫入搜尋索引 delta 失敗: resume_id={resume_item.get('resume_id')}, {str(e)}")
+
+def append_vector_delta(resume_item: dict, deleted: bool = False) -> None:
+    """產生履歷向量並追加語意搜尋索引的 delta 檔"""
+    try:
+        vector_bytes = None
+        if not deleted:
+            vector = embedding_provider.embed(embeddings.profile_embedding_text(resume_item))
+            vector_bytes = embeddings.pack_float16(vector)
+            if getattr(embedding_provider, 'last_input_tokens', 0):
+                usage_meter.record_usage(
+                    embedding_provider.model_id, embedding_provider.last_input_tokens, 0, 'embed',
+                    team_id=resume_item.get('team_id', ''), job_id=resume_item.get('job_id', ''),
+                    resume_ids=[resume_item.get('resume_id', '')]
+                )
+        search_delta.write_vector_delta(
+            s3, parsed_output_s3_bucket, resume_item,
+            vector_bytes=vector_bytes,
+            dimension=embedding_provider.dimension
+        )
+    except Exception as e:
+        logger.error(f"寫入向量索引 delta 失敗: resume_id={resume_item.get('resume_id')}, {str(e)}")
+
+def trigger_resume_matching(resume_id: str, team_id: str, deleted: bool = False) -> None:
+    """非同步呼叫配對 Lambda，只針對這份履歷與團隊的 active 職缺評分（或刪除其配對結果）"""
+    if not matcher_function_name:
+        return
+    try:
+        lambda_client.invoke(
+            FunctionName=matcher_function_name,
+            InvocationType="Event",
+            Payload=json.dumps({"resume_id": resume_id, "team_id": team_id, "deleted": deleted}).encode("utf-8")
+        )
+    except Exception as e:
+        # 配對失敗不影響履歷寫入，可由職缺的批次評分補上
+        logger.error(f"觸發履歷配對失敗: resume_id={resume_id}, {str(e)}")
+
+def find_reusable_parse(table, content_hash: str) -> dict:
+    """相同檔案先前解析過且該履歷仍存在時，回傳其 profile 與候選人資訊"""
+    try:
+        linked = candidate_identity.lookup_content(dynamodb.Table(candidate_identity_table_name), content_hash)
+        if not linked:
+            return None
+        source = table.get_item(
+            Key={"resume_id": linked["resume_id"]},
+            ProjectionExpression="resume_id, profile, parsed_s3_key, candidate_id"
+        ).get("Item")
+        if not source or not source.get("profile"):
+            return None
+        return {**source, "candidate_id": source.get("candidate_id") or linked["candidate_id"]}
+    except Exception as e:
+        # 查詢失敗時照常解析
+        logger.warning(f"查詢相同檔案的解析結果失敗: {str(e)}")
+        return None
+
+def link_candidate_identity(profile: dict, raw_text: str, reused: dict, content_hash: str,
+                            resume_id: str, parsed_s3_key: str) -> dict:
+    """
+    找出（或建立）履歷所屬的 candidate_id，並更新身分索引
+
+    :return: {'candidate_id', 'matched_by'}，失敗時 candidate_id 為 None
+    """
+    try:
+        identity_table = dynamodb.Table(candidate_identity_table_name)
+        keys = candidate_identity.identity_keys(profile, raw_text)
+        if reused and reused.get("candidate_id"):
+            identity = {"candidate_id": reused["candidate_id"], "matched_by": "content"}
+        else:
+            identity = candidate_identity.resolve_candidate(identity_table, keys)
+        candidate_identity.register_identity(
+            identity_table, identity["candidate_id"], keys, content_hash, resume_id, parsed_s3_key
+        )
+        return identity
+    except Exception as e:
+        logger.error(f"候選人身分辨識失敗: resume_id={resume_id}, {str(e)}")
+        return {"candidate_id": None, "matched_by": None}
+
+def remove_resume(table, resume_id: str) -> None:
+    """原始履歷被刪除時，移除解析結果及其索引"""
+    previous = get_existing_resume(table, resume_id)
+    if not previous:
+        logger.info(f"履歷不存在，無需移除: {resume_id}")
+        return
+    
+    table.delete_item(Key={"resume_id": resume_id})
+    index_resume_skills(resume_id, previous.get("team_id", ""), previous.get("job_id", ""), [], previous)
+    append_search_delta({"resume_id": resume_id, **previous}, deleted=True)
+    append_vector_delta({"resume_id": resume_id, **previous}, deleted=True)
+    if previous.get("job_id"):
+        bump_applicant_list_version(previous["job_id"])
+        count_application(previous["job_id"], -1)
+    trigger_resume_matching(resume_id, previous.get("team_id", ""), deleted=True)
+    logger.info(f"已移除履歷及其索引: resume_id={resume_id}")
+
 def extract_filename(key: str) -> str:
     """取得 key 中最後一段檔名，解碼後回傳"""
     filename = os.path.basename(key)
@@ -194,21 +383,24 @@ def extract_path_info(s3_key: str) -> dict:
     """
     從 S3 key 中提取路徑資訊
     支援格式: raw_resume/{team_id}/{job_id}/{file_name}
+    不符合上傳路徑的 key（例如同一個 bucket 中的其他檔案）回傳 None，不會被當成履歷解析
     """
     try:
         # 解碼 URL encoding
         key = urllib.parse.unquote(s3_key)
         logger.info(f"解析 S3 key: {key}")
         
-        # 移除前面的 raw_resume/ 如果存在
-        if key.startswith('raw_resume/'):
-            key = key[11:]  # 移除 'raw_resume/' 部分
+        # 只處理 resume_upload 寫入的 raw_resume/ 路徑
+        if not key.startswith('raw_resume/'):
+            logger.warning(f"S3 key 不在 raw_resume/ 之下，略過: {s3_key}")
+            return None
+        key = key[11:]  # 移除 'raw_resume/' 部分
         
         # 分割路徑
         path_parts = key.split('/')
         logger.info(f"路徑分割結果: {path_parts}")
         
-        if len(path_parts) >= 3:
+        if len(path_parts) == 3 and all(path_parts):
             team_id = path_parts[0]
             job_id = path_parts[1]
             file_name = path_parts[2]
@@ -223,7 +415,7 @@ def extract_path_info(s3_key: str) -> dict:
                 'file_name': file_name
             }
         else:
-            logger.error(f"S3 key 格式不正確，需要至少 3 個路徑段: {s3_key}")
+            logger.error(f"S3 key 格式不正確，需要 raw_resume/{{team_id}}/{{job_id}}/{{file_name}}: {s3_key}")
             return None
             
     except Exception as e:
@@ -261,6 +453,36 @@ def extract_basic_info(profile_data: dict) -> dict:
             'current_title': ''
         }
 
+def normalize_term(term) -> str:
+    """正規化技能 / 關鍵字：全半形統一、轉小寫、合併空白（與履歷管理 API 的篩選一致）"""
+    return ' '.join(unicodedata.normalize('NFKC', str(term)).lower().split())
+
+def build_filter_attributes(profile: dict) -> dict:
+    """預先計算應徵者篩選用的精簡屬性，讓列表 API 不必逐筆解析 profile"""
+    basics = profile.get('basics', {}) or {}
+    
+    # 技能欄位轉為標準名稱，再合併工作經歷描述中提到的技能
+    skills = normalize_skills(basics.get('skills', []) or [])
+    for exp in profile.get('professional_experiences', []) or []:
+        skills.extend(s for s in extract_skills(exp.get('description') or '') if s not in skills)
+    
+    experience_years = basics.get('total_experience_in_years')
+    if experience_years is None:
+        total_months = sum(int(exp.get('duration_in_months') or 0) for exp in profile.get('professional_experiences', []) or [])
+        experience_years = round(total_months / 12) if total_months > 0 else -1
+    
+    education_keywords = normalize_term(' '.join(
+        str(edu.get(field) or '')
+        for edu in profile.get('educations', []) or []
+        for field in ('issuing_organization', 'study_type', 'department')
+    ))
+    
+    return {
+        'skills_normalized': skills,
+        'experience_years': int(experience_years),
+        'education_keywords': education_keywords
+    }
+
 def convert_pdf_to_image_bytes_list(pdf_bytes, 
                                     max_pages=5,
                                     image_format='png',
@@ -291,7 +513,7 @@ def convert_pdf_to_image_bytes_list(pdf_bytes,
         logger.error(f"PDF 轉圖片失敗: {str(e)}")
         raise e
 
-def bedrock_converse_convert_images_to_text_batch(bedrock_client, model_id, images_bytes_list, batch_size=3, sleep_sec=1):
+def bedrock_converse_convert_images_to_text_batch(bedrock_client, model_id, images_bytes_list, batch_size=3, sleep_sec=1, usage_scope=None):
     """
     分批將多張圖片丟給 Claude 模型，避免一次丟太多造成 timeout。
 
@@ -300,6 +522,7 @@ def bedrock_converse_convert_images_to_text_batch(bedrock_client, model_id, imag
     :param images_bytes_list: List of image bytes（每張為一頁）
     :param batch_size: 每批最多幾張圖片（預設 3）
     :param sleep_sec: 每批間隔幾秒（預設 1 秒，避免觸發限速）
+    :param usage_scope: 用量計量的歸屬（team_id、job_id、resume_ids）
     :return: 完整的履歷文字內容｀
     """
     try:
@@ -331,6 +554,7 @@ def bedrock_converse_convert_images_to_text_batch(bedrock_client, model_id, imag
                 modelId=model_id,
                 messages=messages
             )
+            usage_meter.record_converse(response, model_id, 'ocr', **(usage_scope or {}))
             
             text = response["output"]["message"]["content"][0]["text"]
             all_text_content.append(text)
@@ -351,6 +575,72 @@ def is_pdf_file(file_content_bytes):
     """檢查檔案是否為 PDF 格式"""
     return file_content_bytes.startswith(b'%PDF')
 
+def parse_resume_file(file_content_bytes: bytes, team_id: str = '', job_id: str = '', resume_id: str = ''):
+    """
+    以 Bedrock 解析履歷檔案（PDF 先轉圖片再擷取文字）
+
+    每次模型呼叫的 tokens 都計入履歷、職缺與團隊的用量；團隊超過當日預算時改用較便宜的模型。
+
+    :return: (解析結果 dict, 原始文字)，原始文字供身分辨識找電話號碼
+    """
+    usage_scope = {'team_id': team_id, 'job_id': job_id, 'resume_ids': [resume_id]}
+    parse_model_id, _ = usage_meter.route_model(team_id, model_id)
+
+    if is_pdf_file(file_content_bytes):
+        logger.info("偵測到 PDF 檔案，進行 PDF 轉圖片處理...")
+
+        # 將 PDF 轉換為圖片
+        images_bytes_list = convert_pdf_to_image_bytes_list(
+            file_content_bytes, 
+            max_pages=10, 
+            dpi=300
+        )
+        logger.info(f"PDF 轉換完成，共 {len(images_bytes_list)} 頁")
+
+        # 使用批次處理將圖片轉換為文字
+        resume_text_content = bedrock_converse_convert_images_to_text_batch(
+            bedrock_client=bedrock_client,
+            model_id=parse_model_id,
+            images_bytes_list=images_bytes_list,
+            batch_size=2,
+            sleep_sec=1,
+            usage_scope=usage_scope
+        )
+
+        # 使用 Claude 解析履歷文字
+        raw_text = resume_text_content
+        user_message = {
+            "role": "user",
+            "content": [{"text": f"Resume Raw Json Data 為: {resume_text_content}"}]
+        }
+
+    else:
+        # 處理 JSON 格式（原來的邏輯）
+        logger.info("偵測到 JSON 檔案，進行 JSON 解析...")
+        body = file_content_bytes.decode("utf-8")
+        raw_text = body
+
+        user_message = {
+            "role": "user",
+            "content": [{"text": f"Resume Raw Json Data 為: {body}"}]
+        }
+
+    # 使用 Claude 解析履歷
+    response = bedrock_client.converse(
+        modelId=parse_model_id,
+        messages=[user_message],
+        system=system_prompt,
+        inferenceConfig=inference_config
+    )
+    usage_meter.record_converse(response, parse_model_id, 'parse', **usage_scope)
+
+    result = json.loads(response['output']['message']["content"][0]["text"])
+    logger.info(f"Claude 解析成功，解析結果大小: {len(str(result))} 字元")
+
+    logger.info(f"Claude 解析完成，解析結果{result}")
+
+    return result, raw_text
+
 def lambda_handler(event, context):
     logger.info(f"收到事件: {event}")
     
@@ -374,6 +664,14 @@ def lambda_handler(event, context):
         
         logger.info(f"提取到路徑資訊 - team_id: {team_id}, job_id: {job_id}, resume_id: {resume_id}")
 
+        # 原始履歷被刪除：移除解析結果與索引
+        if rec.get("eventName", "").startswith("ObjectRemoved"):
+            try:
+                remove_resume(table, resume_id)
+            except Exception as e:
+                logger.error(f"移除履歷失敗: {str(e)}")
+            continue
+
         # 從 S3 讀取原始履歷檔案
         try:
             file_content_bytes = s3.get_object(Bucket=bucket, Key=key)["Body"].read()
@@ -382,57 +680,17 @@ def lambda_handler(event, context):
             logger.error(f"讀取 S3 檔案失敗: {str(e)}")
             continue
 
+        # 相同檔案已解析過時沿用既有 profile，不再呼叫 Bedrock
+        content_hash = candidate_identity.file_content_hash(file_content_bytes)
+        reused = find_reusable_parse(table, content_hash)
+        
         # 判斷檔案格式並處理
         try:
-            if is_pdf_file(file_content_bytes):
-                logger.info("偵測到 PDF 檔案，進行 PDF 轉圖片處理...")
-                
-                # 將 PDF 轉換為圖片
-                images_bytes_list = convert_pdf_to_image_bytes_list(
-                    file_content_bytes, 
-                    max_pages=10, 
-                    dpi=300
-                )
-                logger.info(f"PDF 轉換完成，共 {len(images_bytes_list)} 頁")
-                
-                # 使用批次處理將圖片轉換為文字
-                resume_text_content = bedrock_converse_convert_images_to_text_batch(
-                    bedrock_client=bedrock_client,
-                    model_id=model_id,
-                    images_bytes_list=images_bytes_list,
-                    batch_size=2,
-                    sleep_sec=1
-                )
-                
-                # 使用 Claude 解析履歷文字
-                user_message = {
-                    "role": "user",
-                    "content": [{"text": f"Resume Raw Json Data 為: {resume_text_content}"}]
-                }
-                
+            if reused:
+                result, raw_text = {'profile': reused['profile']}, ''
+                logger.info(f"檔案內容與 resume_id={reused['resume_id']} 相同，沿用既有解析結果")
             else:
-                # 處理 JSON 格式（原來的邏輯）
-                logger.info("偵測到 JSON 檔案，進行 JSON 解析...")
-                body = file_content_bytes.decode("utf-8")
-                
-                user_message = {
-                    "role": "user",
-                    "content": [{"text": f"Resume Raw Json Data 為: {body}"}]
-                }
-
-            # 使用 Claude 解析履歷
-            response = bedrock_client.converse(
-                modelId=model_id,
-                messages=[user_message],
-                system=system_prompt,
-                inferenceConfig=inference_config
-            )
-            
-            result = json.loads(response['output']['message']["content"][0]["text"])
-            logger.info(f"Claude 解析成功，解析結果大小: {len(str(result))} 字元")
-            
-            logger.info(f"Claude 解析完成，解析結果{result}")
-            
+                result, raw_text = parse_resume_file(file_content_bytes, team_id, job_id, resume_id)
         except Exception as e:
             logger.error(f"檔案處理或 Claude 解析失敗: {str(e)}")
             continue
@@ -440,12 +698,22 @@ def lambda_handler(event, context):
         # 寫入解析後的履歷到 S3 parsed bucket
         try:
             output_s3_key = generate_output_key(key)
-            s3.put_object(
-                Bucket=parsed_output_s3_bucket,
-                Key=output_s3_key,
-                Body=json.dumps(result, ensure_ascii=False).encode("utf-8"),
-                ContentType="application/json; charset=utf-8"
-            )
+            if reused and reused.get('parsed_s3_key'):
+                # 沿用的 profile 來自 DynamoDB（數值為 Decimal），直接複製原本的解析檔；
+                # 同一份履歷重新上傳相同檔案時解析檔已在原位，S3 也不接受來源與目的相同的複製
+                if reused['parsed_s3_key'] != output_s3_key:
+                    s3.copy_object(
+                        Bucket=parsed_output_s3_bucket,
+                        Key=output_s3_key,
+                        CopySource={"Bucket": parsed_output_s3_bucket, "Key": reused['parsed_s3_key']}
+                    )
+            else:
+                s3.put_object(
+                    Bucket=parsed_output_s3_bucket,
+                    Key=output_s3_key,
+                    Body=json.dumps(result, ensure_ascii=False, default=str).encode("utf-8"),
+                    ContentType="application/json; charset=utf-8"
+                )
             logger.info(f"成功寫入解析結果到 S3: {output_s3_key}")
         except Exception as e:
             logger.error(f"寫入 S3 parsed bucket 失敗: {str(e)}")
@@ -483,6 +751,8 @@ def lambda_handler(event, context):
                 logger.error(f"驗證後的 profile 為空，跳過寫入: {cleaned_profile}")
                 continue
             
+            identity = link_candidate_identity(validated_profile, raw_text, reused, content_hash, resume_id, output_s3_key)
+            
             dynamodb_item = {
                 # 主鍵和基本識別資訊
                 'resume_id': resume_id,
@@ -492,6 +762,11 @@ def lambda_handler(event, context):
                 'parsed_s3_key': output_s3_key,
                 'has_applied': True,
                 
+                # 候選人身分（跨職缺投遞共用，candidate-index 的鍵不可為 null）與原始檔案雜湊
+                **({'candidate_id': identity['candidate_id'], 'identity_matched_by': identity['matched_by']}
+                   if identity['candidate_id'] else {}),
+                'content_hash': content_hash,
+                
                 # 候選人基本資訊（從解析資料中提取，用於快速查詢）
                 'candidate_name': basic_info['candidate_name'],
                 'candidate_email': basic_info['candidate_email'],
@@ -500,15 +775,34 @@ def lambda_handler(event, context):
                 # 完整的 profile 結構（包含所有 dataflow.md 定義的欄位）
                 'profile': validated_profile,
                 
+                # 篩選用的精簡屬性（技能、年資、學歷關鍵字）
+                **build_filter_attributes(validated_profile),
+                
                 # 時間戳記
                 'processed_at': datetime.utcnow().isoformat(),
                 'created_at': datetime.utcnow().isoformat(),
                 'updated_at': datetime.utcnow().isoformat()
             }
             
+            # 覆寫前的索引欄位，用於增量更新技能索引
+            previous = get_existing_resume(table, resume_id)
+            
             # 寫入 DynamoDB
             table.put_item(Item=dynamodb_item)
             logger.info(f"成功寫入 DynamoDB: resume_id={resume_id}, team_id={team_id}, job_id={job_id}")
+            bump_applicant_list_version(job_id)
+            if previous.get('job_id') != job_id:
+                # 新履歷或改投其他職缺才改變應徵人數，重新上傳同一份履歷不重複計算
+                count_application(job_id, 1)
+            if previous.get('job_id') and previous['job_id'] != job_id:
+                bump_applicant_list_version(previous['job_id'])
+                count_application(previous['job_id'], -1)
+            index_resume_skills(resume_id, team_id, job_id, dynamodb_item['skills_normalized'], previous)
+            append_search_delta(dynamodb_item)
+            append_vector_delta(dynamodb_item)
+            trigger_resume_matching(resume_id, team_id)
+            if previous.get('team_id') and previous['team_id'] != team_id:
+                trigger_resume_matching(resume_id, previous['team_id'], deleted=True)
             logger.info(f"候選人資訊: {basic_info['candidate_name']}, 信箱: {basic_info['candidate_email']}")
             logger.info(f"Profile 結構包含: basics, educations({len(validated_profile.get('educations', []))})項, trainings_and_certifications({len(validated_profile.get('trainings_and_certifications', []))})項, professional_experiences({len(validated_profile.get('professional_experiences', []))})項, awards({len(validated_profile.get('awards', []))})項")
             
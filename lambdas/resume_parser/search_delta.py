@@ -0,0 +1,74 @@
+"""
+搜尋索引的增量檔（寫入端）
+
+每寫入或刪除一份履歷，就在 parsed resume bucket 追加小型 delta 檔：
+- search-index/bm25/deltas/：全文搜尋（BM25）
+- search-index/vectors/deltas/：語意搜尋（履歷向量，float16）
+
+履歷管理 Lambda 查詢時會把 delta 疊加到快照上，並定期合併成新快照。
+key 以 UTC 時間戳開頭，字典序即寫入順序。
+"""
+import base64
+import json
+import logging
+from datetime import datetime
+from typing import Optional
+
+logger = logging.getLogger()
+
+SEARCH_DELTA_PREFIX = 'search-index/bm25/deltas/'
+VECTOR_DELTA_PREFIX = 'search-index/vectors/deltas/'
+
+
+def delta_key(resume_id: str, prefix: str = SEARCH_DELTA_PREFIX) -> str:
+    timestamp = datetime.utcnow().strftime('%Y%m%dT%H%M%S%f')
+    return f"{prefix}{timestamp}-{resume_id}.json"
+
+
+def write_search_delta(s3_client, bucket: str, resume_item: dict, deleted: bool = False) -> None:
+    """寫入一筆 delta；只保留建立全文索引需要的欄位"""
+    resume_id = resume_item['resume_id']
+    delta = {
+        'resume_id': resume_id,
+        'team_id': resume_item.get('team_id', ''),
+        'job_id': resume_item.get('job_id', ''),
+        'deleted': deleted,
+        'written_at': datetime.utcnow().isoformat()
+    }
+    if not deleted:
+        delta['document'] = {
+            'current_title': resume_item.get('current_title', ''),
+            'profile': resume_item.get('profile', {})
+        }
+
+    s3_client.put_object(
+        Bucket=bucket,
+        Key=delta_key(resume_id),
+        Body=json.dumps(delta, ensure_ascii=False, default=str).encode('utf-8'),
+        ContentType='application/json; charset=utf-8'
+    )
+    logger.info(f"已寫入搜尋索引 delta: resume_id={resume_id}, deleted={deleted}")
+
+
+def write_vector_delta(s3_client, bucket: str, resume_item: dict,
+                       vector_bytes: Optional[bytes] = None, dimension: int = 0) -> None:
+    """寫入一筆履歷向量 delta；vector_bytes 為 None 代表履歷已刪除"""
+    resume_id = resume_item['resume_id']
+    delta = {
+        'resume_id': resume_id,
+        'team_id': resume_item.get('team_id', ''),
+        'job_id': resume_item.get('job_id', ''),
+        'deleted': vector_bytes is None,
+        'written_at': datetime.utcnow().isoformat()
+    }
+    if vector_bytes is not None:
+        delta['dimension'] = dimension
+        delta['vector_f16'] = base64.b64encode(vector_bytes).decode('ascii')
+
+    s3_client.put_object(
+        Bucket=bucket,
+        Key=delta_key(resume_id, VECTOR_DELTA_PREFIX),
+        Body=json.dumps(delta).encode('utf-8'),
+        ContentType='application/json'
+    )
+    logger.info(f"已寫入向量索引 delta: resume_id={resume_id}, deleted={vector_bytes is None}")
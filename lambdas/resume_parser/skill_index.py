@@ -0,0 +1,68 @@
+"""
+技能反向索引（寫入端）
+
+索引表以 skill_key 為 partition key、resume_id 為 sort key：
+- "{team_id}#{skill}"：團隊內查詢
+- "*#{skill}"：跨團隊查詢
+
+每次寫入或刪除履歷時只針對新增 / 移除的技能更新 posting，不重建整個索引。
+"""
+import logging
+from datetime import datetime
+from typing import Iterable, Optional
+
+logger = logging.getLogger()
+
+# 跨團隊查詢使用的 partition 前綴
+ALL_TEAMS = '*'
+
+
+def posting_keys(team_id: str, skill: str):
+    """一個技能在索引中對應的 partition key（團隊內與跨團隊各一）"""
+    return [f"{team_id}#{skill}", f"{ALL_TEAMS}#{skill}"]
+
+
+def update_postings(index_table,
+                    resume_id: str,
+                    team_id: str,
+                    job_id: str,
+                    new_skills: Iterable[str],
+                    old_skills: Optional[Iterable[str]] = None,
+                    old_team_id: Optional[str] = None,
+                    old_job_id: Optional[str] = None) -> None:
+    """
+    依新舊技能差異更新 posting
+
+    :param new_skills: 已正規化的技能（空值代表履歷被刪除）
+    :param old_skills: 覆寫前的技能，首次寫入時為 None
+    :param old_team_id: 覆寫前的團隊，若團隊改變則舊 posting 全部移除，
+                        保留的跨團隊 posting 也會重寫 team_id
+    :param old_job_id: 覆寫前的職缺，若職缺改變則重寫所有 posting 的 job_id
+    """
+    new_keys = {key for skill in set(new_skills or []) for key in posting_keys(team_id, skill)}
+    old_keys = set()
+    if old_skills:
+        previous_team = old_team_id or team_id
+        old_keys = {key for skill in set(old_skills) for key in posting_keys(previous_team, skill)}
+
+    # posting 上的 team_id / job_id 改變時，沒有新增或移除的 key 也必須重寫
+    moved = (old_team_id and old_team_id != team_id) or (old_job_id and old_job_id != job_id)
+    to_add = new_keys if moved else new_keys - old_keys
+    to_remove = old_keys - new_keys
+    if not to_add and not to_remove:
+        return
+
+    timestamp = datetime.utcnow().isoformat()
+    with index_table.batch_writer(overwrite_by_pkeys=['skill_key', 'resume_id']) as batch:
+        for skill_key in to_add:
+            batch.put_item(Item={
+                'skill_key': skill_key,
+                'resume_id': resume_id,
+                'team_id': team_id,
+                'job_id': job_id,
+                'indexed_at': timestamp
+            })
+        for skill_key in to_remove:
+            batch.delete_item(Key={'skill_key': skill_key, 'resume_id': resume_id})
+
+    logger.info(f"技能索引更新完成: resume_id={resume_id}, 新增 {len(to_add)} 筆, 移除 {len(to_remove)} 筆")
@@ -0,0 +1,272 @@
+"""
+DynamoDB Streams 驅動的資料表備份
+
+職缺表與團隊表開啟 Stream（NEW_IMAGE），由這個 Lambda 接收變更後寫入 S3，
+API 的寫入路徑不再同步呼叫 put_object：
+
+- 每批變更依資料表與時間窗（BACKUP_WINDOW_SECONDS）分組，同一時間窗內同一筆資料只保留最後一次變更（壓縮）
+- 每組寫成一個 gzip 壓縮的 NDJSON 分段：
+  {BACKUP_PREFIX}/{table}/{YYYY}/{MM}/{DD}/{時間窗開始}-{第一個序號}-{最後一個序號}.ndjson.gz
+  檔名由內容決定，Stream 重送同一批時會覆寫同一個檔案，不會重複
+- 每一行保留 DynamoDB 的型別格式（{"S": ...}、{"N": ...}），還原時不會失去型別（例如 Decimal、集合）
+- Stream 只含開啟之後的變更，因此以 seed 動作掃描整張表，寫一份基準（seed）分段：
+  {BACKUP_PREFIX}/seeds/{table}/{掃描開始時間}.ndjson.gz。開啟 Stream 後至少執行一次（之後可定期執行縮短重播範圍），
+  早於第一份 seed 的時間點無法還原
+- restore 動作從時間點之前最新的 seed 開始，依序重播之後的分段，得到任一時間點的資料：
+  寫入指定的資料表，或輸出成 S3 上的 NDJSON 快照。同一時間窗內的變更已被壓縮，還原的精度為一個時間窗
+
+本機測試可用 local_stream.LocalStream 產生與 Stream 相同格式的事件。
+"""
+import gzip
+import json
+import os
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import boto3
+from boto3.dynamodb.types import TypeDeserializer, TypeSerializer
+
+import table_scan
+
+dynamodb = boto3.resource('dynamodb')
+s3 = boto3.client('s3')
+
+BACKUP_BUCKET = os.environ.get('BACKUP_BUCKET', '')
+BACKUP_PREFIX = os.environ.get('BACKUP_PREFIX', 'backups/stream')
+BACKUP_WINDOW_SECONDS = int(os.environ.get('BACKUP_WINDOW_SECONDS', '300'))
+SEED_SCAN_SEGMENTS = int(os.environ.get('SEED_SCAN_SEGMENTS', '4'))
+SEGMENT_TIME_FORMAT = '%Y%m%dT%H%M%SZ'
+
+_deserializer = TypeDeserializer()
+_serializer = TypeSerializer()
+
+
+def table_name_from_arn(arn: str) -> str:
+    """arn:aws:dynamodb:region:account:table/{name}/stream/{label} -> name"""
+    return arn.split(':table/', 1)[1].split('/', 1)[0]
+
+
+def window_start(timestamp: float) -> datetime:
+    return datetime.fromtimestamp(timestamp - timestamp % BACKUP_WINDOW_SECONDS, tz=timezone.utc)
+
+
+def parse_record(record: Dict[str, Any]) -> Dict[str, Any]:
+    """Stream 記錄 -> 備份的一行"""
+    change = record['dynamodb']
+    timestamp = float(change.get('ApproximateCreationDateTime') or datetime.now(timezone.utc).timestamp())
+    line = {
+        'table': table_name_from_arn(record['eventSourceARN']),
+        'op': 'delete' if record['eventName'] == 'REMOVE' else 'put',
+        'keys': change['Keys'],
+        'seq': change['SequenceNumber'],
+        'ts': timestamp
+    }
+    if line['op'] == 'put':
+        line['image'] = change['NewImage']
+    return line
+
+
+def key_id(keys: Dict[str, Any]) -> str:
+    return json.dumps(keys, sort_keys=True, separators=(',', ':'))
+
+
+def order(line: Dict[str, Any]) -> Tuple[float, int]:
+    return line['ts'], int(line['seq'])
+
+
+def compact(lines: List[Dict[str, Any]]) -> Dict[Tuple[str, datetime], List[Dict[str, Any]]]:
+    """依 (資料表, 時間窗) 分組，每組每筆資料只保留最後一次變更"""
+    groups: Dict[Tuple[str, datetime], Dict[str, Dict[str, Any]]] = {}
+    for line in lines:
+        latest = groups.setdefault((line['table'], window_start(line['ts'])), {})
+        current = latest.get(key_id(line['keys']))
+        if current is None or order(line) > order(current):
+            latest[key_id(line['keys'])] = line
+    return {group: sorted(latest.values(), key=order) for group, latest in groups.items()}
+
+
+def table_prefix(table: str) -> str:
+    return f'{BACKUP_PREFIX}/{table}/'
+
+
+def segment_key(table: str, window: datetime, lines: List[Dict[str, Any]]) -> str:
+    sequences = sorted(int(line['seq']) for line in lines)
+    return (f"{table_prefix(table)}{window.strftime('%Y/%m/%d')}/"
+            f"{window.strftime(SEGMENT_TIME_FORMAT)}-{sequences[0]}-{sequences[-1]}.ndjson.gz")
+
+
+def seed_prefix(table: str) -> str:
+    return f'{BACKUP_PREFIX}/seeds/{table}/'
+
+
+def write_segment(key: str, lines: List[Dict[str, Any]]) -> None:
+    body = '\n'.join(json.dumps({k: v for k, v in line.items() if k != 'table'}, ensure_ascii=False,
+                                separators=(',', ':')) for line in lines)
+    s3.put_object(
+        Bucket=BACKUP_BUCKET,
+        Key=key,
+        Body=gzip.compress(body.encode('utf-8')),
+        ContentType='application/x-ndjson',
+        ContentEncoding='gzip'
+    )
+
+
+def backup_records(records: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """把一批 Stream 記錄寫成分段；失敗時拋出例外，讓 Stream 重送整批"""
+    lines = [parse_record(record) for record in records if record.get('eventSource') == 'aws:dynamodb']
+    segments = compact(lines)
+    for (table, window), group in segments.items():
+        write_segment(segment_key(table, window, group), group)
+    summary = {
+        'records': len(records),
+        'segments': len(segments),
+        'lines': sum(len(group) for group in segments.values())
+    }
+    print(f"備份完成: {summary}")
+    return summary
+
+
+def seed(table: str) -> Dict[str, Any]:
+    """
+    掃描整張表寫成基準分段
+
+    每一行的 ts 為掃描開始時間、seq 為 0：掃描期間的變更在 Stream 分段中的 ts 不會早於掃描開始，
+    重播時一定會蓋過 seed 讀到的舊值，因此掃描不需要一致的快照。
+    """
+    started = datetime.now(timezone.utc).replace(microsecond=0)
+    source = dynamodb.Table(table)
+    key_fields = [key['AttributeName'] for key in source.key_schema]
+    lines = []
+    for item in table_scan.TableScan(source, segments=SEED_SCAN_SEGMENTS):
+        image = {field: _serializer.serialize(value) for field, value in item.items()}
+        lines.append({
+            'op': 'put',
+            'keys': {field: image[field] for field in key_fields},
+            'seq': '0',
+            'ts': started.timestamp(),
+            'image': image
+        })
+    key = f"{seed_prefix(table)}{started.strftime(SEGMENT_TIME_FORMAT)}.ndjson.gz"
+    write_segment(key, lines)
+    summary = {'table': table, 'seed_key': key, 'items': len(lines)}
+    print(f"基準分段完成: {summary}")
+    return summary
+
+
+def parse_time(value: Optional[str]) -> datetime:
+    """ISO 8601 時間（未帶時區視為 UTC）；None 代表現在"""
+    if not value:
+        return datetime.now(timezone.utc)
+    parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def segment_time(key: str) -> datetime:
+    """分段檔名開頭的時間（Stream 分段為時間窗開始，seed 為掃描開始）"""
+    name = key.rsplit('/', 1)[-1]
+    return datetime.strptime(name.split('-', 1)[0].split('.', 1)[0], SEGMENT_TIME_FORMAT).replace(tzinfo=timezone.utc)
+
+
+def list_segments(prefix: str, until: datetime, since: Optional[datetime] = None) -> List[str]:
+    """prefix 下時間不晚於 until 的分段，依時間排序；since 排除整個時間窗都早於 since 的 Stream 分段"""
+    keys = []
+    paginator = s3.get_paginator('list_objects_v2')
+    for page in paginator.paginate(Bucket=BACKUP_BUCKET, Prefix=prefix):
+        for obj in page.get('Contents', []):
+            if not obj['Key'].endswith('.ndjson.gz'):
+                continue
+            started = segment_time(obj['Key'])
+            if started > until:
+                continue
+            if since and started.timestamp() + BACKUP_WINDOW_SECONDS <= since.timestamp():
+                continue
+            keys.append(obj['Key'])
+    return sorted(keys, key=lambda key: key.rsplit('/', 1)[-1])
+
+
+def read_segment(key: str) -> Iterator[Dict[str, Any]]:
+    body = gzip.decompress(s3.get_object(Bucket=BACKUP_BUCKET, Key=key)['Body'].read())
+    for raw in body.decode('utf-8').splitlines():
+        if raw:
+            yield json.loads(raw)
+
+
+def state_at(table: str, at: datetime) -> Tuple[Dict[str, Dict[str, Any]], Optional[str]]:
+    """
+    從 at 之前最新的 seed 開始重播分段，回傳 ({主鍵: 最後一次變更}（包含刪除）, 使用的 seed)
+
+    seed 之前的 Stream 變更已反映在 seed 中，直接略過（否則 seed 前已刪除的資料會被舊的 put 復原）。
+    """
+    cutoff = at.timestamp()
+    seeds = list_segments(seed_prefix(table), at)
+    seed_key = seeds[-1] if seeds else None
+    since = segment_time(seed_key) if seed_key else None
+    state: Dict[str, Dict[str, Any]] = {}
+    if seed_key:
+        for line in read_segment(seed_key):
+            state[key_id(line['keys'])] = line
+    for key in list_segments(table_prefix(table), at, since):
+        for line in read_segment(key):
+            if line['ts'] > cutoff or (since and line['ts'] < since.timestamp()):
+                continue
+            current = state.get(key_id(line['keys']))
+            if current is None or order(line) > order(current):
+                state[key_id(line['keys'])] = line
+    return state, seed_key
+
+
+def deserialize(image: Dict[str, Any]) -> Dict[str, Any]:
+    return {field: _deserializer.deserialize(value) for field, value in image.items()}
+
+
+def restore(table: str, at: Optional[str] = None, target_table: Optional[str] = None) -> Dict[str, Any]:
+    """
+    還原資料表在某個時間點的內容
+
+    :param table: 來源資料表名稱（備份路徑）
+    :param at: ISO 8601 時間，預設為現在
+    :param target_table: 寫入的資料表（必須已存在）；未指定時輸出成 S3 上的 NDJSON 快照
+    """
+    point = parse_time(at)
+    state, seed_key = state_at(table, point)
+    items = [line['image'] for line in state.values() if line['op'] == 'put']
+    summary = {'table': table, 'at': point.isoformat(), 'items': len(items), 'seed_key': seed_key}
+    if not seed_key:
+        print(f"警告: {table} 在 {point.isoformat()} 之前沒有 seed，只能還原 Stream 開啟後變更過的資料")
+
+    if target_table:
+        with dynamodb.Table(target_table).batch_writer() as batch:
+            for item in items:
+                batch.put_item(Item=deserialize(item))
+        summary['target_table'] = target_table
+    else:
+        snapshot_key = f"{BACKUP_PREFIX}/restores/{table}/{point.strftime(SEGMENT_TIME_FORMAT)}.ndjson.gz"
+        body = '\n'.join(json.dumps(item, ensure_ascii=False, separators=(',', ':')) for item in items)
+        s3.put_object(Bucket=BACKUP_BUCKET, Key=snapshot_key, Body=gzip.compress(body.encode('utf-8')),
+                      ContentType='application/x-ndjson', ContentEncoding='gzip')
+        summary['snapshot_key'] = snapshot_key
+
+    print(f"還原完成: {summary}")
+    return summary
+
+
+def lambda_handler(event, context):
+    """DynamoDB Stream 事件寫入備份；{'action': 'seed' / 'restore', ...} 為手動觸發的基準分段與還原"""
+    if 'Records' in event:
+        return backup_records(event['Records'])
+
+    action = event.get('action')
+    print(f"執行維護工作: {action}")
+    if action == 'seed':
+        if not event.get('table'):
+            return {'statusCode': 400, 'body': json.dumps({'error': '缺少 table'}, ensure_ascii=False)}
+        return {'statusCode': 200, 'body': json.dumps(seed(event['table']), ensure_ascii=False)}
+    if action == 'restore':
+        if not event.get('table'):
+            return {'statusCode': 400, 'body': json.dumps({'error': '缺少 table'}, ensure_ascii=False)}
+        try:
+            result = restore(event['table'], event.get('at'), event.get('target_table'))
+        except ValueError as e:
+            return {'statusCode': 400, 'body': json.dumps({'error': f'時間格式錯誤: {str(e)}'}, ensure_ascii=False)}
+        return {'statusCode': 200, 'body': json.dumps(result, ensure_ascii=False)}
+    return {'statusCode': 400, 'body': json.dumps({'error': f'未知的維護工作: {action}'}, ensure_ascii=False)}
@@ -0,0 +1,66 @@
+"""
+DynamoDB Stream 的本機替代品
+
+本機或測試環境沒有 Stream 時，把寫入動作記錄成與 Stream 相同格式的事件，
+再交給 lambda_function.lambda_handler 處理：
+
+    stream = LocalStream('haire-jobs', key_fields=['job_id'])
+    stream.put(job)
+    stream.remove({'job_id': job_id})
+    lambda_function.lambda_handler(stream.drain(), None)
+"""
+import time
+from typing import Any, Dict, List, Optional, Sequence
+
+from boto3.dynamodb.types import TypeSerializer
+
+_serializer = TypeSerializer()
+
+
+class LocalStream:
+    """依寫入順序產生 INSERT / MODIFY / REMOVE 記錄（view type 相當於 NEW_IMAGE）"""
+
+    def __init__(self, table_name: str, key_fields: Sequence[str], region: str = 'ap-southeast-1'):
+        self.table_name = table_name
+        self.key_fields = list(key_fields)
+        self.arn = f"arn:aws:dynamodb:{region}:000000000000:table/{table_name}/stream/local"
+        self.records: List[Dict[str, Any]] = []
+        self._sequence = 100000000000000000000
+        self._existing = set()
+
+    def _serialize(self, item: Dict[str, Any]) -> Dict[str, Any]:
+        return {field: _serializer.serialize(value) for field, value in item.items()}
+
+    def _record(self, event_name: str, keys: Dict[str, Any], image: Optional[Dict[str, Any]],
+                timestamp: Optional[float]) -> None:
+        self._sequence += 1
+        change = {
+            'ApproximateCreationDateTime': timestamp if timestamp is not None else time.time(),
+            'Keys': self._serialize(keys),
+            'SequenceNumber': str(self._sequence),
+            'StreamViewType': 'NEW_IMAGE'
+        }
+        if image is not None:
+            change['NewImage'] = self._serialize(image)
+        self.records.append({
+            'eventName': event_name,
+            'eventSource': 'aws:dynamodb',
+            'eventSourceARN': self.arn,
+            'dynamodb': change
+        })
+
+    def put(self, item: Dict[str, Any], timestamp: Optional[float] = None) -> None:
+        keys = {field: item[field] for field in self.key_fields}
+        key = tuple(str(keys[field]) for field in self.key_fields)
+        self._record('MODIFY' if key in self._existing else 'INSERT', keys, item, timestamp)
+        self._existing.add(key)
+
+    def remove(self, keys: Dict[str, Any], timestamp: Optional[float] = None) -> None:
+        self._record('REMOVE', keys, None, timestamp)
+        self._existing.discard(tuple(str(keys[field]) for field in self.key_fields))
+
+    def drain(self) -> Dict[str, Any]:
+        """取出目前累積的記錄，格式與 Lambda 收到的 Stream 事件相同"""
+        event = {'Records': self.records}
+        self.records = []
+        return event
@@ -6,23 +6,34 @@ import base64
 import cgi
 import io
 import urllib.parse
-from datetime import datetime
+from datetime import datetime, timedelta
+from decimal import Decimal, InvalidOperation
 from typing import Dict, Any, Optional, List
 
 import boto3
+from boto3.dynamodb.conditions import Key
 from botocore.exceptions import ClientError
 
+import http_cache
+import table_scan
+import usage_meter
+
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
 # AWS 服務初始化
 dynamodb = boto3.resource('dynamodb', region_name='ap-southeast-1')
 s3 = boto3.client('s3', region_name='ap-southeast-1')
+lambda_client = boto3.client('lambda', region_name='ap-southeast-1')
 
 # 環境變數
 TEAMS_TABLE_NAME = os.environ.get('TEAMS_TABLE_NAME', 'benson-haire-teams')
 BACKUP_S3_BUCKET = os.environ.get('BACKUP_S3_BUCKET', '')
 TEAM_INFO_BUCKET = os.environ.get('TEAM_INFO_BUCKET', 'benson-haire-team-info-e36d5aee')
+JOB_MANAGEMENT_FUNCTION_NAME = os.environ.get('JOB_MANAGEMENT_FUNCTION_NAME', '')
+
+# 會被複製到職缺上的團隊欄位；變更時要同步到該團隊的職缺
+JOB_DENORMALIZED_FIELDS = ['company', 'company_code', 'department', 'dept_code', 'team_name', 'team_code']
 
 # DynamoDB Table
 teams_table = dynamodb.Table(TEAMS_TABLE_NAME)
@@ -31,6 +42,13 @@ teams_table = dynamodb.Table(TEAMS_TABLE_NAME)
 S3_FOLDER_PREFIX = 'team_info_docs'
 
 # 統一的 CORS headers
+# 各路由的 Cache-Control（GET 回應一律帶 ETag，未列出的路由使用 http_cache 的預設值）
+# 用量統計是累加值，延遲一分鐘不影響判斷
+CACHE_CONTROL_RULES = [
+    (r'/admin/usage', 'private, max-age=60'),
+    (r'/teams(/.*)?', 'private, no-cache')
+]
+
 CORS_HEADERS = {
     'Access-Control-Allow-Origin': '*',
     'Access-Control-Allow-Methods': 'GET, POST, PUT, DELETE, OPTIONS',
@@ -40,7 +58,11 @@ CORS_HEADERS = {
 }
 
 def lambda_handler(event, context):
-    """主要 Lambda 處理函式"""
+    """Lambda 主函數：處理請求後為 GET 回應加上 ETag / Cache-Control（If-None-Match 符合時回傳 304）"""
+    return http_cache.conditional(event, route_request(event, context), CACHE_CONTROL_RULES)
+
+def route_request(event, context):
+    """主要請求處理函式：依方法與路徑分派請求"""
     logger.info(f"?????? Lambda 函數被調用! Event: {json.dumps(event, default=str)}")
     
     try:
@@ -86,6 +108,12 @@ def lambda_handler(event, context):
         elif method == 'POST' and path == '/teams':
             logger.info("?? 路由到：創建新團隊")
             return create_team(event, CORS_HEADERS)
+        elif method == 'GET' and path == '/admin/usage':
+            logger.info("?? 路由到：Bedrock 用量查詢")
+            return get_usage(event, CORS_HEADERS)
+        elif method == 'PUT' and path == '/admin/usage':
+            logger.info("?? 路由到：設定團隊每日預算")
+            return set_team_budget(event, CORS_HEADERS)
         elif method == 'GET' and '/teams/' in path and path_parameters.get('team_id'):
             team_id = path_parameters.get('team_id')
             query_params = event.get('queryStringParameters') or {}
@@ -144,6 +172,10 @@ def lambda_handler(event, context):
                             'PUT /teams/{team_id}': '更新團隊',
                             'DELETE /teams/{team_id}': '刪除團隊'
                         },
+                        'admin': {
+                            'GET /admin/usage': 'Bedrock 用量（scope=team|job|resume|all, id, from, to）',
+                            'PUT /admin/usage': '設定團隊每日預算'
+                        },
                         'files': {
                             'POST /teams/{team_id}/files': '上傳檔案',
                             'GET /team-files/{team_id}': '列出團隊檔案',
@@ -190,8 +222,7 @@ def list_teams(event, headers):
     """列出所有團隊"""
     try:
         logger.info("?? 開始列出所有團隊")
-        response = teams_table.scan()
-        teams = response.get('Items', [])
+        teams = table_scan.TableScan(teams_table).all()
         
         logger.info(f"? 成功取得 {len(teams)} 個團隊")
         return {
@@ -219,7 +250,7 @@ def list_teams(event, headers):
         }
 
 def get_team(event, headers):
-    """取得特定團隊資訊 - 同時從 DynamoDB 和 S3 讀取"""
+    """取得特定團隊資訊 - 基本資料以 DynamoDB 為準，並列出 S3 上的團隊檔案"""
     try:
         path_parameters = event.get('pathParameters') or {}
         team_id = path_parameters.get('team_id')
@@ -253,32 +284,6 @@ def get_team(event, headers):
         
         team_data = response['Item']
         
-        # 嘗試從 S3 讀取額外的團隊資訊檔案
-        try:
-            s3_key = f'{S3_FOLDER_PREFIX}/{team_id}/team_info.json'
-            logger.info(f"?? 嘗試讀取 S3 團隊資訊: {s3_key}")
-            
-            s3_response = s3.get_object(
-                Bucket=TEAM_INFO_BUCKET,
-                Key=s3_key
-            )
-            
-            s3_data = json.loads(s3_response['Body'].read().decode('utf-8'))
-            logger.info(f"? 成功從 S3 讀取團隊資訊")
-            
-            # 合併 S3 資料（S3 資料優先，但保留 DynamoDB 的更新時間）
-            for key, value in s3_data.items():
-                if key not in ['updated_at']:  # 保留 DynamoDB 的更新時間
-                    team_data[key] = value
-                    
-        except ClientError as e:
-            if e.response['Error']['Code'] == 'NoSuchKey':
-                logger.info(f"?? S3 中沒有額外的團隊資訊檔案: {s3_key}")
-            else:
-                logger.warning(f"?? 讀取 S3 團隊資訊時發生錯誤: {str(e)}")
-        except Exception as e:
-            logger.warning(f"?? 處理 S3 團隊資訊時發生錯誤: {str(e)}")
-        
         # 取得團隊檔案列表
         try:
             s3_prefix = f'{S3_FOLDER_PREFIX}/{team_id}/'
@@ -490,9 +495,6 @@ def create_team_json(team_data, headers):
         teams_table.put_item(Item=team_item)
         logger.info(f"? 團隊已儲存到 DynamoDB: {team_id}")
         
-        # 備份到 S3
-        backup_team_to_s3(team_item)
-        
         # 創建團隊檔案資料夾
         create_team_folder(team_id)
         
@@ -881,23 +883,22 @@ def update_team_text_only(event, headers, team_id):
             expression_attribute_names['#updated_at'] = 'updated_at'
             expression_attribute_values[':updated_at'] = datetime.now().isoformat()
             
-            # 執行更新
-            teams_table.update_item(
+            # 執行更新（取回更新前的值，判斷職缺上的欄位是否需要同步）
+            update_response = teams_table.update_item(
                 Key={'team_id': team_id},
                 UpdateExpression='SET ' + ', '.join(update_expression_parts),
                 ExpressionAttributeNames=expression_attribute_names,
-                ExpressionAttributeValues=expression_attribute_values
+                ExpressionAttributeValues=expression_attribute_values,
+                ReturnValues='ALL_OLD'
             )
             
             logger.info(f"? 團隊文字資料更新成功: {team_id}")
             
-            # 備份到 S3
-            backup_data = {
-                'team_id': team_id,
-                **update_data,
-                'updated_at': datetime.now().isoformat()
-            }
-            backup_team_to_s3(backup_data)
+            previous = update_response.get('Attributes', {})
+            changed_fields = [field for field in JOB_DENORMALIZED_FIELDS
+                              if field in update_data and update_data[field] != previous.get(field, '')]
+            if changed_fields:
+                publish_team_change(team_id, changed_fields)
         
         return {
             'statusCode': 200,
@@ -1794,24 +1795,124 @@ def handle_file_delete(event, headers):
             })
         }
 
-def backup_team_to_s3(team_data):
-    """備份團隊資料到 S3"""
+def usage_numbers(item):
+    """用量項目轉成可輸出的數字"""
+    item = item or {}
+    numbers = {
+        'input_tokens': int(item.get('input_tokens', 0)),
+        'output_tokens': int(item.get('output_tokens', 0)),
+        'calls': int(item.get('calls', 0)),
+        'cost_usd': float(item.get('cost_usd', 0))
+    }
+    numbers.update({key: int(value) for key, value in item.items() if key.startswith('calls_')})
+    return numbers
+
+def get_usage(event, headers):
+    """
+    Bedrock 用量查詢（管理用）
+
+    GET /admin/usage?scope=team&id={team_id}&from=2024-01-01&to=2024-01-31
+    scope 為 team / job / resume / all；履歷只有累計值，全站只有每日值。
+    團隊另外回傳當日預算狀態與延後中的工作。
+    """
     try:
-        team_id = team_data['team_id']
-        s3_key = f'{S3_FOLDER_PREFIX}/{team_id}/team_info.json'
-        
-        s3.put_object(
-            Bucket=TEAM_INFO_BUCKET,
-            Key=s3_key,
-            Body=json.dumps(team_data, default=str),
-            ContentType='application/json'
+        params = event.get('queryStringParameters') or {}
+        scope = params.get('scope', 'all')
+        scope_id = params.get('id', '')
+        if scope not in ('team', 'job', 'resume', 'all'):
+            return {'statusCode': 400, 'headers': headers, 'body': json.dumps({'error': 'scope 必須是 team、job、resume 或 all'})}
+        if scope != 'all' and not scope_id:
+            return {'statusCode': 400, 'headers': headers, 'body': json.dumps({'error': '缺少 id 參數'})}
+
+        date_to = params.get('to') or usage_meter.today()
+        date_from = params.get('from') or (datetime.utcnow() - timedelta(days=6)).strftime('%Y-%m-%d')
+        scope_key = 'all' if scope == 'all' else f"{scope}#{scope_id}"
+
+        result = {'scope': scope, 'id': scope_id, 'from': date_from, 'to': date_to}
+        if scope != 'all':
+            total = usage_meter.usage_table.get_item(Key={'scope': scope_key, 'period': 'total'}).get('Item')
+            result['total'] = usage_numbers(total)
+        if scope != 'resume':
+            daily = usage_meter.usage_table.query(
+                KeyConditionExpression=Key('scope').eq(scope_key) & Key('period').between(date_from, date_to)
+            ).get('Items', [])
+            result['daily'] = [{'day': item['period'], **usage_numbers(item)} for item in daily]
+        if scope == 'team':
+            status = usage_meter.budget_status(scope_id, use_cache=False)
+            result['budget'] = {
+                'day': status['day'],
+                'spent_usd': float(status['spent_usd']),
+                'daily_budget_usd': float(status['budget_usd']),
+                'over_budget': status['over_budget']
+            }
+            result['deferred'] = [
+                {'operation': item['operation'], 'job_id': item['job_id'], 'queued_at': item.get('queued_at', '')}
+                for item in usage_meter.load_deferred() if item.get('team_id') == scope_id
+            ]
+
+        return {
+            'statusCode': 200,
+            'headers': headers,
+            'body': json.dumps({'success': True, **result}, ensure_ascii=False, default=str)
+        }
+    except Exception as e:
+        logger.error(f"? 查詢 Bedrock 用量失敗: {str(e)}")
+        import traceback
+        logger.error(traceback.format_exc())
+        return {
+            'statusCode': 500,
+            'headers': headers,
+            'body': json.dumps({'error': '查詢 Bedrock 用量失敗', 'message': str(e)})
+        }
+
+def set_team_budget(event, headers):
+    """PUT /admin/usage  body: {"team_id": "...", "daily_budget_usd": 10}（0 代表不限制）"""
+    try:
+        data = json.loads(event.get('body') or '{}')
+        team_id = data.get('team_id', '')
+        if not team_id:
+            return {'statusCode': 400, 'headers': headers, 'body': json.dumps({'error': '缺少 team_id'})}
+        try:
+            budget = Decimal(str(data.get('daily_budget_usd')))
+        except (InvalidOperation, ValueError):
+            return {'statusCode': 400, 'headers': headers, 'body': json.dumps({'error': 'daily_budget_usd 必須是數字'})}
+        if not budget.is_finite() or budget < 0:
+            return {'statusCode': 400, 'headers': headers, 'body': json.dumps({'error': 'daily_budget_usd 必須是非負數'})}
+
+        usage_meter.set_team_budget(team_id, budget)
+        logger.info(f"? 已設定團隊 {team_id} 每日預算: {budget} USD")
+        return {
+            'statusCode': 200,
+            'headers': headers,
+            'body': json.dumps({'success': True, 'team_id': team_id, 'daily_budget_usd': float(budget)}, ensure_ascii=False)
+        }
+    except Exception as e:
+        logger.error(f"? 設定團隊預算失敗: {str(e)}")
+        return {
+            'statusCode': 500,
+            'headers': headers,
+            'body': json.dumps({'error': '設定團隊預算失敗', 'message': str(e)})
+        }
+
+def publish_team_change(team_id, changed_fields):
+    """送出團隊變更事件：非同步呼叫職缺管理 Lambda，把新的團隊資料同步到該團隊的職缺"""
+    if not JOB_MANAGEMENT_FUNCTION_NAME:
+        logger.warning(f"?? 未設定 JOB_MANAGEMENT_FUNCTION_NAME，略過職缺同步: {team_id}")
+        return
+    try:
+        lambda_client.invoke(
+            FunctionName=JOB_MANAGEMENT_FUNCTION_NAME,
+            InvocationType='Event',
+            Payload=json.dumps({
+                'action': 'sync_team_info',
+                'team_id': team_id,
+                'changed_fields': changed_fields
+            }, ensure_ascii=False).encode('utf-8')
         )
-        
-        logger.info(f"? 團隊資料備份成功: s3://{TEAM_INFO_BUCKET}/{s3_key}")
-        
+        logger.info(f"? 已送出團隊變更事件: {team_id} {changed_fields}")
     except Exception as e:
-        logger.error(f"? 團隊資料備份失敗: {str(e)}")
-        # 不拋出例外，因為備份失敗不應該影響主要功能
+        logger.error(f"? 送出團隊變更事件失敗: {team_id} - {str(e)}")
+        # 不拋出例外，職缺可由 POST /jobs/fix-team-info 補齊
 
 def create_team_folder(team_id):
     """創建團隊檔案資料夾"""
@@ -0,0 +1,199 @@
+"""
+Bedrock 用量與費用計量
+
+每次模型呼叫後以 record_usage 寫入 bedrock-usage 表（ADD 原子累加，不需先讀取）：
+
+- scope = "resume#{id}" / "job#{id}" / "team#{id}" / "all"
+- period = "total"（累計）或 "YYYY-MM-DD"（UTC 每日），履歷只記累計、全站只記每日
+- 欄位：input_tokens、output_tokens、calls、cost_usd，以及 calls_{operation} 各用途的呼叫次數
+
+預算保護：團隊當日費用達到每日預算（scope="team#{id}", period="budget" 的 daily_budget_usd，
+未設定時使用 TEAM_DAILY_BUDGET_USD，0 代表不限制）後，route_model 改用較便宜的 BUDGET_FALLBACK_MODEL_ID，
+可延後的工作（例如重新排序）則以 enqueue_deferred 排入佇列，等預算重置後再執行。
+
+resume_parser、resume_matcher、resume_management、job_requirement、team_management 各有一份相同的模組，修改時請同步。
+"""
+import os
+import time
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import boto3
+from boto3.dynamodb.conditions import Key
+
+dynamodb = boto3.resource('dynamodb')
+
+USAGE_TABLE_NAME = os.environ.get('USAGE_TABLE_NAME', 'benson-haire-bedrock-usage')
+TEAM_DAILY_BUDGET_USD = Decimal(os.environ.get('TEAM_DAILY_BUDGET_USD', '5'))
+BUDGET_FALLBACK_MODEL_ID = os.environ.get('BUDGET_FALLBACK_MODEL_ID', 'anthropic.claude-3-haiku-20240307-v1:0')
+# 預算狀態在暖機容器中的快取秒數，避免每次呼叫模型前都讀取表格
+BUDGET_CACHE_SECONDS = 60
+
+# 每 1,000 tokens 的美元價格 (輸入, 輸出)
+MODEL_PRICING = {
+    'anthropic.claude-3-5-sonnet-20240620-v1:0': (Decimal('0.003'), Decimal('0.015')),
+    'anthropic.claude-3-haiku-20240307-v1:0': (Decimal('0.00025'), Decimal('0.00125')),
+    'amazon.titan-embed-text-v2:0': (Decimal('0.00002'), Decimal('0')),
+}
+# 價格表沒有的模型以 Sonnet 的價格估算（寧可高估）
+DEFAULT_PRICING = (Decimal('0.003'), Decimal('0.015'))
+
+usage_table = dynamodb.Table(USAGE_TABLE_NAME)
+
+_budget_cache: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+
+
+def today() -> str:
+    return datetime.utcnow().strftime('%Y-%m-%d')
+
+
+def cost_usd(model_id: str, input_tokens: int, output_tokens: int) -> Decimal:
+    input_price, output_price = MODEL_PRICING.get(model_id, DEFAULT_PRICING)
+    cost = (Decimal(input_tokens) * input_price + Decimal(output_tokens) * output_price) / 1000
+    return cost.quantize(Decimal('0.000001'))
+
+
+def converse_usage(response: Dict[str, Any]) -> Tuple[int, int]:
+    """converse 回應中的 (輸入, 輸出) tokens"""
+    usage = response.get('usage') or {}
+    return int(usage.get('inputTokens', 0)), int(usage.get('outputTokens', 0))
+
+
+def usage_rows(team_id: str = '', job_id: str = '', resume_ids: Iterable[str] = (),
+               day: Optional[str] = None) -> List[Tuple[str, str, Decimal]]:
+    """
+    一次呼叫要累加的 (scope, period, 分攤比例)
+
+    一個 prompt 包含多份履歷時（例如重新排序），費用平均分攤到各履歷。
+    """
+    day = day or today()
+    rows = [('all', day, Decimal(1))]
+    if team_id:
+        rows += [(f"team#{team_id}", 'total', Decimal(1)), (f"team#{team_id}", day, Decimal(1))]
+    if job_id:
+        rows += [(f"job#{job_id}", 'total', Decimal(1)), (f"job#{job_id}", day, Decimal(1))]
+    resume_ids = [resume_id for resume_id in resume_ids if resume_id]
+    for resume_id in resume_ids:
+        rows.append((f"resume#{resume_id}", 'total', Decimal(1) / len(resume_ids)))
+    return rows
+
+
+def record_usage(model_id: str, input_tokens: int, output_tokens: int, operation: str,
+                 team_id: str = '', job_id: str = '', resume_ids: Iterable[str] = ()) -> Decimal:
+    """
+    累加一次模型呼叫的用量；計量失敗只記錄錯誤，不影響呼叫端
+
+    :return: 這次呼叫的費用（美元）
+    """
+    cost = cost_usd(model_id, input_tokens, output_tokens)
+    try:
+        for scope, period, share in usage_rows(team_id, job_id, resume_ids):
+            usage_table.update_item(
+                Key={'scope': scope, 'period': period},
+                UpdateExpression='ADD input_tokens :input, output_tokens :output, calls :one, cost_usd :cost, #op_calls :one',
+                ExpressionAttributeNames={'#op_calls': f"calls_{operation}"},
+                ExpressionAttributeValues={
+                    ':input': int(input_tokens * share),
+                    ':output': int(output_tokens * share),
+                    ':one': 1,
+                    ':cost': (cost * share).quantize(Decimal('0.000001'))
+                }
+            )
+        if team_id:
+            # 讓預算快取反映剛發生的費用
+            cached = _budget_cache.get(team_id)
+            if cached:
+                cached[1]['spent_usd'] += cost
+    except Exception as e:
+        print(f"記錄 Bedrock 用量失敗: operation={operation}, {str(e)}")
+    return cost
+
+
+def record_converse(response: Dict[str, Any], model_id: str, operation: str,
+                    team_id: str = '', job_id: str = '', resume_ids: Iterable[str] = ()) -> Decimal:
+    input_tokens, output_tokens = converse_usage(response)
+    return record_usage(model_id, input_tokens, output_tokens, operation, team_id, job_id, resume_ids)
+
+
+def budget_status(team_id: str, use_cache: bool = True) -> Dict[str, Any]:
+    """團隊當日費用與預算：{'spent_usd', 'budget_usd', 'over_budget'}"""
+    now = time.monotonic()
+    cached = _budget_cache.get(team_id)
+    if use_cache and cached and now - cached[0] < BUDGET_CACHE_SECONDS and cached[1]['day'] == today():
+        status = cached[1]
+    else:
+        day = today()
+        keys = [{'scope': f"team#{team_id}", 'period': 'budget'}, {'scope': f"team#{team_id}", 'period': day}]
+        items = {}
+        request_items = {USAGE_TABLE_NAME: {'Keys': keys}}
+        while request_items:
+            batch_response = dynamodb.batch_get_item(RequestItems=request_items)
+            for item in batch_response.get('Responses', {}).get(USAGE_TABLE_NAME, []):
+                items[item['period']] = item
+            request_items = batch_response.get('UnprocessedKeys') or {}
+        budget = items.get('budget', {}).get('daily_budget_usd', TEAM_DAILY_BUDGET_USD)
+        status = {'day': day, 'spent_usd': Decimal(items.get(day, {}).get('cost_usd', 0)), 'budget_usd': Decimal(budget)}
+        _budget_cache[team_id] = (now, status)
+    return {**status, 'over_budget': status['budget_usd'] > 0 and status['spent_usd'] >= status['budget_usd']}
+
+
+def route_model(team_id: str, model_id: str) -> Tuple[str, bool]:
+    """
+    依團隊當日預算選擇模型；超過預算時改用較便宜的模型
+
+    :return: (model_id, 是否超過預算)；讀取預算失敗時維持原模型
+    """
+    if not team_id:
+        return model_id, False
+    try:
+        over_budget = budget_status(team_id)['over_budget']
+    except Exception as e:
+        print(f"讀取團隊預算失敗: team_id={team_id}, {str(e)}")
+        return model_id, False
+    if over_budget and model_id != BUDGET_FALLBACK_MODEL_ID:
+        print(f"團隊 {team_id} 已超過每日預算，改用 {BUDGET_FALLBACK_MODEL_ID}")
+        return BUDGET_FALLBACK_MODEL_ID, True
+    return model_id, over_budget
+
+
+def enqueue_deferred(operation: str, team_id: str, job_id: str, payload: Dict[str, Any]) -> None:
+    """排入超過預算而延後的工作（同一職缺同一用途只保留一筆）"""
+    usage_table.put_item(Item={
+        'scope': 'queue',
+        'period': f"{operation}#{job_id}",
+        'operation': operation,
+        'team_id': team_id,
+        'job_id': job_id,
+        'payload': payload,
+        'queued_day': today(),
+        'queued_at': datetime.utcnow().isoformat()
+    })
+
+
+def load_deferred(operation: Optional[str] = None) -> List[Dict[str, Any]]:
+    key_condition = Key('scope').eq('queue')
+    if operation:
+        key_condition = key_condition & Key('period').begins_with(f"{operation}#")
+    items = []
+    query_kwargs = {'KeyConditionExpression': key_condition}
+    while True:
+        query_response = usage_table.query(**query_kwargs)
+        items.extend(query_response.get('Items', []))
+        if 'LastEvaluatedKey' not in query_response:
+            return items
+        query_kwargs['ExclusiveStartKey'] = query_response['LastEvaluatedKey']
+
+
+def remove_deferred(item: Dict[str, Any]) -> None:
+    usage_table.delete_item(Key={'scope': 'queue', 'period': item['period']})
+
+
+def set_team_budget(team_id: str, daily_budget_usd: Decimal) -> None:
+    usage_table.put_item(Item={
+        'scope': f"team#{team_id}",
+        'period': 'budget',
+        'daily_budget_usd': Decimal(str(daily_budget_usd)),
+        'updated_at': datetime.utcnow().isoformat()
+    })
+    _budget_cache.pop(team_id, None)
@@ -85,7 +85,10 @@ resource "aws_iam_role_policy" "lambda_exec_bedrock_policy" {
           "dynamodb:UpdateItem",
           "dynamodb:DeleteItem",
           "dynamodb:Query",
-          "dynamodb:Scan"
+          "dynamodb:Scan",
+          "dynamodb:BatchGetItem",
+          "dynamodb:BatchWriteItem",
+          "dynamodb:DescribeTable"
         ]
         Resource = [
           module.resume_table.table_arn,
@@ -97,9 +100,55 @@ resource "aws_iam_role_policy" "lambda_exec_bedrock_policy" {
           module.match_result_table.table_arn,
           "${module.match_result_table.table_arn}/index/*",
           module.teams_table.table_arn,
-          "${module.teams_table.table_arn}/index/*"
+          "${module.teams_table.table_arn}/index/*",
+          module.jobs_table.table_arn,
+          "${module.jobs_table.table_arn}/index/*",
+          module.applicant_cache_table.table_arn,
+          module.skill_index_table.table_arn,
+          module.rerank_cache_table.table_arn,
+          module.candidate_identity_table.table_arn,
+          module.background_task_table.table_arn,
+          module.job_stats_table.table_arn,
+          module.match_notification_table.table_arn,
+          "${module.match_notification_table.table_arn}/index/*",
+          module.bedrock_usage_table.table_arn
         ]
       },
+      # 讀取 DynamoDB Stream（資料表備份）
+      {
+        Effect = "Allow"
+        Action = [
+          "dynamodb:DescribeStream",
+          "dynamodb:GetRecords",
+          "dynamodb:GetShardIterator",
+          "dynamodb:ListStreams"
+        ]
+        Resource = [
+          "${module.jobs_table.table_arn}/stream/*",
+          "${module.teams_table.table_arn}/stream/*"
+        ]
+      },
+      # 非同步觸發配對 Lambda
+      {
+        Effect = "Allow"
+        Action = [
+          "lambda:InvokeFunction"
+        ]
+        Resource = [
+          "arn:aws:lambda:ap-southeast-1:*:function:${var.resource_prefix}-resume-matcher",
+          "arn:aws:lambda:ap-southeast-1:*:function:${var.resource_prefix}-job-requirement",
+          "arn:aws:lambda:ap-southeast-1:*:function:${var.resource_prefix}-job-management",
+          "arn:aws:lambda:ap-southeast-1:*:function:${var.resource_prefix}-resume-management"
+        ]
+      },
+      # 發送配對通知摘要
+      {
+        Effect = "Allow"
+        Action = [
+          "sns:Publish"
+        ]
+        Resource = "arn:aws:sns:ap-southeast-1:*:${var.resource_prefix}-match-notifications"
+      },
       # Bedrock 完整權限 (FullAccess for debugging)
       {
         Effect = "Allow"
@@ -118,7 +167,8 @@ resource "aws_s3_bucket_notification" "raw_resume_notification" {
 
   lambda_function {
     lambda_function_arn = module.resume_parser_lambda.lambda_arn
-    events              = ["s3:ObjectCreated:*"]
+    events              = ["s3:ObjectCreated:*", "s3:ObjectRemoved:*"]
+    filter_prefix       = "raw_resume/"  # 只處理 resume_upload 寫入的履歷
     filter_suffix       = ".json"
   }
 
@@ -193,7 +243,8 @@ module "resume_table" {
     { name = "resume_id", type = "S" },
     { name = "team_id", type = "S" },
     { name = "job_id", type = "S" },
-    { name = "processed_at", type = "S" }
+    { name = "processed_at", type = "S" },
+    { name = "candidate_id", type = "S" }
   ]
   
   global_secondary_indexes = [
@@ -210,6 +261,14 @@ module "resume_table" {
       range_key          = "processed_at"
       projection_type    = "ALL"
       non_key_attributes = []
+    },
+    {
+      # 同一候選人的所有投遞（candidate_id 由解析 Lambda 的身分辨識寫入）
+      name               = "candidate-index"
+      hash_key           = "candidate_id"
+      range_key          = "processed_at"
+      projection_type    = "INCLUDE"
+      non_key_attributes = ["team_id", "job_id", "candidate_name", "current_title", "identity_matched_by"]
     }
   ]
 }
@@ -221,6 +280,9 @@ module "teams_table" {
   attributes = [
     { name = "team_id", type = "S" }
   ]
+
+  # 變更由 Stream 送到 table_backup Lambda 備份
+  stream_view_type = "NEW_IMAGE"
 }
 
 module "job_posting_table" {
@@ -241,6 +303,96 @@ module "job_requirement_table" {
   ]
 }
 
+module "applicant_cache_table" {
+  source     = "./modules/dynamodb_table"
+  table_name = "${var.resource_prefix}-applicant-cache"
+  hash_key   = "job_id"
+  attributes = [
+    { name = "job_id", type = "S" }
+  ]
+}
+
+module "skill_index_table" {
+  source     = "./modules/dynamodb_table"
+  table_name = "${var.resource_prefix}-skill-index"
+  hash_key   = "skill_key"  # {team_id}#{skill} 或 *#{skill}
+  range_key  = "resume_id"
+  attributes = [
+    { name = "skill_key", type = "S" },
+    { name = "resume_id", type = "S" }
+  ]
+}
+
+module "background_task_table" {
+  source     = "./modules/dynamodb_table"
+  table_name = "${var.resource_prefix}-background-task"
+  hash_key   = "task_id"  # 例如 score-backlog#{job_id}，保存進度與 checkpoint
+  attributes = [
+    { name = "task_id", type = "S" }
+  ]
+}
+
+module "job_stats_table" {
+  source     = "./modules/dynamodb_table"
+  table_name = "${var.resource_prefix}-job-stats"
+  hash_key   = "stat_id"  # 目前只有 jobs 一筆：各狀態 / 團隊 / 聘用類型的職缺數與瀏覽、應徵總數
+  attributes = [
+    { name = "stat_id", type = "S" }
+  ]
+}
+
+module "bedrock_usage_table" {
+  source     = "./modules/dynamodb_table"
+  table_name = "${var.resource_prefix}-bedrock-usage"
+  hash_key   = "scope"   # resume#{id} / job#{id} / team#{id} / all / queue
+  range_key  = "period"  # total / YYYY-MM-DD / budget；queue 為 {operation}#{job_id}
+  attributes = [
+    { name = "scope", type = "S" },
+    { name = "period", type = "S" }
+  ]
+}
+
+module "match_notification_table" {
+  source        = "./modules/dynamodb_table"
+  table_name    = "${var.resource_prefix}-match-notification"
+  hash_key      = "window_key"  # {收件人}#{job_id}#{時間窗起點} 或 rate#{收件人}#{小時}
+  ttl_attribute = "expires_at"
+  attributes = [
+    { name = "window_key", type = "S" },
+    { name = "pending", type = "S" },
+    { name = "window_end", type = "N" }
+  ]
+  
+  # 稀疏索引：只有尚未送出的時間窗帶有 pending
+  global_secondary_indexes = [
+    {
+      name               = "pending-index"
+      hash_key           = "pending"
+      range_key          = "window_end"
+      projection_type    = "ALL"
+      non_key_attributes = []
+    }
+  ]
+}
+
+module "candidate_identity_table" {
+  source     = "./modules/dynamodb_table"
+  table_name = "${var.resource_prefix}-candidate-identity"
+  hash_key   = "identity_key"  # email#{雜湊} / phone#{雜湊} / content#{檔案雜湊}
+  attributes = [
+    { name = "identity_key", type = "S" }
+  ]
+}
+
+module "rerank_cache_table" {
+  source     = "./modules/dynamodb_table"
+  table_name = "${var.resource_prefix}-rerank-cache"
+  hash_key   = "cache_key"  # {job_id}#{需求版本}#{履歷內容雜湊}
+  attributes = [
+    { name = "cache_key", type = "S" }
+  ]
+}
+
 module "match_result_table" {
   source     = "./modules/dynamodb_table"
   table_name = "${var.resource_prefix}-match-result"
@@ -248,7 +400,19 @@ module "match_result_table" {
   range_key  = "resume_id"
   attributes = [
     { name = "job_id", type = "S" },
-    { name = "resume_id", type = "S" }
+    { name = "resume_id", type = "S" },
+    { name = "score_sort", type = "S" }
+  ]
+  
+  # 依分數排序的職缺配對結果：score_sort = "{is_matched}#{分數 x 10000 補零}"
+  global_secondary_indexes = [
+    {
+      name               = "score-index"
+      hash_key           = "job_id"
+      range_key          = "score_sort"
+      projection_type    = "INCLUDE"
+      non_key_attributes = ["match_score", "is_matched", "matched_requirements", "unmatched_requirements", "matched_at", "cot_reason", "llm_score"]
+    }
   ]
 }
 
@@ -365,14 +529,111 @@ module "team_management_lambda" {
   timeout             = 900
   
   environment_variables = {
-    TEAMS_TABLE_NAME = module.teams_table.table_name
-    BACKUP_S3_BUCKET = aws_s3_bucket.raw_resume.bucket
-    TEAM_INFO_BUCKET = aws_s3_bucket.team_info.bucket
+    TEAMS_TABLE_NAME             = module.teams_table.table_name
+    BACKUP_S3_BUCKET             = aws_s3_bucket.raw_resume.bucket
+    TEAM_INFO_BUCKET             = aws_s3_bucket.team_info.bucket
+    USAGE_TABLE_NAME             = module.bedrock_usage_table.table_name
+    JOB_MANAGEMENT_FUNCTION_NAME = "${var.resource_prefix}-job-management"
   }
   
   common_tags = local.common_tags
 }
 
+# API Gateway Resource - /admin/usage（Bedrock 用量與團隊預算，由團隊管理 Lambda 處理）
+resource "aws_api_gateway_resource" "admin" {
+  rest_api_id = aws_api_gateway_rest_api.haire_api.id
+  parent_id   = aws_api_gateway_rest_api.haire_api.root_resource_id
+  path_part   = "admin"
+}
+
+resource "aws_api_gateway_resource" "admin_usage" {
+  rest_api_id = aws_api_gateway_rest_api.haire_api.id
+  parent_id   = aws_api_gateway_resource.admin.id
+  path_part   = "usage"
+}
+
+resource "aws_api_gateway_method" "admin_usage_get" {
+  rest_api_id   = aws_api_gateway_rest_api.haire_api.id
+  resource_id   = aws_api_gateway_resource.admin_usage.id
+  http_method   = "GET"
+  authorization = "NONE"
+}
+
+resource "aws_api_gateway_method" "admin_usage_put" {
+  rest_api_id   = aws_api_gateway_rest_api.haire_api.id
+  resource_id   = aws_api_gateway_resource.admin_usage.id
+  http_method   = "PUT"
+  authorization = "NONE"
+}
+
+resource "aws_api_gateway_method" "admin_usage_options" {
+  rest_api_id   = aws_api_gateway_rest_api.haire_api.id
+  resource_id   = aws_api_gateway_resource.admin_usage.id
+  http_method   = "OPTIONS"
+  authorization = "NONE"
+}
+
+resource "aws_api_gateway_integration" "admin_usage_get_integration" {
+  rest_api_id = aws_api_gateway_rest_api.haire_api.id
+  resource_id = aws_api_gateway_resource.admin_usage.id
+  http_method = aws_api_gateway_method.admin_usage_get.http_method
+  
+  integration_http_method = "POST"
+  type                   = "AWS_PROXY"
+  uri                    = module.team_management_lambda.invoke_arn
+}
+
+resource "aws_api_gateway_integration" "admin_usage_put_integration" {
+  rest_api_id = aws_api_gateway_rest_api.haire_api.id
+  resource_id = aws_api_gateway_resource.admin_usage.id
+  http_method = aws_api_gateway_method.admin_usage_put.http_method
+  
+  integration_http_method = "POST"
+  type                   = "AWS_PROXY"
+  uri                    = module.team_management_lambda.invoke_arn
+}
+
+resource "aws_api_gateway_integration" "admin_usage_options_integration" {
+  rest_api_id = aws_api_gateway_rest_api.haire_api.id
+  resource_id = aws_api_gateway_resource.admin_usage.id
+  http_method = aws_api_gateway_method.admin_usage_options.http_method
+  
+  type = "MOCK"
+  request_templates = {
+    "application/json" = jsonencode({
+      statusCode = 200
+    })
+  }
+}
+
+resource "aws_api_gateway_method_response" "admin_usage_options_method_response" {
+  rest_api_id = aws_api_gateway_rest_api.haire_api.id
+  resource_id = aws_api_gateway_resource.admin_usage.id
+  http_method = aws_api_gateway_method.admin_usage_options.http_method
+  status_code = "200"
+  
+  response_parameters = {
+    "method.response.header.Access-Control-Allow-Headers" = true
+    "method.response.header.Access-Control-Allow-Methods" = true
+    "method.response.header.Access-Control-Allow-Origin"  = true
+  }
+}
+
+resource "aws_api_gateway_integration_response" "admin_usage_options_integration_response" {
+  rest_api_id = aws_api_gateway_rest_api.haire_api.id
+  resource_id = aws_api_gateway_resource.admin_usage.id
+  http_method = aws_api_gateway_method.admin_usage_options.http_method
+  status_code = aws_api_gateway_method_response.admin_usage_options_method_response.status_code
+  
+  response_parameters = {
+    "method.response.header.Access-Control-Allow-Headers" = "'Content-Type,X-Amz-Date,Authorization,X-Api-Key,X-Amz-Security-Token'"
+    "method.response.header.Access-Control-Allow-Methods" = "'GET,PUT,OPTIONS'"
+    "method.response.header.Access-Control-Allow-Origin"  = "'*'"
+  }
+
+  depends_on = [aws_api_gateway_method_response.admin_usage_options_method_response]
+}
+
 # API Gateway Integration - 所有 teams 相關請求都導向同一個 Lambda
 resource "aws_api_gateway_integration" "teams_get_integration" {
   rest_api_id = aws_api_gateway_rest_api.haire_api.id
@@ -569,6 +830,12 @@ resource "aws_api_gateway_deployment" "haire_api_deployment" {
     aws_api_gateway_method_response.teams_options_method_response,
     aws_api_gateway_method_response.team_options_method_response,
     aws_api_gateway_method_response.team_files_upload_options_method_response,
+    # 管理用：Bedrock 用量
+    aws_api_gateway_integration.admin_usage_get_integration,
+    aws_api_gateway_integration.admin_usage_put_integration,
+    aws_api_gateway_integration.admin_usage_options_integration,
+    aws_api_gateway_integration_response.admin_usage_options_integration_response,
+    aws_api_gateway_method_response.admin_usage_options_method_response,
     # Jobs 相關的整合
     aws_api_gateway_integration.jobs_get_integration,
     aws_api_gateway_integration.jobs_post_integration,
@@ -581,6 +848,33 @@ resource "aws_api_gateway_deployment" "haire_api_deployment" {
     aws_api_gateway_integration_response.job_options_integration_response,
     aws_api_gateway_method_response.jobs_options_method_response,
     aws_api_gateway_method_response.job_options_method_response,
+    # 職缺需求相關的整合
+    aws_api_gateway_integration.job_requirements_get_integration,
+    aws_api_gateway_integration.job_requirements_post_integration,
+    aws_api_gateway_integration.job_requirements_put_integration,
+    aws_api_gateway_integration.job_requirements_options_integration,
+    aws_api_gateway_integration_response.job_requirements_options_integration_response,
+    aws_api_gateway_method_response.job_requirements_options_method_response,
+    # 團隊資訊修復
+    aws_api_gateway_integration.jobs_fix_team_info_get_integration,
+    aws_api_gateway_integration.jobs_fix_team_info_post_integration,
+    aws_api_gateway_integration.jobs_fix_team_info_options_integration,
+    aws_api_gateway_integration_response.jobs_fix_team_info_options_integration_response,
+    aws_api_gateway_method_response.jobs_fix_team_info_options_method_response,
+    # 職缺統計
+    aws_api_gateway_integration.jobs_stats_get_integration,
+    aws_api_gateway_integration.jobs_stats_options_integration,
+    aws_api_gateway_integration_response.jobs_stats_options_integration_response,
+    aws_api_gateway_method_response.jobs_stats_options_method_response,
+    # 職缺批次 API
+    aws_api_gateway_integration.jobs_batch_post_integration,
+    aws_api_gateway_integration.jobs_batch_options_integration,
+    aws_api_gateway_integration_response.jobs_batch_options_integration_response,
+    aws_api_gateway_method_response.jobs_batch_options_method_response,
+    aws_api_gateway_integration.jobs_batch_status_patch_integration,
+    aws_api_gateway_integration.jobs_batch_status_options_integration,
+    aws_api_gateway_integration_response.jobs_batch_status_options_integration_response,
+    aws_api_gateway_method_response.jobs_batch_status_options_method_response,
     # 履歷上傳相關的整合
     aws_api_gateway_integration.upload_resume_post_integration,
     aws_api_gateway_integration.upload_resume_options_integration,
@@ -621,6 +915,12 @@ resource "aws_api_gateway_deployment" "haire_api_deployment" {
       aws_api_gateway_method.team_options.id,
       aws_api_gateway_method.team_files_upload_post.id,
       aws_api_gateway_method.team_files_upload_options.id,
+      # 管理用資源
+      aws_api_gateway_resource.admin.id,
+      aws_api_gateway_resource.admin_usage.id,
+      aws_api_gateway_method.admin_usage_get.id,
+      aws_api_gateway_method.admin_usage_put.id,
+      aws_api_gateway_method.admin_usage_options.id,
       # Jobs 資源  
       aws_api_gateway_resource.jobs.id,
       aws_api_gateway_resource.job_id.id,
@@ -631,6 +931,28 @@ resource "aws_api_gateway_deployment" "haire_api_deployment" {
       aws_api_gateway_method.job_delete.id,
       aws_api_gateway_method.jobs_options.id,
       aws_api_gateway_method.job_options.id,
+      # 職缺需求資源
+      aws_api_gateway_resource.job_requirements.id,
+      aws_api_gateway_method.job_requirements_get.id,
+      aws_api_gateway_method.job_requirements_post.id,
+      aws_api_gateway_method.job_requirements_put.id,
+      aws_api_gateway_method.job_requirements_options.id,
+      # 團隊資訊修復資源
+      aws_api_gateway_resource.jobs_fix_team_info.id,
+      aws_api_gateway_method.jobs_fix_team_info_get.id,
+      aws_api_gateway_method.jobs_fix_team_info_post.id,
+      aws_api_gateway_method.jobs_fix_team_info_options.id,
+      # 職缺統計資源
+      aws_api_gateway_resource.jobs_stats.id,
+      aws_api_gateway_method.jobs_stats_get.id,
+      aws_api_gateway_method.jobs_stats_options.id,
+      # 職缺批次 API 資源
+      aws_api_gateway_resource.jobs_batch.id,
+      aws_api_gateway_method.jobs_batch_post.id,
+      aws_api_gateway_method.jobs_batch_options.id,
+      aws_api_gateway_resource.jobs_batch_status.id,
+      aws_api_gateway_method.jobs_batch_status_patch.id,
+      aws_api_gateway_method.jobs_batch_status_options.id,
       # 履歷上傳資源
       aws_api_gateway_resource.upload_resume.id,
       aws_api_gateway_method.upload_resume_post.id,
@@ -713,8 +1035,17 @@ module "resume_parser_lambda" {
   timeout             = 900
   
   environment_variables = {
-    DYNAMODB_TABLE = module.resume_table.table_name
-    PARSED_BUCKET  = aws_s3_bucket.parsed_resume.bucket
+    DYNAMODB_TABLE           = module.resume_table.table_name
+    PARSED_BUCKET            = aws_s3_bucket.parsed_resume.bucket
+    APPLICANT_CACHE_TABLE    = module.applicant_cache_table.table_name
+    SKILL_INDEX_TABLE        = module.skill_index_table.table_name
+    EMBEDDING_PROVIDER       = "bedrock"
+    EMBEDDING_DIMENSION      = "512"
+    MATCHER_FUNCTION_NAME    = "${var.resource_prefix}-resume-matcher"
+    CANDIDATE_IDENTITY_TABLE = module.candidate_identity_table.table_name
+    USAGE_TABLE_NAME         = module.bedrock_usage_table.table_name
+    JOBS_TABLE_NAME          = module.jobs_table.table_name
+    STATS_TABLE_NAME         = module.job_stats_table.table_name
   }
   
   common_tags = local.common_tags
@@ -875,6 +1206,9 @@ module "jobs_table" {
   source     = "./modules/dynamodb_table"
   table_name = "haire-jobs"  # 保持原來的名稱不變
   hash_key   = "job_id"
+  
+  # 變更由 Stream 送到 table_backup Lambda 備份
+  stream_view_type = "NEW_IMAGE"
   attributes = [
     { name = "job_id", type = "S" },
     { name = "team_id", type = "S" },
@@ -912,9 +1246,14 @@ module "job_management_lambda" {
   timeout             = 900
   
   environment_variables = {
-    JOBS_TABLE_NAME  = module.jobs_table.table_name
-    TEAMS_TABLE_NAME = module.teams_table.table_name
-    BACKUP_S3_BUCKET = aws_s3_bucket.raw_resume.bucket
+    JOBS_TABLE_NAME           = module.jobs_table.table_name
+    TEAMS_TABLE_NAME          = module.teams_table.table_name
+    MATCHER_FUNCTION_NAME     = "${var.resource_prefix}-resume-matcher"
+    REQUIREMENT_FUNCTION_NAME = "${var.resource_prefix}-job-requirement"
+    JOB_BOARD_BUCKET          = aws_s3_bucket.static_site.bucket
+    JOB_SEARCH_BUCKET         = aws_s3_bucket.job_posting.bucket  # 沒有 S3 事件通知，寫入索引不會觸發履歷解析
+    TASK_TABLE_NAME           = module.background_task_table.table_name
+    STATS_TABLE_NAME          = module.job_stats_table.table_name
   }
   
   common_tags = local.common_tags
@@ -1056,64 +1395,101 @@ resource "aws_api_gateway_method_response" "job_options_method_response" {
   }
 }
 
-# API Gateway Resource - /upload-resume
-resource "aws_api_gateway_resource" "upload_resume" {
+# 職缺需求 Lambda（萃取需求草稿與確認）
+module "job_requirement_lambda" {
+  source = "./modules/lambda_function"
+
+  function_name       = "${var.resource_prefix}-job-requirement"
+  lambda_package_path = "${path.module}/lambdas/job_requirement/job_requirement.zip"
+  iam_role_arn        = aws_iam_role.lambda_exec_bedrock_role.arn
+  handler             = "lambda_function.lambda_handler"
+  runtime             = "python3.11"
+  timeout             = 300
+  
+  environment_variables = {
+    JOBS_TABLE_NAME            = module.jobs_table.table_name
+    JOB_REQUIREMENT_TABLE_NAME = module.job_requirement_table.table_name
+    REQUIREMENT_BUCKET         = aws_s3_bucket.job_requirement.bucket
+    MATCHER_FUNCTION_NAME      = "${var.resource_prefix}-resume-matcher"
+    USAGE_TABLE_NAME           = module.bedrock_usage_table.table_name
+  }
+  
+  common_tags = local.common_tags
+}
+
+# API Gateway Resource - /jobs/{job_id}/requirements
+resource "aws_api_gateway_resource" "job_requirements" {
   rest_api_id = aws_api_gateway_rest_api.haire_api.id
-  parent_id   = aws_api_gateway_rest_api.haire_api.root_resource_id
-  path_part   = "upload-resume"
+  parent_id   = aws_api_gateway_resource.job_id.id
+  path_part   = "requirements"
 }
 
-# API Gateway Methods - POST /upload-resume
-resource "aws_api_gateway_method" "upload_resume_post" {
+# API Gateway Methods - GET /jobs/{job_id}/requirements
+resource "aws_api_gateway_method" "job_requirements_get" {
   rest_api_id   = aws_api_gateway_rest_api.haire_api.id
-  resource_id   = aws_api_gateway_resource.upload_resume.id
+  resource_id   = aws_api_gateway_resource.job_requirements.id
+  http_method   = "GET"
+  authorization = "NONE"
+}
+
+# API Gateway Methods - POST /jobs/{job_id}/requirements（重新萃取草稿）
+resource "aws_api_gateway_method" "job_requirements_post" {
+  rest_api_id   = aws_api_gateway_rest_api.haire_api.id
+  resource_id   = aws_api_gateway_resource.job_requirements.id
   http_method   = "POST"
   authorization = "NONE"
 }
 
-# API Gateway Methods - OPTIONS /upload-resume
-resource "aws_api_gateway_method" "upload_resume_options" {
+# API Gateway Methods - PUT /jobs/{job_id}/requirements（確認草稿）
+resource "aws_api_gateway_method" "job_requirements_put" {
   rest_api_id   = aws_api_gateway_rest_api.haire_api.id
-  resource_id   = aws_api_gateway_resource.upload_resume.id
-  http_method   = "OPTIONS"
+  resource_id   = aws_api_gateway_resource.job_requirements.id
+  http_method   = "PUT"
   authorization = "NONE"
 }
 
-# 履歷上傳 Lambda
-module "resume_upload_lambda" {
-  source = "./modules/lambda_function"
+# OPTIONS for CORS - /jobs/{job_id}/requirements
+resource "aws_api_gateway_method" "job_requirements_options" {
+  rest_api_id   = aws_api_gateway_rest_api.haire_api.id
+  resource_id   = aws_api_gateway_resource.job_requirements.id
+  http_method   = "OPTIONS"
+  authorization = "NONE"
+}
 
-  function_name       = "${var.resource_prefix}-resume-upload"
-  lambda_package_path = "${path.module}/lambdas/resume_upload/resume_upload.zip"
-  iam_role_arn        = aws_iam_role.lambda_exec_bedrock_role.arn
-  handler             = "lambda_function.lambda_handler"
-  runtime             = "python3.11"
-  timeout             = 900
+resource "aws_api_gateway_integration" "job_requirements_get_integration" {
+  rest_api_id = aws_api_gateway_rest_api.haire_api.id
+  resource_id = aws_api_gateway_resource.job_requirements.id
+  http_method = aws_api_gateway_method.job_requirements_get.http_method
   
-  environment_variables = {
-    RAW_BUCKET    = aws_s3_bucket.raw_resume.bucket
-    PARSED_BUCKET = aws_s3_bucket.parsed_resume.bucket
-  }
+  integration_http_method = "POST"
+  type                   = "AWS_PROXY"
+  uri                    = module.job_requirement_lambda.invoke_arn
+}
+
+resource "aws_api_gateway_integration" "job_requirements_post_integration" {
+  rest_api_id = aws_api_gateway_rest_api.haire_api.id
+  resource_id = aws_api_gateway_resource.job_requirements.id
+  http_method = aws_api_gateway_method.job_requirements_post.http_method
   
-  common_tags = local.common_tags
+  integration_http_method = "POST"
+  type                   = "AWS_PROXY"
+  uri                    = module.job_requirement_lambda.invoke_arn
 }
 
-# API Gateway Integration - 履歷上傳
-resource "aws_api_gateway_integration" "upload_resume_post_integration" {
+resource "aws_api_gateway_integration" "job_requirements_put_integration" {
   rest_api_id = aws_api_gateway_rest_api.haire_api.id
-  resource_id = aws_api_gateway_resource.upload_resume.id
-  http_method = aws_api_gateway_method.upload_resume_post.http_method
+  resource_id = aws_api_gateway_resource.job_requirements.id
+  http_method = aws_api_gateway_method.job_requirements_put.http_method
   
   integration_http_method = "POST"
   type                   = "AWS_PROXY"
-  uri                    = module.resume_upload_lambda.invoke_arn
+  uri                    = module.job_requirement_lambda.invoke_arn
 }
 
-# CORS Integration for /upload-resume
-resource "aws_api_gateway_integration" "upload_resume_options_integration" {
+resource "aws_api_gateway_integration" "job_requirements_options_integration" {
   rest_api_id = aws_api_gateway_rest_api.haire_api.id
-  resource_id = aws_api_gateway_resource.upload_resume.id
-  http_method = aws_api_gateway_method.upload_resume_options.http_method
+  resource_id = aws_api_gateway_resource.job_requirements.id
+  http_method = aws_api_gateway_method.job_requirements_options.http_method
   
   type = "MOCK"
   request_templates = {
@@ -1123,11 +1499,10 @@ resource "aws_api_gateway_integration" "upload_resume_options_integration" {
   }
 }
 
-# Method Response for OPTIONS /upload-resume
-resource "aws_api_gateway_method_response" "upload_resume_options_method_response" {
+resource "aws_api_gateway_method_response" "job_requirements_options_method_response" {
   rest_api_id = aws_api_gateway_rest_api.haire_api.id
-  resource_id = aws_api_gateway_resource.upload_resume.id
-  http_method = aws_api_gateway_method.upload_resume_options.http_method
+  resource_id = aws_api_gateway_resource.job_requirements.id
+  http_method = aws_api_gateway_method.job_requirements_options.http_method
   status_code = "200"
   
   response_parameters = {
@@ -1137,56 +1512,500 @@ resource "aws_api_gateway_method_response" "upload_resume_options_method_respons
   }
 }
 
-# Integration Response for OPTIONS /upload-resume
-resource "aws_api_gateway_integration_response" "upload_resume_options_integration_response" {
+resource "aws_api_gateway_integration_response" "job_requirements_options_integration_response" {
   rest_api_id = aws_api_gateway_rest_api.haire_api.id
-  resource_id = aws_api_gateway_resource.upload_resume.id
-  http_method = aws_api_gateway_method.upload_resume_options.http_method
-  status_code = "200"
+  resource_id = aws_api_gateway_resource.job_requirements.id
+  http_method = aws_api_gateway_method.job_requirements_options.http_method
+  status_code = aws_api_gateway_method_response.job_requirements_options_method_response.status_code
   
   response_parameters = {
     "method.response.header.Access-Control-Allow-Headers" = "'Content-Type,X-Amz-Date,Authorization,X-Api-Key,X-Amz-Security-Token'"
-    "method.response.header.Access-Control-Allow-Methods" = "'POST,OPTIONS'"
+    "method.response.header.Access-Control-Allow-Methods" = "'GET,POST,PUT,OPTIONS'"
     "method.response.header.Access-Control-Allow-Origin"  = "'*'"
   }
 
-  depends_on = [aws_api_gateway_method_response.upload_resume_options_method_response]
+  depends_on = [aws_api_gateway_method_response.job_requirements_options_method_response]
 }
 
-# 履歷管理 Lambda
-module "resume_management_lambda" {
-  source = "./modules/lambda_function"
-
-  function_name       = "${var.resource_prefix}-resume-management"
-  lambda_package_path = "${path.module}/lambdas/resume_management/resume_management.zip"
-  iam_role_arn        = aws_iam_role.lambda_exec_bedrock_role.arn
-  handler             = "lambda_function.lambda_handler"
-  runtime             = "python3.11"
-  timeout             = 900
-  
-  environment_variables = {
-    RESUME_TABLE     = module.resume_table.table_name
-    PARSED_BUCKET    = aws_s3_bucket.parsed_resume.bucket
-  }
-  
-  common_tags = local.common_tags
+# API Gateway Resource - /jobs/fix-team-info（團隊資訊背景修復；固定路徑優先於 {job_id}）
+resource "aws_api_gateway_resource" "jobs_fix_team_info" {
+  rest_api_id = aws_api_gateway_rest_api.haire_api.id
+  parent_id   = aws_api_gateway_resource.jobs.id
+  path_part   = "fix-team-info"
 }
 
-# API Gateway Resource - /resumes
-resource "aws_api_gateway_resource" "resumes" {
-  rest_api_id = aws_api_gateway_rest_api.haire_api.id
-  parent_id   = aws_api_gateway_rest_api.haire_api.root_resource_id
-  path_part   = "resumes"
+# API Gateway Methods - GET /jobs/fix-team-info（查詢進度）
+resource "aws_api_gateway_method" "jobs_fix_team_info_get" {
+  rest_api_id   = aws_api_gateway_rest_api.haire_api.id
+  resource_id   = aws_api_gateway_resource.jobs_fix_team_info.id
+  http_method   = "GET"
+  authorization = "NONE"
 }
 
-# API Gateway Resource - /resumes/job-applicants
-resource "aws_api_gateway_resource" "resumes_job_applicants" {
-  rest_api_id = aws_api_gateway_rest_api.haire_api.id
-  parent_id   = aws_api_gateway_resource.resumes.id
-  path_part   = "job-applicants"
+# API Gateway Methods - POST /jobs/fix-team-info（開始修復）
+resource "aws_api_gateway_method" "jobs_fix_team_info_post" {
+  rest_api_id   = aws_api_gateway_rest_api.haire_api.id
+  resource_id   = aws_api_gateway_resource.jobs_fix_team_info.id
+  http_method   = "POST"
+  authorization = "NONE"
 }
 
-# API Gateway Resource - /resumes/{resume_id}
+# OPTIONS for CORS - /jobs/fix-team-info
+resource "aws_api_gateway_method" "jobs_fix_team_info_options" {
+  rest_api_id   = aws_api_gateway_rest_api.haire_api.id
+  resource_id   = aws_api_gateway_resource.jobs_fix_team_info.id
+  http_method   = "OPTIONS"
+  authorization = "NONE"
+}
+
+resource "aws_api_gateway_integration" "jobs_fix_team_info_get_integration" {
+  rest_api_id = aws_api_gateway_rest_api.haire_api.id
+  resource_id = aws_api_gateway_resource.jobs_fix_team_info.id
+  http_method = aws_api_gateway_method.jobs_fix_team_info_get.http_method
+  
+  integration_http_method = "POST"
+  type                   = "AWS_PROXY"
+  uri                    = module.job_management_lambda.invoke_arn
+}
+
+resource "aws_api_gateway_integration" "jobs_fix_team_info_post_integration" {
+  rest_api_id = aws_api_gateway_rest_api.haire_api.id
+  resource_id = aws_api_gateway_resource.jobs_fix_team_info.id
+  http_method = aws_api_gateway_method.jobs_fix_team_info_post.http_method
+  
+  integration_http_method = "POST"
+  type                   = "AWS_PROXY"
+  uri                    = module.job_management_lambda.invoke_arn
+}
+
+resource "aws_api_gateway_integration" "jobs_fix_team_info_options_integration" {
+  rest_api_id = aws_api_gateway_rest_api.haire_api.id
+  resource_id = aws_api_gateway_resource.jobs_fix_team_info.id
+  http_method = aws_api_gateway_method.jobs_fix_team_info_options.http_method
+  
+  type = "MOCK"
+  request_templates = {
+    "application/json" = jsonencode({
+      statusCode = 200
+    })
+  }
+}
+
+resource "aws_api_gateway_method_response" "jobs_fix_team_info_options_method_response" {
+  rest_api_id = aws_api_gateway_rest_api.haire_api.id
+  resource_id = aws_api_gateway_resource.jobs_fix_team_info.id
+  http_method = aws_api_gateway_method.jobs_fix_team_info_options.http_method
+  status_code = "200"
+  
+  response_parameters = {
+    "method.response.header.Access-Control-Allow-Headers" = true
+    "method.response.header.Access-Control-Allow-Methods" = true
+    "method.response.header.Access-Control-Allow-Origin"  = true
+  }
+}
+
+resource "aws_api_gateway_integration_response" "jobs_fix_team_info_options_integration_response" {
+  rest_api_id = aws_api_gateway_rest_api.haire_api.id
+  resource_id = aws_api_gateway_resource.jobs_fix_team_info.id
+  http_method = aws_api_gateway_method.jobs_fix_team_info_options.http_method
+  status_code = aws_api_gateway_method_response.jobs_fix_team_info_options_method_response.status_code
+  
+  response_parameters = {
+    "method.response.header.Access-Control-Allow-Headers" = "'Content-Type,X-Amz-Date,Authorization,X-Api-Key,X-Amz-Security-Token'"
+    "method.response.header.Access-Control-Allow-Methods" = "'GET,POST,OPTIONS'"
+    "method.response.header.Access-Control-Allow-Origin"  = "'*'"
+  }
+
+  depends_on = [aws_api_gateway_method_response.jobs_fix_team_info_options_method_response]
+}
+
+# API Gateway Resource - /jobs/stats（職缺統計；固定路徑優先於 {job_id}）
+resource "aws_api_gateway_resource" "jobs_stats" {
+  rest_api_id = aws_api_gateway_rest_api.haire_api.id
+  parent_id   = aws_api_gateway_resource.jobs.id
+  path_part   = "stats"
+}
+
+# API Gateway Methods - GET /jobs/stats
+resource "aws_api_gateway_method" "jobs_stats_get" {
+  rest_api_id   = aws_api_gateway_rest_api.haire_api.id
+  resource_id   = aws_api_gateway_resource.jobs_stats.id
+  http_method   = "GET"
+  authorization = "NONE"
+}
+
+# OPTIONS for CORS - /jobs/stats
+resource "aws_api_gateway_method" "jobs_stats_options" {
+  rest_api_id   = aws_api_gateway_rest_api.haire_api.id
+  resource_id   = aws_api_gateway_resource.jobs_stats.id
+  http_method   = "OPTIONS"
+  authorization = "NONE"
+}
+
+resource "aws_api_gateway_integration" "jobs_stats_get_integration" {
+  rest_api_id = aws_api_gateway_rest_api.haire_api.id
+  resource_id = aws_api_gateway_resource.jobs_stats.id
+  http_method = aws_api_gateway_method.jobs_stats_get.http_method
+  
+  integration_http_method = "POST"
+  type                   = "AWS_PROXY"
+  uri                    = module.job_management_lambda.invoke_arn
+}
+
+resource "aws_api_gateway_integration" "jobs_stats_options_integration" {
+  rest_api_id = aws_api_gateway_rest_api.haire_api.id
+  resource_id = aws_api_gateway_resource.jobs_stats.id
+  http_method = aws_api_gateway_method.jobs_stats_options.http_method
+  
+  type = "MOCK"
+  request_templates = {
+    "application/json" = jsonencode({
+      statusCode = 200
+    })
+  }
+}
+
+resource "aws_api_gateway_method_response" "jobs_stats_options_method_response" {
+  rest_api_id = aws_api_gateway_rest_api.haire_api.id
+  resource_id = aws_api_gateway_resource.jobs_stats.id
+  http_method = aws_api_gateway_method.jobs_stats_options.http_method
+  status_code = "200"
+  
+  response_parameters = {
+    "method.response.header.Access-Control-Allow-Headers" = true
+    "method.response.header.Access-Control-Allow-Methods" = true
+    "method.response.header.Access-Control-Allow-Origin"  = true
+  }
+}
+
+resource "aws_api_gateway_integration_response" "jobs_stats_options_integration_response" {
+  rest_api_id = aws_api_gateway_rest_api.haire_api.id
+  resource_id = aws_api_gateway_resource.jobs_stats.id
+  http_method = aws_api_gateway_method.jobs_stats_options.http_method
+  status_code = aws_api_gateway_method_response.jobs_stats_options_method_response.status_code
+  
+  response_parameters = {
+    "method.response.header.Access-Control-Allow-Headers" = "'Content-Type,X-Amz-Date,Authorization,X-Api-Key,X-Amz-Security-Token'"
+    "method.response.header.Access-Control-Allow-Methods" = "'GET,OPTIONS'"
+    "method.response.header.Access-Control-Allow-Origin"  = "'*'"
+  }
+
+  depends_on = [aws_api_gateway_method_response.jobs_stats_options_method_response]
+}
+
+# API Gateway Resource - /jobs:batch（批次建立職缺；位於根路徑，與 /jobs 同層）
+resource "aws_api_gateway_resource" "jobs_batch" {
+  rest_api_id = aws_api_gateway_rest_api.haire_api.id
+  parent_id   = aws_api_gateway_rest_api.haire_api.root_resource_id
+  path_part   = "jobs:batch"
+}
+
+# API Gateway Methods - POST /jobs:batch（一次建立多個職缺）
+resource "aws_api_gateway_method" "jobs_batch_post" {
+  rest_api_id   = aws_api_gateway_rest_api.haire_api.id
+  resource_id   = aws_api_gateway_resource.jobs_batch.id
+  http_method   = "POST"
+  authorization = "NONE"
+}
+
+# OPTIONS for CORS - /jobs:batch
+resource "aws_api_gateway_method" "jobs_batch_options" {
+  rest_api_id   = aws_api_gateway_rest_api.haire_api.id
+  resource_id   = aws_api_gateway_resource.jobs_batch.id
+  http_method   = "OPTIONS"
+  authorization = "NONE"
+}
+
+resource "aws_api_gateway_integration" "jobs_batch_post_integration" {
+  rest_api_id = aws_api_gateway_rest_api.haire_api.id
+  resource_id = aws_api_gateway_resource.jobs_batch.id
+  http_method = aws_api_gateway_method.jobs_batch_post.http_method
+  
+  integration_http_method = "POST"
+  type                   = "AWS_PROXY"
+  uri                    = module.job_management_lambda.invoke_arn
+}
+
+resource "aws_api_gateway_integration" "jobs_batch_options_integration" {
+  rest_api_id = aws_api_gateway_rest_api.haire_api.id
+  resource_id = aws_api_gateway_resource.jobs_batch.id
+  http_method = aws_api_gateway_method.jobs_batch_options.http_method
+  
+  type = "MOCK"
+  request_templates = {
+    "application/json" = jsonencode({
+      statusCode = 200
+    })
+  }
+}
+
+resource "aws_api_gateway_method_response" "jobs_batch_options_method_response" {
+  rest_api_id = aws_api_gateway_rest_api.haire_api.id
+  resource_id = aws_api_gateway_resource.jobs_batch.id
+  http_method = aws_api_gateway_method.jobs_batch_options.http_method
+  status_code = "200"
+  
+  response_parameters = {
+    "method.response.header.Access-Control-Allow-Headers" = true
+    "method.response.header.Access-Control-Allow-Methods" = true
+    "method.response.header.Access-Control-Allow-Origin"  = true
+  }
+}
+
+resource "aws_api_gateway_integration_response" "jobs_batch_options_integration_response" {
+  rest_api_id = aws_api_gateway_rest_api.haire_api.id
+  resource_id = aws_api_gateway_resource.jobs_batch.id
+  http_method = aws_api_gateway_method.jobs_batch_options.http_method
+  status_code = aws_api_gateway_method_response.jobs_batch_options_method_response.status_code
+  
+  response_parameters = {
+    "method.response.header.Access-Control-Allow-Headers" = "'Content-Type,X-Amz-Date,Authorization,X-Api-Key,X-Amz-Security-Token'"
+    "method.response.header.Access-Control-Allow-Methods" = "'POST,OPTIONS'"
+    "method.response.header.Access-Control-Allow-Origin"  = "'*'"
+  }
+
+  depends_on = [aws_api_gateway_method_response.jobs_batch_options_method_response]
+}
+
+# API Gateway Resource - /jobs:batchStatus（批次更新職缺狀態；位於根路徑，與 /jobs 同層）
+resource "aws_api_gateway_resource" "jobs_batch_status" {
+  rest_api_id = aws_api_gateway_rest_api.haire_api.id
+  parent_id   = aws_api_gateway_rest_api.haire_api.root_resource_id
+  path_part   = "jobs:batchStatus"
+}
+
+# API Gateway Methods - PATCH /jobs:batchStatus（一次更新多個職缺的狀態）
+resource "aws_api_gateway_method" "jobs_batch_status_patch" {
+  rest_api_id   = aws_api_gateway_rest_api.haire_api.id
+  resource_id   = aws_api_gateway_resource.jobs_batch_status.id
+  http_method   = "PATCH"
+  authorization = "NONE"
+}
+
+# OPTIONS for CORS - /jobs:batchStatus
+resource "aws_api_gateway_method" "jobs_batch_status_options" {
+  rest_api_id   = aws_api_gateway_rest_api.haire_api.id
+  resource_id   = aws_api_gateway_resource.jobs_batch_status.id
+  http_method   = "OPTIONS"
+  authorization = "NONE"
+}
+
+resource "aws_api_gateway_integration" "jobs_batch_status_patch_integration" {
+  rest_api_id = aws_api_gateway_rest_api.haire_api.id
+  resource_id = aws_api_gateway_resource.jobs_batch_status.id
+  http_method = aws_api_gateway_method.jobs_batch_status_patch.http_method
+  
+  integration_http_method = "POST"
+  type                   = "AWS_PROXY"
+  uri                    = module.job_management_lambda.invoke_arn
+}
+
+resource "aws_api_gateway_integration" "jobs_batch_status_options_integration" {
+  rest_api_id = aws_api_gateway_rest_api.haire_api.id
+  resource_id = aws_api_gateway_resource.jobs_batch_status.id
+  http_method = aws_api_gateway_method.jobs_batch_status_options.http_method
+  
+  type = "MOCK"
+  request_templates = {
+    "application/json" = jsonencode({
+      statusCode = 200
+    })
+  }
+}
+
+resource "aws_api_gateway_method_response" "jobs_batch_status_options_method_response" {
+  rest_api_id = aws_api_gateway_rest_api.haire_api.id
+  resource_id = aws_api_gateway_resource.jobs_batch_status.id
+  http_method = aws_api_gateway_method.jobs_batch_status_options.http_method
+  status_code = "200"
+  
+  response_parameters = {
+    "method.response.header.Access-Control-Allow-Headers" = true
+    "method.response.header.Access-Control-Allow-Methods" = true
+    "method.response.header.Access-Control-Allow-Origin"  = true
+  }
+}
+
+resource "aws_api_gateway_integration_response" "jobs_batch_status_options_integration_response" {
+  rest_api_id = aws_api_gateway_rest_api.haire_api.id
+  resource_id = aws_api_gateway_resource.jobs_batch_status.id
+  http_method = aws_api_gateway_method.jobs_batch_status_options.http_method
+  status_code = aws_api_gateway_method_response.jobs_batch_status_options_method_response.status_code
+  
+  response_parameters = {
+    "method.response.header.Access-Control-Allow-Headers" = "'Content-Type,X-Amz-Date,Authorization,X-Api-Key,X-Amz-Security-Token'"
+    "method.response.header.Access-Control-Allow-Methods" = "'PATCH,OPTIONS'"
+    "method.response.header.Access-Control-Allow-Origin"  = "'*'"
+  }
+
+  depends_on = [aws_api_gateway_method_response.jobs_batch_status_options_method_response]
+}
+
+# API Gateway Resource - /upload-resume
+resource "aws_api_gateway_resource" "upload_resume" {
+  rest_api_id = aws_api_gateway_rest_api.haire_api.id
+  parent_id   = aws_api_gateway_rest_api.haire_api.root_resource_id
+  path_part   = "upload-resume"
+}
+
+# API Gateway Methods - POST /upload-resume
+resource "aws_api_gateway_method" "upload_resume_post" {
+  rest_api_id   = aws_api_gateway_rest_api.haire_api.id
+  resource_id   = aws_api_gateway_resource.upload_resume.id
+  http_method   = "POST"
+  authorization = "NONE"
+}
+
+# API Gateway Methods - OPTIONS /upload-resume
+resource "aws_api_gateway_method" "upload_resume_options" {
+  rest_api_id   = aws_api_gateway_rest_api.haire_api.id
+  resource_id   = aws_api_gateway_resource.upload_resume.id
+  http_method   = "OPTIONS"
+  authorization = "NONE"
+}
+
+# 履歷上傳 Lambda
+module "resume_upload_lambda" {
+  source = "./modules/lambda_function"
+
+  function_name       = "${var.resource_prefix}-resume-upload"
+  lambda_package_path = "${path.module}/lambdas/resume_upload/resume_upload.zip"
+  iam_role_arn        = aws_iam_role.lambda_exec_bedrock_role.arn
+  handler             = "lambda_function.lambda_handler"
+  runtime             = "python3.11"
+  timeout             = 900
+  
+  environment_variables = {
+    RAW_BUCKET    = aws_s3_bucket.raw_resume.bucket
+    PARSED_BUCKET = aws_s3_bucket.parsed_resume.bucket
+  }
+  
+  common_tags = local.common_tags
+}
+
+# API Gateway Integration - 履歷上傳
+resource "aws_api_gateway_integration" "upload_resume_post_integration" {
+  rest_api_id = aws_api_gateway_rest_api.haire_api.id
+  resource_id = aws_api_gateway_resource.upload_resume.id
+  http_method = aws_api_gateway_method.upload_resume_post.http_method
+  
+  integration_http_method = "POST"
+  type                   = "AWS_PROXY"
+  uri                    = module.resume_upload_lambda.invoke_arn
+}
+
+# CORS Integration for /upload-resume
+resource "aws_api_gateway_integration" "upload_resume_options_integration" {
+  rest_api_id = aws_api_gateway_rest_api.haire_api.id
+  resource_id = aws_api_gateway_resource.upload_resume.id
+  http_method = aws_api_gateway_method.upload_resume_options.http_method
+  
+  type = "MOCK"
+  request_templates = {
+    "application/json" = jsonencode({
+      statusCode = 200
+    })
+  }
+}
+
+# Method Response for OPTIONS /upload-resume
+resource "aws_api_gateway_method_response" "upload_resume_options_method_response" {
+  rest_api_id = aws_api_gateway_rest_api.haire_api.id
+  resource_id = aws_api_gateway_resource.upload_resume.id
+  http_method = aws_api_gateway_method.upload_resume_options.http_method
+  status_code = "200"
+  
+  response_parameters = {
+    "method.response.header.Access-Control-Allow-Headers" = true
+    "method.response.header.Access-Control-Allow-Methods" = true
+    "method.response.header.Access-Control-Allow-Origin"  = true
+  }
+}
+
+# Integration Response for OPTIONS /upload-resume
+resource "aws_api_gateway_integration_response" "upload_resume_options_integration_response" {
+  rest_api_id = aws_api_gateway_rest_api.haire_api.id
+  resource_id = aws_api_gateway_resource.upload_resume.id
+  http_method = aws_api_gateway_method.upload_resume_options.http_method
+  status_code = "200"
+  
+  response_parameters = {
+    "method.response.header.Access-Control-Allow-Headers" = "'Content-Type,X-Amz-Date,Authorization,X-Api-Key,X-Amz-Security-Token'"
+    "method.response.header.Access-Control-Allow-Methods" = "'POST,OPTIONS'"
+    "method.response.header.Access-Control-Allow-Origin"  = "'*'"
+  }
+
+  depends_on = [aws_api_gateway_method_response.upload_resume_options_method_response]
+}
+
+# 履歷配對 Lambda
+module "resume_matcher_lambda" {
+  source = "./modules/lambda_function"
+
+  function_name       = "${var.resource_prefix}-resume-matcher"
+  lambda_package_path = "${path.module}/lambdas/resume_matcher/resume_matcher.zip"
+  iam_role_arn        = aws_iam_role.lambda_exec_bedrock_role.arn
+  handler             = "lambda_function.lambda_handler"
+  runtime             = "python3.11"
+  timeout             = 900
+  
+  environment_variables = {
+    RESUME_TABLE_NAME          = module.resume_table.table_name
+    JOBS_TABLE_NAME            = module.jobs_table.table_name
+    MATCH_RESULT_TABLE_NAME    = module.match_result_table.table_name
+    RERANK_CACHE_TABLE_NAME    = module.rerank_cache_table.table_name
+    JOB_REQUIREMENT_TABLE_NAME = module.job_requirement_table.table_name
+    TASK_TABLE_NAME            = module.background_task_table.table_name
+    NOTIFICATION_TABLE_NAME    = module.match_notification_table.table_name
+    MATCH_TOPIC_ARN            = aws_sns_topic.match_notifications.arn
+    USAGE_TABLE_NAME           = module.bedrock_usage_table.table_name
+  }
+  
+  common_tags = local.common_tags
+}
+
+# 履歷管理 Lambda
+module "resume_management_lambda" {
+  source = "./modules/lambda_function"
+
+  function_name       = "${var.resource_prefix}-resume-management"
+  lambda_package_path = "${path.module}/lambdas/resume_management/resume_management.zip"
+  iam_role_arn        = aws_iam_role.lambda_exec_bedrock_role.arn
+  handler             = "lambda_function.lambda_handler"
+  runtime             = "python3.11"
+  timeout             = 900
+  
+  environment_variables = {
+    RESUME_TABLE               = module.resume_table.table_name
+    PARSED_BUCKET              = aws_s3_bucket.parsed_resume.bucket
+    APPLICANT_CACHE_TABLE_NAME = module.applicant_cache_table.table_name
+    MATCH_RESULT_TABLE_NAME    = module.match_result_table.table_name
+    SKILL_INDEX_TABLE_NAME     = module.skill_index_table.table_name
+    JOBS_TABLE_NAME            = module.jobs_table.table_name
+    EMBEDDING_PROVIDER         = "bedrock"
+    EMBEDDING_DIMENSION        = "512"
+    USAGE_TABLE_NAME           = module.bedrock_usage_table.table_name
+    TASK_TABLE_NAME            = module.background_task_table.table_name
+  }
+  
+  common_tags = local.common_tags
+}
+
+# API Gateway Resource - /resumes
+resource "aws_api_gateway_resource" "resumes" {
+  rest_api_id = aws_api_gateway_rest_api.haire_api.id
+  parent_id   = aws_api_gateway_rest_api.haire_api.root_resource_id
+  path_part   = "resumes"
+}
+
+# API Gateway Resource - /resumes/job-applicants
+resource "aws_api_gateway_resource" "resumes_job_applicants" {
+  rest_api_id = aws_api_gateway_rest_api.haire_api.id
+  parent_id   = aws_api_gateway_resource.resumes.id
+  path_part   = "job-applicants"
+}
+
+# API Gateway Resource - /resumes/{resume_id}
 resource "aws_api_gateway_resource" "resume_id" {
   rest_api_id = aws_api_gateway_rest_api.haire_api.id
   parent_id   = aws_api_gateway_resource.resumes.id
@@ -1466,6 +2285,14 @@ resource "aws_lambda_permission" "allow_api_gateway_jobs" {
   source_arn    = "${aws_api_gateway_rest_api.haire_api.execution_arn}/*/*"
 }
 
+resource "aws_lambda_permission" "allow_api_gateway_job_requirements" {
+  statement_id  = "AllowExecutionFromAPIGateway"
+  action        = "lambda:InvokeFunction"
+  function_name = module.job_requirement_lambda.function_name
+  principal     = "apigateway.amazonaws.com"
+  source_arn    = "${aws_api_gateway_rest_api.haire_api.execution_arn}/*/*"
+}
+
 resource "aws_lambda_permission" "allow_api_gateway_resume_upload" {
   statement_id  = "AllowExecutionFromAPIGateway"
   action        = "lambda:InvokeFunction"
@@ -1482,6 +2309,147 @@ resource "aws_lambda_permission" "allow_api_gateway_resumes" {
   source_arn    = "${aws_api_gateway_rest_api.haire_api.execution_arn}/*/*"
 }
 
+# 排程合併全文搜尋索引的 delta（履歷管理 Lambda）
+resource "aws_cloudwatch_event_rule" "merge_search_index" {
+  name                = "${var.resource_prefix}-merge-search-index"
+  description         = "定期將履歷全文搜尋的 delta 合併為新快照"
+  schedule_expression = "rate(1 hour)"
+
+  tags = merge(local.common_tags, { Name = "merge-search-index" })
+}
+
+resource "aws_cloudwatch_event_target" "merge_search_index" {
+  rule  = aws_cloudwatch_event_rule.merge_search_index.name
+  arn   = module.resume_management_lambda.lambda_arn
+  input = jsonencode({ action = "merge_search_index" })
+}
+
+resource "aws_lambda_permission" "allow_events_merge_search_index" {
+  statement_id  = "AllowExecutionFromEventBridgeMergeSearchIndex"
+  action        = "lambda:InvokeFunction"
+  function_name = module.resume_management_lambda.function_name
+  principal     = "events.amazonaws.com"
+  source_arn    = aws_cloudwatch_event_rule.merge_search_index.arn
+}
+
+# 定期將職缺搜尋索引的 delta 合併為新快照（職缺管理 Lambda）
+resource "aws_cloudwatch_event_rule" "merge_job_search_index" {
+  name                = "${var.resource_prefix}-merge-job-search-index"
+  description         = "定期將職缺全文搜尋的 delta 合併為新快照"
+  schedule_expression = "rate(1 hour)"
+
+  tags = merge(local.common_tags, { Name = "merge-job-search-index" })
+}
+
+resource "aws_cloudwatch_event_target" "merge_job_search_index" {
+  rule  = aws_cloudwatch_event_rule.merge_job_search_index.name
+  arn   = module.job_management_lambda.lambda_arn
+  input = jsonencode({ action = "merge_job_search_index" })
+}
+
+resource "aws_lambda_permission" "allow_events_merge_job_search_index" {
+  statement_id  = "AllowExecutionFromEventBridgeMergeJobSearchIndex"
+  action        = "lambda:InvokeFunction"
+  function_name = module.job_management_lambda.function_name
+  principal     = "events.amazonaws.com"
+  source_arn    = aws_cloudwatch_event_rule.merge_job_search_index.arn
+}
+
+# 資料表備份 Lambda：由職缺表與團隊表的 DynamoDB Stream 觸發，寫入壓縮的 NDJSON 分段
+# 部署後對每張表手動呼叫一次 {"action": "seed", "table": "<資料表>"} 建立基準分段，還原需要時間點之前的 seed
+module "table_backup_lambda" {
+  source = "./modules/lambda_function"
+
+  function_name       = "${var.resource_prefix}-table-backup"
+  lambda_package_path = "${path.module}/lambdas/table_backup/table_backup.zip"
+  iam_role_arn        = aws_iam_role.lambda_exec_bedrock_role.arn
+  handler             = "lambda_function.lambda_handler"
+  runtime             = "python3.11"
+  timeout             = 300
+  
+  environment_variables = {
+    BACKUP_BUCKET         = aws_s3_bucket.raw_resume.bucket
+    BACKUP_PREFIX         = "backups/stream"
+    BACKUP_WINDOW_SECONDS = "300"
+  }
+  
+  common_tags = local.common_tags
+}
+
+# 每批最多等待一分鐘收集變更，一次寫成一個分段；失敗時對半切分重送，分段檔名由內容決定，重送不會重複
+resource "aws_lambda_event_source_mapping" "jobs_table_backup" {
+  event_source_arn                   = module.jobs_table.stream_arn
+  function_name                      = module.table_backup_lambda.lambda_arn
+  starting_position                  = "TRIM_HORIZON"
+  batch_size                         = 1000
+  maximum_batching_window_in_seconds = 60
+  bisect_batch_on_function_error     = true
+  maximum_retry_attempts             = 10
+}
+
+resource "aws_lambda_event_source_mapping" "teams_table_backup" {
+  event_source_arn                   = module.teams_table.stream_arn
+  function_name                      = module.table_backup_lambda.lambda_arn
+  starting_position                  = "TRIM_HORIZON"
+  batch_size                         = 1000
+  maximum_batching_window_in_seconds = 60
+  bisect_batch_on_function_error     = true
+  maximum_retry_attempts             = 10
+}
+
+# 配對通知：用人主管以 filter policy（message attribute recipient）訂閱
+resource "aws_sns_topic" "match_notifications" {
+  name = "${var.resource_prefix}-match-notifications"
+  
+  tags = merge(local.common_tags, { Name = "match-notifications" })
+}
+
+# 排程送出到期的配對通知摘要（配對 Lambda）
+resource "aws_cloudwatch_event_rule" "flush_match_notifications" {
+  name                = "${var.resource_prefix}-flush-match-notifications"
+  description         = "定期將累積的配對成功通知合併為摘要送出"
+  schedule_expression = "rate(5 minutes)"
+
+  tags = merge(local.common_tags, { Name = "flush-match-notifications" })
+}
+
+resource "aws_cloudwatch_event_target" "flush_match_notifications" {
+  rule  = aws_cloudwatch_event_rule.flush_match_notifications.name
+  arn   = module.resume_matcher_lambda.lambda_arn
+  input = jsonencode({ action = "flush_notifications" })
+}
+
+resource "aws_lambda_permission" "allow_events_flush_match_notifications" {
+  statement_id  = "AllowExecutionFromEventBridgeFlushMatchNotifications"
+  action        = "lambda:InvokeFunction"
+  function_name = module.resume_matcher_lambda.function_name
+  principal     = "events.amazonaws.com"
+  source_arn    = aws_cloudwatch_event_rule.flush_match_notifications.arn
+}
+
+# 排程執行因超過團隊每日 Bedrock 預算而延後的重新排序（配對 Lambda）
+resource "aws_cloudwatch_event_rule" "drain_deferred_work" {
+  name                = "${var.resource_prefix}-drain-deferred-work"
+  description         = "預算重置後執行延後的 LLM 重新排序"
+  schedule_expression = "rate(1 hour)"
+
+  tags = merge(local.common_tags, { Name = "drain-deferred-work" })
+}
+
+resource "aws_cloudwatch_event_target" "drain_deferred_work" {
+  rule  = aws_cloudwatch_event_rule.drain_deferred_work.name
+  arn   = module.resume_matcher_lambda.lambda_arn
+  input = jsonencode({ action = "drain_deferred" })
+}
+
+resource "aws_lambda_permission" "allow_events_drain_deferred_work" {
+  statement_id  = "AllowExecutionFromEventBridgeDrainDeferredWork"
+  action        = "lambda:InvokeFunction"
+  function_name = module.resume_matcher_lambda.function_name
+  principal     = "events.amazonaws.com"
+  source_arn    = aws_cloudwatch_event_rule.drain_deferred_work.arn
+}
+
 # 成本控制和監控
 resource "aws_cloudwatch_metric_alarm" "high_cost_alarm" {
   alarm_name          = "${var.resource_prefix}-high-cost-alarm"
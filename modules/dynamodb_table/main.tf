@@ -21,6 +21,16 @@ variable "global_secondary_indexes" {
   default = []
 }
 
+# 設定時啟用 TTL（屬性值為 epoch 秒）
+variable "ttl_attribute" {
+  default = null
+}
+
+# 設定時啟用 DynamoDB Stream（例如 NEW_IMAGE）
+variable "stream_view_type" {
+  default = null
+}
+
 resource "aws_dynamodb_table" "this" {
   name         = var.table_name
   billing_mode = "PAY_PER_REQUEST"
@@ -31,6 +41,9 @@ resource "aws_dynamodb_table" "this" {
   hash_key  = var.hash_key
   range_key = var.range_key != null ? var.range_key : null
 
+  stream_enabled   = var.stream_view_type != null
+  stream_view_type = var.stream_view_type
+
   dynamic "attribute" {
     for_each = var.attributes
     content {
@@ -50,6 +63,14 @@ resource "aws_dynamodb_table" "this" {
     }
   }
 
+  dynamic "ttl" {
+    for_each = var.ttl_attribute != null ? [var.ttl_attribute] : []
+    content {
+      attribute_name = ttl.value
+      enabled        = true
+    }
+  }
+
   # 防止意外重建資源
   lifecycle {
     prevent_destroy = true
@@ -72,4 +93,8 @@ output "table_arn" {
 
 output "table_name" {
   value = aws_dynamodb_table.this.name
+}
+
+output "stream_arn" {
+  value = aws_dynamodb_table.this.stream_arn
 }
\ No newline at end of file
@@ -27,6 +27,9 @@ const apiConfig = getApiConfig();
 const JOBS_API_BASE_URL = apiConfig.jobsUrl;
 const TEAMS_API_BASE_URL = apiConfig.teamsUrl;
 
+// 批次 API 每次請求的筆數上限（與 job_management 的 MAX_BATCH_ITEMS 相同）
+const JOBS_BATCH_SIZE = 200;
+
 console.log('🔗 職缺 API 配置:', { JOBS_API_BASE_URL, TEAMS_API_BASE_URL });
 
 /**
@@ -95,6 +98,26 @@ class JobsApiClient {
         return await this.request(url);
     }
 
+    /**
+     * 依 next_cursor 逐頁取得符合條件的所有職缺
+     * @param {Object} params - 查詢參數
+     * @returns {Promise<Array>} 職缺資料陣列
+     */
+    async getAllJobs(params = {}) {
+        const jobs = [];
+        let cursor = null;
+        do {
+            const query = { ...params, limit: 100 };
+            if (cursor) {
+                query.cursor = cursor;
+            }
+            const result = await this.getJobs(query);
+            jobs.push(...(result.data || []));
+            cursor = result.pagination ? result.pagination.next_cursor : null;
+        } while (cursor);
+        return jobs;
+    }
+
     /**
      * 取得單一職缺
      * @param {string} jobId - 職缺 ID
@@ -137,30 +160,23 @@ class JobsApiClient {
     }
 
     /**
-     * 取得職缺統計資料
+     * 取得職缺統計（GET /jobs/stats，伺服器端維護的聚合數字，一次讀取）
      * @returns {Promise<Object>} 統計資料
      */
     async getJobStats() {
         try {
-            // 取得所有狀態的職缺進行統計
-            const [activeJobs, pausedJobs, closedJobs] = await Promise.all([
-                this.getJobs({ status: 'active', limit: 1000 }),
-                this.getJobs({ status: 'paused', limit: 1000 }),
-                this.getJobs({ status: 'closed', limit: 1000 })
-            ]);
-
-            const totalViews = [
-                ...activeJobs.data,
-                ...pausedJobs.data,
-                ...closedJobs.data
-            ].reduce((sum, job) => sum + (job.view_count || 0), 0);
+            const { stats } = await this.request(`${this.baseUrl}/stats`);
+            const byStatus = stats.by_status || {};
 
             return {
-                totalJobs: activeJobs.pagination.total_items + pausedJobs.pagination.total_items + closedJobs.pagination.total_items,
-                activeJobs: activeJobs.pagination.total_items,
-                pausedJobs: pausedJobs.pagination.total_items,
-                closedJobs: closedJobs.pagination.total_items,
-                totalViews: totalViews
+                totalJobs: stats.total_jobs || 0,
+                activeJobs: byStatus.active || 0,
+                pausedJobs: byStatus.paused || 0,
+                closedJobs: byStatus.closed || 0,
+                totalViews: stats.total_views || 0,
+                totalApplications: stats.total_applications || 0,
+                byTeam: stats.by_team || {},
+                byEmploymentType: stats.by_employment_type || {}
             };
         } catch (error) {
             console.error('取得職缺統計失敗:', error);
@@ -169,28 +185,56 @@ class JobsApiClient {
                 activeJobs: 0,
                 pausedJobs: 0,
                 closedJobs: 0,
-                totalViews: 0
+                totalViews: 0,
+                totalApplications: 0,
+                byTeam: {},
+                byEmploymentType: {}
             };
         }
     }
 
     /**
-     * 批次操作職缺狀態
+     * 批次匯入職缺（POST /jobs:batch，每次最多 JOBS_BATCH_SIZE 筆，超過時分批送出）
+     * @param {Array} jobs - 職缺資料陣列
+     * @returns {Promise<Array>} 每筆的結果 { index, success, jobId, error }，順序與輸入相同
+     */
+    async importJobs(jobs) {
+        const results = [];
+        for (let start = 0; start < jobs.length; start += JOBS_BATCH_SIZE) {
+            const data = await this.request(`${this.baseUrl}:batch`, {
+                method: 'POST',
+                body: JSON.stringify({ jobs: jobs.slice(start, start + JOBS_BATCH_SIZE) }),
+            });
+            results.push(...data.results.map(result => ({
+                index: start + result.index,
+                success: result.success,
+                jobId: result.job_id || null,
+                error: result.error || null
+            })));
+        }
+        return results;
+    }
+
+    /**
+     * 批次操作職缺狀態（PATCH /jobs:batchStatus，一次請求更新多筆）
      * @param {Array} jobIds - 職缺 ID 陣列
      * @param {string} status - 新狀態
      * @returns {Promise<Array>} 批次操作結果
      */
     async batchUpdateJobStatus(jobIds, status) {
-        const promises = jobIds.map(jobId => 
-            this.updateJob(jobId, { status })
-        );
-
         try {
-            const results = await Promise.allSettled(promises);
-            return results.map((result, index) => ({
-                jobId: jobIds[index],
-                success: result.status === 'fulfilled',
-                error: result.status === 'rejected' ? result.reason.message : null
+            const outcomes = {};
+            for (let start = 0; start < jobIds.length; start += JOBS_BATCH_SIZE) {
+                const data = await this.request(`${this.baseUrl}:batchStatus`, {
+                    method: 'PATCH',
+                    body: JSON.stringify({ job_ids: jobIds.slice(start, start + JOBS_BATCH_SIZE), status }),
+                });
+                data.results.forEach(result => { outcomes[result.job_id] = result; });
+            }
+            return jobIds.map(jobId => ({
+                jobId,
+                success: Boolean(outcomes[jobId] && outcomes[jobId].success),
+                error: outcomes[jobId] ? (outcomes[jobId].error || null) : '沒有回傳結果'
             }));
         } catch (error) {
             console.error('批次更新職缺狀態失敗:', error);
@@ -288,8 +332,7 @@ class JobsApiClient {
                 return results.map(result => result.data);
             } else {
                 // 匯出所有職缺
-                const allJobs = await this.getJobs({ limit: 1000 });
-                return allJobs.data;
+                return await this.getAllJobs({ status: 'all' });
             }
         } catch (error) {
             console.error('匯出職缺資料失敗:', error);
@@ -5,6 +5,7 @@
 
 // 全域變數
 let currentPage = 1;
+let pageCursors = [null]; // 每一頁的起始 cursor，第 1 頁為 null
 let currentFilters = {};
 let currentEditingJobId = null;
 let availableTeams = [];
@@ -162,13 +163,21 @@ async function loadJobsList() {
     showLoading(true);
     
     try {
+        if (currentPage === 1) {
+            pageCursors = [null];
+        }
         const params = {
-            page: currentPage,
             limit: document.getElementById('limitFilter').value,
             ...currentFilters
         };
+        if (pageCursors[currentPage - 1]) {
+            params.cursor = pageCursors[currentPage - 1];
+        }
         
         const response = await jobsApi.getJobs(params);
+        if (response.pagination && response.pagination.next_cursor) {
+            pageCursors[currentPage] = response.pagination.next_cursor;
+        }
         displayJobsList(response.data, response.pagination);
         
     } catch (error) {
@@ -201,7 +210,7 @@ function displayJobsList(jobs, pagination) {
     }
     
     // 更新計數
-    jobCount.textContent = `(${pagination ? pagination.total_items : jobs.length})`;
+    jobCount.textContent = `(${jobs.length}${pagination && pagination.has_more ? '+' : ''})`;
     
     // 渲染職缺卡片
     jobsList.innerHTML = jobs.map(job => createJobCard(job)).join('');
@@ -318,47 +327,26 @@ function getStatusText(status) {
 function updatePagination(pagination) {
     const paginationContainer = document.getElementById('pagination');
     
-    if (!pagination || pagination.total_pages <= 1) {
+    if (!pagination || (currentPage === 1 && !pagination.has_more)) {
         paginationContainer.innerHTML = '';
         return;
     }
     
-    const { current_page, total_pages } = pagination;
     let paginationHTML = '<div class="pagination-controls">';
     
     // 上一頁
-    if (current_page > 1) {
-        paginationHTML += `<button class="btn btn-sm btn-outline-secondary" onclick="changePage(${current_page - 1})">
+    if (currentPage > 1) {
+        paginationHTML += `<button class="btn btn-sm btn-outline-secondary" onclick="changePage(${currentPage - 1})">
             <i class="fas fa-chevron-left"></i> 上一頁
         </button>`;
     }
     
-    // 頁碼
-    const startPage = Math.max(1, current_page - 2);
-    const endPage = Math.min(total_pages, current_page + 2);
-    
-    if (startPage > 1) {
-        paginationHTML += `<button class="btn btn-sm btn-outline-secondary" onclick="changePage(1)">1</button>`;
-        if (startPage > 2) {
-            paginationHTML += `<span class="pagination-ellipsis">...</span>`;
-        }
-    }
-    
-    for (let i = startPage; i <= endPage; i++) {
-        const isActive = i === current_page ? 'btn-primary' : 'btn-outline-secondary';
-        paginationHTML += `<button class="btn btn-sm ${isActive}" onclick="changePage(${i})">${i}</button>`;
-    }
-    
-    if (endPage < total_pages) {
-        if (endPage < total_pages - 1) {
-            paginationHTML += `<span class="pagination-ellipsis">...</span>`;
-        }
-        paginationHTML += `<button class="btn btn-sm btn-outline-secondary" onclick="changePage(${total_pages})">${total_pages}</button>`;
-    }
+    // 目前頁碼（cursor 分頁不提供總頁數）
+    paginationHTML += `<button class="btn btn-sm btn-primary" disabled>${currentPage}</button>`;
     
     // 下一頁
-    if (current_page < total_pages) {
-        paginationHTML += `<button class="btn btn-sm btn-outline-secondary" onclick="changePage(${current_page + 1})">
+    if (pagination.has_more) {
+        paginationHTML += `<button class="btn btn-sm btn-outline-secondary" onclick="changePage(${currentPage + 1})">
             下一頁 <i class="fas fa-chevron-right"></i>
         </button>`;
     }